@@ -6,7 +6,6 @@ from werkzeug.utils import secure_filename
 import os
 from api.database.models import (
     create_board_category,
-    get_all_board_categories,
     update_board_category,
     delete_board_category,
     create_board,
@@ -18,7 +17,9 @@ from api.database.models import (
     increment_board_view_count,
     create_board_file,
     get_board_files,
-    delete_board_file
+    delete_board_file,
+    BOARD_CATEGORIES_LOOKUP,
+    lookup_json_response
 )
 from api.uploads.cloudinary_upload import upload_to_cloudinary
 
@@ -30,14 +31,9 @@ board_bp = Blueprint('board', __name__, url_prefix='/api/board')
 
 @board_bp.route('/categories', methods=['GET'])
 def get_categories():
-    """모든 카테고리 조회"""
+    """모든 카테고리 조회 (ETag - 변경이 없으면 304)"""
     try:
-        categories = get_all_board_categories()
-        return jsonify({
-            'success': True,
-            'data': categories,
-            'count': len(categories)
-        })
+        return lookup_json_response(BOARD_CATEGORIES_LOOKUP)
     except Exception as e:
         print(f'❌ 카테고리 조회 오류: {e}')
         import traceback
@@ -4,7 +4,9 @@ C/S 접수 관리 API 라우트
 from flask import Blueprint, request, jsonify, Response
 from api.database.models import (
     get_db_connection,
-    USE_POSTGRESQL
+    USE_POSTGRESQL,
+    LookupCache,
+    lookup_json_response
 )
 from datetime import datetime, timezone, timedelta
 import csv
@@ -50,7 +52,9 @@ def create_cs_request(company_name: str, username: str, date: str, month: str, i
                 RETURNING id
             ''', (company_name, username, date, month, issue_type, content, management_number, customer_name, kst_now, kst_now))
             cs_id = cursor.fetchone()[0]
+            next_notify_at = refresh_cs_next_notify(cursor, cs_id)
             conn.commit()
+            _reschedule_cs_notification(cs_id, next_notify_at)
             print(f"✅ C/S 접수 생성 성공: ID {cs_id}, 화주사: {company_name}, 유형: {issue_type}")
             return cs_id
         except Exception as e:
@@ -68,7 +72,9 @@ def create_cs_request(company_name: str, username: str, date: str, month: str, i
                 VALUES (?, ?, ?, ?, ?, ?, ?, ?, '접수', ?, ?)
             ''', (company_name, username, date, month, issue_type, content, management_number, customer_name, kst_now, kst_now))
             cs_id = cursor.lastrowid
+            next_notify_at = refresh_cs_next_notify(cursor, cs_id)
             conn.commit()
+            _reschedule_cs_notification(cs_id, next_notify_at)
             print(f"✅ C/S 접수 생성 성공: ID {cs_id}, 화주사: {company_name}, 유형: {issue_type}")
             return cs_id
         except Exception as e:
@@ -210,7 +216,7 @@ def get_cs_requests(company_name: str = None, role: str = '화주사', month: st
                     'content': row['content'] or '',
                     'management_number': row['management_number'] or '',
                     'generated_management_number': row['generated_management_number'] or '',
-                    'customer_name': row.get('customer_name') or '',
+                    'customer_name': row['customer_name'] or '',
                     'status': row['status'] or '접수',
                     'admin_message': row['admin_message'] or '',
                     'processor': row['processor'] or '',
@@ -223,6 +229,274 @@ def get_cs_requests(company_name: str = None, role: str = '화주사', month: st
             conn.close()
 
 
+CS_PAGE_DEFAULT_LIMIT = 100
+CS_PAGE_MAX_LIMIT = 500
+# 스트리밍 내보내기: 서버 측 커서에서 한 번에 가져오는 행 수 / 응답으로 내보내는 CSV 묶음 행 수
+CS_EXPORT_FETCH_SIZE = 2000
+CS_EXPORT_FLUSH_ROWS = 500
+
+CS_LIST_COLUMNS = (
+    'id', 'company_name', 'username', 'date', 'month', 'issue_type', 'content',
+    'management_number', 'generated_management_number', 'customer_name', 'status',
+    'admin_message', 'processor', 'processed_at', 'created_at', 'updated_at',
+)
+
+CS_EXPORT_HEADER = ['날짜', '관리번호', '생성된 관리번호', '화주사명', '고객명', 'C/S 종류', 'C/S 내용', '처리여부', '처리자', '관리자 메시지', '접수일시']
+CS_EXPORT_COLUMNS = (
+    'date', 'management_number', 'generated_management_number', 'company_name', 'customer_name',
+    'issue_type', 'content', 'status', 'processor', 'admin_message', 'created_at',
+)
+
+CS_SEARCH_INDEX_READY = False
+
+
+def ensure_cs_search_indexes() -> None:
+    """C/S 내용·관리번호·고객명 부분 검색용 pg_trgm GIN 인덱스 (PostgreSQL, 확장 권한이 없으면 건너뜀)"""
+    global CS_SEARCH_INDEX_READY
+    if CS_SEARCH_INDEX_READY or not USE_POSTGRESQL:
+        return
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for column in ('content', 'management_number', 'generated_management_number', 'customer_name'):
+            cursor.execute(
+                f'''CREATE INDEX IF NOT EXISTS idx_cs_{column}_trgm
+                    ON customer_service USING GIN ({column} gin_trgm_ops)'''
+            )
+        conn.commit()
+    except Exception as e:
+        conn.rollback()
+        print(f'[경고] pg_trgm C/S 검색 인덱스 생성 실패 (일반 ILIKE 사용): {e}')
+    finally:
+        CS_SEARCH_INDEX_READY = True
+        cursor.close()
+        conn.close()
+
+
+def encode_cs_cursor(created_at, cs_id: int) -> str:
+    """keyset 커서 (created_at, id) → URL-safe 문자열"""
+    import base64
+    import json
+    raw = json.dumps([str(created_at), int(cs_id)], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cs_cursor(token: str):
+    """encode_cs_cursor 역변환. 형식이 잘못되면 ValueError."""
+    import base64
+    import json
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, cs_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        # PostgreSQL 은 timestamp 로 비교, SQLite 는 저장된 문자열 그대로 비교
+        if USE_POSTGRESQL:
+            created_at = datetime.fromisoformat(created_at)
+        return created_at, int(cs_id)
+    except Exception:
+        raise ValueError('잘못된 커서입니다.')
+
+
+def _parse_filter_date(value: str, label: str) -> str:
+    try:
+        return datetime.strptime(value, '%Y-%m-%d').strftime('%Y-%m-%d')
+    except ValueError:
+        raise ValueError(f'{label} 형식이 올바르지 않습니다. (YYYY-MM-DD)')
+
+
+def _cs_list_filters(company_name: str = None, role: str = '화주사', month: str = None,
+                     status: str = None, issue_type: str = None, date_from: str = None,
+                     date_to: str = None, q: str = None):
+    """
+    C/S 목록 필터 → (WHERE 절, 파라미터)
+
+    - 화주사 모드는 항상 자기 화주사만 (idx_cs_company), 관리자는 company 가 있을 때만
+    - status: 쉼표로 여러 처리여부 지정 가능 (예: '처리완료,처리불가')
+    - date_from/date_to: 접수일시(created_at) 범위, 양끝 포함 (YYYY-MM-DD)
+    - q: C/S 내용·관리번호·생성된 관리번호·고객명 부분 일치 (대소문자 무시)
+    """
+    sym = '%s' if USE_POSTGRESQL else '?'
+    where, params = [], []
+    if role != '관리자' or company_name:
+        where.append(f'company_name = {sym}')
+        params.append(company_name or '')
+    if month:
+        where.append(f'month = {sym}')
+        params.append(month)
+    statuses = [s.strip() for s in (status or '').split(',') if s.strip() and s.strip() != '전체']
+    if len(statuses) == 1:
+        where.append(f'status = {sym}')
+        params.append(statuses[0])
+    elif statuses:
+        where.append(f"status IN ({', '.join([sym] * len(statuses))})")
+        params.extend(statuses)
+    if issue_type and issue_type != '전체':
+        where.append(f'issue_type = {sym}')
+        params.append(issue_type)
+    if date_from:
+        where.append(f'created_at >= {sym}')
+        params.append(_parse_filter_date(date_from, '시작일'))
+    if date_to:
+        end = datetime.strptime(_parse_filter_date(date_to, '종료일'), '%Y-%m-%d') + timedelta(days=1)
+        where.append(f'created_at < {sym}')
+        params.append(end.strftime('%Y-%m-%d'))
+    if q and q.strip():
+        ensure_cs_search_indexes()
+        like = 'ILIKE' if USE_POSTGRESQL else 'LIKE'
+        pattern = f'%{q.strip()}%'
+        where.append('(' + ' OR '.join(
+            f'{column} {like} {sym}'
+            for column in ('content', 'management_number', 'generated_management_number', 'customer_name')
+        ) + ')')
+        params.extend([pattern] * 4)
+    return where, params
+
+
+def _cs_list_row(row) -> dict:
+    """목록 행 → dict (SQLite 는 get_cs_requests 와 같이 빈 값·일시를 문자열로 정리)"""
+    cs = dict(zip(CS_LIST_COLUMNS, tuple(row)))
+    if USE_POSTGRESQL:
+        return cs
+    for key in CS_LIST_COLUMNS:
+        if key == 'id':
+            continue
+        value = cs[key]
+        cs[key] = str(value) if value else ''
+    cs['status'] = cs['status'] or '접수'
+    return cs
+
+
+def get_cs_requests_page(company_name: str = None, role: str = '화주사', month: str = None,
+                         status: str = None, issue_type: str = None, date_from: str = None,
+                         date_to: str = None, q: str = None, cursor_token: str = None,
+                         limit: int = CS_PAGE_DEFAULT_LIMIT) -> dict:
+    """
+    C/S 접수 목록 페이지 조회 (keyset 페이지네이션)
+
+    - (created_at DESC, id DESC) keyset 커서로 다음 페이지 조회 (OFFSET 없음)
+    - 화주사/월/상태/종류/접수일 범위/검색어 필터는 모두 SQL WHERE 로 처리
+
+    Returns:
+        {'items': [...], 'next_cursor': str | None, 'has_more': bool}
+    """
+    try:
+        limit = int(limit or CS_PAGE_DEFAULT_LIMIT)
+    except (TypeError, ValueError):
+        limit = CS_PAGE_DEFAULT_LIMIT
+    limit = max(1, min(limit, CS_PAGE_MAX_LIMIT))
+
+    where, params = _cs_list_filters(company_name, role, month, status, issue_type, date_from, date_to, q)
+    sym = '%s' if USE_POSTGRESQL else '?'
+    if cursor_token:
+        after_created, after_id = decode_cs_cursor(cursor_token)
+        where.append(f'(created_at < {sym} OR (created_at = {sym} AND id < {sym}))')
+        params.extend([after_created, after_created, after_id])
+    params.append(limit + 1)
+    where_sql = f" WHERE {' AND '.join(where)}" if where else ''
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''
+            SELECT {', '.join(CS_LIST_COLUMNS)}
+            FROM customer_service{where_sql}
+            ORDER BY created_at DESC, id DESC
+            LIMIT {sym}
+        ''', params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    next_cursor = None
+    if has_more and rows:
+        last = tuple(rows[-1])
+        next_cursor = encode_cs_cursor(last[CS_LIST_COLUMNS.index('created_at')], last[0])
+    return {
+        'items': [_cs_list_row(row) for row in rows],
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+    }
+
+
+def get_cs_request_counts(company_name: str = None, role: str = '화주사', month: str = None,
+                          status: str = None, issue_type: str = None, date_from: str = None,
+                          date_to: str = None, q: str = None) -> list:
+    """
+    C/S 접수 건수 집계 (화주사·처리여부·종류별 GROUP BY)
+
+    목록은 페이지 단위로만 내려주므로 통계 박스는 전체 행 대신 이 집계를 사용한다.
+
+    Returns:
+        [{'company_name': str, 'status': str, 'issue_type': str, 'count': int}, ...]
+    """
+    where, params = _cs_list_filters(company_name, role, month, status, issue_type, date_from, date_to, q)
+    where_sql = f" WHERE {' AND '.join(where)}" if where else ''
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''
+            SELECT company_name, COALESCE(NULLIF(status, ''), '접수') AS status, issue_type, COUNT(*)
+            FROM customer_service{where_sql}
+            GROUP BY company_name, COALESCE(NULLIF(status, ''), '접수'), issue_type
+        ''', params)
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return [
+        {'company_name': row[0] or '', 'status': row[1], 'issue_type': row[2] or '', 'count': int(row[3])}
+        for row in (tuple(r) for r in rows)
+    ]
+
+
+def iter_cs_export_rows(company_name: str = None, role: str = '화주사', month: str = None,
+                        status: str = None, issue_type: str = None, date_from: str = None,
+                        date_to: str = None, q: str = None):
+    """
+    C/S 내보내기 행 스트림 (CS_EXPORT_COLUMNS 순서 튜플)
+
+    PostgreSQL 은 이름 있는 서버 측 커서(itersize)로, SQLite 는 fetchmany 로 나눠 읽어
+    전체 결과를 메모리에 올리지 않는다. 필터 검증은 첫 행을 꺼내기 전에 끝난다.
+    """
+    where, params = _cs_list_filters(company_name, role, month, status, issue_type, date_from, date_to, q)
+    where_sql = f" WHERE {' AND '.join(where)}" if where else ''
+    query = f'''
+        SELECT {', '.join(CS_EXPORT_COLUMNS)}
+        FROM customer_service{where_sql}
+        ORDER BY created_at DESC, id DESC
+    '''
+
+    def generate():
+        conn = get_db_connection()
+        try:
+            if USE_POSTGRESQL:
+                cursor = conn.cursor(name='cs_export')
+                cursor.itersize = CS_EXPORT_FETCH_SIZE
+            else:
+                cursor = conn.cursor()
+            try:
+                cursor.execute(query, params)
+                while True:
+                    rows = cursor.fetchmany(CS_EXPORT_FETCH_SIZE)
+                    if not rows:
+                        break
+                    for row in rows:
+                        yield tuple(row)
+            finally:
+                cursor.close()
+        finally:
+            if USE_POSTGRESQL:
+                conn.rollback()
+            conn.close()
+
+    return generate()
+
+
 def update_cs_status(cs_id: int, status: str, admin_message: str = None, processor: str = None) -> bool:
     """C/S 접수 상태 업데이트 (관리자용)"""
     conn = get_db_connection()
@@ -240,9 +514,7 @@ def update_cs_status(cs_id: int, status: str, admin_message: str = None, process
                     SET status = %s, admin_message = %s, processor = NULL, processed_at = NULL, updated_at = %s
                     WHERE id = %s
                 ''', (status, admin_message, updated_at, cs_id))
-                conn.commit()
-                return cursor.rowcount > 0
-            if status == '보류':
+            elif status == '보류':
                 # 확인 후 처리 예정: 반복 텔레그램 대상 제외(status≠접수) + 타이머 리셋
                 cursor.execute('''
                     UPDATE customer_service
@@ -250,9 +522,7 @@ def update_cs_status(cs_id: int, status: str, admin_message: str = None, process
                         last_notification_at = NULL, updated_at = %s
                     WHERE id = %s
                 ''', (status, admin_message, processor, updated_at, cs_id))
-                conn.commit()
-                return cursor.rowcount > 0
-            if admin_message and processor:
+            elif admin_message and processor:
                 cursor.execute('''
                     UPDATE customer_service
                     SET status = %s, admin_message = %s, processor = %s, processed_at = %s, updated_at = %s
@@ -276,8 +546,13 @@ def update_cs_status(cs_id: int, status: str, admin_message: str = None, process
                     SET status = %s, processed_at = %s, updated_at = %s
                     WHERE id = %s
                 ''', (status, processed_at, updated_at, cs_id))
+            updated = cursor.rowcount > 0
+            # '접수'로 되돌리면 다시 예약, 그 외 상태는 반복 알림 제외(next_notify_at = NULL)
+            next_notify_at = refresh_cs_next_notify(cursor, cs_id) if updated else None
             conn.commit()
-            return cursor.rowcount > 0
+            if updated:
+                _reschedule_cs_notification(cs_id, next_notify_at)
+            return updated
         except Exception as e:
             print(f"❌ C/S 상태 업데이트 오류: {e}")
             conn.rollback()
@@ -294,18 +569,14 @@ def update_cs_status(cs_id: int, status: str, admin_message: str = None, process
                     SET status = ?, admin_message = ?, processor = NULL, processed_at = NULL, updated_at = ?
                     WHERE id = ?
                 ''', (status, admin_message, updated_at, cs_id))
-                conn.commit()
-                return cursor.rowcount > 0
-            if status == '보류':
+            elif status == '보류':
                 cursor.execute('''
                     UPDATE customer_service
                     SET status = ?, admin_message = ?, processor = ?, processed_at = NULL,
                         last_notification_at = NULL, updated_at = ?
                     WHERE id = ?
                 ''', (status, admin_message, processor, updated_at, cs_id))
-                conn.commit()
-                return cursor.rowcount > 0
-            if admin_message and processor:
+            elif admin_message and processor:
                 cursor.execute('''
                     UPDATE customer_service
                     SET status = ?, admin_message = ?, processor = ?, processed_at = ?, updated_at = ?
@@ -329,8 +600,13 @@ def update_cs_status(cs_id: int, status: str, admin_message: str = None, process
                     SET status = ?, processed_at = ?, updated_at = ?
                     WHERE id = ?
                 ''', (status, processed_at, updated_at, cs_id))
+            updated = cursor.rowcount > 0
+            # '접수'로 되돌리면 다시 예약, 그 외 상태는 반복 알림 제외(next_notify_at = NULL)
+            next_notify_at = refresh_cs_next_notify(cursor, cs_id) if updated else None
             conn.commit()
-            return cursor.rowcount > 0
+            if updated:
+                _reschedule_cs_notification(cs_id, next_notify_at)
+            return updated
         except Exception as e:
             print(f"❌ C/S 상태 업데이트 오류: {e}")
             return False
@@ -347,6 +623,7 @@ def delete_cs_request(cs_id: int) -> bool:
         try:
             cursor.execute('DELETE FROM customer_service WHERE id = %s', (cs_id,))
             conn.commit()
+            _reschedule_cs_notification(cs_id, None)
             return cursor.rowcount > 0
         except Exception as e:
             print(f"❌ C/S 삭제 오류: {e}")
@@ -360,6 +637,7 @@ def delete_cs_request(cs_id: int) -> bool:
         try:
             cursor.execute('DELETE FROM customer_service WHERE id = ?', (cs_id,))
             conn.commit()
+            _reschedule_cs_notification(cs_id, None)
             return cursor.rowcount > 0
         except Exception as e:
             print(f"❌ C/S 삭제 오류: {e}")
@@ -490,8 +768,13 @@ def update_cs_request_issue_type(cs_id: int, issue_type: str) -> bool:
                 SET issue_type = %s, updated_at = %s
                 WHERE id = %s
             ''', (issue_type, updated_at, cs_id))
+            updated = cursor.rowcount > 0
+            # 취소건 ↔ 일반건 전환 시 알림 간격이 달라지므로 다시 계산
+            next_notify_at = refresh_cs_next_notify(cursor, cs_id) if updated else None
             conn.commit()
-            return cursor.rowcount > 0
+            if updated:
+                _reschedule_cs_notification(cs_id, next_notify_at)
+            return updated
         except Exception as e:
             print(f"❌ C/S 종류 업데이트 오류: {e}")
             conn.rollback()
@@ -507,8 +790,13 @@ def update_cs_request_issue_type(cs_id: int, issue_type: str) -> bool:
                 SET issue_type = ?, updated_at = ?
                 WHERE id = ?
             ''', (issue_type, updated_at, cs_id))
+            updated = cursor.rowcount > 0
+            # 취소건 ↔ 일반건 전환 시 알림 간격이 달라지므로 다시 계산
+            next_notify_at = refresh_cs_next_notify(cursor, cs_id) if updated else None
             conn.commit()
-            return cursor.rowcount > 0
+            if updated:
+                _reschedule_cs_notification(cs_id, next_notify_at)
+            return updated
         except Exception as e:
             print(f"❌ C/S 종류 업데이트 오류: {e}")
             return False
@@ -517,7 +805,7 @@ def update_cs_request_issue_type(cs_id: int, issue_type: str) -> bool:
 
 
 def update_cs_last_notification(cs_id: int, notification_time: datetime = None) -> bool:
-    """C/S 마지막 알림 시간 업데이트 (반복 알림용, Vercel 서버리스에서 DB에 저장)
+    """C/S 마지막 알림 시간 + 다음 알림 시각 업데이트 (반복 알림용, Vercel 서버리스에서 DB에 저장)
     PostgreSQL: DB의 NOW() 사용 (타임존 변환 문제 완전 회피)
     SQLite: Python datetime 전달
     """
@@ -537,7 +825,9 @@ def update_cs_last_notification(cs_id: int, notification_time: datetime = None)
             cursor.execute('''
                 UPDATE customer_service SET last_notification_at = ? WHERE id = ?
             ''', (ts, cs_id))
+        next_notify_at = refresh_cs_next_notify(cursor, cs_id)
         conn.commit()
+        _reschedule_cs_notification(cs_id, next_notify_at)
         return True
     except Exception as e:
         print(f"❌ C/S last_notification_at 업데이트 오류: {e}")
@@ -550,136 +840,188 @@ def update_cs_last_notification(cs_id: int, notification_time: datetime = None)
         conn.close()
 
 
-def get_pending_cs_requests() -> list:
-    """미처리 C/S 접수 목록 조회 (알림용)"""
+def _cs_db_utc(value: datetime):
+    """UTC datetime → next_notify_at 저장/비교 값 (naive UTC, SQLite 는 문자열 비교라 고정 형식)"""
+    if value is None:
+        return None
+    value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value if USE_POSTGRESQL else value.strftime('%Y-%m-%d %H:%M:%S')
+
+
+def refresh_cs_next_notify(cursor, cs_id: int):
+    """
+    C/S 한 건의 next_notify_at 을 현재 상태/종류/마지막 알림 시간으로 다시 계산해 저장 (호출한 트랜잭션 안에서)
+
+    Returns:
+        다음 알림 시각(UTC datetime), 반복 알림 대상이 아니면 None
+    """
+    from api.cs.scheduler import compute_next_notify_at
+    sym = '%s' if USE_POSTGRESQL else '?'
+    cursor.execute(f'''
+        SELECT issue_type, status, last_notification_at, created_at
+        FROM customer_service WHERE id = {sym}
+    ''', (cs_id,))
+    row = cursor.fetchone()
+    if not row:
+        return None
+    issue_type, status, last_notification_at, created_at = tuple(row)
+    next_notify_at = compute_next_notify_at(issue_type, status, last_notification_at, created_at)
+    cursor.execute(f'UPDATE customer_service SET next_notify_at = {sym} WHERE id = {sym}',
+                   (_cs_db_utc(next_notify_at), cs_id))
+    return next_notify_at
+
+
+def _reschedule_cs_notification(cs_id: int, next_notify_at) -> None:
+    """커밋 후 알림 스케줄러 힙에 반영 (스케줄러 스레드가 없는 프로세스에서는 무시)"""
+    try:
+        from api.cs.scheduler import reschedule_cs_notification
+        reschedule_cs_notification(cs_id, next_notify_at)
+    except Exception as e:
+        print(f"[경고] C/S 알림 예약 반영 실패: #{cs_id}, {e}")
+
+
+# next_notify_at 컬럼 추가 이전 '접수' 건 채움 여부 (프로세스당 한 번)
+CS_NEXT_NOTIFY_READY = False
+
+CS_NOTIFY_COLUMNS = (
+    'id', 'company_name', 'username', 'date', 'month', 'issue_type', 'content',
+    'management_number', 'generated_management_number', 'customer_name', 'status',
+    'created_at', 'last_notification_at', 'next_notify_at',
+)
+
+
+def ensure_cs_next_notify_at() -> None:
+    """next_notify_at 이 비어 있는 '접수' 건(컬럼 추가 전 데이터)을 채움"""
+    global CS_NEXT_NOTIFY_READY
+    if CS_NEXT_NOTIFY_READY:
+        return
     conn = get_db_connection()
-    
-    if USE_POSTGRESQL:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        try:
-            cursor.execute('''
-                SELECT * FROM customer_service
-                WHERE status = '접수'
-                ORDER BY created_at DESC
-            ''')
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
-        finally:
-            cursor.close()
-            conn.close()
-    else:
-        import sqlite3
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                SELECT id, company_name, username, date, month, issue_type, content, 
-                       management_number, generated_management_number, customer_name, status, 
-                       admin_message, processor, processed_at, created_at, updated_at, last_notification_at
-                FROM customer_service
-                WHERE status = '접수'
-                ORDER BY created_at DESC
-            ''')
-            rows = cursor.fetchall()
-            result = []
-            for row in rows:
-                result.append({
-                    'id': row['id'],
-                    'company_name': row['company_name'] or '',
-                    'username': row['username'] or '',
-                    'date': row['date'] or '',
-                    'month': row['month'] or '',
-                    'issue_type': row['issue_type'] or '',
-                    'content': row['content'] or '',
-                    'management_number': row['management_number'] or '',
-                    'generated_management_number': row['generated_management_number'] or '',
-                    'customer_name': row.get('customer_name') or '',
-                    'status': row['status'] or '접수',
-                    'admin_message': row['admin_message'] or '',
-                    'processor': row['processor'] or '',
-                    'processed_at': str(row['processed_at']) if row['processed_at'] else '',
-                    'created_at': str(row['created_at']) if row['created_at'] else '',
-                    'updated_at': str(row['updated_at']) if row['updated_at'] else '',
-                    'last_notification_at': str(row['last_notification_at']) if row.get('last_notification_at') else None
-                })
-            return result
-        finally:
-            conn.close()
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id FROM customer_service WHERE status = '접수' AND next_notify_at IS NULL")
+        cs_ids = [row[0] for row in cursor.fetchall()]
+        for cs_id in cs_ids:
+            refresh_cs_next_notify(cursor, cs_id)
+        conn.commit()
+        CS_NEXT_NOTIFY_READY = True
+        if cs_ids:
+            print(f"[정보] C/S next_notify_at 채움: {len(cs_ids)}건")
+    except Exception as e:
+        print(f"❌ C/S next_notify_at 채움 오류: {e}")
+        if USE_POSTGRESQL:
+            conn.rollback()
+    finally:
+        cursor.close()
+        conn.close()
 
 
-def get_pending_cs_requests_by_issue_type(issue_type: str = None) -> list:
-    """미처리 C/S 접수 목록 조회 (알림용) - 특정 유형 필터링"""
+def get_due_cs_requests(now_utc: datetime = None, notification_type: str = 'all', cs_ids=None) -> list:
+    """
+    알림 기한(next_notify_at)이 지난 '접수' C/S 조회 - idx_cs_next_notify(status, next_notify_at) 인덱스 한 번 조회
+
+    Args:
+        now_utc: 기준 시각 (기본 현재 UTC)
+        notification_type: 'all' | 'cancellation'(취소건만) | 'general'(취소건 제외)
+        cs_ids: 대상 ID 제한 (스케줄러 힙에서 꺼낸 ID)
+    """
+    ensure_cs_next_notify_at()
+    now_utc = now_utc or datetime.now(timezone.utc)
+    sym = '%s' if USE_POSTGRESQL else '?'
+    where = ["status = '접수'", f'next_notify_at <= {sym}']
+    params = [_cs_db_utc(now_utc)]
+    if notification_type == 'cancellation':
+        where.append("issue_type = '취소'")
+    elif notification_type == 'general':
+        where.append("issue_type <> '취소'")
+    if cs_ids is not None:
+        cs_ids = list(cs_ids)
+        if not cs_ids:
+            return []
+        where.append(f"id IN ({', '.join([sym] * len(cs_ids))})")
+        params.extend(cs_ids)
+
     conn = get_db_connection()
-    
-    if USE_POSTGRESQL:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        try:
-            if issue_type:
-                cursor.execute('''
-                    SELECT * FROM customer_service
-                    WHERE status = '접수' AND issue_type = %s
-                    ORDER BY created_at DESC
-                ''', (issue_type,))
-            else:
-                cursor.execute('''
-                    SELECT * FROM customer_service
-                    WHERE status = '접수'
-                    ORDER BY created_at DESC
-                ''')
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
-        finally:
-            cursor.close()
-            conn.close()
-    else:
-        import sqlite3
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        try:
-            if issue_type:
-                cursor.execute('''
-                    SELECT id, company_name, username, date, month, issue_type, content, 
-                           management_number, generated_management_number, customer_name, status, 
-                           admin_message, processor, processed_at, created_at, updated_at, last_notification_at
-                    FROM customer_service
-                    WHERE status = '접수' AND issue_type = ?
-                    ORDER BY created_at DESC
-                ''', (issue_type,))
-            else:
-                cursor.execute('''
-                    SELECT id, company_name, username, date, month, issue_type, content, 
-                           management_number, generated_management_number, customer_name, status, 
-                           admin_message, processor, processed_at, created_at, updated_at, last_notification_at
-                    FROM customer_service
-                    WHERE status = '접수'
-                    ORDER BY created_at DESC
-                ''')
-            rows = cursor.fetchall()
-            result = []
-            for row in rows:
-                result.append({
-                    'id': row['id'],
-                    'company_name': row['company_name'] or '',
-                    'username': row['username'] or '',
-                    'date': row['date'] or '',
-                    'month': row['month'] or '',
-                    'issue_type': row['issue_type'] or '',
-                    'content': row['content'] or '',
-                    'management_number': row['management_number'] or '',
-                    'generated_management_number': row['generated_management_number'] or '',
-                    'customer_name': row.get('customer_name') or '',
-                    'status': row['status'] or '접수',
-                    'admin_message': row['admin_message'] or '',
-                    'processor': row['processor'] or '',
-                    'processed_at': str(row['processed_at']) if row['processed_at'] else '',
-                    'created_at': str(row['created_at']) if row['created_at'] else '',
-                    'updated_at': str(row['updated_at']) if row['updated_at'] else '',
-                    'last_notification_at': str(row['last_notification_at']) if row.get('last_notification_at') else None
-                })
-            return result
-        finally:
-            conn.close()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''
+            SELECT {', '.join(CS_NOTIFY_COLUMNS)}
+            FROM customer_service
+            WHERE {' AND '.join(where)}
+            ORDER BY next_notify_at, id
+        ''', params)
+        result = []
+        for row in cursor.fetchall():
+            cs = dict(zip(CS_NOTIFY_COLUMNS, tuple(row)))
+            for key in ('company_name', 'username', 'issue_type', 'content', 'management_number',
+                        'generated_management_number', 'customer_name'):
+                cs[key] = cs[key] or ''
+            cs['status'] = cs['status'] or '접수'
+            result.append(cs)
+        return result
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def load_cs_notify_schedule(cs_ids=None) -> list:
+    """반복 알림 예약 목록 [(C/S ID, next_notify_at 원본 값)] - 스케줄러 힙 적재용"""
+    ensure_cs_next_notify_at()
+    sym = '%s' if USE_POSTGRESQL else '?'
+    sql = "SELECT id, next_notify_at FROM customer_service WHERE status = '접수' AND next_notify_at IS NOT NULL"
+    params = []
+    if cs_ids is not None:
+        cs_ids = list(cs_ids)
+        if not cs_ids:
+            return []
+        sql += f" AND id IN ({', '.join([sym] * len(cs_ids))})"
+        params = cs_ids
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(sql, params)
+        return [(row[0], row[1]) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
 
+def get_cs_queue_metrics() -> dict:
+    """
+    미처리 C/S 큐 지표 (부분 인덱스만 읽음)
+
+    Returns:
+        {depth, cancellation, by_issue_type{유형: 건수}, oldest_created_at, due_notifications}
+    """
+    sym = '%s' if USE_POSTGRESQL else '?'
+    now_value = _cs_db_utc(datetime.now(timezone.utc))
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT issue_type, COUNT(*), MIN(created_at)
+            FROM pending_cs
+            GROUP BY issue_type
+        ''')
+        by_type, oldest = {}, None
+        for issue_type, count, min_created in (tuple(r) for r in cursor.fetchall()):
+            by_type[issue_type or ''] = int(count)
+            if min_created is not None and (oldest is None or str(min_created) < str(oldest)):
+                oldest = min_created
+        cursor.execute(f"""
+            SELECT COUNT(*) FROM customer_service
+            WHERE status = '접수' AND next_notify_at <= {sym}
+        """, (now_value,))
+        due = int(cursor.fetchone()[0])
+        return {
+            'depth': sum(by_type.values()),
+            'cancellation': by_type.get('취소', 0),
+            'by_issue_type': by_type,
+            'oldest_created_at': str(oldest) if oldest is not None else None,
+            'due_notifications': due,
+        }
+    finally:
+        cursor.close()
+        conn.close()
 
 @cs_bp.route('/', methods=['POST'])
 def create_cs():
@@ -794,6 +1136,108 @@ def get_cs_list():
         }), 500
 
 
+def _cs_filter_args() -> dict:
+    """목록/내보내기 공통 필터 쿼리 파라미터"""
+    company_name = request.args.get('company', '').strip()
+    role = request.args.get('role', '화주사').strip()
+    return {
+        'company_name': company_name or None,
+        'role': role,
+        'month': request.args.get('month', '').strip() or None,
+        'status': request.args.get('status', '').strip() or None,
+        'issue_type': request.args.get('issue_type', '').strip() or None,
+        'date_from': request.args.get('date_from', '').strip() or None,
+        'date_to': request.args.get('date_to', '').strip() or None,
+        'q': request.args.get('q', '').strip() or None,
+    }
+
+
+@cs_bp.route('/page', methods=['GET'])
+def get_cs_list_page():
+    """
+    C/S 접수 목록 페이지 조회 (keyset 커서)
+
+    Query Parameters:
+        - company, role, month: / 와 동일
+        - status, issue_type: 처리여부 / C/S 종류 ('전체' 또는 생략 시 필터 없음, status 는 쉼표로 여러 개)
+        - date_from, date_to: 접수일 범위 (YYYY-MM-DD, 양끝 포함)
+        - q: C/S 내용·관리번호·생성된 관리번호·고객명 검색어
+        - cursor: 이전 응답의 next_cursor (없으면 첫 페이지)
+        - limit: 페이지 크기 (기본 100, 최대 500)
+    """
+    try:
+        try:
+            from app import ensure_db_ready
+            ensure_db_ready()
+        except Exception as db_error:
+            print(f"[경고] C/S 목록 조회 시 DB 초기화 확인 중 오류 (무시하고 계속): {db_error}")
+
+        page = get_cs_requests_page(
+            cursor_token=request.args.get('cursor', '').strip() or None,
+            limit=request.args.get('limit', CS_PAGE_DEFAULT_LIMIT, type=int),
+            **_cs_filter_args()
+        )
+
+        return jsonify({
+            'success': True,
+            'data': page['items'],
+            'count': len(page['items']),
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more']
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        print(f'❌ C/S 목록 페이지 조회 오류: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'data': [],
+            'count': 0,
+            'message': f'C/S 목록 조회 중 오류: {str(e)}'
+        }), 500
+
+
+@cs_bp.route('/stats', methods=['GET'])
+def get_cs_list_stats():
+    """
+    C/S 접수 건수 집계 (통계 박스용)
+
+    Query Parameters: /page 와 동일한 필터 (cursor, limit 제외)
+    """
+    try:
+        try:
+            from app import ensure_db_ready
+            ensure_db_ready()
+        except Exception as db_error:
+            print(f"[경고] C/S 통계 조회 시 DB 초기화 확인 중 오류 (무시하고 계속): {db_error}")
+
+        counts = get_cs_request_counts(**_cs_filter_args())
+        return jsonify({
+            'success': True,
+            'data': counts,
+            'total': sum(row['count'] for row in counts)
+        })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        print(f'❌ C/S 통계 조회 오류: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'data': [],
+            'message': f'C/S 통계 조회 중 오류: {str(e)}'
+        }), 500
+
+
 @cs_bp.route('/available-months', methods=['GET'])
 def get_available_months():
     """C/S 접수가 있는 월 목록 조회 (현재 월 자동 포함)"""
@@ -1319,73 +1763,71 @@ def check_notifications_general():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@cs_bp.route('/queue-metrics', methods=['GET'])
+def cs_queue_metrics():
+    """미처리 C/S 큐 지표 (모니터링용 - 접수 건수/유형별/가장 오래된 접수/알림 기한 도래)"""
+    try:
+        return jsonify({'success': True, 'data': get_cs_queue_metrics()})
+    except Exception as e:
+        print(f'❌ C/S 큐 지표 조회 오류: {e}')
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @cs_bp.route('/export', methods=['GET'])
 def export_cs():
-    """C/S 접수 엑셀 다운로드"""
+    """
+    C/S 접수 엑셀(CSV) 다운로드 - 스트리밍 응답
+
+    목록 페이지와 같은 필터(company, role, month, status, issue_type, date_from, date_to, q)를 받고,
+    서버 측 커서에서 읽은 행을 CS_EXPORT_FLUSH_ROWS 행씩 CSV 로 만들어 바로 내보낸다.
+    """
     try:
-        company_name = request.args.get('company', '').strip()
-        role = request.args.get('role', '화주사').strip()
-        month = request.args.get('month', '').strip()
-        
-        # 관리자 모드에서도 company_name이 제공되면 필터링
-        filter_company = company_name if company_name else (None if role == '관리자' else company_name)
-        
-        cs_list = get_cs_requests(
-            filter_company,
-            role,
-            month if month else None
-        )
-        
-        # 메모리 내 CSV 생성
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # 한글 헤더
-        writer.writerow(['날짜', '관리번호', '생성된 관리번호', '화주사명', '고객명', 'C/S 종류', 'C/S 내용', '처리여부', '처리자', '관리자 메시지', '접수일시'])
-        
-        for cs in cs_list:
-            date = cs.get('date', '')
-            management_number = cs.get('management_number', '') or ''
-            generated_management_number = cs.get('generated_management_number', '') or ''
-            company = cs.get('company_name', '')
-            customer_name = cs.get('customer_name', '') or ''
-            issue_type = cs.get('issue_type', '')
-            content = cs.get('content', '')
-            status = cs.get('status', '접수')
-            processor = cs.get('processor', '') or ''
-            admin_message = cs.get('admin_message', '') or ''
-            created_at = cs.get('created_at', '')
-            
-            writer.writerow([
-                date,
-                management_number,
-                generated_management_number,
-                company,
-                customer_name,
-                issue_type,
-                content,
-                status,
-                processor,
-                admin_message,
-                created_at
-            ])
-        
-        output.seek(0)
-        
+        filters = _cs_filter_args()
+        rows = iter_cs_export_rows(**filters)
+        month = filters['month']
+
+        def generate():
+            buffer = io.StringIO()
+            writer = csv.writer(buffer)
+            # 한글 헤더 (BOM 추가로 Excel에서 한글 깨짐 방지)
+            writer.writerow(CS_EXPORT_HEADER)
+            yield buffer.getvalue().encode('utf-8-sig')
+            buffer.seek(0)
+            buffer.truncate()
+
+            count = 0
+            try:
+                for row in rows:
+                    writer.writerow(['' if value is None else value for value in row])
+                    count += 1
+                    if count % CS_EXPORT_FLUSH_ROWS == 0:
+                        yield buffer.getvalue().encode('utf-8')
+                        buffer.seek(0)
+                        buffer.truncate()
+            except Exception as e:
+                # 응답 헤더가 이미 나갔으므로 로그만 남기고 중단
+                print(f'❌ C/S 엑셀 스트리밍 오류 ({count}행 전송 후): {e}')
+                raise
+            if buffer.tell():
+                yield buffer.getvalue().encode('utf-8')
+
         # 파일명 생성 (한글)
         filename = f"C/S접수내역_{month if month else '전체'}.csv"
         encoded_filename = quote(filename.encode('utf-8'))
-        
-        response = Response(
-            output.getvalue().encode('utf-8-sig'),  # BOM 추가로 Excel에서 한글 깨짐 방지
+
+        return Response(
+            generate(),
             mimetype='text/csv; charset=utf-8',
             headers={
                 'Content-Disposition': f'attachment; filename*=UTF-8\'\'{encoded_filename}'
             }
         )
-        
-        return response
-        
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
     except Exception as e:
         print(f'❌ C/S 엑셀 다운로드 오류: {e}')
         import traceback
@@ -1398,8 +1840,8 @@ def export_cs():
 
 # ========== C/S 종류 관리 API ==========
 
-def get_cs_issue_types() -> list:
-    """C/S 종류 목록 조회"""
+def _load_cs_issue_types() -> list:
+    """C/S 종류 목록 DB 조회 (CS_ISSUE_TYPES_LOOKUP 로더)"""
     conn = get_db_connection()
     
     if USE_POSTGRESQL:
@@ -1442,6 +1884,14 @@ def get_cs_issue_types() -> list:
             conn.close()
 
 
+CS_ISSUE_TYPES_LOOKUP = LookupCache('cs_issue_types', _load_cs_issue_types)
+
+
+def get_cs_issue_types() -> list:
+    """C/S 종류 목록 조회 (프로세스 캐시, 생성/수정/삭제 시 무효화)"""
+    return CS_ISSUE_TYPES_LOOKUP.get()
+
+
 def create_cs_issue_type(name: str, color: str = None, bg_color: str = None, display_order: int = None) -> int:
     """C/S 종류 생성"""
     conn = get_db_connection()
@@ -1477,6 +1927,7 @@ def create_cs_issue_type(name: str, color: str = None, bg_color: str = None, dis
                 RETURNING id
             ''', (name, color, bg_color, display_order, kst_now, kst_now))
             cs_type_id = cursor.fetchone()[0]
+            CS_ISSUE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
             print(f"✅ C/S 종류 생성 성공: ID {cs_type_id}, 이름: {name}")
             return cs_type_id
@@ -1495,6 +1946,7 @@ def create_cs_issue_type(name: str, color: str = None, bg_color: str = None, dis
                 VALUES (?, ?, ?, ?, ?, ?)
             ''', (name, color, bg_color, display_order, kst_now, kst_now))
             cs_type_id = cursor.lastrowid
+            CS_ISSUE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
             print(f"✅ C/S 종류 생성 성공: ID {cs_type_id}, 이름: {name}")
             return cs_type_id
@@ -1544,8 +1996,11 @@ def update_cs_issue_type(type_id: int, name: str = None, color: str = None, bg_c
         try:
             query = f'UPDATE cs_issue_types SET {", ".join(updates)} WHERE id = %s'
             cursor.execute(query, params)
+            changed = cursor.rowcount > 0
+            if changed:
+                CS_ISSUE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"❌ C/S 종류 업데이트 오류: {e}")
             conn.rollback()
@@ -1558,8 +2013,11 @@ def update_cs_issue_type(type_id: int, name: str = None, color: str = None, bg_c
         try:
             query = f'UPDATE cs_issue_types SET {", ".join(updates)} WHERE id = ?'
             cursor.execute(query, params)
+            changed = cursor.rowcount > 0
+            if changed:
+                CS_ISSUE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"❌ C/S 종류 업데이트 오류: {e}")
             return False
@@ -1575,8 +2033,11 @@ def delete_cs_issue_type(type_id: int) -> bool:
         cursor = conn.cursor()
         try:
             cursor.execute('DELETE FROM cs_issue_types WHERE id = %s', (type_id,))
+            changed = cursor.rowcount > 0
+            if changed:
+                CS_ISSUE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"❌ C/S 종류 삭제 오류: {e}")
             conn.rollback()
@@ -1588,8 +2049,11 @@ def delete_cs_issue_type(type_id: int) -> bool:
         cursor = conn.cursor()
         try:
             cursor.execute('DELETE FROM cs_issue_types WHERE id = ?', (type_id,))
+            changed = cursor.rowcount > 0
+            if changed:
+                CS_ISSUE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"❌ C/S 종류 삭제 오류: {e}")
             return False
@@ -1599,13 +2063,9 @@ def delete_cs_issue_type(type_id: int) -> bool:
 
 @cs_bp.route('/issue-types', methods=['GET'])
 def get_cs_issue_types_route():
-    """C/S 종류 목록 조회"""
+    """C/S 종류 목록 조회 (ETag - 변경이 없으면 304)"""
     try:
-        issue_types = get_cs_issue_types()
-        return jsonify({
-            'success': True,
-            'data': issue_types
-        })
+        return lookup_json_response(CS_ISSUE_TYPES_LOOKUP, with_count=False)
     except Exception as e:
         print(f'❌ C/S 종류 목록 조회 오류: {e}')
         import traceback
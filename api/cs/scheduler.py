@@ -1,19 +1,33 @@
 """
 C/S 알림 스케줄러
-- 일반 미처리 항목: 5분마다 알림
+- 일반 미처리 항목: 첫 알림은 접수 후 1분, 이후 5분마다 알림
 - 취소건: 1분마다 알림
-- Vercel 서버리스: last_notification_at을 DB에 저장 (메모리는 요청마다 초기화됨)
+- 다음 알림 시각은 next_notify_at 컬럼(UTC)에 저장하고, 기한이 지난 행만 인덱스로 조회
+- 백그라운드 스레드: (next_notify_at, C/S ID) 최소 힙을 두고 가장 이른 기한까지만 잠든다
+- Vercel 서버리스: cron(/api/cs/check-notifications)이 같은 조회로 기한 지난 행만 전송
+- 반복 알림은 텔레그램 디스패처 큐로 보내 같은 시각에 도래한 여러 건을 한 메시지로 합침
+- 워커가 여러 개면 리더로 선출된 프로세스 하나만 알림을 보냄 (api.database.leader)
 """
+import heapq
 import sys
 import threading
 import time
 from datetime import datetime, timezone, timedelta
+from typing import Iterable, List, Optional, Tuple
 from api.cs.routes_db import (
-    get_pending_cs_requests,
-    get_pending_cs_requests_by_issue_type,
+    get_due_cs_requests,
+    load_cs_notify_schedule,
     update_cs_last_notification,
 )
-from api.notifications.telegram import send_telegram_notification
+from api.notifications.telegram import queue_telegram_notification
+from api.database.leader import get_leader_election
+
+# 반복 알림 간격 (초)
+CS_CANCELLATION_INTERVAL_SECONDS = 60
+CS_GENERAL_INTERVAL_SECONDS = 300
+CS_GENERAL_FIRST_DELAY_SECONDS = 60
+# 다른 프로세스(cron 등)의 변경을 반영하기 위해 힙을 DB 에서 다시 읽는 주기
+CS_SCHEDULER_RESYNC_SECONDS = 300
 
 
 def parse_datetime_for_compare(value) -> datetime:
@@ -119,17 +133,149 @@ def convert_to_kst(value) -> str:
         value_str = str(value)
         return value_str.split('.')[0] if '.' in value_str else value_str
 
-def send_cs_notifications(notification_type='all'):
-    """C/S 알림 전송 (스케줄러에서 호출)
+def compute_next_notify_at(issue_type, status, last_notification_at, created_at,
+                           now: Optional[datetime] = None) -> Optional[datetime]:
+    """
+    다음 반복 알림 시각(UTC) 계산 - C/S 등록/상태 변경/종류 변경/알림 전송 시 모두 이 규칙으로 next_notify_at 저장
+
+    - '접수'가 아니면 None (보류·처리완료·처리불가는 반복 알림 제외)
+    - 취소건: 마지막 알림 + 1분, 알림 이력이 없으면 즉시
+    - 일반건: 마지막 알림 + 5분, 알림 이력이 없으면 접수 + 1분
+    - last_notification_at 은 UTC, created_at 은 KST 로 해석 (기존 비교 규칙과 동일)
+    """
+    if (status or '접수') != '접수':
+        return None
+    utc = timezone.utc
+    now = now or datetime.now(utc)
+    last_time = parse_datetime_for_compare_utc(last_notification_at)
+    created = parse_datetime_for_compare(created_at)
+    if (issue_type or '') == '취소':
+        if last_time:
+            return last_time + timedelta(seconds=CS_CANCELLATION_INTERVAL_SECONDS)
+        return created.astimezone(utc) if created else now
+    if last_time:
+        return last_time + timedelta(seconds=CS_GENERAL_INTERVAL_SECONDS)
+    if created:
+        return created.astimezone(utc) + timedelta(seconds=CS_GENERAL_FIRST_DELAY_SECONDS)
+    # 접수일 파싱 실패 시 바로 알림 (안전장치)
+    return now
+
+
+class CsNotificationHeap:
+    """
+    (다음 알림 시각, C/S ID) 최소 힙
+
+    C/S 별 현재 예약 시각은 _due 에 두고, 예약이 바뀌면 새 항목을 넣기만 한다(이전 항목은 꺼낼 때 버림).
+    더 이른 예약이 들어오면 대기 중인 스케줄러 스레드를 깨운다.
+    """
+
+    def __init__(self):
+        self._heap: List[Tuple[float, int]] = []
+        self._due = {}
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        with self._cond:
+            return len(self._due)
+
+    def load(self, entries: Iterable[Tuple[int, datetime]]) -> None:
+        """전체 예약을 DB 값으로 교체"""
+        with self._cond:
+            self._due = {cs_id: due_at.timestamp() for cs_id, due_at in entries}
+            self._heap = [(ts, cs_id) for cs_id, ts in self._due.items()]
+            heapq.heapify(self._heap)
+            self._cond.notify_all()
+
+    def schedule(self, cs_id: int, due_at: Optional[datetime]) -> None:
+        """예약 추가/변경 (due_at 이 None 이면 예약 취소)"""
+        with self._cond:
+            if due_at is None:
+                self._due.pop(cs_id, None)
+                return
+            ts = due_at.timestamp()
+            if self._due.get(cs_id) == ts:
+                return
+            self._due[cs_id] = ts
+            heapq.heappush(self._heap, (ts, cs_id))
+            if self._heap[0] == (ts, cs_id):
+                self._cond.notify_all()
+
+    def sync(self, cs_ids: Iterable[int], entries: Iterable[Tuple[int, datetime]]) -> None:
+        """일부 C/S 예약을 DB 값으로 맞춤 (entries 에 없는 ID 는 예약 취소)"""
+        found = dict(entries)
+        for cs_id in cs_ids:
+            self.schedule(cs_id, found.get(cs_id))
+
+    def _peek(self) -> Optional[float]:
+        while self._heap:
+            ts, cs_id = self._heap[0]
+            if self._due.get(cs_id) == ts:
+                return ts
+            heapq.heappop(self._heap)
+        return None
+
+    def next_due_at(self) -> Optional[float]:
+        with self._cond:
+            return self._peek()
+
+    def pop_due(self, now_ts: float) -> List[int]:
+        """기한이 지난 C/S ID 를 꺼냄 (꺼낸 ID 는 알림 후 다시 예약됨)"""
+        due_ids = []
+        with self._cond:
+            while True:
+                ts = self._peek()
+                if ts is None or ts > now_ts:
+                    break
+                _, cs_id = heapq.heappop(self._heap)
+                self._due.pop(cs_id, None)
+                due_ids.append(cs_id)
+        return due_ids
+
+    def wait(self, max_seconds: float) -> None:
+        """가장 이른 예약 시각까지(최대 max_seconds) 대기, 더 이른 예약이 들어오면 즉시 깨어남"""
+        with self._cond:
+            ts = self._peek()
+            timeout = max_seconds
+            if ts is not None:
+                timeout = min(timeout, max(0.0, ts - time.time()))
+            if timeout > 0:
+                self._cond.wait(timeout)
+
+
+# 스케줄러 스레드가 시작된 프로세스에서만 생성 (서버리스에서는 None → cron 경로만 사용)
+_NOTIFY_HEAP: Optional[CsNotificationHeap] = None
+
+
+def reschedule_cs_notification(cs_id: int, next_notify_at: Optional[datetime]) -> None:
+    """C/S 등록/상태 변경/알림 후 다음 알림 시각을 스케줄러 힙에 반영 (스케줄러가 없으면 무시)"""
+    heap = _NOTIFY_HEAP
+    if heap is not None:
+        heap.schedule(cs_id, next_notify_at)
+
+
+def _load_heap_entries(cs_ids=None) -> List[Tuple[int, datetime]]:
+    entries = []
+    for cs_id, raw in load_cs_notify_schedule(cs_ids):
+        due_at = parse_datetime_for_compare_utc(raw)
+        if due_at is not None:
+            entries.append((cs_id, due_at))
+    return entries
+
+
+def send_cs_notifications(notification_type='all', cs_ids=None):
+    """C/S 알림 전송 (스케줄러/cron 에서 호출) - next_notify_at 기한이 지난 '접수' 건만 전송
     Args:
         notification_type: 'all' | 'cancellation' | 'general'
             - all: 취소건 + 일반건 모두
             - cancellation: 취소건만 (1분용 cron)
             - general: 일반건만 (5분용 cron)
+        cs_ids: 대상 C/S ID 목록 (스케줄러 힙에서 꺼낸 ID, None 이면 기한 지난 전체)
     Returns:
-        dict: {cancellation_count, general_count, cancellation_sent, general_sent, log_lines}
+        dict: {cancellation_count, general_count, cancellation_sent, general_sent, notified_ids, log_lines}
+            (count 는 기한이 지난 건수, sent 는 전송 큐 접수 건수 - 서버리스는 실제 전송 건수)
     """
-    stats = {'cancellation_count': 0, 'general_count': 0, 'cancellation_sent': 0, 'general_sent': 0, 'log_lines': []}
+    stats = {'cancellation_count': 0, 'general_count': 0, 'cancellation_sent': 0, 'general_sent': 0,
+             'notified_ids': [], 'log_lines': []}
     
     def _log(msg):
         stats['log_lines'].append(msg)
@@ -144,45 +290,21 @@ def send_cs_notifications(notification_type='all'):
         current_time_kst = current_time_utc.astimezone(kst)
         _log(f"[스케줄러] 실행 시작: {current_time_kst.strftime('%Y-%m-%d %H:%M:%S')} KST (type={notification_type})")
         
-        run_cancellation = notification_type in ('all', 'cancellation')
-        run_general = notification_type in ('all', 'general')
+        due_requests = get_due_cs_requests(current_time_utc, notification_type, cs_ids)
+        cancellation_requests = [cs for cs in due_requests if cs.get('issue_type') == '취소']
+        non_cancellation_requests = [cs for cs in due_requests if cs.get('issue_type') != '취소']
+        stats['cancellation_count'] = len(cancellation_requests)
+        stats['general_count'] = len(non_cancellation_requests)
+        _log(f"[스케줄러] 알림 기한 도래: 취소건 {len(cancellation_requests)}건, 일반건 {len(non_cancellation_requests)}건")
         
         # 취소건: 1분마다 알림
-        if run_cancellation:
-            cancellation_requests = get_pending_cs_requests_by_issue_type('취소')
-            stats['cancellation_count'] = len(cancellation_requests)
-            _log(f"[스케줄러] 취소건 조회: {len(cancellation_requests)}건")
-        else:
-            cancellation_requests = []
-            stats['cancellation_count'] = 0
-        
         for cs in cancellation_requests:
             cs_id = cs.get('id')
-            if not cs_id:
-                continue
-            
-            # 상태 확인 (텔레그램 반복 알림은 '접수'만 대상 — 보류·처리완료·처리불가 제외)
-            status = cs.get('status', '접수')
-            if status not in ['접수']:
-                continue
-                
-            # 마지막 알림 시간 확인 (1분 이내면 스킵) - UTC로 비교
-            raw_last = cs.get('last_notification_at')
-            last_time = parse_datetime_for_compare_utc(raw_last)
-            if last_time:
-                time_diff = (current_time_utc - last_time).total_seconds()
-                _log(f"[스케줄러] 취소 C/S #{cs_id}: last={raw_last} → 경과={time_diff:.0f}초")
-                if time_diff < 60:  # 1분 미만이면 스킵
-                    _log(f"[스케줄러] 취소 C/S #{cs_id}: 1분 미만 스킵")
-                    continue
-            
-            # 알림 전송
             company_name = cs.get('company_name', '알 수 없음')
             issue_type = cs.get('issue_type', '취소')
             content = cs.get('content', '')
             content_preview = content[:100] + ('...' if len(content) > 100 else '')
             
-            cs_id = cs.get('id', '')
             management_number = cs.get('management_number', '') or cs.get('generated_management_number', '')
             created_at_kst = convert_to_kst(cs.get('created_at', ''))
             message = f"🚨 <b>미처리 취소건 알림 (1분)</b>\n\n"
@@ -195,105 +317,25 @@ def send_cs_notifications(notification_type='all'):
             message += f"접수일: {created_at_kst}"
             
             _log(f"[스케줄러] 취소건 알림 전송: C/S #{cs_id}")
-            if send_telegram_notification(message):
+            if queue_telegram_notification(message):
                 stats['cancellation_sent'] += 1
             
-            # 마지막 알림 시간 DB 업데이트 (Vercel 서버리스에서 다음 호출 시 유지)
+            # 마지막 알림 시간 + 다음 알림 시각 DB 업데이트 (Vercel 서버리스에서 다음 호출 시 유지)
             # None 전달 시 PostgreSQL은 NOW(), SQLite는 Python UTC 사용 → 타임존 일관성
-            update_cs_last_notification(cs.get('id'), None)
+            update_cs_last_notification(cs_id, None)
+            stats['notified_ids'].append(cs_id)
         
-        # 일반 미처리 항목: 5분마다 알림 (취소건 제외)
-        if run_general:
-            all_pending = get_pending_cs_requests()
-            non_cancellation_requests = [cs for cs in all_pending if cs.get('issue_type') != '취소' and cs.get('status') == '접수']
-            stats['general_count'] = len(non_cancellation_requests)
-            _log(f"[스케줄러] 일반 미처리 항목 조회: {len(non_cancellation_requests)}건")
-            if len(non_cancellation_requests) > 0:
-                _log(f"   - C/S ID 목록: {[cs.get('id') for cs in non_cancellation_requests]}")
-        else:
-            non_cancellation_requests = []
-            stats['general_count'] = 0
+        # 일반 미처리 항목: 접수 후 1분, 이후 5분마다 알림 (취소건 제외)
+        if non_cancellation_requests:
+            _log(f"   - C/S ID 목록: {[cs.get('id') for cs in non_cancellation_requests]}")
         
         for cs in non_cancellation_requests:
             cs_id = cs.get('id')
-            if not cs_id:
-                continue
-            
-            # 상태 확인 ('접수'만 반복 알림 — 보류 등은 제외)
-            status = cs.get('status', '접수')
-            if status not in ['접수']:
-                continue
-                
-            # 마지막 알림 시간 확인 (5분 이내면 스킵) - UTC로 비교
-            last_time = parse_datetime_for_compare_utc(cs.get('last_notification_at'))
-            
-            should_send = False
-            
-            if last_time:
-                # 이전에 알림을 보낸 적이 있으면, 5분 이상 지났는지 확인
-                time_diff = (current_time_utc - last_time).total_seconds()
-                _log(f"[스케줄러] C/S #{cs_id}: 마지막 알림 경과 {time_diff/60:.1f}분")
-                if time_diff >= 300:  # 5분 이상 지났으면 알림 전송
-                    should_send = True
-                    _log(f"[스케줄러] C/S #{cs_id}: 5분 이상 경과, 알림 전송")
-                else:
-                    _log(f"[스케줄러] C/S #{cs_id}: 5분 미만 스킵")
-            else:
-                # 첫 알림인 경우, 접수일로부터 1분 이상 지났는지 확인 (5분에서 1분으로 완화)
-                created_at_str = cs.get('created_at', '')
-                _log(f"[스케줄러] C/S #{cs_id}: 첫 알림 체크, 접수일: {created_at_str}")
-                
-                if created_at_str:
-                    try:
-                        # created_at을 datetime으로 파싱 (KST로 가정)
-                        created_at = None
-                        formats = [
-                            '%Y-%m-%d %H:%M:%S',
-                            '%Y-%m-%d %H:%M:%S.%f',
-                            '%Y-%m-%dT%H:%M:%S',
-                            '%Y-%m-%dT%H:%M:%S.%f',
-                        ]
-                        for fmt in formats:
-                            try:
-                                created_at = datetime.strptime(created_at_str.split('.')[0] if '.' in created_at_str else created_at_str, fmt)
-                                # KST로 가정
-                                created_at = created_at.replace(tzinfo=kst)
-                                break
-                            except ValueError:
-                                continue
-                        
-                        if created_at:
-                            # 접수일로부터 1분 이상 지났는지 확인 (5분에서 1분으로 완화)
-                            created_at_utc = created_at.astimezone(utc) if created_at.tzinfo else created_at.replace(tzinfo=utc)
-                            time_since_creation = (current_time_utc - created_at_utc).total_seconds()
-                            if time_since_creation >= 60:  # 1분 이상 지났으면 알림 전송
-                                should_send = True
-                                _log(f"[스케줄러] C/S #{cs_id}: 1분 이상 경과, 알림 전송")
-                            else:
-                                _log(f"[스케줄러] C/S #{cs_id}: 1분 미만 스킵")
-                        else:
-                            # 파싱 실패 시에도 알림 전송 (안전장치)
-                            should_send = True
-                            _log(f"[경고] C/S #{cs_id}: 접수일 파싱 실패, 알림 전송")
-                    except Exception as e:
-                        _log(f"[경고] C/S #{cs_id}: 접수일 파싱 오류: {e}")
-                        # 오류 발생 시에도 알림 전송 (안전장치)
-                        should_send = True
-                else:
-                    # created_at이 없으면 알림 전송 (안전장치)
-                    should_send = True
-                    _log(f"[경고] C/S #{cs_id}: 접수일 없음, 알림 전송")
-            
-            if not should_send:
-                continue
-            
-            # 알림 전송
             company_name = cs.get('company_name', '알 수 없음')
             issue_type = cs.get('issue_type', '알 수 없음')
             content = cs.get('content', '')
             content_preview = content[:100] + ('...' if len(content) > 100 else '')
             
-            cs_id = cs.get('id', '')
             management_number = cs.get('management_number', '') or cs.get('generated_management_number', '')
             created_at_kst = convert_to_kst(cs.get('created_at', ''))
             message = f"🚨 <b>미처리 C/S 알림 (5분)</b>\n\n"
@@ -306,11 +348,12 @@ def send_cs_notifications(notification_type='all'):
             message += f"접수일: {created_at_kst}"
             
             _log(f"[스케줄러] 일반 알림 전송: C/S #{cs_id}")
-            if send_telegram_notification(message):
+            if queue_telegram_notification(message):
                 stats['general_sent'] += 1
             
-            # 마지막 알림 시간 DB 업데이트 (PostgreSQL: NOW(), SQLite: Python UTC)
-            update_cs_last_notification(cs.get('id'), None)
+            # 마지막 알림 시간 + 다음 알림 시각 DB 업데이트 (PostgreSQL: NOW(), SQLite: Python UTC)
+            update_cs_last_notification(cs_id, None)
+            stats['notified_ids'].append(cs_id)
             _log(f"[스케줄러] C/S #{cs_id}: DB 저장 완료")
         
         return stats
@@ -325,6 +368,7 @@ def send_cs_notifications(notification_type='all'):
 
 def start_cs_notification_scheduler():
     """C/S 알림 스케줄러 시작 (백그라운드 스레드)"""
+    global _NOTIFY_HEAP
     import os
     is_vercel = os.environ.get('VERCEL') == '1'
     
@@ -332,24 +376,47 @@ def start_cs_notification_scheduler():
         print("[경고] [스케줄러] Vercel 환경 감지 - 백그라운드 스레드는 제한적일 수 있습니다.")
         print("   Vercel Cron Jobs를 사용하는 것을 권장합니다: /api/cs/check-notifications")
     
+    if _NOTIFY_HEAP is not None:
+        print("[정보] [스케줄러] 이미 실행 중입니다.")
+        return
+    heap = CsNotificationHeap()
+    _NOTIFY_HEAP = heap
+    
+    election = get_leader_election('cs_notifications')
+    
     def scheduler_loop():
         print("[정보] [스케줄러] 루프 시작 (백그라운드 스레드)")
-        loop_count = 0
+        synced_at = None
         while True:
+            # 리더가 아니면 대기 (리더가 되면 DB 에서 힙을 새로 적재)
+            if not election.is_leader:
+                synced_at = None
+                election.wait_until_leader(CS_SCHEDULER_RESYNC_SECONDS)
+                continue
             try:
-                loop_count += 1
-                if loop_count % 5 == 0:  # 5분마다 한 번씩 로그 출력
-                    print(f"[정보] [스케줄러] 루프 실행 중... (실행 횟수: {loop_count})")
-                elif loop_count == 1:
-                    print(f"[정보] [스케줄러] 첫 실행: {loop_count}")
-                send_cs_notifications()
+                # 시작 시 한 번 적재, 이후 주기적으로 DB 와 맞춤 (다른 프로세스·cron 이 보낸 알림 반영)
+                if synced_at is None or time.monotonic() - synced_at >= CS_SCHEDULER_RESYNC_SECONDS:
+                    heap.load(_load_heap_entries())
+                    synced_at = time.monotonic()
+                    print(f"[정보] [스케줄러] 알림 예약 적재: {len(heap)}건")
+                
+                due_ids = heap.pop_due(time.time())
+                if due_ids:
+                    stats = send_cs_notifications(cs_ids=due_ids)
+                    # 알림을 보내지 않은 ID(이미 다른 곳에서 전송·처리됨)는 DB 값으로 다시 예약
+                    notified = set(stats.get('notified_ids') or [])
+                    skipped = [cs_id for cs_id in due_ids if cs_id not in notified]
+                    if skipped:
+                        heap.sync(skipped, _load_heap_entries(skipped))
             except Exception as e:
                 print(f"[오류] [스케줄러] 루프 오류: {e}")
                 import traceback
                 traceback.print_exc()
+                time.sleep(5)
             
-            # 1분마다 실행 (취소건 체크)
-            time.sleep(60)
+            # 다음 기한(또는 재동기화 시각)까지 대기
+            resync_in = CS_SCHEDULER_RESYNC_SECONDS - (time.monotonic() - (synced_at or 0))
+            heap.wait(max(0.0, resync_in))
     
     try:
         scheduler_thread = threading.Thread(target=scheduler_loop, daemon=True)
@@ -368,4 +435,3 @@ def start_cs_notification_scheduler():
         print(f"[오류] [스케줄러] 스레드 시작 오류: {e}")
         import traceback
         traceback.print_exc()
-
@@ -0,0 +1,217 @@
+"""
+백그라운드 스케줄러 리더 선출
+
+gunicorn 워커가 여러 개여도 스케줄러(C/S 알림, 스케쥴 알림)마다 한 프로세스만 실제로 실행하도록 한다.
+PostgreSQL·SQLite 모두 scheduler_leases 임대(lease) 행 + heartbeat 를 쓴다.
+- heartbeat 마다 임대 행을 조건부 갱신(비어 있음·내 것·만료만 가져감)하고, 행의 holder 로 리더 여부를 판단한다.
+- 리더가 임대 기간 안에 갱신하지 못하면(프로세스 중단 등) 만료되어 다른 프로세스가 가져간다.
+- 세션 advisory lock 은 쓰지 않는다: 배포 DATABASE_URL 은 PgBouncer(트랜잭션 모드) 풀러라서
+  세션 잠금이 풀의 백엔드 연결에 남아 다른 워커가 재진입으로 다시 잡거나, 죽은 리더의 잠금이 풀리지 않는다.
+- 만료 판단은 DB 시계로 한다 (PostgreSQL: now(), SQLite: 같은 호스트의 시계).
+
+스케줄러 루프는 매 실행 전에 wait_until_leader() 로 리더일 때만 진행한다.
+"""
+import atexit
+import os
+import socket
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, Optional
+
+from api.database.models import get_db_connection, USE_POSTGRESQL
+
+LEADER_LEASE_SECONDS = int(os.environ.get('LEADER_LEASE_SECONDS', '30'))
+LEADER_HEARTBEAT_SECONDS = int(os.environ.get('LEADER_HEARTBEAT_SECONDS', '10'))
+
+# 프로세스 식별자 (호스트:PID:임의값)
+PROCESS_ID = f'{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}'
+
+LEASE_TABLE_READY = False
+
+_ELECTIONS: Dict[str, 'LeaderElection'] = {}
+_ELECTIONS_LOCK = threading.Lock()
+
+
+def _ensure_lease_table(cursor) -> None:
+    """scheduler_leases 생성 (호출자가 커밋한 뒤 LEASE_TABLE_READY 를 켠다)"""
+    if LEASE_TABLE_READY:
+        return
+    # 시각은 epoch 초 (PostgreSQL REAL 은 단정밀도라 DOUBLE PRECISION)
+    seconds_type = 'DOUBLE PRECISION' if USE_POSTGRESQL else 'REAL'
+    cursor.execute(f'''
+        CREATE TABLE IF NOT EXISTS scheduler_leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            acquired_at {seconds_type} NOT NULL,
+            heartbeat_at {seconds_type} NOT NULL,
+            expires_at {seconds_type} NOT NULL
+        )
+    ''')
+
+
+def _iso(ts: Optional[float]) -> Optional[str]:
+    if not ts:
+        return None
+    return datetime.fromtimestamp(ts, timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+
+class LeaderElection:
+    """스케줄러 하나의 리더 선출 (heartbeat 스레드가 획득/갱신)"""
+
+    def __init__(self, name: str, lease_seconds: int = LEADER_LEASE_SECONDS,
+                 heartbeat_seconds: int = LEADER_HEARTBEAT_SECONDS):
+        self.name = name
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.backend = 'lease'
+        self._leader = threading.Event()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self.holder: Optional[str] = None
+        self.leader_since: Optional[float] = None
+        self.last_heartbeat: Optional[float] = None
+        self.last_error: Optional[str] = None
+        self.transitions = 0
+
+    @property
+    def is_leader(self) -> bool:
+        return self._leader.is_set()
+
+    # ---- 획득/갱신 ----
+    def _tick_lease(self) -> bool:
+        """임대 행 획득/갱신 후 holder 로 소유 확인"""
+        global LEASE_TABLE_READY
+        sym = '%s' if USE_POSTGRESQL else '?'
+        conn = get_db_connection()
+        try:
+            cursor = conn.cursor()
+            _ensure_lease_table(cursor)
+            if USE_POSTGRESQL:
+                cursor.execute('SELECT EXTRACT(EPOCH FROM now())')
+                now = float(cursor.fetchone()[0])
+            else:
+                now = time.time()
+            # 비어 있거나, 내가 잡고 있거나, 만료된 임대만 가져감
+            cursor.execute(f'''
+                INSERT INTO scheduler_leases (name, holder, acquired_at, heartbeat_at, expires_at)
+                VALUES ({sym}, {sym}, {sym}, {sym}, {sym})
+                ON CONFLICT(name) DO UPDATE SET
+                    holder = excluded.holder,
+                    acquired_at = CASE WHEN scheduler_leases.holder = excluded.holder
+                                       THEN scheduler_leases.acquired_at ELSE excluded.acquired_at END,
+                    heartbeat_at = excluded.heartbeat_at,
+                    expires_at = excluded.expires_at
+                WHERE scheduler_leases.holder = excluded.holder OR scheduler_leases.expires_at < excluded.heartbeat_at
+            ''', (self.name, PROCESS_ID, now, now, now + self.lease_seconds))
+            cursor.execute(f'SELECT holder FROM scheduler_leases WHERE name = {sym}', (self.name,))
+            row = cursor.fetchone()
+            conn.commit()
+            LEASE_TABLE_READY = True
+            self.holder = row[0] if row else None
+            return self.holder == PROCESS_ID
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                pass
+            raise
+        finally:
+            conn.close()
+
+    def tick(self) -> bool:
+        """리더 획득 시도/갱신 한 번 (heartbeat 스레드에서 호출)"""
+        try:
+            leader = self._tick_lease()
+            self.last_error = None
+        except Exception as e:
+            leader = False
+            self.last_error = str(e)
+            print(f"[경고] [리더 선출] {self.name}: heartbeat 오류 - {e}")
+        self.last_heartbeat = time.time()
+        if leader and not self.is_leader:
+            self.leader_since = self.last_heartbeat
+            self.transitions += 1
+            print(f"[정보] [리더 선출] {self.name}: 이 프로세스가 리더가 되었습니다 ({PROCESS_ID})")
+            self._leader.set()
+        elif not leader and self.is_leader:
+            self.leader_since = None
+            self.transitions += 1
+            print(f"[경고] [리더 선출] {self.name}: 리더 자격을 잃었습니다 ({PROCESS_ID})")
+            self._leader.clear()
+        return leader
+
+    def start(self) -> None:
+        if self._thread is not None and self._thread.is_alive():
+            return
+
+        def heartbeat_loop():
+            while not self._stop.is_set():
+                self.tick()
+                self._stop.wait(self.heartbeat_seconds)
+
+        self._thread = threading.Thread(target=heartbeat_loop, name=f'leader-{self.name}', daemon=True)
+        self._thread.start()
+
+    def wait_until_leader(self, timeout: Optional[float] = None) -> bool:
+        """리더가 될 때까지 대기 (timeout 초 후에는 현재 상태 반환)"""
+        return self._leader.wait(timeout)
+
+    def release(self) -> None:
+        """리더 자격 반납 (프로세스 종료 시) - 다른 프로세스가 임대 만료를 기다리지 않고 넘겨받음"""
+        self._stop.set()
+        was_leader = self.is_leader
+        self._leader.clear()
+        if not was_leader:
+            return
+        sym = '%s' if USE_POSTGRESQL else '?'
+        try:
+            conn = get_db_connection()
+            try:
+                cursor = conn.cursor()
+                cursor.execute(f'DELETE FROM scheduler_leases WHERE name = {sym} AND holder = {sym}',
+                               (self.name, PROCESS_ID))
+                conn.commit()
+            finally:
+                conn.close()
+        except Exception as e:
+            print(f"[경고] [리더 선출] {self.name}: 반납 오류 - {e}")
+
+    def state(self) -> Dict[str, Any]:
+        return {
+            'is_leader': self.is_leader,
+            'backend': self.backend,
+            'process': PROCESS_ID,
+            'holder': self.holder,
+            'leader_since': _iso(self.leader_since),
+            'last_heartbeat': _iso(self.last_heartbeat),
+            'transitions': self.transitions,
+            'last_error': self.last_error,
+        }
+
+
+def get_leader_election(name: str) -> LeaderElection:
+    """스케줄러 이름별 리더 선출 (처음 호출 시 heartbeat 시작)"""
+    with _ELECTIONS_LOCK:
+        election = _ELECTIONS.get(name)
+        if election is None:
+            election = LeaderElection(name)
+            _ELECTIONS[name] = election
+            election.start()
+        return election
+
+
+def leadership_state() -> Dict[str, Dict[str, Any]]:
+    """스케줄러별 리더 상태 (헬스체크용)"""
+    with _ELECTIONS_LOCK:
+        elections = list(_ELECTIONS.values())
+    return {e.name: e.state() for e in elections}
+
+
+@atexit.register
+def _release_all() -> None:
+    with _ELECTIONS_LOCK:
+        elections = list(_ELECTIONS.values())
+    for election in elections:
+        election.release()
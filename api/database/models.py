@@ -83,15 +83,18 @@ def get_db_connection():
 
 # 배포 DB가 수동 마이그레이션 없이 올라간 경우 대비 (settlements.return_fee)
 _SETTLEMENT_RETURN_FEE_COLUMN_OK = False
+_SETTLEMENT_STATUS_LOGS_ENSURED = False
+_SETTLEMENT_FILE_COUNT_COLUMN_OK = False
 
 # pallets 확장 컬럼 (스키마 변경 시 버전만 올리면 재보강)
-_PALLETS_SCHEMA_ENSURE_VERSION = 3
+_PALLETS_SCHEMA_ENSURE_VERSION = 4
 _LAST_PALLETS_ENSURE_VERSION = 0
 
 
 def ensure_pallet_table_columns():
     """
     pallets에 pallet_kind, vendor_return_status, vendor_returned_at, kind_color 컬럼이 없으면 추가.
+    company_key(정규화 화주사명)는 부팅 시마다 company_name 기준으로 재동기화한다.
     PostgreSQL은 information_schema로 판별 (구버전 PG 호환).
     """
     global _LAST_PALLETS_ENSURE_VERSION
@@ -132,6 +135,17 @@ def ensure_pallet_table_columns():
                 cursor.execute('ALTER TABLE pallets ADD COLUMN rack_section_code TEXT')
             if not col_exists('pallets', 'warehouse_use_status'):
                 cursor.execute('ALTER TABLE pallets ADD COLUMN warehouse_use_status TEXT')
+            if not col_exists('pallets', 'company_key'):
+                cursor.execute('ALTER TABLE pallets ADD COLUMN company_key TEXT')
+            # company_key = normalize_company_name(company_name) (목록 API 화주사 필터용 인덱스 키)
+            key_expr = _sql_company_normalized_equals_keywords_pg()
+            cursor.execute(
+                f'UPDATE pallets SET company_key = {key_expr} WHERE company_key IS DISTINCT FROM {key_expr}'
+            )
+            cursor.execute(
+                '''CREATE INDEX IF NOT EXISTS idx_pallets_company_key_in_date
+                   ON pallets(company_key, in_date DESC, pallet_id DESC)'''
+            )
         else:
             for sql in (
                 "ALTER TABLE pallets ADD COLUMN pallet_kind TEXT NOT NULL DEFAULT '일반'",
@@ -156,6 +170,7 @@ def ensure_pallet_table_columns():
             for sql in (
                 'ALTER TABLE pallets ADD COLUMN rack_section_code TEXT',
                 'ALTER TABLE pallets ADD COLUMN warehouse_use_status TEXT',
+                'ALTER TABLE pallets ADD COLUMN company_key TEXT',
             ):
                 try:
                     cursor.execute(sql)
@@ -163,6 +178,14 @@ def ensure_pallet_table_columns():
                     err = str(e).lower()
                     if 'duplicate' not in err and 'already exists' not in err:
                         raise
+            key_expr = _sql_company_normalized_equals_keywords_sqlite()
+            cursor.execute(
+                f'UPDATE pallets SET company_key = {key_expr} WHERE company_key IS NOT {key_expr}'
+            )
+            cursor.execute(
+                '''CREATE INDEX IF NOT EXISTS idx_pallets_company_key_in_date
+                   ON pallets(company_key, in_date DESC, pallet_id DESC)'''
+            )
         conn.commit()
         ensure_rack_sections_table()
         _LAST_PALLETS_ENSURE_VERSION = _PALLETS_SCHEMA_ENSURE_VERSION
@@ -244,6 +267,565 @@ def ensure_rack_sections_table():
         conn.close()
 
 
+_PALLET_MOBILE_TRACK_LOG_ENSURED = False
+
+
+def ensure_pallet_mobile_track_log_table():
+    """모바일 QR 일괄 동기화 처리 기록 (idempotency_key 중복 적용 방지)."""
+    global _PALLET_MOBILE_TRACK_LOG_ENSURED
+    if _PALLET_MOBILE_TRACK_LOG_ENSURED:
+        return
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if USE_POSTGRESQL:
+            cursor.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS pallet_mobile_track_log (
+                    id SERIAL PRIMARY KEY,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    pallet_id TEXT,
+                    action TEXT,
+                    rack_section_code TEXT,
+                    client_ts TIMESTAMP,
+                    outcome TEXT NOT NULL,
+                    message TEXT,
+                    processed_by TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                '''
+            )
+        else:
+            cursor.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS pallet_mobile_track_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    idempotency_key TEXT NOT NULL UNIQUE,
+                    pallet_id TEXT,
+                    action TEXT,
+                    rack_section_code TEXT,
+                    client_ts TIMESTAMP,
+                    outcome TEXT NOT NULL,
+                    message TEXT,
+                    processed_by TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+                '''
+            )
+        conn.commit()
+        _PALLET_MOBILE_TRACK_LOG_ENSURED = True
+        print('[성공] pallet_mobile_track_log 테이블 준비 완료')
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f'[경고] ensure_pallet_mobile_track_log_table 실패: {e}')
+    finally:
+        cursor.close()
+        conn.close()
+
+
+_PALLET_REVENUE_ROLLUP_ENSURED = False
+
+
+def ensure_pallet_revenue_rollup_table() -> bool:
+    """
+    월별 보관료 수입 롤업 테이블 (settlement_month, company_name) 생성.
+    비어 있으면 pallet_monthly_settlements 에서 1회 백필한다.
+
+    Returns:
+        롤업 테이블 사용 가능 여부
+    """
+    global _PALLET_REVENUE_ROLLUP_ENSURED
+    if _PALLET_REVENUE_ROLLUP_ENSURED:
+        return True
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if USE_POSTGRESQL:
+            cursor.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS pallet_revenue_rollup (
+                    id SERIAL PRIMARY KEY,
+                    settlement_month TEXT NOT NULL,
+                    company_name TEXT NOT NULL,
+                    company_key TEXT NOT NULL,
+                    total_fee INTEGER DEFAULT 0,
+                    is_active INTEGER DEFAULT 1,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(settlement_month, company_name)
+                )
+                '''
+            )
+        else:
+            cursor.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS pallet_revenue_rollup (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    settlement_month TEXT NOT NULL,
+                    company_name TEXT NOT NULL,
+                    company_key TEXT NOT NULL,
+                    total_fee INTEGER DEFAULT 0,
+                    is_active INTEGER DEFAULT 1,
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    UNIQUE(settlement_month, company_name)
+                )
+                '''
+            )
+        cursor.execute(
+            '''CREATE INDEX IF NOT EXISTS idx_revenue_rollup_active_month
+               ON pallet_revenue_rollup(is_active, settlement_month)'''
+        )
+        cursor.execute(
+            '''CREATE INDEX IF NOT EXISTS idx_revenue_rollup_company_key
+               ON pallet_revenue_rollup(company_key)'''
+        )
+        cursor.execute('SELECT COUNT(*) FROM pallet_revenue_rollup')
+        if cursor.fetchone()[0] == 0:
+            sync_pallet_revenue_rollup(cursor)
+        conn.commit()
+        _PALLET_REVENUE_ROLLUP_ENSURED = True
+        print('[성공] pallet_revenue_rollup 테이블 준비 완료')
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f'[경고] ensure_pallet_revenue_rollup_table 실패: {e}')
+    finally:
+        cursor.close()
+        conn.close()
+    return _PALLET_REVENUE_ROLLUP_ENSURED
+
+
+def sync_pallet_revenue_rollup(cursor, settlement_month: str = None) -> int:
+    """
+    pallet_monthly_settlements → pallet_revenue_rollup 재집계 (호출자 트랜잭션 안에서 실행).
+
+    settlement_month 가 있으면 해당 월만, 없으면 전체 월을 다시 쓴다.
+    활성 여부는 get_companies_deactivated_map 으로 한 번에 판별한다.
+    cursor 는 일반(튜플) 커서여야 한다.
+
+    Returns:
+        기록된 롤업 행 수
+    """
+    sym = '%s' if USE_POSTGRESQL else '?'
+    if settlement_month:
+        cursor.execute(
+            f'SELECT settlement_month, company_name, total_fee FROM pallet_monthly_settlements WHERE settlement_month = {sym}',
+            (settlement_month,),
+        )
+    else:
+        cursor.execute('SELECT settlement_month, company_name, total_fee FROM pallet_monthly_settlements')
+    rows = [r for r in cursor.fetchall() if r[1]]
+
+    deactivated = get_companies_deactivated_map([r[1] for r in rows], cursor)
+
+    if settlement_month:
+        cursor.execute(f'DELETE FROM pallet_revenue_rollup WHERE settlement_month = {sym}', (settlement_month,))
+    else:
+        cursor.execute('DELETE FROM pallet_revenue_rollup')
+    if rows:
+        cursor.executemany(
+            f'''INSERT INTO pallet_revenue_rollup
+                (settlement_month, company_name, company_key, total_fee, is_active, updated_at)
+                VALUES ({sym}, {sym}, {sym}, {sym}, {sym}, CURRENT_TIMESTAMP)''',
+            [
+                (sm, cn, normalize_company_name(cn), int(fee or 0), 0 if deactivated.get(cn) else 1)
+                for sm, cn, fee in rows
+            ],
+        )
+    return len(rows)
+
+
+def sync_pallet_revenue_rollup_active(cursor, company_name: str) -> None:
+    """화주사 활성/비활성 변경 시 롤업의 is_active 만 갱신 (정규화 이름이 같은 표기 포함)."""
+    sym = '%s' if USE_POSTGRESQL else '?'
+    cursor.execute(
+        f'SELECT DISTINCT company_name FROM pallet_revenue_rollup WHERE company_key = {sym} OR company_name = {sym}',
+        (normalize_company_name(company_name), company_name),
+    )
+    names = [r[0] for r in cursor.fetchall() if r[0]]
+    if not names:
+        return
+    deactivated = get_companies_deactivated_map(names, cursor)
+    cursor.executemany(
+        f'''UPDATE pallet_revenue_rollup SET is_active = {sym}, updated_at = CURRENT_TIMESTAMP
+            WHERE company_name = {sym}''',
+        [(0 if deactivated.get(cn) else 1, cn) for cn in names],
+    )
+
+
+_RACK_SECTION_OCCUPANCY_ENSURED = False
+
+
+def ensure_rack_section_occupancy_table() -> bool:
+    """
+    섹션별 보관중(입고됨) 파레트 수 카운터 테이블 생성.
+    비어 있으면 pallets 에서 1회 재집계한다.
+
+    Returns:
+        카운터 테이블 사용 가능 여부
+    """
+    global _RACK_SECTION_OCCUPANCY_ENSURED
+    if _RACK_SECTION_OCCUPANCY_ENSURED:
+        return True
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS rack_section_occupancy (
+                code TEXT PRIMARY KEY,
+                pallet_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            '''
+        )
+        cursor.execute('SELECT COUNT(*) FROM rack_section_occupancy')
+        if cursor.fetchone()[0] == 0:
+            rebuild_rack_section_occupancy(cursor)
+        conn.commit()
+        _RACK_SECTION_OCCUPANCY_ENSURED = True
+        print('[성공] rack_section_occupancy 테이블 준비 완료')
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f'[경고] ensure_rack_section_occupancy_table 실패: {e}')
+    finally:
+        cursor.close()
+        conn.close()
+    return _RACK_SECTION_OCCUPANCY_ENSURED
+
+
+def rebuild_rack_section_occupancy(cursor) -> int:
+    """
+    pallets → rack_section_occupancy 전체 재집계 (호출자 트랜잭션 안에서 실행).
+
+    Returns:
+        기록된 섹션 행 수
+    """
+    cursor.execute('DELETE FROM rack_section_occupancy')
+    cursor.execute(
+        '''
+        INSERT INTO rack_section_occupancy (code, pallet_count, updated_at)
+        SELECT rack_section_code, COUNT(*), CURRENT_TIMESTAMP
+        FROM pallets
+        WHERE status = '입고됨' AND rack_section_code IS NOT NULL AND rack_section_code <> ''
+        GROUP BY rack_section_code
+        '''
+    )
+    return cursor.rowcount or 0
+
+
+def apply_rack_section_occupancy_deltas(cursor, deltas: Dict[str, int]) -> None:
+    """
+    섹션별 카운터 증감 (호출자 트랜잭션 안에서 실행).
+
+    deltas: {rack_section_code: 증감 수} — 0 인 항목과 빈 코드는 무시, 결과는 0 미만으로 내려가지 않는다.
+    """
+    rows = [(code, int(delta)) for code, delta in (deltas or {}).items() if code and delta]
+    if not rows:
+        return
+    sym = '%s' if USE_POSTGRESQL else '?'
+    if USE_POSTGRESQL:
+        cursor.executemany(
+            f'''INSERT INTO rack_section_occupancy (code, pallet_count, updated_at)
+                VALUES ({sym}, 0, CURRENT_TIMESTAMP) ON CONFLICT (code) DO NOTHING''',
+            [(code,) for code, _ in rows],
+        )
+        clamp = 'GREATEST'
+    else:
+        cursor.executemany(
+            f'''INSERT OR IGNORE INTO rack_section_occupancy (code, pallet_count, updated_at)
+                VALUES ({sym}, 0, CURRENT_TIMESTAMP)''',
+            [(code,) for code, _ in rows],
+        )
+        clamp = 'MAX'
+    cursor.executemany(
+        f'''UPDATE rack_section_occupancy
+            SET pallet_count = {clamp}(pallet_count + {sym}, 0), updated_at = CURRENT_TIMESTAMP
+            WHERE code = {sym}''',
+        [(delta, code) for code, delta in rows],
+    )
+
+
+# ========================================
+# 캐시 버전 스탬프 (프로세스 간 캐시 무효화)
+# ========================================
+
+SETTLEMENT_COMPANIES_CACHE = 'settlement_companies'
+
+_CACHE_VERSIONS_ENSURED = False
+# 같은 프로세스 안에서는 DB 왕복 없이 바로 무효화되도록 bump 횟수를 따로 센다.
+_LOCAL_CACHE_GENERATIONS: Dict[str, int] = {}
+
+# 양쪽 DB 공통 DDL (init_db 에서 생성)
+CACHE_VERSIONS_DDL = '''
+    CREATE TABLE IF NOT EXISTS cache_versions (
+        name TEXT PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+'''
+
+
+def ensure_cache_versions_table():
+    """
+    캐시 이름별 버전 스탬프 테이블 생성 (init_db 를 거치지 않은 스크립트용, 별도 연결에서 커밋).
+    쓰기 트랜잭션 안에서는 호출하지 않는다 - SQLite 는 잠금 대기로 실패한다.
+    """
+    global _CACHE_VERSIONS_ENSURED
+    if _CACHE_VERSIONS_ENSURED:
+        return
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(CACHE_VERSIONS_DDL)
+        conn.commit()
+        _CACHE_VERSIONS_ENSURED = True
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f'[경고] ensure_cache_versions_table 실패: {e}')
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def local_cache_generation(name: str) -> int:
+    """현재 프로세스에서 커밋된 bump_cache_version 횟수."""
+    return _LOCAL_CACHE_GENERATIONS.get(name, 0)
+
+
+def _bump_local_cache_generation(name: str) -> None:
+    _LOCAL_CACHE_GENERATIONS[name] = _LOCAL_CACHE_GENERATIONS.get(name, 0) + 1
+
+
+def _bump_local_cache_generation_after_commit(name: str) -> None:
+    """
+    호출자 트랜잭션에 포함된 bump 의 로컬 세대 증가는 커밋 뒤로 미룬다.
+    먼저 올리면 커밋 전에 다른 스레드가 이전 데이터를 새 세대로 캐시해 버린다.
+    요청 안에서는 뷰가 커밋하고 반환한 뒤(after_this_request) 올리고,
+    요청 밖(스크립트 등)에서는 같은 프로세스에 동시 조회가 없으므로 바로 올린다.
+    """
+    from flask import after_this_request, g, has_request_context
+    if not has_request_context():
+        _bump_local_cache_generation(name)
+        return
+    pending = g.get('pending_cache_bumps')
+    if pending is None:
+        pending = g.pending_cache_bumps = set()
+
+        @after_this_request
+        def _apply_pending_cache_bumps(response):
+            for pending_name in pending:
+                _bump_local_cache_generation(pending_name)
+            return response
+    pending.add(name)
+
+
+def get_cache_version(name: str, cursor=None) -> int:
+    """캐시 버전 조회 (행이 없으면 0). cursor 는 일반(튜플) 커서여야 한다."""
+    sym = '%s' if USE_POSTGRESQL else '?'
+    own_conn = None
+    if cursor is None:
+        ensure_cache_versions_table()
+        own_conn = get_db_connection()
+        cursor = own_conn.cursor()
+    try:
+        cursor.execute(f'SELECT version FROM cache_versions WHERE name = {sym}', (name,))
+        row = cursor.fetchone()
+        return int(row[0]) if row else 0
+    finally:
+        if own_conn is not None:
+            cursor.close()
+            own_conn.close()
+
+
+def bump_cache_version(name: str, cursor=None) -> None:
+    """
+    캐시 버전 +1. cursor 를 넘기면 호출자 트랜잭션에 포함되고, 없으면 자체 커밋한다.
+    로컬 세대는 어느 쪽이든 커밋 뒤에 올린다. (cache_versions 테이블은 init_db 에서 만든다)
+    """
+    sym = '%s' if USE_POSTGRESQL else '?'
+    own_conn = None
+    if cursor is None:
+        ensure_cache_versions_table()
+        own_conn = get_db_connection()
+        cursor = own_conn.cursor()
+    try:
+        cursor.execute(
+            f'''INSERT INTO cache_versions (name, version, updated_at)
+                VALUES ({sym}, 1, CURRENT_TIMESTAMP)
+                ON CONFLICT (name) DO UPDATE
+                SET version = cache_versions.version + 1, updated_at = CURRENT_TIMESTAMP''',
+            (name,),
+        )
+        if own_conn is not None:
+            own_conn.commit()
+            _bump_local_cache_generation(name)
+        else:
+            _bump_local_cache_generation_after_commit(name)
+    except Exception as e:
+        if own_conn is None:
+            raise
+        try:
+            own_conn.rollback()
+        except Exception:
+            pass
+        print(f'[경고] bump_cache_version({name}) 실패: {e}')
+    finally:
+        if own_conn is not None:
+            cursor.close()
+            own_conn.close()
+
+
+def invalidate_settlement_company_cache(cursor=None) -> None:
+    """
+    정산 화면 화주사 목록 캐시 무효화 훅.
+    화주사 생성/삭제, 검색 키워드(별칭) 변경, 파레트 화주사명 변경·통합 후 호출한다.
+    """
+    bump_cache_version(SETTLEMENT_COMPANIES_CACHE, cursor)
+
+
+SCHEDULE_CALENDAR_CACHE = 'schedule_calendar'
+
+
+def invalidate_schedule_calendar_cache(cursor=None) -> None:
+    """달력 월별 응답 캐시 무효화 훅 (스케쥴 생성/수정/삭제 시, 가능하면 같은 트랜잭션의 cursor 로 호출)"""
+    bump_cache_version(SCHEDULE_CALENDAR_CACHE, cursor)
+
+
+# ========================================
+# 참조 테이블 조회 캐시 (종류/카테고리 목록)
+# ========================================
+
+# 다른 프로세스의 변경(버전)을 확인하는 주기
+LOOKUP_CACHE_CHECK_SECONDS = int(os.environ.get('LOOKUP_CACHE_CHECK_SECONDS', '30'))
+
+_LOOKUP_CACHES: Dict[str, 'LookupCache'] = {}
+
+
+class LookupCache:
+    """
+    작고 거의 바뀌지 않는 참조 테이블 목록의 프로세스 캐시
+
+    - 처음 호출 때 loader 로 한 번 읽어 두고, 이후에는 DB 조회 없이 복사본을 돌려준다.
+    - 같은 프로세스의 변경은 local_cache_generation 으로 즉시, 다른 프로세스의 변경은
+      LOOKUP_CACHE_CHECK_SECONDS 마다 cache_versions 버전을 확인해 다시 읽는다.
+    - 생성/수정/삭제 함수는 invalidate(cursor) 를 커밋 전에 호출한다.
+    - etag: 버전 + 내용 해시 (내용이 같으면 프로세스가 달라도 같은 값)
+    """
+
+    def __init__(self, name: str, loader, check_seconds: int = LOOKUP_CACHE_CHECK_SECONDS):
+        import threading
+        self.name = name
+        self.loader = loader
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._entry: Optional[Dict[str, Any]] = None
+        _LOOKUP_CACHES[name] = self
+
+    def _snapshot(self) -> Dict[str, Any]:
+        import hashlib
+        import time
+        generation = local_cache_generation(self.name)
+        with self._lock:
+            entry = self._entry
+            if (entry and entry['generation'] == generation
+                    and time.monotonic() - entry['checked_at'] < self.check_seconds):
+                return entry
+            version = get_cache_version(self.name)
+            if entry and entry['generation'] == generation and entry['version'] == version:
+                entry['checked_at'] = time.monotonic()
+                return entry
+            data = self.loader()
+            digest = hashlib.sha1(
+                json.dumps(data, sort_keys=True, ensure_ascii=False, default=str).encode('utf-8')
+            ).hexdigest()[:16]
+            self._entry = {
+                'data': data,
+                'etag': f'{self.name}-{version}-{digest}',
+                'version': version,
+                'generation': generation,
+                'checked_at': time.monotonic(),
+            }
+            return self._entry
+
+    def get(self) -> List[Dict]:
+        """목록 복사본 (호출자가 고쳐도 캐시는 그대로)"""
+        return [dict(row) for row in self._snapshot()['data']]
+
+    def etag(self) -> str:
+        return self._snapshot()['etag']
+
+    def invalidate(self, cursor=None) -> None:
+        """무효화 훅 - 가능하면 변경과 같은 트랜잭션의 cursor 로 호출"""
+        bump_cache_version(self.name, cursor)
+
+
+def lookup_json_response(cache: 'LookupCache', with_count: bool = True):
+    """
+    참조 목록 JSON 응답 ({'success', 'data'[, 'count']}) + ETag.
+    If-None-Match 가 현재 ETag 와 같으면 본문 없이 304 를 돌려준다.
+    """
+    from flask import current_app, jsonify, request
+    snapshot = cache._snapshot()
+    etag = snapshot['etag']
+    if request.if_none_match.contains(etag):
+        response = current_app.response_class(status=304)
+    else:
+        payload = {'success': True, 'data': snapshot['data']}
+        if with_count:
+            payload['count'] = len(snapshot['data'])
+        response = jsonify(payload)
+    response.set_etag(etag)
+    # 매번 ETag 로 재검증 (변경이 없으면 304, 변경 즉시 새 목록)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    return response
+
+
+_PALLET_SETTLEMENT_COMPANY_LISTS_ENSURED = False
+
+
+def ensure_pallet_settlement_company_lists_table():
+    """정산 화면용 화주사 목록(별칭 통합 완료) 물리화 테이블. list_key: 정산월 또는 '*'(전체)."""
+    global _PALLET_SETTLEMENT_COMPANY_LISTS_ENSURED
+    if _PALLET_SETTLEMENT_COMPANY_LISTS_ENSURED:
+        return
+    ensure_cache_versions_table()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            '''
+            CREATE TABLE IF NOT EXISTS pallet_settlement_company_lists (
+                list_key TEXT PRIMARY KEY,
+                companies TEXT NOT NULL,
+                version INTEGER NOT NULL DEFAULT 0,
+                computed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+            '''
+        )
+        conn.commit()
+        _PALLET_SETTLEMENT_COMPANY_LISTS_ENSURED = True
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f'[경고] ensure_pallet_settlement_company_lists_table 실패: {e}')
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def ensure_settlement_return_fee_column(conn):
     """settlements.return_fee 컬럼이 없으면 추가. 프로세스당 최초 1회만 ALTER 시도."""
     global _SETTLEMENT_RETURN_FEE_COLUMN_OK
@@ -264,20 +846,123 @@ def ensure_settlement_return_fee_column(conn):
                 if 'duplicate' not in str(e).lower():
                     raise
         conn.commit()
-        _SETTLEMENT_RETURN_FEE_COLUMN_OK = True
+        _SETTLEMENT_RETURN_FEE_COLUMN_OK = True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+
+def ensure_settlement_file_count_column(conn):
+    """
+    settlements.file_count (settlement_files 첨부 수) 컬럼이 없으면 추가하고 기존 첨부 수로 채움.
+    프로세스당 최초 1회만 확인. 이후 값은 refresh_settlement_file_count 로 유지.
+    """
+    global _SETTLEMENT_FILE_COUNT_COLUMN_OK
+    if _SETTLEMENT_FILE_COUNT_COLUMN_OK:
+        return
+    cursor = conn.cursor()
+    try:
+        if USE_POSTGRESQL:
+            cursor.execute('''
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'settlements' AND column_name = 'file_count'
+            ''')
+            exists = cursor.fetchone() is not None
+        else:
+            cursor.execute('PRAGMA table_info(settlements)')
+            exists = any(r[1] == 'file_count' for r in cursor.fetchall())
+        if not exists:
+            cursor.execute('ALTER TABLE settlements ADD COLUMN file_count INTEGER DEFAULT 0')
+            if USE_POSTGRESQL:
+                cursor.execute('''
+                    UPDATE settlements s SET file_count = f.cnt
+                    FROM (SELECT settlement_id, COUNT(*) AS cnt FROM settlement_files GROUP BY settlement_id) f
+                    WHERE f.settlement_id = s.id
+                ''')
+            else:
+                cursor.execute('''
+                    UPDATE settlements SET file_count = (
+                        SELECT COUNT(*) FROM settlement_files f WHERE f.settlement_id = settlements.id
+                    )
+                    WHERE id IN (SELECT DISTINCT settlement_id FROM settlement_files)
+                ''')
+        conn.commit()
+        _SETTLEMENT_FILE_COUNT_COLUMN_OK = True
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+
+
+def refresh_settlement_file_count(cursor, settlement_id):
+    """settlement_files 추가/삭제 후 해당 정산의 file_count 재계산 (커밋은 호출자)"""
+    if USE_POSTGRESQL:
+        cursor.execute(
+            'UPDATE settlements SET file_count = (SELECT COUNT(*) FROM settlement_files WHERE settlement_id = %s) '
+            'WHERE id = %s',
+            (settlement_id, settlement_id),
+        )
+    else:
+        cursor.execute(
+            'UPDATE settlements SET file_count = (SELECT COUNT(*) FROM settlement_files WHERE settlement_id = ?) '
+            'WHERE id = ?',
+            (settlement_id, settlement_id),
+        )
+
+def ensure_settlement_status_logs_table(conn):
+    """settlement_status_logs (정산 상태 변경 이력) 테이블 생성. 프로세스당 최초 1회만 시도."""
+    global _SETTLEMENT_STATUS_LOGS_ENSURED
+    if _SETTLEMENT_STATUS_LOGS_ENSURED:
+        return
+    cursor = conn.cursor()
+    try:
+        if USE_POSTGRESQL:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS settlement_status_logs (
+                    id SERIAL PRIMARY KEY,
+                    settlement_id INTEGER NOT NULL,
+                    from_status TEXT,
+                    to_status TEXT NOT NULL,
+                    changed_by TEXT,
+                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        else:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS settlement_status_logs (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    settlement_id INTEGER NOT NULL,
+                    from_status TEXT,
+                    to_status TEXT NOT NULL,
+                    changed_by TEXT,
+                    changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+        cursor.execute(
+            'CREATE INDEX IF NOT EXISTS idx_settlement_status_logs_settlement '
+            'ON settlement_status_logs(settlement_id, changed_at)'
+        )
+        conn.commit()
+        _SETTLEMENT_STATUS_LOGS_ENSURED = True
     except Exception:
         conn.rollback()
         raise
     finally:
         cursor.close()
 
-
 def init_db():
     """데이터베이스 초기화 (테이블 생성)"""
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
+        # 캐시 버전 스탬프 - bump_cache_version 이 쓰기 트랜잭션 안에서 처음 쓰여도 테이블이 있도록 먼저 생성
+        cursor.execute(CACHE_VERSIONS_DDL)
+        
         if USE_POSTGRESQL:
             # PostgreSQL 테이블 생성
             # 화주사 계정 테이블
@@ -421,6 +1106,17 @@ def init_db():
                             except:
                                 pass
             
+            # 반복 규칙 + 범위 끝(반복이면 마지막 회차 종료일, 종료 없는 반복은 9999-12-31) 컬럼
+            cursor.execute('ALTER TABLE schedules ADD COLUMN IF NOT EXISTS recurrence_rule TEXT')
+            cursor.execute('ALTER TABLE schedules ADD COLUMN IF NOT EXISTS range_end DATE')
+            cursor.execute('UPDATE schedules SET range_end = end_date WHERE range_end IS NULL')
+            
+            # 달력 범위 조회용 GiST daterange 인덱스 (&& 겹침 연산)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_schedules_range 
+                ON schedules USING GIST (daterange(start_date, GREATEST(range_end, start_date), '[]'))
+            ''')
+            
             # PostgreSQL - 스케줄 타입 테이블
             try:
                 cursor.execute('''
@@ -518,6 +1214,18 @@ def init_db():
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            # 수정 기록은 전체 본문 대신 바뀐 구간만 저장 (api/schedules/memo_log.py)
+            cursor.execute('ALTER TABLE schedule_memo_logs ADD COLUMN IF NOT EXISTS changes TEXT')
+            # 메모별 기록 keyset 페이지 (memo_id, created_at DESC, id DESC)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_schedule_memo_logs_memo
+                ON schedule_memo_logs(memo_id, created_at, id)
+            ''')
+            # 기록장 keyset 페이지 (최근 변경순)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_schedule_memos_activity
+                ON schedule_memos((COALESCE(updated_at, created_at)), id)
+            ''')
             
             conn.commit()
             
@@ -737,6 +1445,11 @@ def init_db():
                 cursor.execute('ALTER TABLE customer_service ADD COLUMN IF NOT EXISTS last_notification_at TIMESTAMP')
             except Exception:
                 pass
+            # next_notify_at: 다음 반복 알림 예정 시각(UTC) - 스케줄러/cron 이 기한 지난 행만 인덱스로 조회
+            try:
+                cursor.execute('ALTER TABLE customer_service ADD COLUMN IF NOT EXISTS next_notify_at TIMESTAMP')
+            except Exception:
+                pass
             
             # C/S 인덱스 생성
             cursor.execute('''
@@ -749,11 +1462,41 @@ def init_db():
                 ON customer_service(status, created_at)
             ''')
             
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cs_next_notify 
+                ON customer_service(status, next_notify_at)
+            ''')
+            
+            # 미처리(접수) 건만 담는 부분 인덱스 - 처리 완료된 과거 건은 인덱스에 들어가지 않음
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cs_pending 
+                ON customer_service(created_at)
+                WHERE status = '접수'
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cs_pending_type 
+                ON customer_service(issue_type, created_at)
+                WHERE status = '접수'
+            ''')
+            
+            # 미처리 작업 뷰 (C/S 큐 지표 get_cs_queue_metrics 용, 알림은 customer_service 를 직접 조회)
+            cursor.execute('''
+                CREATE OR REPLACE VIEW pending_cs AS
+                SELECT * FROM customer_service WHERE status = '접수'
+            ''')
+            
             cursor.execute('''
                 CREATE INDEX IF NOT EXISTS idx_cs_month 
                 ON customer_service(month, created_at)
             ''')
 
+            # 관리자 전체 목록 keyset 페이지네이션 (created_at DESC, id DESC)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cs_created 
+                ON customer_service(created_at, id)
+            ''')
+
             # PostgreSQL - C/S 종류 테이블
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS cs_issue_types (
@@ -1301,6 +2044,21 @@ def init_db():
                     if 'duplicate column' not in str(e).lower() and 'already exists' not in str(e).lower():
                         print(f"[경고] {col} 컬럼 추가 중 오류 (무시 가능): {e}")
             
+            # 반복 규칙 + 범위 끝(반복이면 마지막 회차 종료일, 종료 없는 반복은 9999-12-31) 컬럼
+            for col, col_type in (('recurrence_rule', 'TEXT'), ('range_end', 'DATE')):
+                try:
+                    cursor.execute(f'ALTER TABLE schedules ADD COLUMN {col} {col_type}')
+                except Exception as e:
+                    if 'duplicate column' not in str(e).lower() and 'already exists' not in str(e).lower():
+                        print(f"[경고] {col} 컬럼 추가 중 오류 (무시 가능): {e}")
+            cursor.execute('UPDATE schedules SET range_end = end_date WHERE range_end IS NULL')
+            
+            # 달력 범위 조회용 인덱스 (range_end >= 구간 시작 AND start_date <= 구간 끝)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_schedules_range 
+                ON schedules(range_end, start_date)
+            ''')
+            
             # SQLite - 스케줄 타입 테이블
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS schedule_types (
@@ -1398,6 +2156,17 @@ def init_db():
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             ''')
+            cursor.execute("PRAGMA table_info(schedule_memo_logs)")
+            if 'changes' not in [c[1] for c in cursor.fetchall()]:
+                cursor.execute('ALTER TABLE schedule_memo_logs ADD COLUMN changes TEXT')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_schedule_memo_logs_memo
+                ON schedule_memo_logs(memo_id, created_at, id)
+            ''')
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_schedule_memos_activity
+                ON schedule_memos(COALESCE(updated_at, created_at), id)
+            ''')
             
             conn.commit()
             
@@ -1592,6 +2361,11 @@ def init_db():
                 cursor.execute('ALTER TABLE customer_service ADD COLUMN last_notification_at TIMESTAMP')
             except OperationalError:
                 pass
+            # next_notify_at: 다음 반복 알림 예정 시각(UTC) - 스케줄러/cron 이 기한 지난 행만 인덱스로 조회
+            try:
+                cursor.execute('ALTER TABLE customer_service ADD COLUMN next_notify_at TIMESTAMP')
+            except OperationalError:
+                pass
             
             # C/S 인덱스 생성
             cursor.execute('''
@@ -1604,11 +2378,41 @@ def init_db():
                 ON customer_service(status, created_at)
             ''')
             
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cs_next_notify 
+                ON customer_service(status, next_notify_at)
+            ''')
+            
+            # 미처리(접수) 건만 담는 부분 인덱스 - 처리 완료된 과거 건은 인덱스에 들어가지 않음
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cs_pending 
+                ON customer_service(created_at)
+                WHERE status = '접수'
+            ''')
+            
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cs_pending_type 
+                ON customer_service(issue_type, created_at)
+                WHERE status = '접수'
+            ''')
+            
+            # 미처리 작업 뷰 (C/S 큐 지표 get_cs_queue_metrics 용, 알림은 customer_service 를 직접 조회)
+            cursor.execute('''
+                CREATE VIEW IF NOT EXISTS pending_cs AS
+                SELECT * FROM customer_service WHERE status = '접수'
+            ''')
+            
             cursor.execute('''
                 CREATE INDEX IF NOT EXISTS idx_cs_month 
                 ON customer_service(month, created_at)
             ''')
 
+            # 관리자 전체 목록 keyset 페이지네이션 (created_at DESC, id DESC)
+            cursor.execute('''
+                CREATE INDEX IF NOT EXISTS idx_cs_created 
+                ON customer_service(created_at, id)
+            ''')
+
             # SQLite - C/S 종류 테이블
             cursor.execute('''
                 CREATE TABLE IF NOT EXISTS cs_issue_types (
@@ -2257,6 +3061,7 @@ def toggle_company_active_status(company_name: str, is_active: bool) -> Tuple[bo
     Returns:
         (success, message)
     """
+    rollup_ready = ensure_pallet_revenue_rollup_table()
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -2349,6 +3154,10 @@ def toggle_company_active_status(company_name: str, is_active: bool) -> Tuple[bo
                 ''', (company_name,))
             print(f"[비활성화] deactivated_companies 테이블에 추가 완료")
         
+        # 보관료 수입 롤업의 활성 플래그 동기화 (같은 트랜잭션)
+        if rollup_ready:
+            sync_pallet_revenue_rollup_active(cursor, company_name)
+        
         conn.commit()
         print(f"[비활성화] 커밋 완료")
         
@@ -2506,6 +3315,84 @@ def is_company_deactivated(company_name: str) -> bool:
         conn.close()
 
 
+def _is_inactive_value(is_active) -> bool:
+    """companies.is_active (SQLite INTEGER / PostgreSQL BOOLEAN) → 비활성 여부."""
+    if isinstance(is_active, int) and not isinstance(is_active, bool):
+        return is_active == 0
+    return not bool(is_active)
+
+
+def get_companies_deactivated_map(company_names: List[str], cursor=None) -> Dict[str, bool]:
+    """
+    여러 화주사의 비활성 여부를 한 번에 판별 (is_company_deactivated 와 동일 규칙).
+
+    companies / deactivated_companies 를 각각 1회만 읽는다.
+    cursor 를 넘기면 호출자 트랜잭션(미커밋 변경 포함)에서 조회한다. 일반(튜플) 커서만 지원.
+
+    Returns:
+        {화주사명: 비활성 여부}
+    """
+    names = list(dict.fromkeys(n for n in company_names if n))
+    if not names:
+        return {}
+    own_conn = None
+    if cursor is None:
+        own_conn = get_db_connection()
+        cursor = own_conn.cursor()
+    try:
+        cursor.execute('SELECT company_name FROM deactivated_companies')
+        deactivated_exact = {r[0] for r in cursor.fetchall() if r[0]}
+        deactivated_norm = {normalize_company_name(n) for n in deactivated_exact}
+        has_is_active = True
+        if not USE_POSTGRESQL:
+            # SQLite는 is_active 컬럼이 토글 시점에 추가되므로 존재 여부 확인
+            cursor.execute('PRAGMA table_info(companies)')
+            has_is_active = 'is_active' in [col[1] for col in cursor.fetchall()]
+        if has_is_active:
+            cursor.execute('SELECT company_name, is_active FROM companies')
+        else:
+            cursor.execute('SELECT company_name, NULL FROM companies')
+        company_rows = [(r[0], r[1]) for r in cursor.fetchall() if r[0]]
+    finally:
+        if own_conn is not None:
+            cursor.close()
+            own_conn.close()
+
+    exact_active = {}
+    by_norm = {}
+    for cn, is_active in company_rows:
+        exact_active.setdefault(cn, is_active)
+        by_norm.setdefault(normalize_company_name(cn), []).append((cn, is_active))
+
+    result = {}
+    for name in names:
+        if name in exact_active:
+            is_active = exact_active[name]
+            if is_active is None:
+                result[name] = name in deactivated_exact
+            else:
+                result[name] = _is_inactive_value(is_active) or name in deactivated_exact
+            continue
+        if name in deactivated_exact:
+            result[name] = True
+            continue
+        n = normalize_company_name(name)
+        if not n:
+            result[name] = False
+            continue
+        if n in deactivated_norm:
+            result[name] = True
+            continue
+        matches = by_norm.get(n, [])
+        if any(a is not None and not _is_inactive_value(a) for _, a in matches):
+            result[name] = False
+        elif any(a is not None for _, a in matches):
+            result[name] = True
+        else:
+            result[name] = any(cn in deactivated_exact for cn, _ in matches)
+    return result
+
+
 def create_company(company_name: str, username: str, password: str, role: str = '화주사',
                   business_number: str = None, business_name: str = None,
                   business_address: str = None, business_tel: str = None,
@@ -2528,6 +3415,7 @@ def create_company(company_name: str, username: str, password: str, role: str =
                   business_tel, business_email, business_certificate_url))
             conn.commit()
             print(f"[성공] 화주사 계정 생성 성공: {company_name} ({username})")
+            invalidate_settlement_company_cache()
             return True
         except IntegrityError as e:
             conn.rollback()
@@ -2555,6 +3443,7 @@ def create_company(company_name: str, username: str, password: str, role: str =
                   business_tel, business_email, business_certificate_url))
             conn.commit()
             print(f"[성공] 화주사 계정 생성 성공: {company_name} ({username})")
+            invalidate_settlement_company_cache()
             return True
         except sqlite3.IntegrityError as e:
             print(f"[오류] 화주사 계정 생성 실패 (중복): {username} - {e}")
@@ -2625,7 +3514,10 @@ def delete_company(company_id: int) -> bool:
         try:
             cursor.execute('DELETE FROM companies WHERE id = %s', (company_id,))
             conn.commit()
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+            if deleted:
+                invalidate_settlement_company_cache()
+            return deleted
         except Exception as e:
             print(f"화주사 삭제 오류: {e}")
             conn.rollback()
@@ -2638,7 +3530,10 @@ def delete_company(company_id: int) -> bool:
         try:
             cursor.execute('DELETE FROM companies WHERE id = ?', (company_id,))
             conn.commit()
-            return cursor.rowcount > 0
+            deleted = cursor.rowcount > 0
+            if deleted:
+                invalidate_settlement_company_cache()
+            return deleted
         except Exception as e:
             print(f"화주사 삭제 오류: {e}")
             return False
@@ -2879,7 +3774,11 @@ def update_company_info(username: str, business_number: str = None,
                 WHERE username = %s
             ''', values)
             conn.commit()
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+            if updated and search_keywords is not None:
+                # 별칭 변경 → 화주사 통합 결과가 달라질 수 있음
+                invalidate_settlement_company_cache()
+            return updated
         except Exception as e:
             print(f"화주사 정보 업데이트 오류: {e}")
             conn.rollback()
@@ -2908,6 +3807,9 @@ def update_company_info(username: str, business_number: str = None,
             if business_email is not None:
                 updates.append('business_email = ?')
                 values.append(business_email)
+            if search_keywords is not None:
+                updates.append('search_keywords = ?')
+                values.append(search_keywords)
             
             if not updates:
                 return False
@@ -2921,7 +3823,11 @@ def update_company_info(username: str, business_number: str = None,
                 WHERE username = ?
             ''', values)
             conn.commit()
-            return cursor.rowcount > 0
+            updated = cursor.rowcount > 0
+            if updated and search_keywords is not None:
+                # 별칭 변경 → 화주사 통합 결과가 달라질 수 있음
+                invalidate_settlement_company_cache()
+            return updated
         except Exception as e:
             print(f"화주사 정보 업데이트 오류: {e}")
             return False
@@ -3044,7 +3950,7 @@ def _sql_company_normalized_equals_keywords_pg() -> str:
     """PostgreSQL: Python normalize_company_name 과 동일하게 공백류 제거 후 소문자."""
     return (
         "lower(regexp_replace(coalesce(company_name, ''), "
-        r"'\\s', '', 'g'))"
+        r"'\s', '', 'g'))"
     )
 
 
@@ -4171,8 +5077,9 @@ def create_board_category(name: str, display_order: int = 0) -> int:
                 VALUES (%s, %s)
                 RETURNING id
             ''', (name, display_order))
-            conn.commit()
             row = cursor.fetchone()
+            BOARD_CATEGORIES_LOOKUP.invalidate(cursor)
+            conn.commit()
             return row[0] if row else 0
         except Exception as e:
             print(f"카테고리 생성 오류: {e}")
@@ -4188,8 +5095,10 @@ def create_board_category(name: str, display_order: int = 0) -> int:
                 INSERT INTO board_categories (name, display_order)
                 VALUES (?, ?)
             ''', (name, display_order))
+            category_id = cursor.lastrowid
+            BOARD_CATEGORIES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.lastrowid
+            return category_id
         except Exception as e:
             print(f"카테고리 생성 오류: {e}")
             return 0
@@ -4197,8 +5106,8 @@ def create_board_category(name: str, display_order: int = 0) -> int:
             conn.close()
 
 
-def get_all_board_categories() -> List[Dict]:
-    """모든 게시판 카테고리 조회"""
+def _load_board_categories() -> List[Dict]:
+    """모든 게시판 카테고리 DB 조회 (BOARD_CATEGORIES_LOOKUP 로더)"""
     conn = get_db_connection()
     
     if USE_POSTGRESQL:
@@ -4272,6 +5181,14 @@ def get_all_board_categories() -> List[Dict]:
             conn.close()
 
 
+BOARD_CATEGORIES_LOOKUP = LookupCache('board_categories', _load_board_categories)
+
+
+def get_all_board_categories() -> List[Dict]:
+    """모든 게시판 카테고리 조회 (프로세스 캐시, 생성/수정/삭제 시 무효화)"""
+    return BOARD_CATEGORIES_LOOKUP.get()
+
+
 def update_board_category(category_id: int, name: str = None, display_order: int = None) -> bool:
     """게시판 카테고리 수정"""
     conn = get_db_connection()
@@ -4299,8 +5216,11 @@ def update_board_category(category_id: int, name: str = None, display_order: int
                 SET {', '.join(updates)}
                 WHERE id = %s
             ''', params)
+            changed = cursor.rowcount > 0
+            if changed:
+                BOARD_CATEGORIES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"카테고리 수정 오류: {e}")
             conn.rollback()
@@ -4316,8 +5236,11 @@ def update_board_category(category_id: int, name: str = None, display_order: int
                 SET {', '.join(updates)}
                 WHERE id = ?
             ''', params)
+            changed = cursor.rowcount > 0
+            if changed:
+                BOARD_CATEGORIES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"카테고리 수정 오류: {e}")
             return False
@@ -4333,8 +5256,11 @@ def delete_board_category(category_id: int) -> bool:
         cursor = conn.cursor()
         try:
             cursor.execute('DELETE FROM board_categories WHERE id = %s', (category_id,))
+            changed = cursor.rowcount > 0
+            if changed:
+                BOARD_CATEGORIES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"카테고리 삭제 오류: {e}")
             conn.rollback()
@@ -4346,8 +5272,11 @@ def delete_board_category(category_id: int) -> bool:
         cursor = conn.cursor()
         try:
             cursor.execute('DELETE FROM board_categories WHERE id = ?', (category_id,))
+            changed = cursor.rowcount > 0
+            if changed:
+                BOARD_CATEGORIES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"카테고리 삭제 오류: {e}")
             return False
@@ -4918,8 +5847,36 @@ def delete_board_file(file_id: int) -> bool:
 
 # ========== 판매 스케쥴 관련 함수 ==========
 
+def _schedule_recurrence_columns(schedule_data: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """스케쥴 입력 → (정규화된 recurrence_rule, range_end 'YYYY-MM-DD'). 규칙이 잘못되면 ValueError."""
+    from api.schedules.recurrence import normalize_recurrence_rule, schedule_range_end
+    start_date = schedule_data.get('start_date')
+    end_date = schedule_data.get('end_date')
+    recurrence_rule = normalize_recurrence_rule(schedule_data.get('recurrence_rule'), start_date)
+    if not start_date or not end_date:
+        return recurrence_rule, end_date
+    return recurrence_rule, schedule_range_end(start_date, end_date, recurrence_rule).strftime('%Y-%m-%d')
+
+
+def _schedule_kept_recurrence_columns(cursor, schedule_id: int,
+                                     schedule_data: Dict) -> Tuple[Optional[str], Optional[str]]:
+    """수정 입력에 recurrence_rule 이 없을 때 → 기존 규칙과 새 기간으로 계산한 (recurrence_rule, range_end)"""
+    if USE_POSTGRESQL:
+        cursor.execute('SELECT recurrence_rule FROM schedules WHERE id = %s FOR UPDATE', (schedule_id,))
+    else:
+        cursor.execute('SELECT recurrence_rule FROM schedules WHERE id = ?', (schedule_id,))
+    row = cursor.fetchone()
+    return _schedule_recurrence_columns(dict(schedule_data, recurrence_rule=row[0] if row else None))
+
+
 def create_schedule(schedule_data: Dict) -> int:
-    """판매 스케쥴 생성"""
+    """
+    판매 스케쥴 생성
+
+    schedule_data['recurrence_rule'] 이 있으면 반복 스케쥴 (api/schedules/recurrence.py 형식).
+    range_end(달력 범위 인덱스용 마지막 날)를 함께 저장한다.
+    """
+    recurrence_rule, range_end = _schedule_recurrence_columns(schedule_data)
     conn = get_db_connection()
     
     if USE_POSTGRESQL:
@@ -4928,8 +5885,9 @@ def create_schedule(schedule_data: Dict) -> int:
             cursor.execute('''
                 INSERT INTO schedules (
                     company_name, title, start_date, end_date, 
-                    event_description, request_note, schedule_type
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s)
+                    event_description, request_note, schedule_type,
+                    recurrence_rule, range_end
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s)
                 RETURNING id
             ''', (
                 schedule_data.get('company_name'),
@@ -4938,10 +5896,13 @@ def create_schedule(schedule_data: Dict) -> int:
                 schedule_data.get('end_date'),
                 schedule_data.get('event_description'),
                 schedule_data.get('request_note'),
-                schedule_data.get('schedule_type')
+                schedule_data.get('schedule_type'),
+                recurrence_rule,
+                range_end
             ))
-            conn.commit()
             row = cursor.fetchone()
+            invalidate_schedule_calendar_cache(cursor)
+            conn.commit()
             return row[0] if row else 0
         except Exception as e:
             print(f"스케쥴 생성 오류: {e}")
@@ -4987,8 +5948,9 @@ def create_schedule(schedule_data: Dict) -> int:
             cursor.execute('''
                 INSERT INTO schedules (
                     id, company_name, title, start_date, end_date, 
-                    event_description, request_note, schedule_type, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    event_description, request_note, schedule_type,
+                    recurrence_rule, range_end, created_at, updated_at
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
             ''', (
                 new_id,
                 schedule_data.get('company_name'),
@@ -4998,9 +5960,12 @@ def create_schedule(schedule_data: Dict) -> int:
                 schedule_data.get('event_description'),
                 schedule_data.get('request_note'),
                 schedule_data.get('schedule_type'),
+                recurrence_rule,
+                range_end,
                 created_at,
                 created_at
             ))
+            invalidate_schedule_calendar_cache(cursor)
             conn.commit()
             print(f"[성공] 스케줄 생성 성공 - 생성된 ID: {new_id}")
             return new_id
@@ -5139,73 +6104,39 @@ def get_all_schedules() -> List[Dict]:
             conn.close()
 
 
+SCHEDULE_CALENDAR_COLUMNS = (
+    'id', 'company_name', 'title', 'start_date', 'end_date', 'event_description',
+    'request_note', 'schedule_type', 'recurrence_rule', 'range_end', 'created_at', 'updated_at',
+)
+
+
 def get_schedules_by_date_range(start_date: str, end_date: str) -> List[Dict]:
-    """날짜 범위로 스케쥴 조회 (달력용)"""
-    conn = get_db_connection()
-    
+    """
+    날짜 범위 [start_date, end_date] (양끝 포함) 와 겹치는 스케쥴 조회 (달력용)
+
+    반복 스케쥴은 회차를 펼치지 않은 원본 행 하나로 반환한다 (range_end 가 전체 회차의 끝).
+    - PostgreSQL: daterange && 겹침 조건 → GiST 인덱스 idx_schedules_range
+    - SQLite: range_end >= 시작 AND start_date <= 끝 → 인덱스 idx_schedules_range(range_end, start_date)
+    """
+    columns = ', '.join(SCHEDULE_CALENDAR_COLUMNS)
     if USE_POSTGRESQL:
-        cursor = conn.cursor(cursor_factory=RealDictCursor)
-        try:
-            cursor.execute('''
-                SELECT * FROM schedules 
-                WHERE (start_date <= %s AND end_date >= %s)
-                   OR (start_date BETWEEN %s AND %s)
-                   OR (end_date BETWEEN %s AND %s)
-                ORDER BY start_date ASC, company_name ASC
-            ''', (end_date, start_date, start_date, end_date, start_date, end_date))
-            rows = cursor.fetchall()
-            return [dict(row) for row in rows]
-        finally:
-            cursor.close()
-            conn.close()
+        where = ("daterange(start_date, GREATEST(range_end, start_date), '[]') "
+                 "&& daterange(%s::date, %s::date, '[]')")
     else:
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        try:
-            cursor.execute('''
-                SELECT id, company_name, title, start_date, end_date, 
-                       event_description, request_note, schedule_type, 
-                       created_at, updated_at
-                FROM schedules 
-                WHERE (start_date <= ? AND end_date >= ?)
-                   OR (start_date BETWEEN ? AND ?)
-                   OR (end_date BETWEEN ? AND ?)
-                ORDER BY start_date ASC, company_name ASC
-            ''', (end_date, start_date, start_date, end_date, start_date, end_date))
-            rows = cursor.fetchall()
-            result = []
-            for row in rows:
-                # SQLite Row 객체를 명시적으로 딕셔너리로 변환
-                row_dict = {}
-                if hasattr(row, 'keys'):
-                    # Row 객체인 경우
-                    for key in row.keys():
-                        row_dict[key] = row[key]
-                    # ID가 없거나 None인 경우 row[0]에서 가져오기
-                    if 'id' not in row_dict or row_dict['id'] is None:
-                        row_dict['id'] = row[0] if len(row) > 0 else None
-                else:
-                    # 튜플인 경우
-                    row_dict = {
-                        'id': row[0] if len(row) > 0 else None,
-                        'company_name': row[1] if len(row) > 1 else None,
-                        'title': row[2] if len(row) > 2 else None,
-                        'start_date': row[3] if len(row) > 3 else None,
-                        'end_date': row[4] if len(row) > 4 else None,
-                        'event_description': row[5] if len(row) > 5 else None,
-                        'request_note': row[6] if len(row) > 6 else None,
-                        'schedule_type': row[7] if len(row) > 7 else None,
-                        'created_at': row[8] if len(row) > 8 else None,
-                        'updated_at': row[9] if len(row) > 9 else None
-                    }
-                # ID 디버깅
-                if row_dict.get('id') is None:
-                    print(f'[경고] 스케줄 ID가 None입니다. Row: {row}, Dict: {row_dict}')
-                result.append(row_dict)
-            return result
-        finally:
-            conn.close()
+        where = 'range_end >= ? AND start_date <= ?'
 
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'''
+            SELECT {columns} FROM schedules
+            WHERE {where}
+            ORDER BY start_date ASC, company_name ASC
+        ''', (start_date, end_date))
+        return [dict(zip(SCHEDULE_CALENDAR_COLUMNS, tuple(row))) for row in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
 
 def get_schedule_by_id(schedule_id: int) -> Optional[Dict]:
     """스케쥴 ID로 조회"""
@@ -5282,12 +6213,22 @@ def get_schedule_by_id(schedule_id: int) -> Optional[Dict]:
 
 
 def update_schedule(schedule_id: int, schedule_data: Dict) -> bool:
-    """스케쥴 수정"""
+    """
+    스케쥴 수정
+
+    recurrence_rule 키가 없으면 기존 반복 규칙을 유지하고(range_end 는 새 기간으로 다시 계산),
+    None 이나 빈 문자열이면 반복을 해제한다.
+    """
+    keep_recurrence = 'recurrence_rule' not in schedule_data
+    if not keep_recurrence:
+        recurrence_rule, range_end = _schedule_recurrence_columns(schedule_data)
     conn = get_db_connection()
     
     if USE_POSTGRESQL:
         cursor = conn.cursor()
         try:
+            if keep_recurrence:
+                recurrence_rule, range_end = _schedule_kept_recurrence_columns(cursor, schedule_id, schedule_data)
             cursor.execute('''
                 UPDATE schedules SET
                     company_name = %s,
@@ -5297,6 +6238,8 @@ def update_schedule(schedule_id: int, schedule_data: Dict) -> bool:
                     event_description = %s,
                     request_note = %s,
                     schedule_type = %s,
+                    recurrence_rule = %s,
+                    range_end = %s,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE id = %s
             ''', (
@@ -5307,10 +6250,15 @@ def update_schedule(schedule_id: int, schedule_data: Dict) -> bool:
                 schedule_data.get('event_description'),
                 schedule_data.get('request_note'),
                 schedule_data.get('schedule_type'),
+                recurrence_rule,
+                range_end,
                 schedule_id
             ))
+            updated = cursor.rowcount > 0
+            if updated:
+                invalidate_schedule_calendar_cache(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return updated
         except Exception as e:
             print(f"스케쥴 수정 오류: {e}")
             conn.rollback()
@@ -5321,6 +6269,8 @@ def update_schedule(schedule_id: int, schedule_data: Dict) -> bool:
     else:
         cursor = conn.cursor()
         try:
+            if keep_recurrence:
+                recurrence_rule, range_end = _schedule_kept_recurrence_columns(cursor, schedule_id, schedule_data)
             cursor.execute('''
                 UPDATE schedules SET
                     company_name = ?,
@@ -5330,6 +6280,8 @@ def update_schedule(schedule_id: int, schedule_data: Dict) -> bool:
                     event_description = ?,
                     request_note = ?,
                     schedule_type = ?,
+                    recurrence_rule = ?,
+                    range_end = ?,
                     updated_at = CURRENT_TIMESTAMP
                 WHERE id = ?
             ''', (
@@ -5340,10 +6292,15 @@ def update_schedule(schedule_id: int, schedule_data: Dict) -> bool:
                 schedule_data.get('event_description'),
                 schedule_data.get('request_note'),
                 schedule_data.get('schedule_type'),
+                recurrence_rule,
+                range_end,
                 schedule_id
             ))
+            updated = cursor.rowcount > 0
+            if updated:
+                invalidate_schedule_calendar_cache(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return updated
         except Exception as e:
             print(f"스케쥴 수정 오류: {e}")
             return False
@@ -5352,7 +6309,15 @@ def update_schedule(schedule_id: int, schedule_data: Dict) -> bool:
 
 
 def delete_schedule(schedule_id: int, role: str = '관리자', company_name: str = '') -> bool:
-    """스케쥴 삭제"""
+    """스케쥴 삭제 (반복 스케쥴은 전체 회차 삭제)"""
+    deleted = _delete_schedule_rows(schedule_id, role, company_name)
+    if deleted:
+        invalidate_schedule_calendar_cache()
+    return deleted
+
+
+def _delete_schedule_rows(schedule_id: int, role: str = '관리자', company_name: str = '') -> bool:
+    """스케쥴 삭제 ("모든화주사" 스케쥴은 관리자면 일괄, 화주사면 본인 것만)"""
     conn = get_db_connection()
     
     if USE_POSTGRESQL:
@@ -6201,6 +7166,7 @@ def create_schedule_type(name: str, display_order: int = 0) -> Tuple[int, Option
             
             print(f'📝 [create_schedule_type] INSERT 결과: type_id={type_id}')
             
+            SCHEDULE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
             print(f'✅ [create_schedule_type] 커밋 완료: type_id={type_id}')
             
@@ -6246,6 +7212,7 @@ def create_schedule_type(name: str, display_order: int = 0) -> Tuple[int, Option
             type_id = cursor.lastrowid
             print(f'📝 [create_schedule_type] INSERT 결과: type_id={type_id}')
             
+            SCHEDULE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
             print(f'✅ [create_schedule_type] 커밋 완료: type_id={type_id}')
             
@@ -6264,55 +7231,63 @@ def create_schedule_type(name: str, display_order: int = 0) -> Tuple[int, Option
             conn.close()
 
 
-def get_all_schedule_types() -> List[Dict]:
-    """모든 스케줄 타입 조회"""
+def _load_schedule_types() -> List[Dict]:
+    """모든 스케줄 타입 DB 조회 (SCHEDULE_TYPES_LOOKUP 로더)"""
     conn = get_db_connection()
     
-    try:
-        if USE_POSTGRESQL:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            try:
-                cursor.execute('''
-                    SELECT * FROM schedule_types 
-                    ORDER BY display_order ASC, created_at ASC
-                ''')
-                rows = cursor.fetchall()
-                result = []
-                for row in rows:
+    if USE_POSTGRESQL:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+        try:
+            cursor.execute('''
+                SELECT * FROM schedule_types 
+                ORDER BY display_order ASC, created_at ASC
+            ''')
+            rows = cursor.fetchall()
+            result = []
+            for row in rows:
+                row_dict = dict(row)
+                # datetime 객체를 문자열로 변환
+                for key, value in row_dict.items():
+                    if isinstance(value, datetime):
+                        row_dict[key] = value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+                result.append(row_dict)
+            return result
+        finally:
+            cursor.close()
+            conn.close()
+    else:
+        cursor = conn.cursor()
+        try:
+            cursor.execute('''
+                SELECT * FROM schedule_types 
+                ORDER BY display_order ASC, created_at ASC
+            ''')
+            rows = cursor.fetchall()
+            result = []
+            for row in rows:
+                if hasattr(row, 'keys'):
                     row_dict = dict(row)
-                    # datetime 객체를 문자열로 변환
-                    for key, value in row_dict.items():
-                        if isinstance(value, datetime):
-                            row_dict[key] = value.strftime('%Y-%m-%d %H:%M:%S') if value else None
-                    result.append(row_dict)
-                return result
-            finally:
-                cursor.close()
-                conn.close()
-        else:
-            cursor = conn.cursor()
-            try:
-                cursor.execute('''
-                    SELECT * FROM schedule_types 
-                    ORDER BY display_order ASC, created_at ASC
-                ''')
-                rows = cursor.fetchall()
-                result = []
-                for row in rows:
-                    if hasattr(row, 'keys'):
-                        row_dict = dict(row)
-                    else:
-                        row_dict = {
-                            'id': row[0],
-                            'name': row[1],
-                            'display_order': row[2],
-                            'created_at': row[3],
-                            'updated_at': row[4] if len(row) > 4 else None
-                        }
-                    result.append(row_dict)
-                return result
-            finally:
-                conn.close()
+                else:
+                    row_dict = {
+                        'id': row[0],
+                        'name': row[1],
+                        'display_order': row[2],
+                        'created_at': row[3],
+                        'updated_at': row[4] if len(row) > 4 else None
+                    }
+                result.append(row_dict)
+            return result
+        finally:
+            conn.close()
+
+
+SCHEDULE_TYPES_LOOKUP = LookupCache('schedule_types', _load_schedule_types)
+
+
+def get_all_schedule_types() -> List[Dict]:
+    """모든 스케줄 타입 조회 (프로세스 캐시, 생성/삭제 시 무효화)"""
+    try:
+        return SCHEDULE_TYPES_LOOKUP.get()
     except Exception as e:
         print(f"[경고] schedule_types 테이블이 없거나 조회 중 오류: {e}")
         # 테이블이 없으면 기본 타입 반환
@@ -6328,8 +7303,11 @@ def delete_schedule_type(type_id: int) -> bool:
         cursor = conn.cursor()
         try:
             cursor.execute('DELETE FROM schedule_types WHERE id = %s', (type_id,))
+            changed = cursor.rowcount > 0
+            if changed:
+                SCHEDULE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"스케줄 타입 삭제 오류: {e}")
             conn.rollback()
@@ -6341,8 +7319,11 @@ def delete_schedule_type(type_id: int) -> bool:
         cursor = conn.cursor()
         try:
             cursor.execute('DELETE FROM schedule_types WHERE id = ?', (type_id,))
+            changed = cursor.rowcount > 0
+            if changed:
+                SCHEDULE_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
-            return cursor.rowcount > 0
+            return changed
         except Exception as e:
             print(f"스케줄 타입 삭제 오류: {e}")
             return False
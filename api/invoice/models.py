@@ -2,9 +2,18 @@
 거래명세서 모듈 - 데이터베이스 테이블 초기화
 기존 api/database/models.py 수정 없이 별도 모듈로 테이블 생성
 """
+from datetime import datetime
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
 from api.database.models import get_db_connection, USE_POSTGRESQL
 
 _invoice_tables_initialized = False
+# 상품 검색용 DB 인덱스 사용 가능 여부 (init_invoice_tables 에서 설정)
+PRODUCT_SEARCH_TRGM_READY = False
+PRODUCT_SEARCH_FTS_READY = False
+
+STATEMENT_NO_PREFIX = 'INV'
 
 
 def _ensure_invoice_statements_vat_included(cursor):
@@ -46,6 +55,9 @@ def init_invoice_tables():
         else:
             _create_invoice_tables_sqlite(cursor)
         _ensure_invoice_statements_vat_included(cursor)
+        _sync_statement_sequences(cursor)
+        _ensure_receivables_ledger_seeded(cursor)
+        _ensure_product_search_indexes(cursor)
         conn.commit()
         _invoice_tables_initialized = True
         print("[성공] 거래명세서 테이블 초기화 완료")
@@ -134,6 +146,28 @@ def _create_invoice_tables_postgresql(cursor):
         )
     ''')
 
+    # 5. 명세서 번호 연도별 채번
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_statement_sequences (
+            year TEXT PRIMARY KEY,
+            last_no INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 6. 월별 미수금 원장 (명세서 작성/수정/삭제/입금 처리 시 증분 반영)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_receivables_ledger (
+            period TEXT PRIMARY KEY,
+            cnt INTEGER NOT NULL DEFAULT 0,
+            paid_cnt INTEGER NOT NULL DEFAULT 0,
+            total_amount BIGINT NOT NULL DEFAULT 0,
+            paid_amount BIGINT NOT NULL DEFAULT 0,
+            unpaid_amount BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
     # 인덱스
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_products_code ON invoice_products(product_code)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_products_active ON invoice_products(is_active)')
@@ -141,6 +175,11 @@ def _create_invoice_tables_postgresql(cursor):
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_statements_date ON invoice_statements(statement_date)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_statements_customer ON invoice_statements(customer_id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_statements_paid ON invoice_statements(is_paid)')
+    # 미입금 목록 전용 부분 인덱스 (입금 완료 이력이 늘어도 미입금 건수만큼만 읽음)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_invoice_statements_unpaid
+        ON invoice_statements(statement_date, id) WHERE is_paid IS NOT TRUE
+    ''')
 
 
 def _create_invoice_tables_sqlite(cursor):
@@ -217,6 +256,28 @@ def _create_invoice_tables_sqlite(cursor):
         )
     ''')
 
+    # 5. 명세서 번호 연도별 채번
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_statement_sequences (
+            year TEXT PRIMARY KEY,
+            last_no INTEGER NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    # 6. 월별 미수금 원장 (명세서 작성/수정/삭제/입금 처리 시 증분 반영)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS invoice_receivables_ledger (
+            period TEXT PRIMARY KEY,
+            cnt INTEGER NOT NULL DEFAULT 0,
+            paid_cnt INTEGER NOT NULL DEFAULT 0,
+            total_amount BIGINT NOT NULL DEFAULT 0,
+            paid_amount BIGINT NOT NULL DEFAULT 0,
+            unpaid_amount BIGINT NOT NULL DEFAULT 0,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
     # 인덱스
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_products_code ON invoice_products(product_code)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_products_active ON invoice_products(is_active)')
@@ -224,3 +285,261 @@ def _create_invoice_tables_sqlite(cursor):
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_statements_date ON invoice_statements(statement_date)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_statements_customer ON invoice_statements(customer_id)')
     cursor.execute('CREATE INDEX IF NOT EXISTS idx_invoice_statements_paid ON invoice_statements(is_paid)')
+    # 미입금 목록 전용 부분 인덱스 (입금 완료 이력이 늘어도 미입금 건수만큼만 읽음)
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_invoice_statements_unpaid
+        ON invoice_statements(statement_date, id) WHERE is_paid = 0 OR is_paid IS NULL
+    ''')
+
+
+def _sync_statement_sequences(cursor):
+    """
+    기존 명세서 번호(INV-YYYY-NNNNN)의 연도별 최대값을 채번 테이블에 반영.
+    채번 테이블 도입 전 데이터나 수기로 넣은 번호와 겹치지 않도록 큰 값만 올린다.
+    """
+    if USE_POSTGRESQL:
+        cursor.execute('''
+            INSERT INTO invoice_statement_sequences (year, last_no)
+            SELECT SUBSTRING(statement_no FROM 5 FOR 4), MAX(CAST(SUBSTRING(statement_no FROM 10) AS INTEGER))
+            FROM invoice_statements
+            WHERE statement_no ~ '^INV-[0-9]{4}-[0-9]{1,9}$'
+            GROUP BY SUBSTRING(statement_no FROM 5 FOR 4)
+            ON CONFLICT (year) DO UPDATE SET
+                last_no = GREATEST(invoice_statement_sequences.last_no, excluded.last_no)
+        ''')
+    else:
+        cursor.execute('''
+            INSERT INTO invoice_statement_sequences (year, last_no)
+            SELECT substr(statement_no, 5, 4), MAX(CAST(substr(statement_no, 10) AS INTEGER))
+            FROM invoice_statements
+            WHERE statement_no GLOB 'INV-[0-9][0-9][0-9][0-9]-[0-9]*'
+              AND substr(statement_no, 10) NOT GLOB '*[^0-9]*'
+            GROUP BY substr(statement_no, 5, 4)
+            ON CONFLICT (year) DO UPDATE SET
+                last_no = MAX(invoice_statement_sequences.last_no, excluded.last_no)
+        ''')
+
+
+def format_statement_no(year: str, number: int) -> str:
+    """명세서 번호 형식: INV-{년}-{5자리}"""
+    return f'{STATEMENT_NO_PREFIX}-{year}-{number:05d}'
+
+
+def allocate_statement_numbers(cursor, count: int = 1, year: Optional[str] = None) -> List[str]:
+    """
+    명세서 번호를 연속 구간으로 예약 (호출자 트랜잭션 안에서 실행, 커밋은 호출자).
+
+    연도별 카운터 행을 한 문장으로 증가시키므로 행 잠금이 커밋/롤백까지 유지된다.
+    동시 생성 요청은 순서대로 기다리고, 롤백되면 카운터도 되돌아가 번호가 비지 않는다.
+
+    Args:
+        cursor: 명세서 INSERT 와 같은 트랜잭션의 커서
+        count: 예약할 번호 개수 (일괄 작성 시 건수)
+        year: YYYY (없으면 올해)
+
+    Returns:
+        ['INV-YYYY-00001', ...] (연속 번호, 오름차순)
+    """
+    count = int(count)
+    if count <= 0:
+        return []
+    year = year or datetime.now().strftime('%Y')
+    if USE_POSTGRESQL:
+        cursor.execute('''
+            INSERT INTO invoice_statement_sequences (year, last_no, updated_at)
+            VALUES (%s, %s, CURRENT_TIMESTAMP)
+            ON CONFLICT (year) DO UPDATE SET
+                last_no = invoice_statement_sequences.last_no + excluded.last_no,
+                updated_at = CURRENT_TIMESTAMP
+            RETURNING last_no
+        ''', (year, count))
+        row = cursor.fetchone()
+    else:
+        # SQLite 는 첫 쓰기에서 DB 쓰기 잠금을 잡으므로 같은 트랜잭션의 후속 조회도 일관된다
+        cursor.execute('''
+            INSERT INTO invoice_statement_sequences (year, last_no, updated_at)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT (year) DO UPDATE SET
+                last_no = invoice_statement_sequences.last_no + excluded.last_no,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (year, count))
+        cursor.execute('SELECT last_no FROM invoice_statement_sequences WHERE year = ?', (year,))
+        row = cursor.fetchone()
+    last_no = int(row['last_no'] if isinstance(row, dict) else row[0])
+    return [format_statement_no(year, n) for n in range(last_no - count + 1, last_no + 1)]
+
+
+# ========== 미수금 원장 ==========
+
+# (거래일자, 합계금액, 입금여부)
+LedgerRow = Tuple[Any, int, Any]
+
+LEDGER_COLUMNS = ('cnt', 'paid_cnt', 'total_amount', 'paid_amount', 'unpaid_amount')
+
+
+def statement_period(statement_date: Any) -> str:
+    """거래일자 → 원장 기간 (YYYY-MM)"""
+    if hasattr(statement_date, 'strftime'):
+        return statement_date.strftime('%Y-%m')
+    return str(statement_date or '')[:7]
+
+
+def _ledger_values(grand_total: Any, is_paid: Any) -> Tuple[int, int, int, int, int]:
+    amount = int(grand_total or 0)
+    paid = is_paid is True or is_paid == 1
+    return 1, int(paid), amount, amount if paid else 0, 0 if paid else amount
+
+
+def _upsert_ledger(cursor, deltas: Dict[str, List[int]]):
+    sym = '%s' if USE_POSTGRESQL else '?'
+    changed = [(period, v) for period, v in deltas.items() if any(v)]
+    if not changed:
+        return
+    cursor.executemany(
+        f'''INSERT INTO invoice_receivables_ledger
+                (period, cnt, paid_cnt, total_amount, paid_amount, unpaid_amount, updated_at)
+            VALUES ({sym}, {sym}, {sym}, {sym}, {sym}, {sym}, CURRENT_TIMESTAMP)
+            ON CONFLICT (period) DO UPDATE SET
+                cnt = invoice_receivables_ledger.cnt + excluded.cnt,
+                paid_cnt = invoice_receivables_ledger.paid_cnt + excluded.paid_cnt,
+                total_amount = invoice_receivables_ledger.total_amount + excluded.total_amount,
+                paid_amount = invoice_receivables_ledger.paid_amount + excluded.paid_amount,
+                unpaid_amount = invoice_receivables_ledger.unpaid_amount + excluded.unpaid_amount,
+                updated_at = CURRENT_TIMESTAMP''',
+        [(period,) + tuple(v) for period, v in changed],
+    )
+    cursor.executemany(
+        f'DELETE FROM invoice_receivables_ledger WHERE period = {sym} AND cnt <= 0',
+        [(period,) for period, _ in changed],
+    )
+
+
+def apply_receivables_ledger_diff(cursor, before: Sequence[LedgerRow], after: Sequence[LedgerRow]):
+    """
+    변경 전후 명세서 행의 차이를 미수금 원장에 반영 (호출자 트랜잭션 안에서 실행, 커밋은 호출자).
+
+    Args:
+        before: 변경 전 (거래일자, 합계금액, 입금여부) 목록 (작성 시 빈 목록)
+        after: 변경 후 목록 (삭제 시 빈 목록)
+    """
+    deltas: Dict[str, List[int]] = defaultdict(lambda: [0] * len(LEDGER_COLUMNS))
+    for sign, rows in ((-1, before), (1, after)):
+        for statement_date, grand_total, is_paid in rows:
+            delta = deltas[statement_period(statement_date)]
+            for i, value in enumerate(_ledger_values(grand_total, is_paid)):
+                delta[i] += sign * value
+    _upsert_ledger(cursor, deltas)
+
+
+def receivables_ledger_rows(cursor, statement_ids: Sequence[int], lock: bool = False) -> List[LedgerRow]:
+    """
+    원장 반영용 명세서 행 조회 (변경 전후 비교에 사용)
+
+    lock=True 는 변경 전 조회용: 커밋까지 행을 잠가 동시 수정이 같은 '변경 전' 값으로 원장을 두 번 고치지 않게 한다.
+    PostgreSQL 은 SELECT ... FOR UPDATE, SQLite 는 먼저 빈 UPDATE 로 쓰기 잠금을 잡는다.
+    """
+    ids = [int(i) for i in statement_ids if i is not None]
+    if not ids:
+        return []
+    sym = '%s' if USE_POSTGRESQL else '?'
+    marks = ', '.join([sym] * len(ids))
+    if lock and not USE_POSTGRESQL:
+        cursor.execute(f'UPDATE invoice_statements SET id = id WHERE id IN ({marks})', ids)
+    cursor.execute(
+        f'''SELECT statement_date, grand_total, is_paid FROM invoice_statements
+            WHERE id IN ({marks})''' + (' FOR UPDATE' if lock and USE_POSTGRESQL else ''),
+        ids,
+    )
+    return [
+        (r['statement_date'], r['grand_total'], r['is_paid']) if isinstance(r, dict) else tuple(r)
+        for r in cursor.fetchall()
+    ]
+
+
+def rebuild_receivables_ledger(cursor) -> int:
+    """invoice_statements → 미수금 원장 전체 재집계 (호출자 트랜잭션 안에서 실행). 기간 수 반환"""
+    cursor.execute('DELETE FROM invoice_receivables_ledger')
+    cursor.execute('SELECT statement_date, grand_total, is_paid FROM invoice_statements')
+    rows = [
+        (r['statement_date'], r['grand_total'], r['is_paid']) if isinstance(r, dict) else tuple(r)
+        for r in cursor.fetchall()
+    ]
+    apply_receivables_ledger_diff(cursor, [], rows)
+    return len({statement_period(r[0]) for r in rows})
+
+
+def _ensure_receivables_ledger_seeded(cursor):
+    """원장이 비어 있고 명세서가 있으면 1회 재집계 (원장 도입 전 데이터)"""
+    cursor.execute('SELECT 1 FROM invoice_receivables_ledger LIMIT 1')
+    if cursor.fetchone():
+        return
+    cursor.execute('SELECT 1 FROM invoice_statements LIMIT 1')
+    if cursor.fetchone():
+        periods = rebuild_receivables_ledger(cursor)
+        print(f'[정보] 거래명세서 미수금 원장 재집계: {periods}개 기간')
+
+
+# ========== 상품 검색 인덱스 ==========
+
+def _ensure_product_search_indexes(cursor):
+    """
+    상품 부분 문자열 검색용 DB 인덱스
+    - PostgreSQL: pg_trgm GIN 인덱스 (ILIKE '%검색어%' 가속). 확장 권한이 없으면 건너뛴다.
+    - SQLite: FTS5 trigram 섀도 테이블 + 동기화 트리거
+    """
+    global PRODUCT_SEARCH_TRGM_READY, PRODUCT_SEARCH_FTS_READY
+    if USE_POSTGRESQL:
+        cursor.execute('SAVEPOINT invoice_product_trgm')
+        try:
+            cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+            for column in ('product_code', 'product_name', 'memo'):
+                cursor.execute(
+                    f'''CREATE INDEX IF NOT EXISTS idx_invoice_products_{column}_trgm
+                        ON invoice_products USING GIN ({column} gin_trgm_ops)'''
+                )
+            cursor.execute('RELEASE SAVEPOINT invoice_product_trgm')
+            PRODUCT_SEARCH_TRGM_READY = True
+        except Exception as e:
+            cursor.execute('ROLLBACK TO SAVEPOINT invoice_product_trgm')
+            print(f'[경고] pg_trgm 상품 검색 인덱스 생성 실패 (일반 ILIKE 사용): {e}')
+        return
+
+    try:
+        ensure_product_fts_sqlite(cursor)
+        PRODUCT_SEARCH_FTS_READY = True
+    except Exception as e:
+        print(f'[경고] FTS5 상품 검색 테이블 생성 실패 (LIKE 사용): {e}')
+
+
+def ensure_product_fts_sqlite(cursor):
+    """SQLite FTS5(trigram) 상품 검색 테이블과 동기화 트리거 생성. 새로 만들면 기존 상품으로 채운다."""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'invoice_products_fts'")
+    created = cursor.fetchone() is None
+    cursor.execute('''
+        CREATE VIRTUAL TABLE IF NOT EXISTS invoice_products_fts USING fts5(
+            product_code, product_name, memo,
+            content='invoice_products', content_rowid='id', tokenize='trigram'
+        )
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS invoice_products_fts_ai AFTER INSERT ON invoice_products BEGIN
+            INSERT INTO invoice_products_fts (rowid, product_code, product_name, memo)
+            VALUES (new.id, new.product_code, new.product_name, new.memo);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS invoice_products_fts_ad AFTER DELETE ON invoice_products BEGIN
+            INSERT INTO invoice_products_fts (invoice_products_fts, rowid, product_code, product_name, memo)
+            VALUES ('delete', old.id, old.product_code, old.product_name, old.memo);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS invoice_products_fts_au AFTER UPDATE ON invoice_products BEGIN
+            INSERT INTO invoice_products_fts (invoice_products_fts, rowid, product_code, product_name, memo)
+            VALUES ('delete', old.id, old.product_code, old.product_name, old.memo);
+            INSERT INTO invoice_products_fts (rowid, product_code, product_name, memo)
+            VALUES (new.id, new.product_code, new.product_name, new.memo);
+        END
+    ''')
+    if created:
+        cursor.execute("INSERT INTO invoice_products_fts (invoice_products_fts) VALUES ('rebuild')")
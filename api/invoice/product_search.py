@@ -0,0 +1,264 @@
+"""
+거래명세서 상품 검색
+
+- 프로세스 인덱스(핫 패스): 상품 전체를 메모리에 올려 두고 1·2글자 n-gram 역색인으로 후보를 좁힌 뒤
+  부분 문자열을 확인한다. 상품 등록/수정/삭제 시 cache_versions 의 버전을 올려 다른 프로세스도 다시 읽는다.
+- DB 검색(상품 수가 INVOICE_PRODUCT_INDEX_MAX_ROWS 를 넘을 때): PostgreSQL 은 pg_trgm GIN 인덱스를 타는
+  ILIKE, SQLite 는 FTS5 trigram 테이블(3글자 이상)을 쓴다.
+
+두 경로 모두 같은 순위 규칙(상품코드 일치 → 코드 접두 → 상품명 접두 → 상품명 포함 → 코드 포함 → 메모 포함,
+같은 순위는 상품코드 순)으로 정렬한다.
+"""
+import os
+import time
+from array import array
+from datetime import date, datetime
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from api.database.models import (
+    get_db_connection,
+    USE_POSTGRESQL,
+    get_cache_version,
+    bump_cache_version,
+    local_cache_generation,
+)
+from api.invoice import models as invoice_models
+
+INVOICE_PRODUCTS_CACHE = 'invoice_products'
+# 다른 프로세스의 변경(버전)을 확인하는 주기
+INVOICE_PRODUCT_INDEX_TTL_SECONDS = 30
+# 이보다 상품이 많으면 메모리 인덱스 대신 DB 검색
+INVOICE_PRODUCT_INDEX_MAX_ROWS = int(os.environ.get('INVOICE_PRODUCT_INDEX_MAX_ROWS', '200000'))
+DEFAULT_SEARCH_LIMIT = 50
+MAX_SEARCH_LIMIT = 500
+
+PRODUCT_COLUMNS = (
+    'id', 'product_code', 'product_name', 'qty_per_carton',
+    'purchase_price', 'wholesale_price', 'group_buy_price', 'retail_price',
+    'expiry_days', 'memo', 'image_url', 'category', 'is_active',
+    'created_at', 'updated_at',
+)
+
+# 순위 (작을수록 앞)
+RANK_CODE_EXACT, RANK_CODE_PREFIX, RANK_NAME_PREFIX, RANK_NAME, RANK_CODE, RANK_MEMO = range(6)
+
+_INDEX_CACHE: Dict[str, Any] = {}
+
+
+def invalidate_product_search_cache(cursor=None) -> None:
+    """상품 검색 인덱스 무효화 훅 (상품 등록/수정/삭제 시, 가능하면 같은 트랜잭션의 cursor 로 호출)"""
+    bump_cache_version(INVOICE_PRODUCTS_CACHE, cursor)
+
+
+def _is_active(value: Any) -> bool:
+    return value is None or value is True or value == 1
+
+
+def _product_dict(row) -> Dict[str, Any]:
+    values = tuple(row[c] for c in PRODUCT_COLUMNS) if isinstance(row, dict) else tuple(row)
+    product = dict(zip(PRODUCT_COLUMNS, values))
+    for key in ('created_at', 'updated_at'):
+        value = product.get(key)
+        if isinstance(value, datetime):
+            product[key] = value.strftime('%Y-%m-%d %H:%M:%S')
+        elif isinstance(value, date):
+            product[key] = value.strftime('%Y-%m-%d')
+    return product
+
+
+def rank_product(query: str, code: str, name: str, memo: str) -> Optional[int]:
+    """소문자 검색어·필드 기준 순위 (일치하지 않으면 None)"""
+    if code == query:
+        return RANK_CODE_EXACT
+    if code.startswith(query):
+        return RANK_CODE_PREFIX
+    if name.startswith(query):
+        return RANK_NAME_PREFIX
+    if query in name:
+        return RANK_NAME
+    if query in code:
+        return RANK_CODE
+    if query in memo:
+        return RANK_MEMO
+    return None
+
+
+class ProductSearchIndex:
+    """
+    상품 n-gram 역색인
+
+    글자(1-gram)와 2-gram 마다 상품 위치 목록(array)을 두고, 검색어의 n-gram 중 가장 드문 것의 목록만
+    훑으면서 부분 문자열·순위를 확인한다. 위치는 상품코드 순이라 같은 순위끼리는 별도 정렬이 필요 없다.
+    """
+
+    def __init__(self, products: Iterable[Dict[str, Any]]):
+        self.products = sorted(products, key=lambda p: (p.get('product_code') or '', p['id']))
+        self._fields: List[Tuple[str, str, str]] = []
+        self._active = array('b')
+        postings: Dict[str, List[int]] = {}
+        for pos, product in enumerate(self.products):
+            fields = tuple((product.get(k) or '').lower() for k in ('product_code', 'product_name', 'memo'))
+            self._fields.append(fields)
+            self._active.append(1 if _is_active(product.get('is_active')) else 0)
+            grams = set()
+            for text in fields:
+                grams.update(text)
+                grams.update(text[i:i + 2] for i in range(len(text) - 1))
+            for gram in grams:
+                postings.setdefault(gram, []).append(pos)
+        self._postings = {gram: array('i', positions) for gram, positions in postings.items()}
+
+    def __len__(self):
+        return len(self.products)
+
+    def search(self, query: str, include_inactive: bool = False,
+               limit: Optional[int] = DEFAULT_SEARCH_LIMIT) -> List[Dict[str, Any]]:
+        """순위순 검색 (limit 이 None 이면 일치하는 상품 전부)"""
+        q = (query or '').strip().lower()
+        if not q:
+            return []
+        grams = {q} if len(q) == 1 else {q[i:i + 2] for i in range(len(q) - 1)}
+        lists = [self._postings.get(g) for g in grams]
+        if any(lst is None for lst in lists):
+            return []
+        candidates = min(lists, key=len)
+
+        ranked: List[List[int]] = [[] for _ in range(RANK_MEMO + 1)]
+        for pos in candidates:
+            if not include_inactive and not self._active[pos]:
+                continue
+            rank = rank_product(q, *self._fields[pos])
+            if rank is None:
+                continue
+            ranked[rank].append(pos)
+        results: List[Dict[str, Any]] = []
+        for positions in ranked:
+            for pos in positions:
+                results.append(self.products[pos])
+                if limit is not None and len(results) >= limit:
+                    return results
+        return results
+
+
+def _load_products(cursor) -> List[Dict[str, Any]]:
+    cursor.execute(f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM invoice_products")
+    return [_product_dict(r) for r in cursor.fetchall()]
+
+
+def get_product_search_index(refresh: bool = False) -> Optional[ProductSearchIndex]:
+    """
+    프로세스 상품 인덱스 (없거나 버전이 바뀌었으면 다시 만든다)
+
+    Returns:
+        인덱스, 상품 수가 INVOICE_PRODUCT_INDEX_MAX_ROWS 를 넘으면 None (DB 검색 사용)
+    """
+    generation = local_cache_generation(INVOICE_PRODUCTS_CACHE)
+    entry = _INDEX_CACHE.get('products')
+    if (not refresh and entry and entry['generation'] == generation
+            and time.monotonic() - entry['checked_at'] < INVOICE_PRODUCT_INDEX_TTL_SECONDS):
+        return entry['index']
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        version = get_cache_version(INVOICE_PRODUCTS_CACHE, cursor)
+        if not refresh and entry and entry['version'] == version:
+            entry.update(generation=generation, checked_at=time.monotonic())
+            return entry['index']
+        cursor.execute('SELECT COUNT(*) FROM invoice_products')
+        total = int(cursor.fetchone()[0])
+        index = None
+        if total <= INVOICE_PRODUCT_INDEX_MAX_ROWS:
+            started = time.perf_counter()
+            index = ProductSearchIndex(_load_products(cursor))
+            print(f'[정보] 상품 검색 인덱스 생성: {len(index)}건, {(time.perf_counter() - started) * 1000:.0f}ms')
+    finally:
+        cursor.close()
+        conn.close()
+
+    _INDEX_CACHE['products'] = {
+        'index': index,
+        'version': version,
+        'generation': generation,
+        'checked_at': time.monotonic(),
+    }
+    return index
+
+
+def _like_escape(text: str) -> str:
+    """LIKE 패턴용 이스케이프 (검색어의 %, _ 를 글자 그대로 찾도록, ESCAPE '\\' 와 함께 사용)"""
+    return text.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def _search_products_db(query: str, include_inactive: bool, limit: Optional[int]) -> List[Dict[str, Any]]:
+    """DB 검색 (pg_trgm ILIKE / SQLite FTS5 trigram, 짧은 검색어는 LIKE)"""
+    q = query.strip().lower()
+    sym = '%s' if USE_POSTGRESQL else '?'
+    esc = "ESCAPE '\\'"
+    escaped = _like_escape(q)
+    contains, prefix = f'%{escaped}%', f'{escaped}%'
+    if USE_POSTGRESQL:
+        where = (f'(product_code ILIKE {sym} {esc} OR product_name ILIKE {sym} {esc} '
+                 f'OR memo ILIKE {sym} {esc})')
+        params: List[Any] = [contains, contains, contains]
+        if not include_inactive:
+            where += ' AND (is_active IS NULL OR is_active = TRUE)'
+        source = 'invoice_products'
+    else:
+        if invoice_models.PRODUCT_SEARCH_FTS_READY and len(q) >= 3:
+            source = (f"invoice_products WHERE id IN (SELECT rowid FROM invoice_products_fts "
+                      f"WHERE invoice_products_fts MATCH {sym})")
+            params = ['"' + q.replace('"', '""') + '"']
+            where = ''
+        else:
+            source = 'invoice_products'
+            where = (f'(product_code LIKE {sym} {esc} OR product_name LIKE {sym} {esc} '
+                     f'OR memo LIKE {sym} {esc})')
+            params = [contains, contains, contains]
+        if not include_inactive:
+            where += (' AND ' if where else '') + '(is_active IS NULL OR is_active = 1)'
+    if where:
+        where = (' AND ' if ' WHERE ' in source else ' WHERE ') + where
+    rank_sql = f'''CASE
+        WHEN LOWER(product_code) = {sym} THEN {RANK_CODE_EXACT}
+        WHEN LOWER(product_code) LIKE {sym} {esc} THEN {RANK_CODE_PREFIX}
+        WHEN LOWER(product_name) LIKE {sym} {esc} THEN {RANK_NAME_PREFIX}
+        WHEN LOWER(product_name) LIKE {sym} {esc} THEN {RANK_NAME}
+        WHEN LOWER(product_code) LIKE {sym} {esc} THEN {RANK_CODE}
+        ELSE {RANK_MEMO} END'''
+    params += [q, prefix, prefix, contains, contains]
+    limit_sql = ''
+    if limit is not None:
+        limit_sql = f' LIMIT {sym}'
+        params.append(limit)
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f"SELECT {', '.join(PRODUCT_COLUMNS)} FROM {source}{where} "
+            f"ORDER BY {rank_sql}, product_code{limit_sql}",
+            params,
+        )
+        return [_product_dict(r) for r in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def search_products(query: str, include_inactive: bool = False,
+                    limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    상품 검색 (순위순)
+
+    Args:
+        query: 검색어 (상품코드·상품명·메모 부분 일치, 대소문자 무시)
+        include_inactive: 비활성 상품 포함 여부
+        limit: 최대 건수 (None 이면 일치하는 상품 전부, 상한 MAX_SEARCH_LIMIT 는 호출하는 쪽에서 적용)
+    """
+    if limit is not None:
+        limit = max(1, int(limit))
+    index = get_product_search_index()
+    if index is not None:
+        return index.search(query, include_inactive=include_inactive, limit=limit)
+    return _search_products_db(query, include_inactive, limit)
@@ -1,12 +1,18 @@
 """
 거래명세서 API 라우트 (관리자 전용)
 """
-from flask import Blueprint, request, jsonify
-from urllib.parse import unquote
+from flask import Blueprint, request, jsonify, Response
+from urllib.parse import unquote, quote
 from datetime import datetime, date
 
 from api.database.models import get_db_connection, USE_POSTGRESQL, get_all_companies
-from api.invoice.models import init_invoice_tables
+from api.invoice.models import (
+    init_invoice_tables,
+    allocate_statement_numbers,
+    apply_receivables_ledger_diff,
+    receivables_ledger_rows,
+)
+from api.invoice.product_search import search_products, invalidate_product_search_cache, MAX_SEARCH_LIMIT
 from api.uploads.cloudinary_upload import upload_single_file_to_cloudinary
 
 if USE_POSTGRESQL:
@@ -126,10 +132,26 @@ def health():
 
 @invoice_bp.route('/products', methods=['GET'])
 def get_products():
-    """상품 목록 (검색, is_active 필터)"""
+    """
+    상품 목록 (검색, is_active 필터)
+
+    search 가 있으면 상품 검색 인덱스로 순위순 결과를 돌려준다. limit 이 없으면 일치하는 상품 전부,
+    limit(최대 500)을 주면 그 수만큼 돌려주고 더 있는지를 has_more 로 알려준다.
+    search 가 없으면 전체 목록 (limit 지정 시 그 수만큼).
+    """
     try:
         search = request.args.get('search', '').strip()
         include_inactive = request.args.get('include_inactive', '0') == '1'
+        limit = request.args.get('limit', '').strip()
+        limit = min(int(limit), MAX_SEARCH_LIMIT) if limit.isdigit() and int(limit) > 0 else None
+
+        if search:
+            data = search_products(search, include_inactive=include_inactive,
+                                   limit=limit + 1 if limit else None)
+            has_more = bool(limit) and len(data) > limit
+            if has_more:
+                data = data[:limit]
+            return jsonify({'success': True, 'data': data, 'count': len(data), 'has_more': has_more})
 
         conn = get_db_connection()
         if USE_POSTGRESQL:
@@ -150,11 +172,10 @@ def get_products():
                 params = []
                 if not include_inactive:
                     sql += ' AND (is_active IS NULL OR is_active = TRUE)'
-                if search:
-                    sql += ' AND (product_code ILIKE %s OR product_name ILIKE %s OR memo ILIKE %s)'
-                    p = f'%{search}%'
-                    params = [p, p, p]
                 sql += ' ORDER BY product_code ASC'
+                if limit:
+                    sql += ' LIMIT %s'
+                    params.append(limit)
                 cursor.execute(sql, params if params else None)
             else:
                 sql = '''
@@ -168,11 +189,10 @@ def get_products():
                 params = []
                 if not include_inactive:
                     sql += ' AND (is_active IS NULL OR is_active = 1)'
-                if search:
-                    sql += ' AND (product_code LIKE ? OR product_name LIKE ? OR memo LIKE ?)'
-                    p = f'%{search}%'
-                    params = [p, p, p]
                 sql += ' ORDER BY product_code ASC'
+                if limit:
+                    sql += ' LIMIT ?'
+                    params.append(limit)
                 cursor.execute(sql, params if params else None)
 
             rows = cursor.fetchall()
@@ -263,6 +283,7 @@ def create_product():
                 ''', (product_code, product_name, qty_per_carton, purchase_price, wholesale_price,
                       group_buy_price, retail_price, expiry_days, memo, image_url, category))
                 new_id = cursor.lastrowid
+            invalidate_product_search_cache(cursor)
             conn.commit()
             return jsonify({'success': True, 'message': '상품이 등록되었습니다.', 'id': new_id})
         except Exception as db_err:
@@ -351,8 +372,11 @@ def update_product(product_id):
                     f"UPDATE invoice_products SET {', '.join(updates)} WHERE id = ?",
                     params
                 )
+            updated = cursor.rowcount
+            if updated:
+                invalidate_product_search_cache(cursor)
             conn.commit()
-            if cursor.rowcount == 0:
+            if updated == 0:
                 return jsonify({'success': False, 'message': '상품을 찾을 수 없습니다.'}), 404
             return jsonify({'success': True, 'message': '상품이 수정되었습니다.'})
         except Exception as db_err:
@@ -388,8 +412,11 @@ def delete_product(product_id):
                     'UPDATE invoice_products SET is_active = 0, updated_at = CURRENT_TIMESTAMP WHERE id = ?',
                     (product_id,)
                 )
+            updated = cursor.rowcount
+            if updated:
+                invalidate_product_search_cache(cursor)
             conn.commit()
-            if cursor.rowcount == 0:
+            if updated == 0:
                 return jsonify({'success': False, 'message': '상품을 찾을 수 없습니다.'}), 404
             return jsonify({'success': True, 'message': '상품이 비활성화되었습니다.'})
         finally:
@@ -675,29 +702,8 @@ def delete_customer(customer_id):
 # ========== 거래명세서 API ==========
 
 def _generate_statement_no(conn, cursor):
-    """명세서 번호 자동 생성: INV-{년}-{5자리}"""
-    year = datetime.now().strftime('%Y')
-    prefix = f'INV-{year}-'
-    if USE_POSTGRESQL:
-        cursor.execute(
-            "SELECT statement_no FROM invoice_statements WHERE statement_no LIKE %s ORDER BY statement_no DESC LIMIT 1",
-            (prefix + '%',)
-        )
-    else:
-        cursor.execute(
-            "SELECT statement_no FROM invoice_statements WHERE statement_no LIKE ? ORDER BY statement_no DESC LIMIT 1",
-            (prefix + '%',)
-        )
-    row = cursor.fetchone()
-    if row:
-        last_no = row[0] if isinstance(row, (tuple, list)) else row.get('statement_no', '')
-        try:
-            num = int(last_no.replace(prefix, '')) + 1
-        except (ValueError, TypeError):
-            num = 1
-    else:
-        num = 1
-    return f'{prefix}{num:05d}'
+    """명세서 번호 자동 생성: INV-{년}-{5자리} (연도별 채번 테이블, 명세서 INSERT 와 같은 트랜잭션)"""
+    return allocate_statement_numbers(cursor, 1)[0]
 
 
 @invoice_bp.route('/statements', methods=['GET'])
@@ -840,6 +846,7 @@ def update_statement(statement_id):
                 return jsonify({'success': False, 'message': '수량·단가가 올바른 품목을 1개 이상 넣어주세요.'}), 400
             prepared, total_amount, vat_amount, grand_total = prep
             vif_db = vat_included if USE_POSTGRESQL else (1 if vat_included else 0)
+            ledger_before = receivables_ledger_rows(cursor, [statement_id], lock=True)
 
             if USE_POSTGRESQL:
                 cursor.execute('''
@@ -879,6 +886,7 @@ def update_statement(statement_id):
                         VALUES (?, ?, ?, ?, ?, ?, ?)
                     ''', (statement_id, product_id, product_name, qty, unit_price, amount, i))
 
+            apply_receivables_ledger_diff(cursor, ledger_before, receivables_ledger_rows(cursor, [statement_id]))
             conn.commit()
             return jsonify({'success': True, 'message': '거래명세서가 수정되었습니다.'})
         except Exception as db_err:
@@ -901,21 +909,14 @@ def delete_statement(statement_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
-            if USE_POSTGRESQL:
-                cursor.execute(
-                    'SELECT is_paid FROM invoice_statements WHERE id = %s',
-                    (statement_id,),
-                )
-            else:
-                cursor.execute(
-                    'SELECT is_paid FROM invoice_statements WHERE id = ?',
-                    (statement_id,),
-                )
-            row = cursor.fetchone()
-            if not row:
+            # 행을 잠근 뒤 입금 여부 확인 (동시 입금 처리와 엇갈리지 않게)
+            ledger_before = receivables_ledger_rows(cursor, [statement_id], lock=True)
+            if not ledger_before:
+                conn.rollback()
                 return jsonify({'success': False, 'message': '명세서를 찾을 수 없습니다.'}), 404
-            paid = row[0]
+            paid = ledger_before[0][2]
             if paid is True or paid == 1:
+                conn.rollback()
                 return jsonify({
                     'success': False,
                     'message': '입금 완료된 명세서는 삭제할 수 없습니다.',
@@ -925,8 +926,11 @@ def delete_statement(statement_id):
                 cursor.execute('DELETE FROM invoice_statements WHERE id = %s', (statement_id,))
             else:
                 cursor.execute('DELETE FROM invoice_statements WHERE id = ?', (statement_id,))
+            deleted = cursor.rowcount
+            if deleted:
+                apply_receivables_ledger_diff(cursor, ledger_before, [])
             conn.commit()
-            if cursor.rowcount == 0:
+            if deleted == 0:
                 return jsonify({'success': False, 'message': '명세서를 찾을 수 없습니다.'}), 404
             return jsonify({'success': True, 'message': '거래명세서가 삭제되었습니다.'})
         except Exception as db_err:
@@ -964,12 +968,12 @@ def create_statement():
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
-            statement_no = _generate_statement_no(conn, cursor)
             prep = _prepare_statement_lines(items, vat_included)
             if prep is None:
                 return jsonify({'success': False, 'message': '수량·단가가 올바른 품목을 1개 이상 넣어주세요.'}), 400
             prepared, total_amount, vat_amount, grand_total = prep
             vif_db = vat_included if USE_POSTGRESQL else (1 if vat_included else 0)
+            statement_no = _generate_statement_no(conn, cursor)
 
             if USE_POSTGRESQL:
                 cursor.execute('''
@@ -988,21 +992,17 @@ def create_statement():
                 ''', (statement_no, statement_date, customer_id, total_amount, vat_amount, grand_total, memo, vif_db))
                 stmt_id = cursor.lastrowid
 
-            for i, (it, qty, unit_price, amount) in enumerate(prepared):
-                product_id = int(it.get('product_id', 0) or 0)
-                product_name = (it.get('product_name') or '').strip() or '-'
-                if USE_POSTGRESQL:
-                    cursor.execute('''
-                        INSERT INTO invoice_statement_items
-                        (statement_id, product_id, product_name, qty, unit_price, amount, sort_order)
-                        VALUES (%s, %s, %s, %s, %s, %s, %s)
-                    ''', (stmt_id, product_id, product_name, qty, unit_price, amount, i))
-                else:
-                    cursor.execute('''
-                        INSERT INTO invoice_statement_items
-                        (statement_id, product_id, product_name, qty, unit_price, amount, sort_order)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (stmt_id, product_id, product_name, qty, unit_price, amount, i))
+            _insert_multi_rows(
+                cursor,
+                '''INSERT INTO invoice_statement_items
+                    (statement_id, product_id, product_name, qty, unit_price, amount, sort_order)''',
+                [
+                    (stmt_id, int(it.get('product_id', 0) or 0), (it.get('product_name') or '').strip() or '-',
+                     qty, unit_price, amount, i)
+                    for i, (it, qty, unit_price, amount) in enumerate(prepared)
+                ],
+            )
+            apply_receivables_ledger_diff(cursor, [], [(statement_date, grand_total, False)])
 
             conn.commit()
             return jsonify({'success': True, 'message': '거래명세서가 등록되었습니다.', 'id': stmt_id, 'statement_no': statement_no})
@@ -1019,6 +1019,239 @@ def create_statement():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+# 일괄 작성 한 번에 받는 명세서 수 / 다중 행 INSERT 한 문장당 행 수
+INVOICE_BATCH_MAX_STATEMENTS = 200
+_MULTI_INSERT_CHUNK = 500
+# 한 문장의 바인드 변수 상한 (구버전 SQLite 의 SQLITE_MAX_VARIABLE_NUMBER 기본값)
+_SQL_MAX_VARIABLES = 999
+
+
+def _insert_multi_rows(cursor, insert_sql, rows, returning=''):
+    """
+    다중 행 INSERT (VALUES (...), (...) 한 문장, 바인드 변수가 _SQL_MAX_VARIABLES 를 넘지 않는 행 수씩).
+    returning 이 있으면(PostgreSQL) 반환 행 목록을 돌려준다.
+    """
+    if not rows:
+        return []
+    sym = '%s' if USE_POSTGRESQL else '?'
+    placeholder = '(' + ', '.join([sym] * len(rows[0])) + ')'
+    chunk_rows = max(1, min(_MULTI_INSERT_CHUNK, _SQL_MAX_VARIABLES // len(rows[0])))
+    returned = []
+    for start in range(0, len(rows), chunk_rows):
+        chunk = rows[start:start + chunk_rows]
+        sql = f"{insert_sql} VALUES {', '.join([placeholder] * len(chunk))}"
+        if returning:
+            sql += f' RETURNING {returning}'
+        cursor.execute(sql, [v for row in chunk for v in row])
+        if returning:
+            returned.extend(cursor.fetchall())
+    return returned
+
+
+def _validate_batch_statement(index, data):
+    """일괄 작성 항목 검증 → (정규화된 명세서, 오류 메시지)"""
+    if not isinstance(data, dict):
+        return None, f'{index + 1}번째 명세서 형식이 올바르지 않습니다.'
+    statement_date = (data.get('statement_date') or '').strip()
+    if not statement_date:
+        return None, f'{index + 1}번째 명세서: 거래일자를 입력하세요.'
+    try:
+        customer_id = int(data.get('customer_id') or 0)
+    except (TypeError, ValueError):
+        customer_id = 0
+    if customer_id <= 0:
+        return None, f'{index + 1}번째 명세서: 거래처를 선택하세요.'
+    items = data.get('items') or []
+    if not isinstance(items, list) or not items:
+        return None, f'{index + 1}번째 명세서: 품목을 1개 이상 추가하세요.'
+    vat_included = _parse_vat_included(data)
+    prep = _prepare_statement_lines(items, vat_included)
+    if prep is None:
+        return None, f'{index + 1}번째 명세서: 수량·단가가 올바른 품목을 1개 이상 넣어주세요.'
+    prepared, total_amount, vat_amount, grand_total = prep
+    return {
+        'statement_date': statement_date,
+        'customer_id': customer_id,
+        'memo': (data.get('memo') or '').strip() or None,
+        'vat_included': vat_included,
+        'total_amount': total_amount,
+        'vat_amount': vat_amount,
+        'grand_total': grand_total,
+        'items': [
+            {
+                'product_id': int(it.get('product_id', 0) or 0),
+                'product_name': (it.get('product_name') or '').strip() or '-',
+                'qty': qty,
+                'unit_price': unit_price,
+                'amount': amount,
+            }
+            for it, qty, unit_price, amount in prepared
+        ],
+    }, None
+
+
+@invoice_bp.route('/statements/batch', methods=['POST'])
+def create_statements_batch():
+    """
+    거래명세서 일괄 작성 (월말 거래처별 발행 등)
+
+    요청: {"statements": [{statement_date, customer_id, memo, vat_included, items}, ...],
+           "render": "xlsx" | "zip" (선택)}
+    번호는 한 번에 연속 구간으로 예약하고, 명세서·품목은 다중 행 INSERT 로 한 트랜잭션에 저장한다.
+    하나라도 검증에 실패하면 아무것도 저장하지 않는다.
+    render 가 xlsx 면 명세서별 시트를 가진 워크북, zip 이면 명세서별 파일 ZIP(워커 병렬 생성)으로 응답한다.
+    파일 생성은 커밋 뒤에 한다 (번호 시퀀스 행 잠금을 파일 생성 동안 잡고 있지 않도록).
+    생성에 실패하면 명세서는 저장된 채로 두고, 저장된 번호를 담아 오류로 응답한다.
+    """
+    try:
+        data = request.get_json() or {}
+        raw_statements = data.get('statements')
+        render = (data.get('render') or '').strip().lower()
+        if not isinstance(raw_statements, list) or not raw_statements:
+            return jsonify({'success': False, 'message': '작성할 명세서 목록(statements)이 필요합니다.'}), 400
+        if len(raw_statements) > INVOICE_BATCH_MAX_STATEMENTS:
+            return jsonify({
+                'success': False,
+                'message': f'한 번에 최대 {INVOICE_BATCH_MAX_STATEMENTS}건까지 작성할 수 있습니다.'
+            }), 400
+        if render not in ('', 'xlsx', 'zip'):
+            return jsonify({'success': False, 'message': 'render 는 xlsx 또는 zip 이어야 합니다.'}), 400
+
+        statements, errors = [], []
+        for i, raw in enumerate(raw_statements):
+            stmt, error = _validate_batch_statement(i, raw)
+            if error:
+                errors.append(error)
+            else:
+                statements.append(stmt)
+        if errors:
+            return jsonify({'success': False, 'message': errors[0], 'errors': errors}), 400
+
+        sym = '%s' if USE_POSTGRESQL else '?'
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            customer_ids = sorted({s['customer_id'] for s in statements})
+            cursor.execute(
+                f'''SELECT id, customer_name, address, business_number, representative
+                    FROM invoice_customers WHERE id IN ({', '.join([sym] * len(customer_ids))})''',
+                customer_ids,
+            )
+            customers = {}
+            for row in cursor.fetchall():
+                values = tuple(row.values()) if isinstance(row, dict) else tuple(row)
+                customers[values[0]] = dict(zip(('customer_name', 'address', 'business_number', 'representative'),
+                                                values[1:]))
+            missing = [cid for cid in customer_ids if cid not in customers]
+            if missing:
+                return jsonify({
+                    'success': False,
+                    'message': f"거래처를 찾을 수 없습니다: {', '.join(map(str, missing))}"
+                }), 400
+
+            numbers = allocate_statement_numbers(cursor, len(statements))
+            header_rows = []
+            for stmt, statement_no in zip(statements, numbers):
+                stmt['statement_no'] = statement_no
+                vif_db = stmt['vat_included'] if USE_POSTGRESQL else (1 if stmt['vat_included'] else 0)
+                header_rows.append((statement_no, stmt['statement_date'], stmt['customer_id'],
+                                    stmt['total_amount'], stmt['vat_amount'], stmt['grand_total'],
+                                    stmt['memo'], vif_db))
+            header_sql = '''INSERT INTO invoice_statements
+                (statement_no, statement_date, customer_id, total_amount, vat_amount, grand_total, memo, vat_included)'''
+            if USE_POSTGRESQL:
+                returned = _insert_multi_rows(cursor, header_sql, header_rows, returning='id, statement_no')
+            else:
+                _insert_multi_rows(cursor, header_sql, header_rows)
+                returned = []
+                for start in range(0, len(numbers), _MULTI_INSERT_CHUNK):
+                    chunk = numbers[start:start + _MULTI_INSERT_CHUNK]
+                    cursor.execute(
+                        f"SELECT id, statement_no FROM invoice_statements "
+                        f"WHERE statement_no IN ({', '.join([sym] * len(chunk))})",
+                        chunk,
+                    )
+                    returned.extend(cursor.fetchall())
+            ids_by_no = {}
+            for row in returned:
+                values = tuple(row.values()) if isinstance(row, dict) else tuple(row)
+                ids_by_no[values[1]] = values[0]
+
+            item_rows = []
+            for stmt in statements:
+                stmt['id'] = ids_by_no[stmt['statement_no']]
+                for i, it in enumerate(stmt['items']):
+                    item_rows.append((stmt['id'], it['product_id'], it['product_name'], it['qty'],
+                                      it['unit_price'], it['amount'], i))
+            _insert_multi_rows(
+                cursor,
+                '''INSERT INTO invoice_statement_items
+                    (statement_id, product_id, product_name, qty, unit_price, amount, sort_order)''',
+                item_rows,
+            )
+            apply_receivables_ledger_diff(
+                cursor, [], [(s['statement_date'], s['grand_total'], False) for s in statements]
+            )
+
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+
+        created = [{'id': s['id'], 'statement_no': s['statement_no'], 'customer_id': s['customer_id']}
+                   for s in statements]
+        print(f"[정보] 거래명세서 일괄 작성: {len(created)}건 ({created[0]['statement_no']} ~ {created[-1]['statement_no']})")
+        if not render:
+            return jsonify({
+                'success': True,
+                'message': f'거래명세서 {len(created)}건이 등록되었습니다.',
+                'data': created,
+                'count': len(created),
+            })
+
+        # 커밋된 값(번호·id 포함)으로 파일 생성 - 잠금 없이 실행
+        try:
+            for stmt in statements:
+                stmt.update(customers[stmt['customer_id']])
+            from api.invoice.statement_export import render_statements_workbook, render_statements_zip
+            headers = {
+                'X-Statement-Count': str(len(created)),
+                'X-Statement-Ids': ','.join(str(c['id']) for c in created),
+                'X-Statement-Nos': ','.join(c['statement_no'] for c in created),
+            }
+            file_date = statements[0]['statement_date'].replace('-', '')
+            if render == 'zip':
+                output, stats = render_statements_zip(statements)
+                headers['X-Statement-Render-Mode'] = f"{stats['mode']}:{stats['workers']}"
+                headers['X-Statement-Wall-Ms'] = str(stats['wall_ms'])
+                filename, mimetype = f'거래명세서_일괄_{file_date}.zip', 'application/zip'
+            else:
+                output = render_statements_workbook(statements)
+                filename = f'거래명세서_일괄_{file_date}.xlsx'
+                mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
+            headers['Content-Disposition'] = f"attachment; filename*=UTF-8''{quote(filename)}"
+        except Exception as e:
+            print(f"[오류] 명세서 일괄 파일 생성 (명세서는 저장됨): {e}")
+            import traceback
+            traceback.print_exc()
+            return jsonify({
+                'success': False,
+                'message': (f"거래명세서 {len(created)}건은 등록되었지만 파일 생성에 실패했습니다 "
+                            f"({created[0]['statement_no']} ~ {created[-1]['statement_no']}): {e}"),
+                'data': created,
+                'count': len(created),
+            }), 500
+        return Response(output.getvalue(), mimetype=mimetype, headers=headers)
+    except Exception as e:
+        print(f"[오류] 명세서 일괄 등록: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @invoice_bp.route('/statements/<int:statement_id>/paid', methods=['PUT'])
 def update_statement_paid(statement_id):
     """입금 완료 처리"""
@@ -1026,20 +1259,28 @@ def update_statement_paid(statement_id):
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
+            # 미입금 행만 바꿔 동시 요청 중 하나만 원장에 반영 (UPDATE 가 행을 잠그므로 변경 후 값으로 변경 전을 만든다)
             if USE_POSTGRESQL:
                 cursor.execute('''
                     UPDATE invoice_statements SET is_paid = TRUE, paid_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
+                    WHERE id = %s AND (is_paid IS NULL OR is_paid = FALSE)
                 ''', (statement_id,))
             else:
                 cursor.execute('''
                     UPDATE invoice_statements SET is_paid = 1, paid_at = CURRENT_TIMESTAMP, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
+                    WHERE id = ? AND (is_paid IS NULL OR is_paid = 0)
                 ''', (statement_id,))
-            conn.commit()
-            if cursor.rowcount == 0:
+            updated = cursor.rowcount
+            if updated > 0:
+                ledger_after = receivables_ledger_rows(cursor, [statement_id])
+                ledger_before = [(statement_date, grand_total, False) for statement_date, grand_total, _ in ledger_after]
+                apply_receivables_ledger_diff(cursor, ledger_before, ledger_after)
+                conn.commit()
+                return jsonify({'success': True, 'message': '입금 완료 처리되었습니다.'})
+            conn.rollback()
+            if not receivables_ledger_rows(cursor, [statement_id]):
                 return jsonify({'success': False, 'message': '명세서를 찾을 수 없습니다.'}), 404
-            return jsonify({'success': True, 'message': '입금 완료 처리되었습니다.'})
+            return jsonify({'success': True, 'message': '이미 입금 완료된 명세서입니다.'})
         finally:
             cursor.close()
             conn.close()
@@ -1065,52 +1306,24 @@ def get_settlements_summary():
             cursor = conn.cursor()
 
         try:
+            # 미수금 원장(월별 증분 집계)에서 읽음 - 명세서 이력 크기와 무관하게 기간 수만큼만 읽는다
             if group_by == 'year':
-                if USE_POSTGRESQL:
-                    cursor.execute('''
-                        SELECT TO_CHAR(s.statement_date, 'YYYY') AS period,
-                               COUNT(*) AS cnt,
-                               COALESCE(SUM(s.grand_total), 0)::BIGINT AS total_amount,
-                               COALESCE(SUM(CASE WHEN s.is_paid = TRUE THEN s.grand_total ELSE 0 END), 0)::BIGINT AS paid_amount,
-                               COALESCE(SUM(CASE WHEN s.is_paid = FALSE OR s.is_paid IS NULL THEN s.grand_total ELSE 0 END), 0)::BIGINT AS unpaid_amount
-                        FROM invoice_statements s
-                        GROUP BY TO_CHAR(s.statement_date, 'YYYY')
-                        ORDER BY period DESC
-                    ''')
-                else:
-                    cursor.execute('''
-                        SELECT strftime('%Y', s.statement_date) AS period,
-                               COUNT(*) AS cnt,
-                               SUM(s.grand_total) AS total_amount,
-                               SUM(CASE WHEN s.is_paid = 1 THEN s.grand_total ELSE 0 END) AS paid_amount,
-                               SUM(CASE WHEN s.is_paid = 0 OR s.is_paid IS NULL THEN s.grand_total ELSE 0 END) AS unpaid_amount
-                        FROM invoice_statements s
-                        GROUP BY strftime('%Y', s.statement_date)
-                        ORDER BY period DESC
-                    ''')
+                cursor.execute('''
+                    SELECT SUBSTR(period, 1, 4) AS period,
+                           SUM(cnt) AS cnt,
+                           SUM(total_amount) AS total_amount,
+                           SUM(paid_amount) AS paid_amount,
+                           SUM(unpaid_amount) AS unpaid_amount
+                    FROM invoice_receivables_ledger
+                    GROUP BY SUBSTR(period, 1, 4)
+                    ORDER BY period DESC
+                ''')
             else:
-                if USE_POSTGRESQL:
-                    cursor.execute('''
-                        SELECT TO_CHAR(s.statement_date, 'YYYY-MM') AS period,
-                               COUNT(*) AS cnt,
-                               COALESCE(SUM(s.grand_total), 0)::BIGINT AS total_amount,
-                               COALESCE(SUM(CASE WHEN s.is_paid = TRUE THEN s.grand_total ELSE 0 END), 0)::BIGINT AS paid_amount,
-                               COALESCE(SUM(CASE WHEN s.is_paid = FALSE OR s.is_paid IS NULL THEN s.grand_total ELSE 0 END), 0)::BIGINT AS unpaid_amount
-                        FROM invoice_statements s
-                        GROUP BY TO_CHAR(s.statement_date, 'YYYY-MM')
-                        ORDER BY period DESC
-                    ''')
-                else:
-                    cursor.execute('''
-                        SELECT strftime('%Y-%m', s.statement_date) AS period,
-                               COUNT(*) AS cnt,
-                               SUM(s.grand_total) AS total_amount,
-                               SUM(CASE WHEN s.is_paid = 1 THEN s.grand_total ELSE 0 END) AS paid_amount,
-                               SUM(CASE WHEN s.is_paid = 0 OR s.is_paid IS NULL THEN s.grand_total ELSE 0 END) AS unpaid_amount
-                        FROM invoice_statements s
-                        GROUP BY strftime('%Y-%m', s.statement_date)
-                        ORDER BY period DESC
-                    ''')
+                cursor.execute('''
+                    SELECT period, cnt, total_amount, paid_amount, unpaid_amount
+                    FROM invoice_receivables_ledger
+                    ORDER BY period DESC
+                ''')
 
             rows = cursor.fetchall()
             data = []
@@ -1135,7 +1348,7 @@ def get_settlements_summary():
 
 @invoice_bp.route('/settlements/unpaid', methods=['GET'])
 def get_settlements_unpaid():
-    """미정산(미입금) 명세서 목록"""
+    """미정산(미입금) 명세서 목록 (idx_invoice_statements_unpaid 부분 인덱스 사용)"""
     try:
         conn = get_db_connection()
         if USE_POSTGRESQL:
@@ -0,0 +1,265 @@
+"""
+거래명세서 엑셀 내보내기
+
+invoice.html 인쇄 양식(공급자/공급받는자, 품목표, 합계, 비고)을 엑셀 시트로 옮긴다.
+- 여러 명세서를 시트별로 담은 워크북 하나
+- 명세서별 xlsx 파일을 워커 프로세스에서 병렬 생성해 묶은 ZIP
+"""
+import os
+import time
+import zipfile
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+from typing import Any, Dict, Optional, Sequence, Tuple
+
+from openpyxl import Workbook
+from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
+
+# 공급자 정보 (invoice.html 인쇄 양식과 동일)
+INVOICE_SUPPLIER_ROWS = (
+    ('상호', '제이제이'),
+    ('사업자번호', '803-15-01907'),
+    ('대표자', '이정민'),
+    ('업태', '도매및 소매업'),
+    ('종목', '상품 종합 도매업'),
+    ('전화번호', '010-9813-1905'),
+)
+INVOICE_BANK_ACCOUNT = '국민은행 910601-01-494700 이정민(제이제이)'
+VAT_RATE = 10
+
+# 품목표 열 (A~H)
+ITEM_HEADERS = ('순번', '상품명', '규격', '수량', '단가', '공급가액', '세액', '합계')
+COLUMN_WIDTHS = {'A': 6, 'B': 34, 'C': 8, 'D': 8, 'E': 12, 'F': 13, 'G': 11, 'H': 13}
+MIN_ITEM_ROWS = 15
+
+# 일괄 생성 워커 수 (0/1 이면 현재 프로세스에서 순차 생성)
+INVOICE_RENDER_WORKERS = int(os.environ.get('INVOICE_RENDER_WORKERS', '0')) or min(4, os.cpu_count() or 1)
+
+_THIN = Side(style='thin', color='222222')
+_BORDER = Border(left=_THIN, right=_THIN, top=_THIN, bottom=_THIN)
+_FONT = Font(name='맑은 고딕', size=10)
+_FONT_BOLD = Font(name='맑은 고딕', size=10, bold=True)
+_FONT_CAPTION = Font(name='맑은 고딕', size=10, bold=True, color='FFFFFF')
+_FONT_TITLE = Font(name='맑은 고딕', size=18, bold=True)
+_FILL_CAPTION = PatternFill(start_color='222222', end_color='222222', fill_type='solid')
+_FILL_HEADER = PatternFill(start_color='EEEEEE', end_color='EEEEEE', fill_type='solid')
+_CENTER = Alignment(horizontal='center', vertical='center')
+_LEFT = Alignment(horizontal='left', vertical='center', wrap_text=True)
+_RIGHT = Alignment(horizontal='right', vertical='center')
+_NUMBER_FORMAT = '#,##0'
+
+
+def _put(ws, row: int, col: int, value: Any = None, font=_FONT, align=_LEFT, fill=None, border=True,
+         number=False):
+    cell = ws.cell(row=row, column=col, value=value)
+    cell.font = font
+    cell.alignment = align
+    if fill is not None:
+        cell.fill = fill
+    if border:
+        cell.border = _BORDER
+    if number:
+        cell.number_format = _NUMBER_FORMAT
+    return cell
+
+
+def _line_amounts(item: Dict[str, Any], vat_included: bool) -> Tuple[int, int, int]:
+    """품목 (공급가액, 세액, 합계) - 인쇄 양식과 같은 계산"""
+    qty = int(item.get('qty') or 0)
+    unit_price = int(item.get('unit_price') or 0)
+    supply = int(item.get('amount') or 0)
+    if vat_included:
+        gross = qty * unit_price
+        return supply, gross - supply, gross
+    return supply, int(round(supply * VAT_RATE / 100)), int(round(supply * (1 + VAT_RATE / 100)))
+
+
+def write_statement_sheet(ws, statement: Dict[str, Any]) -> None:
+    """
+    거래명세서 한 건을 시트에 작성
+
+    Args:
+        ws: 대상 워크시트
+        statement: 명세서 (statement_no, statement_date, customer_name, address, business_number,
+                   representative, vat_included, total_amount, vat_amount, grand_total, memo, items)
+    """
+    for col, width in COLUMN_WIDTHS.items():
+        ws.column_dimensions[col].width = width
+    vat_included = bool(statement.get('vat_included'))
+
+    ws.merge_cells('A1:H1')
+    _put(ws, 1, 1, '거 래 명 세 서', font=_FONT_TITLE, align=_CENTER, border=False)
+    ws.row_dimensions[1].height = 32
+
+    ws.merge_cells('A2:D2')
+    ws.merge_cells('E2:H2')
+    ws.merge_cells('A3:H3')
+    _put(ws, 2, 1, f"명세서번호  {statement.get('statement_no') or ''}")
+    _put(ws, 2, 5, f"거래일자  {statement.get('statement_date') or ''}")
+    _put(ws, 3, 1, f'입금계좌  {INVOICE_BANK_ACCOUNT}')
+
+    # 공급자(A~D) / 공급받는자(E~H)
+    buyer_rows = (
+        ('상호(거래처)', statement.get('customer_name') or ''),
+        ('주소', statement.get('address') or '-'),
+        ('사업자번호', statement.get('business_number') or '-'),
+        ('대표자', statement.get('representative') or '-'),
+        ('', ''),
+        ('', ''),
+    )
+    row = 5
+    ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=4)
+    ws.merge_cells(start_row=row, start_column=5, end_row=row, end_column=8)
+    _put(ws, row, 1, '공 급 자', font=_FONT_CAPTION, align=_CENTER, fill=_FILL_CAPTION)
+    _put(ws, row, 5, '공 급 받 는 자', font=_FONT_CAPTION, align=_CENTER, fill=_FILL_CAPTION)
+    for (s_label, s_value), (b_label, b_value) in zip(INVOICE_SUPPLIER_ROWS, buyer_rows):
+        row += 1
+        ws.merge_cells(start_row=row, start_column=2, end_row=row, end_column=4)
+        ws.merge_cells(start_row=row, start_column=6, end_row=row, end_column=8)
+        _put(ws, row, 1, s_label, font=_FONT_BOLD, align=_CENTER, fill=_FILL_HEADER)
+        _put(ws, row, 2, s_value)
+        _put(ws, row, 5, b_label, font=_FONT_BOLD, align=_CENTER, fill=_FILL_HEADER)
+        _put(ws, row, 6, b_value)
+
+    # 품목표
+    row += 2
+    headers = list(ITEM_HEADERS)
+    if vat_included:
+        headers[4] = '단가(포함)'
+    for col, label in enumerate(headers, start=1):
+        _put(ws, row, col, label, font=_FONT_BOLD, align=_CENTER, fill=_FILL_HEADER)
+    items = statement.get('items') or []
+    for i in range(max(len(items), MIN_ITEM_ROWS)):
+        row += 1
+        _put(ws, row, 1, i + 1, align=_CENTER)
+        if i < len(items):
+            item = items[i]
+            supply, vat, total = _line_amounts(item, vat_included)
+            values = (item.get('product_name') or '', '-', int(item.get('qty') or 0),
+                      int(item.get('unit_price') or 0), supply, vat, total)
+        else:
+            values = (None,) * 7
+        for col, value in enumerate(values, start=2):
+            numeric = col >= 4
+            _put(ws, row, col, value, align=_RIGHT if numeric else (_CENTER if col == 3 else _LEFT),
+                 number=numeric)
+
+    row += 1
+    ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=5)
+    _put(ws, row, 1, '합 계', font=_FONT_BOLD, align=_RIGHT)
+    for col in range(2, 6):
+        _put(ws, row, col)
+    _put(ws, row, 6, int(statement.get('total_amount') or 0), font=_FONT_BOLD, align=_RIGHT, number=True)
+    _put(ws, row, 7, int(statement.get('vat_amount') or 0), font=_FONT_BOLD, align=_RIGHT, number=True)
+    _put(ws, row, 8, int(statement.get('grand_total') or 0), font=_FONT_BOLD, align=_RIGHT, number=True)
+
+    row += 2
+    ws.merge_cells(start_row=row, start_column=1, end_row=row, end_column=8)
+    _put(ws, row, 1, f"비고  {statement.get('memo') or ''}")
+    ws.row_dimensions[row].height = 36
+
+
+def _sheet_title(statement: Dict[str, Any], used: set) -> str:
+    base = (statement.get('statement_no') or '명세서')[:28]
+    for ch in '[]:*?/\\':
+        base = base.replace(ch, '-')
+    title, seq = base, 2
+    while title in used:
+        title = f'{base}_{seq}'
+        seq += 1
+    used.add(title)
+    return title
+
+
+def render_statement_xlsx(statement: Dict[str, Any]) -> bytes:
+    """거래명세서 한 건 → xlsx bytes"""
+    wb = Workbook()
+    ws = wb.active
+    ws.title = _sheet_title(statement, set())
+    write_statement_sheet(ws, statement)
+    output = BytesIO()
+    wb.save(output)
+    return output.getvalue()
+
+
+def render_statements_workbook(statements: Sequence[Dict[str, Any]]) -> BytesIO:
+    """여러 거래명세서 → 명세서별 시트를 가진 워크북 하나"""
+    wb = Workbook()
+    wb.remove(wb.active)
+    used = set()
+    for statement in statements:
+        write_statement_sheet(wb.create_sheet(_sheet_title(statement, used)), statement)
+    output = BytesIO()
+    wb.save(output)
+    output.seek(0)
+    return output
+
+
+def statement_filename(statement: Dict[str, Any]) -> str:
+    customer = (statement.get('customer_name') or '거래처').strip()
+    for ch in '/\\?%*:|"<>':
+        customer = customer.replace(ch, '-')
+    return f"거래명세서_{statement.get('statement_no') or ''}_{customer}.xlsx"
+
+
+def _render_statement_job(statement: Dict[str, Any]) -> Tuple[str, bytes, float]:
+    """워커 작업: (파일명, 엑셀 bytes, 생성 시간 ms)"""
+    started = time.perf_counter()
+    data = render_statement_xlsx(statement)
+    return statement_filename(statement), data, (time.perf_counter() - started) * 1000
+
+
+def render_statements_zip(statements: Sequence[Dict[str, Any]],
+                          workers: Optional[int] = None) -> Tuple[BytesIO, Dict[str, Any]]:
+    """
+    거래명세서별 xlsx 를 병렬 생성해 ZIP 으로 묶음
+
+    Args:
+        statements: 명세서 목록 (피클 가능한 기본 타입만)
+        workers: 워커 프로세스 수 (None 이면 INVOICE_RENDER_WORKERS, 1 이하면 순차 생성)
+
+    Returns:
+        (ZIP BytesIO, 통계 {count, mode(process|serial), workers, wall_ms, avg_ms, max_ms})
+    """
+    workers = INVOICE_RENDER_WORKERS if workers is None else workers
+    workers = max(1, min(int(workers), len(statements) or 1))
+    started = time.perf_counter()
+
+    results = None
+    mode = 'serial'
+    if workers > 1:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(statements) // (workers * 4))
+                results = list(pool.map(_render_statement_job, statements, chunksize=chunksize))
+            mode = 'process'
+        except (OSError, NotImplementedError, ImportError, RuntimeError) as e:
+            # 서버리스 등 멀티프로세싱을 쓸 수 없는 환경
+            print(f'[경고] 거래명세서 병렬 생성 불가, 순차 생성으로 전환: {e}')
+            results = None
+    if results is None:
+        workers = 1
+        results = [_render_statement_job(s) for s in statements]
+
+    output = BytesIO()
+    used_names = set()
+    with zipfile.ZipFile(output, 'w', compression=zipfile.ZIP_STORED) as zf:
+        for filename, data, _ in results:
+            name, seq = filename, 2
+            while name in used_names:
+                name = filename.replace('.xlsx', f'_{seq}.xlsx')
+                seq += 1
+            used_names.add(name)
+            zf.writestr(name, data)
+    output.seek(0)
+
+    render_ms = [r[2] for r in results]
+    stats = {
+        'count': len(results),
+        'mode': mode,
+        'workers': workers,
+        'wall_ms': round((time.perf_counter() - started) * 1000, 1),
+        'avg_ms': round(sum(render_ms) / len(render_ms), 1) if render_ms else 0,
+        'max_ms': round(max(render_ms), 1) if render_ms else 0,
+    }
+    return output, stats
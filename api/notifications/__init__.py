@@ -1,4 +1,4 @@
-from .telegram import send_telegram_notification
-
-__all__ = ['send_telegram_notification']
+from .telegram import send_telegram_notification, queue_telegram_notification
+from .dispatcher import telegram_delivery_metrics
 
+__all__ = ['send_telegram_notification', 'queue_telegram_notification', 'telegram_delivery_metrics']
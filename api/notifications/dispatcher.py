@@ -0,0 +1,307 @@
+"""
+텔레그램 전송 디스패처
+
+- 봇 토큰별 디스패처 하나가 requests.Session(커넥션 풀)을 재사용 (메시지마다 새 TLS 연결을 맺지 않음)
+- 토큰 버킷으로 전송 속도 제한 (텔레그램: 같은 채팅방 초당 1건 내외)
+- 429 는 retry_after 만큼, 5xx/연결 오류는 지수 백오프로 재시도
+  (즉시 전송 send 는 속도 제한·재시도 대기를 합쳐 TELEGRAM_SEND_MAX_WAIT_SECONDS 를 넘기면 실패로 처리)
+- 큐 전송: 워커 스레드가 짧은 시간(coalesce_window) 안에 같은 채팅방으로 들어온 메시지를
+  4096자 이내에서 한 메시지로 합쳐 보냄
+- 전송 지표(metrics): 요청/성공/실패/재시도/429/합친 건수/큐 길이/평균 지연
+
+TELEGRAM_API_BASE 로 API 주소를 바꿀 수 있어 로컬 스텁 HTTP 서버로 시험할 수 있다.
+"""
+import os
+import queue
+import random
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from requests.adapters import HTTPAdapter
+
+TELEGRAM_API_BASE = os.environ.get('TELEGRAM_API_BASE', 'https://api.telegram.org').rstrip('/')
+TELEGRAM_MESSAGE_LIMIT = 4096
+TELEGRAM_RATE_PER_SECOND = float(os.environ.get('TELEGRAM_RATE_PER_SECOND', '1'))
+TELEGRAM_RATE_BURST = int(os.environ.get('TELEGRAM_RATE_BURST', '3'))
+TELEGRAM_MAX_RETRIES = int(os.environ.get('TELEGRAM_MAX_RETRIES', '3'))
+TELEGRAM_COALESCE_SECONDS = float(os.environ.get('TELEGRAM_COALESCE_SECONDS', '2'))
+# 즉시 전송(send)이 호출한 요청을 붙잡아 두는 최대 대기 (속도 제한 + 재시도)
+TELEGRAM_SEND_MAX_WAIT_SECONDS = float(os.environ.get('TELEGRAM_SEND_MAX_WAIT_SECONDS', '15'))
+TELEGRAM_TIMEOUT = (3.05, 10)  # (연결, 읽기) 초
+MESSAGE_SEPARATOR = '\n\n──────────\n\n'
+
+
+class TokenBucket:
+    """토큰 버킷 속도 제한 (rate: 초당 토큰, capacity: 최대 연속 전송 수)"""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = max(rate, 0.001)
+        self.capacity = max(int(capacity), 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait: Optional[float] = None) -> Optional[float]:
+        """토큰 하나를 얻을 때까지 대기, 대기한 시간(초) 반환 (max_wait 안에 못 얻으면 기다리지 않고 None)"""
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            if max_wait is not None and waited + delay > max_wait:
+                return None
+            time.sleep(delay)
+            waited += delay
+
+    def pause(self, seconds: float) -> None:
+        """서버가 요구한 대기(429 retry_after) 동안 토큰을 비움"""
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+def split_message(text: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+    """한도를 넘는 메시지를 줄 단위(안 되면 글자 단위)로 나눔"""
+    if len(text) <= limit:
+        return [text]
+    parts, current = [], ''
+    for line in text.split('\n'):
+        while len(line) > limit:
+            if current:
+                parts.append(current)
+                current = ''
+            parts.append(line[:limit])
+            line = line[limit:]
+        candidate = f'{current}\n{line}' if current else line
+        if len(candidate) > limit:
+            parts.append(current)
+            current = line
+        else:
+            current = candidate
+    if current:
+        parts.append(current)
+    return parts
+
+
+def coalesce_messages(texts: List[str], limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[Tuple[str, int]]:
+    """같은 채팅방 메시지들을 한도 안에서 합침 → [(본문, 합친 원본 수)]"""
+    batches: List[Tuple[str, int]] = []
+    current, count = '', 0
+    for text in texts:
+        for part in split_message(text, limit):
+            candidate = f'{current}{MESSAGE_SEPARATOR}{part}' if current else part
+            if current and len(candidate) > limit:
+                batches.append((current, count))
+                current, count = part, 1
+            else:
+                current, count = candidate, count + 1
+    if current:
+        batches.append((current, count))
+    return batches
+
+
+class TelegramDispatcher:
+    """봇 하나의 텔레그램 전송기 (풀링된 세션 + 속도 제한 + 재시도 + 병합 큐)"""
+
+    def __init__(self, bot_token: str, name: str = 'telegram', api_base: Optional[str] = None,
+                 rate: float = TELEGRAM_RATE_PER_SECOND, burst: int = TELEGRAM_RATE_BURST,
+                 max_retries: int = TELEGRAM_MAX_RETRIES, coalesce_window: float = TELEGRAM_COALESCE_SECONDS,
+                 timeout=TELEGRAM_TIMEOUT):
+        self.name = name
+        self.url = f"{(api_base or TELEGRAM_API_BASE).rstrip('/')}/bot{bot_token}/sendMessage"
+        self.max_retries = max_retries
+        self.coalesce_window = coalesce_window
+        self.timeout = timeout
+        self.bucket = TokenBucket(rate, burst)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=4, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+
+        self._queue: 'queue.Queue[Tuple[str, str]]' = queue.Queue()
+        self._worker: Optional[threading.Thread] = None
+        self._worker_lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._metrics_lock = threading.Lock()
+        self._metrics: Dict[str, Any] = {
+            'queued': 0, 'requests': 0, 'sent': 0, 'messages_delivered': 0, 'coalesced': 0,
+            'failed': 0, 'retries': 0, 'rate_limited': 0, 'throttle_wait_ms': 0.0,
+            'latency_ms_total': 0.0, 'last_error': None, 'last_sent_at': None,
+        }
+
+    # ---- 지표 ----
+    def _count(self, **values) -> None:
+        with self._metrics_lock:
+            for key, value in values.items():
+                if key in ('last_error', 'last_sent_at'):
+                    self._metrics[key] = value
+                else:
+                    self._metrics[key] += value
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._metrics_lock:
+            data = dict(self._metrics)
+        data['queue_depth'] = self._queue.qsize()
+        latency_total = data.pop('latency_ms_total')
+        data['avg_latency_ms'] = round(latency_total / data['requests'], 1) if data['requests'] else 0
+        data['throttle_wait_ms'] = round(data['throttle_wait_ms'], 1)
+        return data
+
+    # ---- 전송 ----
+    def _fail(self, error: str) -> bool:
+        print(f"❌ [{self.name}] 텔레그램 전송 실패: {error}")
+        self._count(failed=1, last_error=error)
+        return False
+
+    def _post(self, chat_id: str, text: str, deadline: Optional[float] = None) -> bool:
+        """
+        한 번의 sendMessage (속도 제한·재시도 포함)
+
+        deadline(time.monotonic 기준)이 있으면 속도 제한·재시도 대기가 그 시각을 넘길 때 실패로 처리한다.
+        """
+        payload = {'chat_id': chat_id, 'text': text, 'parse_mode': 'HTML'}
+        for attempt in range(self.max_retries + 1):
+            max_wait = None if deadline is None else max(deadline - time.monotonic(), 0)
+            waited = self.bucket.acquire(max_wait)
+            if waited is None:
+                return self._fail(f'전송 대기 한도 초과 ({TELEGRAM_SEND_MAX_WAIT_SECONDS:g}초)')
+            started = time.perf_counter()
+            retry_after = None
+            try:
+                response = self.session.post(self.url, json=payload, timeout=self.timeout)
+                self._count(requests=1, throttle_wait_ms=waited * 1000,
+                            latency_ms_total=(time.perf_counter() - started) * 1000)
+                if response.status_code == 200:
+                    try:
+                        result = response.json()
+                    except ValueError:
+                        result = None
+                    if not isinstance(result, dict):
+                        error, retryable = f'HTTP 200 응답을 해석할 수 없음: {response.text[:200]}', False
+                    elif result.get('ok'):
+                        self._count(sent=1, last_sent_at=time.time())
+                        return True
+                    else:
+                        error, retryable = result.get('description', '알 수 없는 오류'), False
+                elif response.status_code == 429:
+                    self._count(rate_limited=1)
+                    try:
+                        retry_after = float(response.json().get('parameters', {}).get('retry_after', 1))
+                    except (ValueError, TypeError, AttributeError):
+                        retry_after = 1.0
+                    self.bucket.pause(retry_after)
+                    error, retryable = f'HTTP 429 (retry_after={retry_after:g}s)', True
+                else:
+                    error = f'HTTP {response.status_code}: {response.text[:200]}'
+                    retryable = response.status_code >= 500
+            except requests.exceptions.RequestException as e:
+                self._count(requests=1, latency_ms_total=(time.perf_counter() - started) * 1000)
+                error, retryable = str(e), True
+
+            if not retryable or attempt >= self.max_retries:
+                return self._fail(error)
+            # 429 는 토큰 버킷이 retry_after 만큼 막아 두므로 따로 쉬지 않음
+            delay = retry_after if retry_after is not None else min(2 ** attempt, 30) * (0.5 + random.random() / 2)
+            if deadline is not None and time.monotonic() + delay > deadline:
+                return self._fail(f'{error} (재시도 대기 {delay:.1f}초가 전송 대기 한도를 넘음)')
+            self._count(retries=1, last_error=error)
+            print(f"⚠️ [{self.name}] 텔레그램 전송 재시도 {attempt + 1}/{self.max_retries} ({error}), {delay:.1f}초 후")
+            if retry_after is None:
+                time.sleep(delay)
+        return False
+
+    def send(self, chat_id: str, text: str) -> bool:
+        """
+        즉시 전송 (결과가 필요한 호출용, 4096자를 넘으면 나눠 보냄)
+
+        호출한 요청이 429 retry_after 등으로 오래 묶이지 않도록, 나눈 조각 전체의 대기를
+        TELEGRAM_SEND_MAX_WAIT_SECONDS 안으로 제한한다 (넘으면 실패로 반환).
+        """
+        deadline = time.monotonic() + TELEGRAM_SEND_MAX_WAIT_SECONDS
+        ok = True
+        for part in split_message(text):
+            ok = self._post(chat_id, part, deadline) and ok
+        if ok:
+            self._count(messages_delivered=1)
+        return ok
+
+    def enqueue(self, chat_id: str, text: str) -> bool:
+        """큐에 넣고 바로 반환 (워커가 같은 채팅방 메시지를 모아 전송)"""
+        self._ensure_worker()
+        with self._worker_lock:
+            self._queue.put((chat_id, text))
+            self._idle.clear()
+        self._count(queued=1)
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """큐가 빌 때까지 대기"""
+        return self._idle.wait(timeout)
+
+    def _ensure_worker(self) -> None:
+        with self._worker_lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name=f'{self.name}-dispatcher', daemon=True)
+                self._worker.start()
+
+    def _run(self) -> None:
+        while True:
+            chat_id, text = self._queue.get()
+            pending: Dict[str, List[str]] = {chat_id: [text]}
+            # 첫 메시지 이후 coalesce_window 동안 들어온 메시지를 채팅방별로 모음
+            deadline = time.monotonic() + self.coalesce_window
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    chat_id, text = self._queue.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                pending.setdefault(chat_id, []).append(text)
+            for chat_id, texts in pending.items():
+                for body, count in coalesce_messages(texts):
+                    try:
+                        if self._post(chat_id, body):
+                            self._count(messages_delivered=count, coalesced=count - 1)
+                    except Exception as e:
+                        self._count(failed=1, last_error=str(e))
+                        print(f"❌ [{self.name}] 텔레그램 워커 오류: {e}")
+            with self._worker_lock:
+                for _ in range(sum(len(t) for t in pending.values())):
+                    self._queue.task_done()
+                if self._queue.unfinished_tasks == 0:
+                    self._idle.set()
+
+
+_DISPATCHERS: Dict[Tuple[str, str], TelegramDispatcher] = {}
+_DISPATCHERS_LOCK = threading.Lock()
+
+
+def get_telegram_dispatcher(bot_token: str, name: str = 'telegram') -> TelegramDispatcher:
+    """봇 토큰별 디스패처 (프로세스에서 하나씩 재사용)"""
+    key = (name, bot_token)
+    with _DISPATCHERS_LOCK:
+        dispatcher = _DISPATCHERS.get(key)
+        if dispatcher is None:
+            dispatcher = TelegramDispatcher(bot_token, name=name)
+            _DISPATCHERS[key] = dispatcher
+        return dispatcher
+
+
+def telegram_delivery_metrics() -> Dict[str, Dict[str, Any]]:
+    """디스패처별 전송 지표 (헬스체크용)"""
+    with _DISPATCHERS_LOCK:
+        dispatchers = list(_DISPATCHERS.values())
+    return {d.name: d.metrics() for d in dispatchers}
@@ -1,13 +1,25 @@
 """
 텔레그램 알림 모듈
+- 전송은 api.notifications.dispatcher 의 디스패처 사용 (세션 재사용, 속도 제한, 429/5xx 재시도)
+- 반복 알림처럼 결과를 기다릴 필요 없는 메시지는 queue_telegram_notification 으로 큐 전송 (같은 채팅방 메시지 병합)
 """
 import os
-import requests
+
+from api.notifications.dispatcher import get_telegram_dispatcher
+
+
+def _telegram_config():
+    bot_token = os.environ.get('TELEGRAM_BOT_TOKEN')
+    chat_id = os.environ.get('TELEGRAM_CHAT_ID')
+    if not bot_token or not chat_id:
+        print("⚠️ 텔레그램 설정이 없습니다. (TELEGRAM_BOT_TOKEN 또는 TELEGRAM_CHAT_ID)")
+        return None, None
+    return bot_token, chat_id
 
 
 def send_telegram_notification(message: str) -> bool:
     """
-    텔레그램 알림 전송
+    텔레그램 알림 전송 (전송 완료까지 대기)
     
     Args:
         message: 전송할 메시지 (HTML 형식 지원)
@@ -15,64 +27,17 @@ def send_telegram_notification(message: str) -> bool:
     Returns:
         bool: 전송 성공 여부
     """
-    print("🔍 [텔레그램] 알림 전송 함수 호출됨")
-    bot_token = os.environ.get('TELEGRAM_BOT_TOKEN')
-    chat_id = os.environ.get('TELEGRAM_CHAT_ID')
-    
-    print(f"🔑 [텔레그램] 환경변수 확인:")
-    print(f"   - TELEGRAM_BOT_TOKEN: {'설정됨' if bot_token else '없음'} ({bot_token[:10] + '...' if bot_token and len(bot_token) > 10 else 'N/A'})")
-    print(f"   - TELEGRAM_CHAT_ID: {'설정됨' if chat_id else '없음'} ({chat_id})")
-    
-    if not bot_token or not chat_id:
-        print("⚠️ 텔레그램 설정이 없습니다. (TELEGRAM_BOT_TOKEN 또는 TELEGRAM_CHAT_ID)")
+    bot_token, chat_id = _telegram_config()
+    if not bot_token:
         return False
-    
-    url = f"https://api.telegram.org/bot{bot_token}/sendMessage"
-    
-    data = {
-        "chat_id": chat_id,
-        "text": message,
-        "parse_mode": "HTML"
-    }
-    
     try:
-        response = requests.post(url, json=data, timeout=10)
-        
-        if response.status_code == 200:
-            result = response.json()
-            if result.get('ok'):
-                try:
-                    print("✅ 텔레그램 알림 전송 성공")
-                except UnicodeEncodeError:
-                    print("[SUCCESS] 텔레그램 알림 전송 성공")
-                return True
-            else:
-                try:
-                    print(f"❌ 텔레그램 알림 전송 실패: {result.get('description', '알 수 없는 오류')}")
-                except UnicodeEncodeError:
-                    print(f"[FAIL] 텔레그램 알림 전송 실패: {result.get('description', '알 수 없는 오류')}")
-                return False
-        else:
+        ok = get_telegram_dispatcher(bot_token, name='cs').send(chat_id, message)
+        if ok:
             try:
-                print(f"❌ 텔레그램 API 오류: HTTP {response.status_code}")
-                print(f"   응답: {response.text}")
+                print("✅ 텔레그램 알림 전송 성공")
             except UnicodeEncodeError:
-                print(f"[ERROR] 텔레그램 API 오류: HTTP {response.status_code}")
-                print(f"   응답: {response.text}")
-            return False
-            
-    except requests.exceptions.Timeout:
-        try:
-            print("❌ 텔레그램 알림 전송 타임아웃")
-        except UnicodeEncodeError:
-            print("[ERROR] 텔레그램 알림 전송 타임아웃")
-        return False
-    except requests.exceptions.RequestException as e:
-        try:
-            print(f"❌ 텔레그램 알림 전송 오류: {e}")
-        except UnicodeEncodeError:
-            print(f"[ERROR] 텔레그램 알림 전송 오류: {e}")
-        return False
+                print("[SUCCESS] 텔레그램 알림 전송 성공")
+        return ok
     except Exception as e:
         try:
             print(f"❌ 텔레그램 알림 전송 예외: {e}")
@@ -82,3 +47,18 @@ def send_telegram_notification(message: str) -> bool:
         traceback.print_exc()
         return False
 
+
+def queue_telegram_notification(message: str) -> bool:
+    """
+    텔레그램 알림 큐 전송 (바로 반환, 워커가 같은 채팅방 메시지를 모아 전송)
+    Vercel 서버리스는 응답 후 스레드가 멈출 수 있어 바로 전송한다.
+    
+    Returns:
+        bool: 큐 접수(서버리스는 전송) 성공 여부
+    """
+    if os.environ.get('VERCEL') == '1':
+        return send_telegram_notification(message)
+    bot_token, chat_id = _telegram_config()
+    if not bot_token:
+        return False
+    return get_telegram_dispatcher(bot_token, name='cs').enqueue(chat_id, message)
@@ -4,14 +4,28 @@
 import os
 import re
 import math
+import time
+import json
 from datetime import date, datetime, timedelta
 from typing import Optional, List, Dict, Tuple
 from api.database.models import (
     get_db_connection,
     USE_POSTGRESQL,
-    is_company_deactivated,
     ensure_pallet_table_columns,
     ensure_rack_sections_table,
+    normalize_company_name,
+    get_company_search_keywords,
+    ensure_pallet_revenue_rollup_table,
+    sync_pallet_revenue_rollup,
+    ensure_pallet_mobile_track_log_table,
+    ensure_rack_section_occupancy_table,
+    apply_rack_section_occupancy_deltas,
+    rebuild_rack_section_occupancy,
+    SETTLEMENT_COMPANIES_CACHE,
+    get_cache_version,
+    local_cache_generation,
+    invalidate_settlement_company_cache,
+    ensure_pallet_settlement_company_lists_table,
 )
 
 # ========================================
@@ -106,9 +120,10 @@ def create_pallet(pallet_id: str = None, company_name: str = None,
                  storage_location: str = None, quantity: int = 1,
                  is_service: bool = False, notes: str = None,
                  created_by: str = None, pallet_kind: str = None,
-                 kind_color: str = None) -> Tuple[bool, str, Optional[Dict]]:
+                 kind_color: str = None,
+                 rack_section_code: str = None) -> Tuple[bool, str, Optional[Dict]]:
     """
-    파레트 입고 처리
+    파레트 입고 처리 (rack_section_code 가 있으면 해당 섹션에 바로 배치)
     
     Returns:
         (success, message, data)
@@ -139,6 +154,12 @@ def create_pallet(pallet_id: str = None, company_name: str = None,
     
     ensure_pallet_table_columns()
     
+    section_code = (rack_section_code or '').strip() or None
+    if section_code and not rack_section_exists(section_code):
+        return False, f"등록되지 않은 섹션입니다: {section_code}", None
+    occupancy_ready = ensure_rack_section_occupancy_table()
+    company_key = normalize_company_name(company_name)
+    
     # 중복 체크 (INSERT 전에 미리 확인)
     existing_pallet = get_pallet_by_id(pallet_id)
     if existing_pallet:
@@ -149,19 +170,29 @@ def create_pallet(pallet_id: str = None, company_name: str = None,
     cursor = conn.cursor()
     
     try:
+        # 같은 화주사의 보관 중 파레트가 입고일 이전부터 있으면 월별 화주사 목록은 그대로,
+        # 아니면(신규 화주사·새 달 첫 입고·소급 입고) 정산 화면 화주사 목록 캐시 무효화
+        sym = '%s' if USE_POSTGRESQL else '?'
+        cursor.execute(
+            f'''SELECT 1 FROM pallets
+                WHERE company_key = {sym} AND out_date IS NULL AND in_date <= {sym} LIMIT 1''',
+            (company_key, in_date),
+        )
+        changes_company_lists = cursor.fetchone() is None
+        
         print(f"[DEBUG] INSERT 시도 - pallet_id: {pallet_id}")
         if USE_POSTGRESQL:
             cursor.execute('''
                 INSERT INTO pallets (
-                    pallet_id, company_name, product_name, status,
+                    pallet_id, company_name, company_key, product_name, status,
                     in_date, storage_location, quantity, is_service, pallet_kind,
-                    kind_color, vendor_return_status, vendor_returned_at,
+                    kind_color, vendor_return_status, vendor_returned_at, rack_section_code,
                     notes, created_by, created_at, updated_at
-                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-            ''', (pallet_id, company_name, product_name, '입고됨',
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, %s, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ''', (pallet_id, company_name, company_key, product_name, '입고됨',
                   in_date, storage_location, quantity, 1 if is_service else 0,
                   pallet_kind_norm, kind_color_norm, vendor_return_status, vendor_returned_at,
-                  notes, created_by))
+                  section_code, notes, created_by))
             
             # 트랜잭션 이력 저장
             cursor.execute('''
@@ -173,15 +204,15 @@ def create_pallet(pallet_id: str = None, company_name: str = None,
         else:
             cursor.execute('''
                 INSERT INTO pallets (
-                    pallet_id, company_name, product_name, status,
+                    pallet_id, company_name, company_key, product_name, status,
                     in_date, storage_location, quantity, is_service, pallet_kind,
-                    kind_color, vendor_return_status, vendor_returned_at,
+                    kind_color, vendor_return_status, vendor_returned_at, rack_section_code,
                     notes, created_by, created_at, updated_at
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
-            ''', (pallet_id, company_name, product_name, '입고됨',
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+            ''', (pallet_id, company_name, company_key, product_name, '입고됨',
                   in_date, storage_location, quantity, 1 if is_service else 0,
                   pallet_kind_norm, kind_color_norm, vendor_return_status, vendor_returned_at,
-                  notes, created_by))
+                  section_code, notes, created_by))
             
             # 트랜잭션 이력 저장
             cursor.execute('''
@@ -191,6 +222,11 @@ def create_pallet(pallet_id: str = None, company_name: str = None,
                 ) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?, CURRENT_TIMESTAMP)
             ''', (pallet_id, '입고', quantity, created_by, notes))
         
+        if occupancy_ready and section_code:
+            apply_rack_section_occupancy_deltas(cursor, {section_code: 1})
+        if changes_company_lists:
+            invalidate_settlement_company_cache(cursor)
+        
         conn.commit()
         
         # 생성된 파레트 정보 조회
@@ -226,16 +262,19 @@ def update_pallet_status(pallet_id: str, out_date: date = None,
     if out_date is None:
         out_date = date.today()
     
+    occupancy_ready = ensure_rack_section_occupancy_table()
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # 파레트 정보 조회
-        pallet = get_pallet_by_id(pallet_id)
+        # 파레트 정보 조회 (잠근 뒤 읽어 동시 보관종료가 점유 카운터를 두 번 줄이지 않게)
+        pallet = _locked_pallet_states(cursor, [pallet_id]).get(pallet_id)
         if not pallet:
+            conn.rollback()
             return False, "파레트를 찾을 수 없습니다", None
         
         if pallet['status'] == '보관종료':
+            conn.rollback()
             return False, "이미 보관종료된 파레트입니다", None
         
         # 보관종료 처리
@@ -268,6 +307,11 @@ def update_pallet_status(pallet_id: str, out_date: date = None,
                 ) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?, CURRENT_TIMESTAMP)
             ''', (pallet_id, '보관종료', pallet.get('quantity', 1), processed_by, notes))
         
+        if occupancy_ready and pallet.get('status') == '입고됨':
+            apply_rack_section_occupancy_deltas(cursor, {pallet.get('rack_section_code'): -1})
+        # 보관종료 이후 달의 화주사 목록이 바뀔 수 있음
+        invalidate_settlement_company_cache(cursor)
+        
         conn.commit()
         
         # 업데이트된 파레트 정보 조회
@@ -282,45 +326,100 @@ def update_pallet_status(pallet_id: str, out_date: date = None,
         conn.close()
 
 
-def list_rack_sections() -> List[Dict]:
-    """랙 섹션 목록 (모바일 자체 QR용)."""
+# 랙 섹션 마스터는 관리 화면 없이 거의 바뀌지 않으므로 프로세스 내에서 캐시한다.
+RACK_SECTION_CACHE_TTL_SECONDS = 300
+_RACK_SECTION_CACHE = {'rows': None, 'codes': frozenset(), 'loaded_at': 0.0}
+
+
+def invalidate_rack_section_cache():
+    """랙 섹션 캐시 무효화 (rack_sections 직접 수정 후 호출)."""
+    _RACK_SECTION_CACHE['rows'] = None
+    _RACK_SECTION_CACHE['codes'] = frozenset()
+    _RACK_SECTION_CACHE['loaded_at'] = 0.0
+
+
+def _load_rack_sections() -> List[Dict]:
+    """rack_sections 행 조회 (캐시가 유효하면 DB 조회 없이 반환)."""
+    rows = _RACK_SECTION_CACHE['rows']
+    if rows is not None and time.monotonic() - _RACK_SECTION_CACHE['loaded_at'] < RACK_SECTION_CACHE_TTL_SECONDS:
+        return rows
     ensure_rack_sections_table()
     conn = get_db_connection()
-    cursor = None
+    cursor = conn.cursor()
     try:
-        if USE_POSTGRESQL:
-            from psycopg2.extras import RealDictCursor
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-            cursor.execute(
-                'SELECT code, label, sort_order FROM rack_sections ORDER BY sort_order ASC, code ASC'
-            )
-            rows = cursor.fetchall()
-            return [dict(r) for r in rows]
-        cursor = conn.cursor()
         cursor.execute(
             'SELECT code, label, sort_order FROM rack_sections ORDER BY sort_order ASC, code ASC'
         )
-        cols = [col[0] for col in cursor.description]
-        return [dict(zip(cols, row)) for row in cursor.fetchall()]
+        rows = [{'code': r[0], 'label': r[1], 'sort_order': r[2]} for r in cursor.fetchall()]
     finally:
-        if cursor:
-            cursor.close()
+        cursor.close()
         conn.close()
+    _RACK_SECTION_CACHE['rows'] = rows
+    _RACK_SECTION_CACHE['codes'] = frozenset(r['code'] for r in rows)
+    _RACK_SECTION_CACHE['loaded_at'] = time.monotonic()
+    return rows
+
+
+def list_rack_sections() -> List[Dict]:
+    """랙 섹션 목록 (모바일 자체 QR용)."""
+    return [dict(r) for r in _load_rack_sections()]
 
 
 def rack_section_exists(code: str) -> bool:
     if not (code or '').strip():
         return False
-    ensure_rack_sections_table()
+    _load_rack_sections()
+    return code.strip() in _RACK_SECTION_CACHE['codes']
+
+
+def get_rack_section_occupancy() -> Dict:
+    """
+    창고 섹션 맵 점유 현황 (rack_section_occupancy 카운터 1회 조회).
+
+    Returns:
+        {
+            'sections': [{code, label, sort_order, pallet_count}, ...],
+            'unregistered': [{code, pallet_count}, ...],  # 마스터에 없는 코드
+            'total_pallets': int
+        }
+    """
+    sections = _load_rack_sections()
+    counts = {}
+    if ensure_rack_section_occupancy_table():
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute('SELECT code, pallet_count FROM rack_section_occupancy WHERE pallet_count > 0')
+            counts = {r[0]: int(r[1] or 0) for r in cursor.fetchall()}
+        finally:
+            cursor.close()
+            conn.close()
+    known = _RACK_SECTION_CACHE['codes']
+    return {
+        'sections': [dict(s, pallet_count=counts.get(s['code'], 0)) for s in sections],
+        'unregistered': [
+            {'code': code, 'pallet_count': n}
+            for code, n in sorted(counts.items()) if code not in known
+        ],
+        'total_pallets': sum(counts.values()),
+    }
+
+
+def rebuild_rack_section_occupancy_counts() -> int:
+    """섹션 점유 카운터를 pallets 기준으로 다시 집계 (수동 보정용)."""
+    ensure_rack_section_occupancy_table()
     conn = get_db_connection()
+    cursor = conn.cursor()
     try:
-        cursor = conn.cursor()
-        c = code.strip()
-        if USE_POSTGRESQL:
-            cursor.execute('SELECT 1 FROM rack_sections WHERE code = %s LIMIT 1', (c,))
-        else:
-            cursor.execute('SELECT 1 FROM rack_sections WHERE code = ? LIMIT 1', (c,))
-        return cursor.fetchone() is not None
+        n = rebuild_rack_section_occupancy(cursor)
+        conn.commit()
+        return n
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
     finally:
         cursor.close()
         conn.close()
@@ -337,7 +436,7 @@ def apply_pallet_mobile_track(
     action: section_move | in_use | storage_end
     """
     ensure_pallet_table_columns()
-    ensure_rack_sections_table()
+    occupancy_ready = ensure_rack_section_occupancy_table()
     action = (action or '').strip()
     if action not in ('section_move', 'in_use', 'storage_end'):
         return False, '지원하지 않는 작업입니다.', None
@@ -398,6 +497,14 @@ def apply_pallet_mobile_track(
                 return False, '섹션을 선택해 주세요.', None
             if not rack_section_exists(code):
                 return False, '등록되지 않은 섹션입니다.', None
+            # 이전 섹션은 잠근 뒤 다시 읽는다 (동시 이동이 같은 섹션에서 두 번 빼지 않게)
+            locked = _locked_pallet_states(cursor, [pid]).get(pid)
+            if not locked:
+                conn.rollback()
+                return False, '파레트를 찾을 수 없습니다.', None
+            if locked['status'] == '보관종료':
+                conn.rollback()
+                return False, '이미 보관종료된 파레트입니다.', None
             if USE_POSTGRESQL:
                 cursor.execute(
                     '''UPDATE pallets SET rack_section_code = %s,
@@ -424,6 +531,9 @@ def apply_pallet_mobile_track(
                        VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?, CURRENT_TIMESTAMP)''',
                     (pid, '위치변경', qty, processed_by, f'모바일 자체 QR: 섹션 {code}'),
                 )
+            prev_code = locked['rack_section_code']
+            if occupancy_ready and locked['status'] == '입고됨' and prev_code != code:
+                apply_rack_section_occupancy_deltas(cursor, {prev_code: -1, code: 1})
             conn.commit()
             return True, f'섹션을 {code}(으)로 변경했습니다.', get_pallet_by_id(pid)
 
@@ -438,6 +548,359 @@ def apply_pallet_mobile_track(
         conn.close()
 
 
+_PALLET_LOCK_CHUNK = 500
+
+
+def _select_pallets_for_update(cursor, pallet_ids: List[str], columns: str):
+    """
+    파레트 행을 잠그고 조회 (호출자 트랜잭션 안, 커밋까지 유지).
+
+    상태·섹션을 읽어 점유 카운터 증감을 계산하는 곳에서 사용한다. 같은 파레트를 동시에 처리하는
+    요청은 커밋을 기다린 뒤 바뀐 값을 읽으므로 증감이 두 번 반영되지 않는다.
+    PostgreSQL 은 SELECT ... FOR UPDATE, SQLite 는 먼저 빈 UPDATE 로 쓰기 잠금을 잡는다.
+    """
+    sym = '%s' if USE_POSTGRESQL else '?'
+    ids = list(pallet_ids or [])
+    rows = []
+    for start in range(0, len(ids), _PALLET_LOCK_CHUNK):
+        chunk = ids[start:start + _PALLET_LOCK_CHUNK]
+        marks = ', '.join([sym] * len(chunk))
+        if not USE_POSTGRESQL:
+            cursor.execute(f'UPDATE pallets SET pallet_id = pallet_id WHERE pallet_id IN ({marks})', chunk)
+        cursor.execute(
+            f'SELECT {columns} FROM pallets WHERE pallet_id IN ({marks})'
+            + (' FOR UPDATE' if USE_POSTGRESQL else ''),
+            chunk,
+        )
+        rows.extend(tuple(r) for r in cursor.fetchall())
+    return rows
+
+
+def _locked_pallet_states(cursor, pallet_ids: List[str]) -> Dict[str, Dict]:
+    """잠근 파레트 행 → {pallet_id: {status, quantity, rack_section_code}} (점유 증감 계산용)"""
+    return {
+        pid: {'status': status, 'quantity': qty or 1, 'rack_section_code': code}
+        for pid, status, qty, code in _select_pallets_for_update(
+            cursor, pallet_ids, 'pallet_id, status, quantity, rack_section_code'
+        )
+    }
+
+
+MOBILE_TRACK_BATCH_MAX = 500
+_MOBILE_TRACK_ACTIONS = ('section_move', 'in_use', 'storage_end')
+
+
+def _parse_client_ts(value) -> Optional[datetime]:
+    """모바일 큐의 client_ts (ISO 문자열 또는 epoch ms) → KST naive datetime. 실패 시 None."""
+    from datetime import timezone
+    kst = timezone(timedelta(hours=9))
+    if value is None or value == '':
+        return None
+    try:
+        if isinstance(value, (int, float)):
+            return datetime.fromtimestamp(value / 1000.0, kst).replace(tzinfo=None)
+        s = str(value).strip().replace('Z', '+00:00')
+        dt = datetime.fromisoformat(s)
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(kst).replace(tzinfo=None)
+        return dt
+    except (TypeError, ValueError, OverflowError, OSError):
+        return None
+
+
+def apply_pallet_mobile_track_batch(actions: List[Dict], processed_by: str = 'QR Mobile') -> Dict:
+    """
+    모바일 자체 추적 QR 액션 일괄 적용 (오프라인 큐 동기화용).
+
+    actions: 순서대로 [{idempotency_key, pallet_id, action, rack_section_code, client_ts}, ...]
+      - action: section_move | in_use | storage_end
+      - idempotency_key: 이미 처리된 키는 다시 적용하지 않고 duplicate로 응답
+      - client_ts: 스캔 시각 (이력 transaction_date, 보관종료일에 사용)
+      - dict 가 아닌 항목은 그 항목만 rejected
+
+    처리기록 키는 먼저 선점(INSERT ... ON CONFLICT DO NOTHING)한다. 같은 키를 가진 다른 요청이
+    동시에 처리 중이면 그 요청이 끝난 뒤 충돌로 선점에 실패하므로, 그 항목은 duplicate 로 응답한다.
+
+    파레트·섹션·처리기록을 각각 1회 조회한 뒤 큐 순서대로 상태를 시뮬레이션하고,
+    결과를 하나의 트랜잭션에서 묶음 UPDATE / 다중 행 INSERT로 반영한다.
+
+    Returns:
+        {
+            'results': [{idempotency_key, pallet_id, action, outcome, message}, ...],
+            'applied_count', 'duplicate_count', 'rejected_count',
+            'pallets': {pallet_id: 최종 파레트 정보}
+        }
+        outcome: applied | duplicate | rejected
+    """
+    ensure_pallet_table_columns()
+    ensure_pallet_mobile_track_log_table()
+    occupancy_ready = ensure_rack_section_occupancy_table()
+
+    actions = list(actions or [])
+    if len(actions) > MOBILE_TRACK_BATCH_MAX:
+        raise ValueError(f'한 번에 최대 {MOBILE_TRACK_BATCH_MAX}건까지 처리할 수 있습니다.')
+
+    sym = '%s' if USE_POSTGRESQL else '?'
+    now = datetime.now()
+
+    items = []
+    for raw in actions:
+        if raw is None:
+            raw = {}
+        if not isinstance(raw, dict):
+            items.append({'idempotency_key': None, 'pallet_id': '', 'action': '', 'rack_section_code': '',
+                          'client_ts': None, 'invalid': True})
+            continue
+        items.append({
+            'idempotency_key': str(raw.get('idempotency_key') or raw.get('idempotencyKey') or '').strip() or None,
+            'pallet_id': str(raw.get('pallet_id') or raw.get('palletId') or '').strip(),
+            'action': str(raw.get('action') or '').strip(),
+            'rack_section_code': str(raw.get('rack_section_code') or raw.get('rackSectionCode') or '').strip(),
+            'client_ts': _parse_client_ts(raw.get('client_ts') or raw.get('clientTs')),
+        })
+
+    pallet_ids = list(dict.fromkeys(i['pallet_id'] for i in items if i['pallet_id']))
+    keys = list(dict.fromkeys(i['idempotency_key'] for i in items if i['idempotency_key']))
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        # 처리기록 키 선점 (다른 요청이 이미 가진 키는 unique 충돌로 건너뜀 → duplicate)
+        claimed = set()
+        if keys:
+            if USE_POSTGRESQL:
+                cursor.execute(
+                    f'''INSERT INTO pallet_mobile_track_log (idempotency_key, outcome)
+                        VALUES {', '.join([f'({sym}, {sym})'] * len(keys))}
+                        ON CONFLICT (idempotency_key) DO NOTHING
+                        RETURNING idempotency_key''',
+                    [v for key in keys for v in (key, 'pending')],
+                )
+                claimed = {row[0] for row in cursor.fetchall()}
+            else:
+                for key in keys:
+                    cursor.execute(
+                        'INSERT OR IGNORE INTO pallet_mobile_track_log (idempotency_key, outcome) VALUES (?, ?)',
+                        (key, 'pending'),
+                    )
+                    if cursor.rowcount > 0:
+                        claimed.add(key)
+
+        _load_rack_sections()
+        section_codes = _RACK_SECTION_CACHE['codes']
+
+        # 파레트는 잠근 뒤 조회 (같은 파레트의 동시 동기화가 보관종료·점유 증감을 두 번 반영하지 않게)
+        pallets = {}
+        if pallet_ids:
+            rows = _select_pallets_for_update(
+                cursor, pallet_ids, 'pallet_id, status, quantity, rack_section_code, warehouse_use_status'
+            )
+            for pid, status, qty, code, use_status in rows:
+                pallets[pid] = {
+                    'status': status,
+                    'quantity': qty or 1,
+                    'rack_section_code': code,
+                    'warehouse_use_status': use_status,
+                }
+        original = {pid: (st['status'], st['rack_section_code']) for pid, st in pallets.items()}
+
+        seen = {}
+        taken = [key for key in keys if key not in claimed]
+        if taken:
+            cursor.execute(
+                f'''SELECT idempotency_key, outcome, message FROM pallet_mobile_track_log
+                    WHERE idempotency_key IN ({', '.join([sym] * len(taken))})''',
+                taken,
+            )
+            for key, outcome, message in cursor.fetchall():
+                seen[key] = (outcome, message)
+            for key in taken:
+                seen.setdefault(key, (None, None))
+
+        results = []
+        transactions = []
+        log_rows = []
+        section_targets = {}
+        in_use_ids = []
+        storage_end = {}
+
+        for item in items:
+            key = item['idempotency_key']
+            pid = item['pallet_id']
+            action = item['action']
+            ts = item['client_ts'] or now
+            result = {'idempotency_key': key, 'pallet_id': pid, 'action': action}
+
+            if key and key in seen:
+                prev_outcome, prev_message = seen[key]
+                result.update(outcome='duplicate', message=prev_message or '이미 처리된 요청입니다.',
+                              previous_outcome=prev_outcome)
+                results.append(result)
+                continue
+
+            state = pallets.get(pid)
+            message = None
+            if item.get('invalid'):
+                message = '잘못된 항목입니다.'
+            elif action not in _MOBILE_TRACK_ACTIONS:
+                message = '지원하지 않는 작업입니다.'
+            elif not pid:
+                message = '파레트 ID가 필요합니다.'
+            elif state is None:
+                message = '파레트를 찾을 수 없습니다.'
+            elif state['status'] == '보관종료':
+                message = '이미 보관종료된 파레트입니다.'
+            elif action == 'section_move' and not item['rack_section_code']:
+                message = '섹션을 선택해 주세요.'
+            elif action == 'section_move' and item['rack_section_code'] not in section_codes:
+                message = '등록되지 않은 섹션입니다.'
+
+            if message:
+                result.update(outcome='rejected', message=message)
+            else:
+                if action == 'section_move':
+                    code = item['rack_section_code']
+                    state['rack_section_code'] = code
+                    section_targets[pid] = code
+                    transactions.append((pid, '위치변경', state['quantity'], ts, processed_by,
+                                         f'모바일 자체 QR: 섹션 {code} (오프라인 동기화)'))
+                    message = f'섹션을 {code}(으)로 변경했습니다.'
+                elif action == 'in_use':
+                    state['warehouse_use_status'] = '사용중'
+                    in_use_ids.append(pid)
+                    transactions.append((pid, '상태변경', state['quantity'], ts, processed_by,
+                                         '모바일 자체 QR: 사용중 표시 (오프라인 동기화)'))
+                    message = '사용중으로 표시했습니다.'
+                else:
+                    state['status'] = '보관종료'
+                    state['warehouse_use_status'] = None
+                    storage_end[pid] = ts.date()
+                    transactions.append((pid, '보관종료', state['quantity'], ts, processed_by,
+                                         '모바일 자체 QR 보관종료 (오프라인 동기화)'))
+                    message = '파레트 보관종료 완료'
+                result.update(outcome='applied', message=message)
+
+            if key:
+                seen[key] = (result['outcome'], result['message'])
+                log_rows.append((key, pid or None, action or None, item['rack_section_code'] or None,
+                                 item['client_ts'], result['outcome'], result['message'], processed_by))
+            results.append(result)
+
+        # 섹션별 묶음 UPDATE (파레트마다 최종 섹션만 반영)
+        by_code = {}
+        for pid, code in section_targets.items():
+            by_code.setdefault(code, []).append(pid)
+        for code, ids in by_code.items():
+            cursor.execute(
+                f'''UPDATE pallets SET rack_section_code = {sym}, updated_at = CURRENT_TIMESTAMP
+                    WHERE pallet_id IN ({', '.join([sym] * len(ids))})''',
+                [code] + ids,
+            )
+        in_use_ids = list(dict.fromkeys(in_use_ids))
+        if in_use_ids:
+            cursor.execute(
+                f'''UPDATE pallets SET warehouse_use_status = {sym}, updated_at = CURRENT_TIMESTAMP
+                    WHERE pallet_id IN ({', '.join([sym] * len(in_use_ids))})''',
+                ['사용중'] + in_use_ids,
+            )
+        by_out_date = {}
+        for pid, out_date in storage_end.items():
+            by_out_date.setdefault(out_date, []).append(pid)
+        for out_date, ids in by_out_date.items():
+            cursor.execute(
+                f'''UPDATE pallets SET status = {sym}, out_date = {sym}, warehouse_use_status = NULL,
+                       updated_at = CURRENT_TIMESTAMP
+                    WHERE pallet_id IN ({', '.join([sym] * len(ids))}) AND status = {sym}''',
+                ['보관종료', out_date] + ids + ['입고됨'],
+            )
+            # 잠근 뒤 읽은 상태와 다르면 이력·점유 증감을 반영하지 않도록 묶음 전체를 되돌린다
+            if cursor.rowcount != len(ids):
+                raise RuntimeError('보관종료 대상 파레트 상태가 변경되었습니다. 다시 시도해 주세요.')
+        if storage_end:
+            invalidate_settlement_company_cache(cursor)
+
+        # 섹션 점유 카운터: 파레트별 (처리 전 → 처리 후) 차이만 반영
+        if occupancy_ready:
+            deltas = {}
+            for pid, (status, code) in original.items():
+                state = pallets[pid]
+                if status == '입고됨' and code:
+                    deltas[code] = deltas.get(code, 0) - 1
+                if state['status'] == '입고됨' and state['rack_section_code']:
+                    deltas[state['rack_section_code']] = deltas.get(state['rack_section_code'], 0) + 1
+            apply_rack_section_occupancy_deltas(cursor, deltas)
+
+        if transactions:
+            row_ph = f'({sym}, {sym}, {sym}, {sym}, {sym}, {sym}, CURRENT_TIMESTAMP)'
+            cursor.execute(
+                f'''INSERT INTO pallet_transactions (
+                        pallet_id, transaction_type, quantity, transaction_date,
+                        processed_by, notes, created_at)
+                    VALUES {', '.join([row_ph] * len(transactions))}''',
+                [v for row in transactions for v in row],
+            )
+        if log_rows:
+            # 선점해 둔 자리 표시 행을 실제 결과로 교체
+            logged = [row[0] for row in log_rows]
+            cursor.execute(
+                f'''DELETE FROM pallet_mobile_track_log
+                    WHERE idempotency_key IN ({', '.join([sym] * len(logged))})''',
+                logged,
+            )
+            row_ph = f'({sym}, {sym}, {sym}, {sym}, {sym}, {sym}, {sym}, {sym}, CURRENT_TIMESTAMP)'
+            cursor.execute(
+                f'''INSERT INTO pallet_mobile_track_log (
+                        idempotency_key, pallet_id, action, rack_section_code, client_ts,
+                        outcome, message, processed_by, created_at)
+                    VALUES {', '.join([row_ph] * len(log_rows))}''',
+                [v for row in log_rows for v in row],
+            )
+        conn.commit()
+
+        touched = [pid for pid in pallet_ids if pid in pallets]
+        final = {}
+        if touched:
+            if USE_POSTGRESQL:
+                from psycopg2.extras import RealDictCursor
+                dict_cursor = conn.cursor(cursor_factory=RealDictCursor)
+            else:
+                dict_cursor = conn.cursor()
+            try:
+                dict_cursor.execute(
+                    f'''SELECT pallet_id, company_name, product_name, status, in_date, out_date,
+                               rack_section_code, warehouse_use_status
+                        FROM pallets WHERE pallet_id IN ({', '.join([sym] * len(touched))})''',
+                    touched,
+                )
+                rows = dict_cursor.fetchall()
+                if USE_POSTGRESQL:
+                    rows = [dict(r) for r in rows]
+                else:
+                    cols = [c[0] for c in dict_cursor.description]
+                    rows = [dict(zip(cols, r)) for r in rows]
+            finally:
+                dict_cursor.close()
+            for row in rows:
+                final[row['pallet_id']] = _serialize_pallet_row_dates(row)
+
+        return {
+            'results': results,
+            'applied_count': sum(1 for r in results if r['outcome'] == 'applied'),
+            'duplicate_count': sum(1 for r in results if r['outcome'] == 'duplicate'),
+            'rejected_count': sum(1 for r in results if r['outcome'] == 'rejected'),
+            'pallets': final,
+        }
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
 def update_pallet_status_batch(pallet_ids: List[str], out_date: date = None, processed_by: str = None, notes: str = None) -> Dict:
     """
     파레트 보관종료 대량 처리
@@ -469,18 +932,22 @@ def update_pallet_status_batch(pallet_ids: List[str], out_date: date = None, pro
             'errors': ['파레트 ID가 없습니다.']
         }
     
+    occupancy_ready = ensure_rack_section_occupancy_table()
     conn = get_db_connection()
     cursor = conn.cursor()
     
     processed = []
     failed = []
     errors = []
+    occupancy_deltas = {}
     
     try:
+        # 대상 파레트를 한 번에 잠그고 조회 (동시 처리와 점유 증감이 겹치지 않게)
+        locked = _locked_pallet_states(cursor, list(dict.fromkeys(pallet_ids)))
         for pallet_id in pallet_ids:
             try:
                 # 파레트 정보 조회
-                pallet = get_pallet_by_id(pallet_id)
+                pallet = locked.get(pallet_id)
                 if not pallet:
                     failed.append(pallet_id)
                     errors.append(f'{pallet_id}: 파레트를 찾을 수 없습니다')
@@ -522,12 +989,22 @@ def update_pallet_status_batch(pallet_ids: List[str], out_date: date = None, pro
                     ''', (pallet_id, '보관종료', pallet.get('quantity', 1), processed_by, notes))
                 
                 processed.append(pallet_id)
+                if pallet['status'] == '입고됨' and pallet.get('rack_section_code'):
+                    code = pallet['rack_section_code']
+                    occupancy_deltas[code] = occupancy_deltas.get(code, 0) - 1
+                # 같은 요청에 같은 ID 가 또 있으면 이미 보관종료로 처리
+                pallet['status'] = '보관종료'
                 
             except Exception as e:
                 failed.append(pallet_id)
                 errors.append(f'{pallet_id}: {str(e)}')
                 continue
         
+        if occupancy_ready:
+            apply_rack_section_occupancy_deltas(cursor, occupancy_deltas)
+        if processed:
+            invalidate_settlement_company_cache(cursor)
+        
         # 모든 처리 완료 후 커밋
         conn.commit()
         
@@ -760,13 +1237,15 @@ def delete_pallet(pallet_id: str) -> Tuple[bool, str]:
     Returns:
         (success, message)
     """
+    occupancy_ready = ensure_rack_section_occupancy_table()
     conn = get_db_connection()
     cursor = conn.cursor()
     
     try:
-        # 파레트 존재 확인
-        pallet = get_pallet_by_id(pallet_id)
+        # 파레트 존재 확인 (잠근 뒤 읽은 상태로 점유 카운터 반영)
+        pallet = _locked_pallet_states(cursor, [pallet_id]).get(pallet_id)
         if not pallet:
+            conn.rollback()
             return False, "파레트를 찾을 수 없습니다."
         
         # 관련 데이터 삭제 (트랜잭션 이력, 보관료 계산 내역)
@@ -785,6 +1264,10 @@ def delete_pallet(pallet_id: str) -> Tuple[bool, str]:
             # 파레트 삭제
             cursor.execute('DELETE FROM pallets WHERE pallet_id = ?', (pallet_id,))
         
+        if occupancy_ready and pallet.get('status') == '입고됨':
+            apply_rack_section_occupancy_deltas(cursor, {pallet.get('rack_section_code'): -1})
+        invalidate_settlement_company_cache(cursor)
+        
         conn.commit()
         return True, "파레트가 삭제되었습니다."
     except Exception as e:
@@ -945,6 +1428,229 @@ def get_pallets(company_name: str = None, status: str = None,
         conn.close()
 
 
+PALLET_PAGE_DEFAULT_LIMIT = 100
+PALLET_PAGE_MAX_LIMIT = 500
+
+# 페이지 목록 API 컬럼 (SELECT * 대신 화면에 필요한 컬럼만)
+_PALLET_PAGE_COLUMNS = (
+    'pallet_id', 'company_name', 'product_name', 'status', 'in_date', 'out_date',
+    'storage_location', 'quantity', 'is_service', 'pallet_kind', 'kind_color',
+    'vendor_return_status', 'vendor_returned_at', 'rack_section_code',
+    'warehouse_use_status', 'notes',
+)
+
+
+def encode_pallet_cursor(in_date, pallet_id: str) -> str:
+    """keyset 커서 (in_date, pallet_id) → URL-safe 문자열."""
+    import base64
+    import json
+    d = in_date.isoformat() if hasattr(in_date, 'isoformat') else str(in_date)[:10]
+    raw = json.dumps([d, pallet_id], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_pallet_cursor(token: str) -> Tuple[date, str]:
+    """encode_pallet_cursor 역변환. 형식이 잘못되면 ValueError."""
+    import base64
+    import json
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        d, pid = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        return datetime.strptime(d, '%Y-%m-%d').date(), str(pid)
+    except Exception:
+        raise ValueError('잘못된 커서입니다.')
+
+
+def get_pallets_page(company_name: str = None, status: str = None,
+                     month: str = None, pallet_id: str = None,
+                     product_name: str = None, cursor_token: str = None,
+                     limit: int = PALLET_PAGE_DEFAULT_LIMIT) -> Dict:
+    """
+    파레트 목록 페이지 조회 (keyset 페이지네이션 + 서버 집계)
+
+    - (in_date DESC, pallet_id DESC) keyset 커서로 다음 페이지 조회 (OFFSET 없음)
+    - 화주사 필터는 company_key(정규화 화주사명) 인덱스로 처리 (별칭 키워드 1회 조회)
+    - 보관일수/보관료/상태별 건수 합계는 같은 쿼리(CTE)에서 필터 전체 기준으로 계산
+
+    보관일수·보관료 계산 규칙은 /api/pallets/list 와 동일:
+    month가 있으면 해당 월, 없으면 현재 월 기준 월보관일수 × 일일 보관료 (백원 단위 올림).
+
+    Returns:
+        {
+            'items': [...],
+            'next_cursor': str | None,
+            'has_more': bool,
+            'summary': {
+                'total_count', 'status_counts', 'service_count',
+                'total_storage_days', 'monthly_storage_days', 'total_fee'
+            }
+        }
+    """
+    ensure_pallet_table_columns()
+
+    try:
+        limit = int(limit or PALLET_PAGE_DEFAULT_LIMIT)
+    except (TypeError, ValueError):
+        limit = PALLET_PAGE_DEFAULT_LIMIT
+    limit = max(1, min(limit, PALLET_PAGE_MAX_LIMIT))
+
+    after = decode_pallet_cursor(cursor_token) if cursor_token else None
+
+    today = date.today()
+    if month:
+        year, month_num = map(int, month.split('-'))
+        period_start = date(year, month_num, 1)
+    else:
+        period_start = date(today.year, today.month, 1)
+    if period_start.month == 12:
+        period_end = date(period_start.year + 1, 1, 1) - timedelta(days=1)
+    else:
+        period_end = date(period_start.year, period_start.month + 1, 1) - timedelta(days=1)
+
+    sym = '%s' if USE_POSTGRESQL else '?'
+    greatest = 'GREATEST' if USE_POSTGRESQL else 'MAX'
+    least = 'LEAST' if USE_POSTGRESQL else 'MIN'
+
+    def _days(end_expr: str, start_expr: str) -> str:
+        if USE_POSTGRESQL:
+            return f'({end_expr}) - ({start_expr})'
+        return f'CAST(julianday({end_expr}) - julianday({start_expr}) AS INTEGER)'
+
+    total_days_expr = f"{greatest}(0, {_days(f'COALESCE(out_date, {sym})', 'in_date')} + 1)"
+    monthly_days_expr = (
+        f"{greatest}(0, {_days(f'{least}(COALESCE(out_date, {sym}), {sym})', f'{greatest}(in_date, {sym})')} + 1)"
+    )
+    daily_fee_expr = (
+        'ROUND(COALESCE((SELECT f.monthly_fee FROM pallet_fees f '
+        f'WHERE f.company_name = p.company_name AND f.effective_from <= {sym} '
+        'ORDER BY f.effective_from DESC LIMIT 1), 16000) / 30.0, 2)'
+    )
+    fee_units = 'daily_fee * monthly_storage_days / 100.0'
+    if USE_POSTGRESQL:
+        ceil_fee_expr = f'CAST(CEIL({fee_units}) * 100 AS INTEGER)'
+    else:
+        ceil_fee_expr = (
+            f'(CAST({fee_units} AS INTEGER) + ({fee_units} > CAST({fee_units} AS INTEGER))) * 100'
+        )
+
+    params = [today, today, period_end, period_start, period_start]
+
+    where = ' WHERE 1=1'
+    if company_name:
+        keys = get_company_search_keywords(company_name) or [normalize_company_name(company_name)]
+        where += f" AND company_key IN ({', '.join([sym] * len(keys))})"
+        params.extend(keys)
+    if status and status != '전체':
+        where += f' AND status = {sym}'
+        params.append(status)
+    pid_terms = _pallet_id_search_token_list(pallet_id)
+    if pid_terms:
+        where, params = _append_pallet_id_like_clause(where, params, pid_terms)
+    if product_name and product_name.strip():
+        where += f' AND product_name LIKE {sym}'
+        params.append(f'%{product_name.strip()}%')
+    if month:
+        where += f' AND in_date <= {sym} AND (out_date IS NULL OR out_date >= {sym})'
+        params.extend([period_end, period_start])
+
+    page_where = ''
+    if after:
+        page_where = f' WHERE (in_date < {sym} OR (in_date = {sym} AND pallet_id < {sym}))'
+        params.extend([after[0], after[0], after[1]])
+    params.append(limit + 1)
+
+    columns = ', '.join(f'p.{c}' for c in _PALLET_PAGE_COLUMNS)
+    query = f'''
+        WITH base AS (
+            SELECT {columns},
+                   {total_days_expr} AS total_storage_days,
+                   {monthly_days_expr} AS monthly_storage_days,
+                   {daily_fee_expr} AS daily_fee
+            FROM pallets p{where}
+        ),
+        priced AS (
+            SELECT base.*,
+                   CASE WHEN is_service = 1 THEN 0 ELSE {ceil_fee_expr} END AS current_fee
+            FROM base
+        ),
+        agg AS (
+            SELECT COUNT(*) AS agg_total_count,
+                   COALESCE(SUM(CASE WHEN status = '입고됨' THEN 1 ELSE 0 END), 0) AS agg_inbound_count,
+                   COALESCE(SUM(CASE WHEN status = '보관종료' THEN 1 ELSE 0 END), 0) AS agg_ended_count,
+                   COALESCE(SUM(CASE WHEN is_service = 1 THEN 1 ELSE 0 END), 0) AS agg_service_count,
+                   COALESCE(SUM(total_storage_days), 0) AS agg_total_storage_days,
+                   COALESCE(SUM(monthly_storage_days), 0) AS agg_monthly_storage_days,
+                   COALESCE(SUM(current_fee), 0) AS agg_total_fee
+            FROM priced
+        ),
+        page AS (
+            SELECT * FROM priced{page_where}
+            ORDER BY in_date DESC, pallet_id DESC
+            LIMIT {sym}
+        )
+        SELECT agg.*, page.*
+        FROM agg LEFT JOIN page ON 1=1
+        ORDER BY page.in_date DESC, page.pallet_id DESC
+    '''
+
+    conn = get_db_connection()
+    try:
+        if USE_POSTGRESQL:
+            from psycopg2.extras import RealDictCursor
+            cursor = conn.cursor(cursor_factory=RealDictCursor)
+        else:
+            cursor = conn.cursor()
+        cursor.execute(query, params)
+        rows = cursor.fetchall()
+        if USE_POSTGRESQL:
+            rows = [dict(r) for r in rows]
+        else:
+            cols = [c[0] for c in cursor.description]
+            rows = [dict(zip(cols, r)) for r in rows]
+    finally:
+        cursor.close()
+        conn.close()
+
+    head = rows[0] if rows else {}
+    summary = {
+        'total_count': int(head.get('agg_total_count') or 0),
+        'status_counts': {
+            '입고됨': int(head.get('agg_inbound_count') or 0),
+            '보관종료': int(head.get('agg_ended_count') or 0),
+        },
+        'service_count': int(head.get('agg_service_count') or 0),
+        'total_storage_days': int(head.get('agg_total_storage_days') or 0),
+        'monthly_storage_days': int(head.get('agg_monthly_storage_days') or 0),
+        'total_fee': int(head.get('agg_total_fee') or 0),
+    }
+
+    items = []
+    for row in rows:
+        if row.get('pallet_id') is None:
+            continue
+        item = {k: v for k, v in row.items() if not k.startswith('agg_')}
+        item['total_storage_days'] = int(item.get('total_storage_days') or 0)
+        item['monthly_storage_days'] = int(item.get('monthly_storage_days') or 0)
+        # /list 호환: month가 있으면 storage_days = 월보관일수, 없으면 총보관일수
+        item['storage_days'] = item['monthly_storage_days'] if month else item['total_storage_days']
+        item['daily_fee'] = float(item.get('daily_fee') or 0)
+        item['current_fee'] = int(item.get('current_fee') or 0)
+        items.append(_serialize_pallet_row_dates(item))
+
+    has_more = len(items) > limit
+    items = items[:limit]
+    next_cursor = None
+    if has_more and items:
+        next_cursor = encode_pallet_cursor(items[-1]['in_date'], items[-1]['pallet_id'])
+
+    return {
+        'items': items,
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'summary': summary,
+    }
+
+
 # ========================================
 # 보관료 계산 함수
 # ========================================
@@ -1531,6 +2237,7 @@ def generate_monthly_settlement(settlement_month: str = None,
         })
     
     # 데이터베이스에 저장
+    rollup_ready = ensure_pallet_revenue_rollup_table()
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -1678,8 +2385,20 @@ def generate_monthly_settlement(settlement_month: str = None,
                     VALUES (?, ?, CURRENT_TIMESTAMP)
                 ''', (settlement_month, company))
         
+        # 보관료 수입 롤업 갱신 (해당 정산월)
+        if rollup_ready:
+            sync_pallet_revenue_rollup(cursor, settlement_month)
+        
+        # 정산 화면 화주사 목록: 버전을 올리고 커밋 후 해당 월 목록을 미리 물리화
+        invalidate_settlement_company_cache(cursor)
+        
         conn.commit()
         
+        try:
+            get_companies_with_pallets(settlement_month, refresh=True)
+        except Exception as e:
+            print(f"[경고] 정산월 화주사 목록 물리화 실패: {e}")
+        
         return True, f"정산 생성 완료: {len(company_settlements)}개 화주사", {
             'settlement_month': settlement_month,
             'total_companies': len(company_settlements),
@@ -2123,6 +2842,7 @@ def delete_settlement_by_month(settlement_month: str) -> Tuple[bool, str]:
     Returns:
         (success, message)
     """
+    rollup_ready = ensure_pallet_revenue_rollup_table()
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -2156,6 +2876,9 @@ def delete_settlement_by_month(settlement_month: str) -> Tuple[bool, str]:
         else:
             cursor.execute('DELETE FROM pallet_monthly_settlements WHERE settlement_month = ?', (settlement_month,))
         
+        if rollup_ready:
+            sync_pallet_revenue_rollup(cursor, settlement_month)
+        
         conn.commit()
         return True, f"{settlement_month} 정산 내역 {count}개가 삭제되었습니다."
     except Exception as e:
@@ -2176,6 +2899,7 @@ def delete_settlement(settlement_id: int) -> Tuple[bool, str]:
     Returns:
         (success, message)
     """
+    rollup_ready = ensure_pallet_revenue_rollup_table()
     conn = get_db_connection()
     cursor = conn.cursor()
     
@@ -2221,6 +2945,9 @@ def delete_settlement(settlement_id: int) -> Tuple[bool, str]:
         else:
             cursor.execute('DELETE FROM pallet_monthly_settlements WHERE id = ?', (settlement_id,))
         
+        if rollup_ready:
+            sync_pallet_revenue_rollup(cursor, settlement_month)
+        
         conn.commit()
         return True, "정산 내역이 삭제되었습니다."
     except Exception as e:
@@ -2231,10 +2958,84 @@ def delete_settlement(settlement_id: int) -> Tuple[bool, str]:
         conn.close()
 
 
-def get_companies_with_pallets(settlement_month: str = None) -> List[str]:
+# 화주사 목록 프로세스 캐시: list_key → {companies, version, generation, checked_at}
+SETTLEMENT_COMPANIES_CACHE_TTL_SECONDS = 300
+_SETTLEMENT_COMPANIES_CACHE: Dict[str, Dict] = {}
+
+
+def get_companies_with_pallets(settlement_month: str = None, refresh: bool = False) -> List[str]:
     """
-    파레트를 보관 중인 화주사 목록 조회
-    
+    파레트를 보관 중인 화주사 목록 (정산 화면용, 캐시 사용)
+
+    1) 프로세스 캐시: TTL 안이고 같은 프로세스에서 무효화가 없었으면 DB 조회 없이 반환
+    2) pallet_settlement_company_lists: 버전 스탬프가 현재 버전과 같으면 그대로 사용
+    3) 둘 다 아니면 _compute_companies_with_pallets 로 다시 계산해 물리화
+
+    화주사 생성/삭제·별칭 변경·정산 생성, 그리고 월별 보관 화주사가 바뀔 수 있는 파레트 쓰기
+    (새 달·소급 입고, 보관종료, 출고일 수정, 삭제) 시 invalidate_settlement_company_cache 로 버전이 올라간다.
+
+    Args:
+        settlement_month: 정산월 (YYYY-MM 형식). 지정되면 해당 월에 보관했던 화주사만 조회
+        refresh: True 면 캐시를 무시하고 다시 계산
+    """
+    list_key = settlement_month or '*'
+    generation = local_cache_generation(SETTLEMENT_COMPANIES_CACHE)
+    entry = _SETTLEMENT_COMPANIES_CACHE.get(list_key)
+    if (not refresh and entry and entry['generation'] == generation
+            and time.monotonic() - entry['checked_at'] < SETTLEMENT_COMPANIES_CACHE_TTL_SECONDS):
+        return list(entry['companies'])
+
+    ensure_pallet_settlement_company_lists_table()
+    sym = '%s' if USE_POSTGRESQL else '?'
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        version = get_cache_version(SETTLEMENT_COMPANIES_CACHE, cursor)
+        companies = None
+        if not refresh:
+            cursor.execute(
+                f'SELECT companies, version FROM pallet_settlement_company_lists WHERE list_key = {sym}',
+                (list_key,),
+            )
+            row = cursor.fetchone()
+            if row and int(row[1] or 0) == version:
+                companies = json.loads(row[0])
+        if companies is None:
+            companies = _compute_companies_with_pallets(settlement_month)
+            if USE_POSTGRESQL:
+                cursor.execute(
+                    """INSERT INTO pallet_settlement_company_lists (list_key, companies, version, computed_at)
+                       VALUES (%s, %s, %s, CURRENT_TIMESTAMP)
+                       ON CONFLICT (list_key) DO UPDATE
+                       SET companies = EXCLUDED.companies, version = EXCLUDED.version,
+                           computed_at = CURRENT_TIMESTAMP""",
+                    (list_key, json.dumps(companies, ensure_ascii=False), version),
+                )
+            else:
+                cursor.execute(
+                    """INSERT OR REPLACE INTO pallet_settlement_company_lists
+                       (list_key, companies, version, computed_at)
+                       VALUES (?, ?, ?, CURRENT_TIMESTAMP)""",
+                    (list_key, json.dumps(companies, ensure_ascii=False), version),
+                )
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    _SETTLEMENT_COMPANIES_CACHE[list_key] = {
+        'companies': companies,
+        'version': version,
+        'generation': generation,
+        'checked_at': time.monotonic(),
+    }
+    return list(companies)
+
+
+def _compute_companies_with_pallets(settlement_month: str = None) -> List[str]:
+    """
+    파레트를 보관 중인 화주사 목록 계산 (get_companies_with_pallets 캐시 미스 시)
+
     ✅ 성능 최적화:
     - 저장된 화주사 목록(`pallet_settlement_companies`) 우선 사용
     - 배치 쿼리로 모든 화주사 키워드를 한 번에 조회 (N+1 문제 해결)
@@ -2472,6 +3273,7 @@ def get_monthly_revenue(start_month: str = None, end_month: str = None) -> Dict:
     월별 보관료 수입 현황 조회
     
     비활성화된 화주사(is_company_deactivated) 정산 행은 집계에서 제외한다.
+    pallet_revenue_rollup(월·화주사별 보관료, 활성 플래그)을 읽으므로 기간과 무관하게 GROUP BY 2회로 끝난다.
     
     Args:
         start_month: 시작 월 (YYYY-MM 형식, 선택)
@@ -2505,66 +3307,45 @@ def get_monthly_revenue(start_month: str = None, end_month: str = None) -> Dict:
             ]
         }
     """
-    from collections import defaultdict
-    
+    ensure_pallet_revenue_rollup_table()
     conn = get_db_connection()
+    cursor = conn.cursor()
     
     try:
-        if USE_POSTGRESQL:
-            from psycopg2.extras import RealDictCursor
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-        else:
-            cursor = conn.cursor()
-        
-        query = "SELECT settlement_month, company_name, total_fee FROM pallet_monthly_settlements WHERE 1=1"
+        # pallet_revenue_rollup 에서 활성 화주사 행만 인덱스 범위 조회 (정산 생성/삭제·화주사 토글 시 갱신됨)
+        sym = '%s' if USE_POSTGRESQL else '?'
+        where = ' WHERE is_active = 1'
         params = []
-        
         if start_month:
-            query += " AND settlement_month >= %s" if USE_POSTGRESQL else " AND settlement_month >= ?"
+            where += f' AND settlement_month >= {sym}'
             params.append(start_month)
-        
         if end_month:
-            query += " AND settlement_month <= %s" if USE_POSTGRESQL else " AND settlement_month <= ?"
+            where += f' AND settlement_month <= {sym}'
             params.append(end_month)
         
-        query += " ORDER BY settlement_month DESC"
-        
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        
-        deact_cache = {}
-        
-        def _include_company(cn: str) -> bool:
-            if not cn:
-                return False
-            if cn not in deact_cache:
-                deact_cache[cn] = is_company_deactivated(cn)
-            return not deact_cache[cn]
-        
-        month_fee = defaultdict(int)
-        month_companies = defaultdict(set)
-        company_fee = defaultdict(int)
-        
-        for row in rows:
-            if USE_POSTGRESQL:
-                sm = row['settlement_month']
-                cn = row['company_name']
-                fee = int(row['total_fee'] or 0)
-            else:
-                sm, cn, fee = row[0], row[1], int(row[2] or 0)
-            if not _include_company(cn):
-                continue
-            month_fee[sm] += fee
-            month_companies[sm].add(cn)
-            company_fee[cn] += fee
+        cursor.execute(f'''
+            SELECT settlement_month, COALESCE(SUM(total_fee), 0), COUNT(DISTINCT company_name)
+            FROM pallet_revenue_rollup{where}
+            GROUP BY settlement_month
+            ORDER BY settlement_month DESC
+        ''', params)
+        month_rows = cursor.fetchall()
+        
+        cursor.execute(f'''
+            SELECT company_name, COALESCE(SUM(total_fee), 0) AS company_total
+            FROM pallet_revenue_rollup{where}
+            GROUP BY company_name
+            ORDER BY company_total DESC, company_name
+        ''', params)
+        company_rows = cursor.fetchall()
         
         monthly_data = []
         total_revenue = 0
         revenue_list = []
         
-        for month in sorted(month_fee.keys(), reverse=True):
-            total_fee = month_fee[month]
-            company_count = len(month_companies[month])
+        for month, total_fee, company_count in month_rows:
+            total_fee = int(total_fee or 0)
+            company_count = int(company_count or 0)
             average_fee = total_fee / company_count if company_count > 0 else 0
             monthly_data.append({
                 'month': month,
@@ -2589,8 +3370,8 @@ def get_monthly_revenue(start_month: str = None, end_month: str = None) -> Dict:
         }
         
         company_distribution = []
-        sorted_companies = sorted(company_fee.items(), key=lambda x: -x[1])
-        for company_name, company_total_fee in sorted_companies:
+        for company_name, company_total_fee in company_rows:
+            company_total_fee = int(company_total_fee or 0)
             percentage = (company_total_fee / total_revenue * 100) if total_revenue > 0 else 0
             company_distribution.append({
                 'company_name': company_name,
@@ -12,6 +12,9 @@ from api.pallets.models import (
     get_monthly_revenue, get_daily_fees_batch,
     get_vendor_return_pallets, update_vendor_return,
     list_rack_sections, apply_pallet_mobile_track, _serialize_pallet_row_dates,
+    get_rack_section_occupancy, rebuild_rack_section_occupancy_counts, invalidate_rack_section_cache,
+    get_pallets_page, PALLET_PAGE_DEFAULT_LIMIT,
+    apply_pallet_mobile_track_batch,
 )
 
 # Blueprint 생성
@@ -134,6 +137,7 @@ def pallet_inbound():
                     created_by=username,
                     pallet_kind=pallet_data.get('pallet_kind'),
                     kind_color=pallet_data.get('kind_color'),
+                    rack_section_code=pallet_data.get('rack_section_code'),
                 )
                 
                 if success:
@@ -171,6 +175,7 @@ def pallet_inbound():
                 created_by=username,
                 pallet_kind=data.get('pallet_kind'),
                 kind_color=data.get('kind_color'),
+                rack_section_code=data.get('rack_section_code'),
             )
             
             print(f"[DEBUG] create_pallet 결과 - success: {success}, message: {message}")
@@ -493,6 +498,73 @@ def pallet_list():
         }), 500
 
 
+@pallets_bp.route('/list/page', methods=['GET'])
+def pallet_list_page():
+    """
+    파레트 목록 페이지 조회 (keyset 커서 + 서버 집계)
+
+    Query Parameters:
+        - company, status, month, pallet_id, product_name: /list 와 동일
+        - cursor: 이전 응답의 next_cursor (없으면 첫 페이지)
+        - limit: 페이지 크기 (기본 100, 최대 500)
+
+    summary(상태별 건수, 보관일수 합계, 보관료 합계)는 커서와 무관하게 필터 전체 기준.
+    """
+    try:
+        role, company_name, username = get_user_context()
+
+        filter_company = request.args.get('company', '').strip()
+        status = request.args.get('status', '전체')
+        month = request.args.get('month') or None
+        pallet_id_filter = request.args.get('pallet_id', '').strip()
+        product_name_filter = request.args.get('product_name', '').strip()
+        cursor_token = request.args.get('cursor', '').strip()
+        limit = request.args.get('limit', PALLET_PAGE_DEFAULT_LIMIT, type=int)
+
+        if role != '관리자':
+            if not company_name:
+                return jsonify({
+                    'success': False,
+                    'message': '화주사 정보가 필요합니다.'
+                }), 400
+            final_company = company_name
+        else:
+            final_company = filter_company if filter_company else None
+
+        page = get_pallets_page(
+            company_name=final_company,
+            status=None if status == '전체' else status,
+            month=month,
+            pallet_id=pallet_id_filter or None,
+            product_name=product_name_filter or None,
+            cursor_token=cursor_token or None,
+            limit=limit,
+        )
+
+        return jsonify({
+            'success': True,
+            'data': page['items'],
+            'count': len(page['items']),
+            'next_cursor': page['next_cursor'],
+            'has_more': page['has_more'],
+            'summary': page['summary']
+        }), 200
+
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'message': str(e)
+        }), 400
+    except Exception as e:
+        print(f"파레트 목록 페이지 조회 오류: {e}")
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'message': f'파레트 목록 조회 실패: {str(e)}'
+        }), 500
+
+
 @pallets_bp.route('/vendor-return-list', methods=['GET'])
 def pallet_vendor_return_list():
     """아주·kpp 파레트 화주 반납(회수) 현황. 관리자: 전체/필터, 화주사: 자사만 조회."""
@@ -669,7 +741,7 @@ def pallet_update_out_date(pallet_id):
             }), 400
         
         # 출고일 업데이트
-        from api.database.models import get_db_connection, USE_POSTGRESQL
+        from api.database.models import get_db_connection, USE_POSTGRESQL, invalidate_settlement_company_cache
         conn = get_db_connection()
         cursor = conn.cursor()
         
@@ -703,6 +775,8 @@ def pallet_update_out_date(pallet_id):
                     ) VALUES (?, ?, ?, CURRENT_TIMESTAMP, ?, ?, CURRENT_TIMESTAMP)
                 ''', (pallet_id, '출고일수정', pallet.get('quantity', 1), username, notes))
             
+            # 출고일이 바뀌면 월별 보관 화주사 목록도 바뀔 수 있음
+            invalidate_settlement_company_cache(cursor)
             conn.commit()
             
             # 업데이트된 파레트 정보 조회
@@ -2063,6 +2137,40 @@ def pallet_rack_sections_list():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@pallets_bp.route('/rack-sections/occupancy', methods=['GET'])
+def pallet_rack_sections_occupancy():
+    """섹션별 보관중 파레트 수 (창고 맵 전체를 카운터 1회 조회로 반환)."""
+    try:
+        data = get_rack_section_occupancy()
+        return jsonify({'success': True, 'data': data}), 200
+    except Exception as e:
+        print(f'rack-sections/occupancy 오류: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
+@pallets_bp.route('/rack-sections/occupancy/rebuild', methods=['POST'])
+def pallet_rack_sections_occupancy_rebuild():
+    """섹션 점유 카운터를 pallets 기준으로 재집계 (관리자 전용, 수동 보정용)."""
+    role, _, _ = get_user_context()
+    if role != '관리자':
+        return jsonify({'success': False, 'message': '관리자만 재집계할 수 있습니다.'}), 403
+    try:
+        invalidate_rack_section_cache()
+        count = rebuild_rack_section_occupancy_counts()
+        return jsonify({
+            'success': True,
+            'message': f'{count}개 섹션 재집계 완료',
+            'data': get_rack_section_occupancy(),
+        }), 200
+    except Exception as e:
+        print(f'rack-sections/occupancy/rebuild 오류: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @pallets_bp.route('/mobile-track/info', methods=['GET'])
 def pallet_mobile_track_info():
     """자체 추적 QR 스캔 후 파레트 요약·섹션 목록."""
@@ -2113,6 +2221,30 @@ def pallet_mobile_track_action_route():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@pallets_bp.route('/mobile-track/batch', methods=['POST'])
+def pallet_mobile_track_batch_route():
+    """
+    모바일 자체 추적 QR — 오프라인 큐 일괄 동기화.
+
+    Body: {"actions": [{"idempotency_key", "pallet_id", "action", "rack_section_code", "client_ts"}, ...]}
+    항목별 결과(applied/duplicate/rejected)를 순서대로 반환. 같은 키로 재전송해도 한 번만 적용된다.
+    """
+    try:
+        data = request.get_json(silent=True) or {}
+        actions = data.get('actions')
+        if not isinstance(actions, list) or not actions:
+            return jsonify({'success': False, 'message': 'actions 목록이 필요합니다.'}), 400
+        result = apply_pallet_mobile_track_batch(actions, processed_by='QR Mobile')
+        return jsonify({'success': True, 'data': result}), 200
+    except ValueError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+    except Exception as e:
+        print(f'mobile-track/batch 오류: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @pallets_bp.route('/labels/filter', methods=['GET'])
 def filter_labels():
     """
@@ -2596,55 +2728,21 @@ def get_companies():
         role, company_name, username = get_user_context()
         
         settlement_month = request.args.get('month')
+        refresh = role == '관리자' and request.args.get('refresh') in ('1', 'true')
         
         from api.pallets.models import get_companies_with_pallets
-        from api.database.models import get_all_companies, is_company_deactivated
-        
-        # 파레트를 보관 중인 화주사 목록
-        companies_with_pallets = get_companies_with_pallets(settlement_month=settlement_month)
-        
-        # 모든 화주사 정보 조회 (비활성화 상태 포함)
-        all_companies = get_all_companies()
-        
-        # 화주사명을 키로 하는 딕셔너리 생성 (비활성화 상태 포함)
-        companies_dict = {}
-        for comp in all_companies:
-            comp_name = comp.get('company_name', '')
-            if comp_name:
-                # is_active 처리 (SQLite는 INTEGER, PostgreSQL은 BOOLEAN)
-                is_active = comp.get('is_active')
-                if is_active is None:
-                    is_active = True  # 기본값
-                elif isinstance(is_active, int):
-                    is_active = bool(is_active)  # SQLite: 1/0 -> True/False
-                companies_dict[comp_name] = {
-                    'company_name': comp_name,
-                    'is_active': is_active
-                }
-        
-        # 화주사 목록에 비활성화 상태 추가 (이전/비활성 화주사는 목록에서 제외)
-        companies_list = []
-        for comp_name in companies_with_pallets:
-            # 모든 화주사에 대해 is_company_deactivated로 최종 상태 확인
-            # (companies 테이블과 deactivated_companies 테이블 모두 확인)
-            is_deactivated = is_company_deactivated(comp_name)
-            if is_deactivated:
-                continue  # 이전(비활성) 화주사는 모든 메뉴에서 숨김
-            
-            if comp_name in companies_dict:
-                # companies 테이블에 있는 경우: 딕셔너리에서 가져오되, deactivated_companies도 확인
-                company_info = companies_dict[comp_name].copy()
-                # deactivated_companies 테이블에 있으면 무조건 비활성화
-                company_info['is_active'] = not is_deactivated
-                print(f"[화주사목록] {comp_name}: companies 테이블에 있음, 최종 is_active={company_info.get('is_active')} (deactivated={is_deactivated})")
-            else:
-                # companies 테이블에 없는 경우: deactivated_companies 테이블만 확인
-                company_info = {
-                    'company_name': comp_name,
-                    'is_active': not is_deactivated  # 비활성화되어 있으면 False
-                }
-                print(f"[화주사목록] {comp_name}: companies 테이블에 없음, deactivated={is_deactivated}, is_active={company_info.get('is_active')}")
-            companies_list.append(company_info)
+        from api.database.models import get_companies_deactivated_map
+        
+        # 파레트를 보관 중인 화주사 목록 (물리화 + 버전 스탬프 캐시)
+        companies_with_pallets = get_companies_with_pallets(settlement_month=settlement_month, refresh=refresh)
+        
+        # 이전/비활성 화주사는 목록에서 제외 (companies·deactivated_companies 를 한 번에 판별)
+        deactivated = get_companies_deactivated_map(companies_with_pallets)
+        companies_list = [
+            {'company_name': comp_name, 'is_active': True}
+            for comp_name in companies_with_pallets
+            if not deactivated.get(comp_name)
+        ]
         
         return jsonify({
             'success': True,
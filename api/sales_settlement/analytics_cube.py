@@ -0,0 +1,285 @@
+"""
+매출정산 통계 큐브 (sales_analytics_cube)
+
+(정산년월, 화주사 키, 상태) 단위로 금액 합계·건수를 미리 집계해 두고,
+정산 생성/수정/삭제/상태 변경 시 변경 전후 행의 차이만 반영한다.
+/analytics 는 큐브만 읽어 순위·KPI 계산만 한다.
+
+전체 재집계(rebuild)는 NumPy 가 있으면 배열 연산으로, 없으면 dict 루프로 처리한다.
+"""
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from api.database.models import get_db_connection, USE_POSTGRESQL, normalize_company_name
+
+try:
+    import numpy as np  # 선택 의존성 (전체 재집계 가속용)
+except ImportError:
+    np = None
+
+UNNAMED_COMPANY = '(미지정)'
+
+# (정산년월, 화주사명, 상태, 총액)
+SettlementCubeRow = Tuple[str, str, str, int]
+# (정산년월, 화주사 키, 상태) → [금액, 건수, 화주사명]
+CubeCell = Tuple[str, str, str]
+
+_SALES_ANALYTICS_CUBE_ENSURED = False
+
+
+def cube_key(year_month: Any, company_name: Any, status: Any) -> Tuple[CubeCell, str]:
+    """
+    큐브 키와 표시용 화주사명 (기존 집계와 같은 규칙: 빈 화주사명은 (미지정), 빈 상태는 대기)
+    상태는 status_transitions 의 COALESCE(NULLIF(TRIM(status), ''), '대기') 와 같게 공백을 제거한다.
+    """
+    name = (company_name or '').strip() or UNNAMED_COMPANY
+    key = normalize_company_name(name) or UNNAMED_COMPANY
+    return ((year_month or '').strip(), key, (status or '').strip() or '대기'), name
+
+
+def ensure_sales_analytics_cube_table() -> bool:
+    """
+    sales_analytics_cube 테이블 생성. 비어 있으면 settlements 에서 1회 재집계한다.
+
+    Returns:
+        큐브 사용 가능 여부
+    """
+    global _SALES_ANALYTICS_CUBE_ENSURED
+    if _SALES_ANALYTICS_CUBE_ENSURED:
+        return True
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''
+            CREATE TABLE IF NOT EXISTS sales_analytics_cube (
+                year_month TEXT NOT NULL,
+                company_key TEXT NOT NULL,
+                status TEXT NOT NULL,
+                company_name TEXT NOT NULL,
+                total_amount {'BIGINT' if USE_POSTGRESQL else 'INTEGER'} NOT NULL DEFAULT 0,
+                row_count INTEGER NOT NULL DEFAULT 0,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (year_month, company_key, status)
+            )
+            '''
+        )
+        cursor.execute('SELECT COUNT(*) FROM sales_analytics_cube')
+        if cursor.fetchone()[0] == 0:
+            rebuild_sales_analytics_cube(cursor)
+        conn.commit()
+        _SALES_ANALYTICS_CUBE_ENSURED = True
+        print('[성공] sales_analytics_cube 테이블 준비 완료')
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f'[경고] ensure_sales_analytics_cube_table 실패: {e}')
+    finally:
+        cursor.close()
+        conn.close()
+    return _SALES_ANALYTICS_CUBE_ENSURED
+
+
+def _aggregate_python(rows: Iterable[SettlementCubeRow]) -> Dict[CubeCell, list]:
+    cells: Dict[CubeCell, list] = {}
+    for ym, company_name, status, amount in rows:
+        key, name = cube_key(ym, company_name, status)
+        cell = cells.get(key)
+        if cell is None:
+            cells[key] = [int(amount or 0), 1, name]
+        else:
+            cell[0] += int(amount or 0)
+            cell[1] += 1
+    return cells
+
+
+def _aggregate_numpy(rows: Sequence[SettlementCubeRow]) -> Dict[CubeCell, list]:
+    """NumPy 집계: 키 문자열을 정수 코드로 바꾼 뒤 bincount 로 합산"""
+    if not rows:
+        return {}
+    ym_raw, name_raw, status_raw, amount_raw = zip(*rows)
+    names = np.char.strip(np.array([n or '' for n in name_raw], dtype=str))
+    names = np.where(names == '', UNNAMED_COMPANY, names)
+    uniq_names, name_codes = np.unique(names, return_inverse=True)
+    # 고유 화주사명에만 normalize_company_name 적용 후 키 코드로 변환
+    company_keys = np.array([normalize_company_name(n) or UNNAMED_COMPANY for n in uniq_names.tolist()], dtype=str)
+    key_values, key_of_name = np.unique(company_keys, return_inverse=True)
+    key_codes = key_of_name[name_codes]
+
+    yms, ym_codes = np.unique(np.char.strip(np.array([y or '' for y in ym_raw], dtype=str)), return_inverse=True)
+    statuses, status_codes = np.unique(
+        np.array([(s or '').strip() or '대기' for s in status_raw], dtype=str), return_inverse=True
+    )
+    amounts = np.array([int(a or 0) for a in amount_raw], dtype=np.int64)
+
+    combined = (ym_codes.astype(np.int64) * len(key_values) + key_codes) * len(statuses) + status_codes
+    cells_codes, first_index, inverse = np.unique(combined, return_index=True, return_inverse=True)
+    sums = np.bincount(inverse, weights=amounts, minlength=len(cells_codes))
+    counts = np.bincount(inverse, minlength=len(cells_codes))
+
+    cells: Dict[CubeCell, list] = {}
+    for i, code in enumerate(cells_codes.tolist()):
+        rest, status_code = divmod(code, len(statuses))
+        ym_code, key_code = divmod(rest, len(key_values))
+        cells[(str(yms[ym_code]), str(key_values[key_code]), str(statuses[status_code]))] = [
+            int(round(sums[i])), int(counts[i]), str(uniq_names[name_codes[first_index[i]]]),
+        ]
+    return cells
+
+
+def aggregate_cube_rows(rows: Sequence[SettlementCubeRow], use_numpy: Optional[bool] = None) -> Dict[CubeCell, list]:
+    """
+    정산 행 → 큐브 셀 집계
+
+    Args:
+        rows: (정산년월, 화주사명, 상태, 총액) 목록
+        use_numpy: None 이면 NumPy 설치 시 사용
+
+    Returns:
+        {(정산년월, 화주사 키, 상태): [금액 합계, 건수, 화주사명]}
+    """
+    if use_numpy is None:
+        use_numpy = np is not None
+    if use_numpy and np is not None:
+        return _aggregate_numpy(rows)
+    return _aggregate_python(rows)
+
+
+def _row_values(row) -> tuple:
+    """일반 커서 튜플 / RealDictCursor 행 모두 컬럼 순서 튜플로"""
+    return tuple(row.values()) if isinstance(row, dict) else tuple(row)
+
+
+def rebuild_sales_analytics_cube(cursor, use_numpy: Optional[bool] = None) -> int:
+    """
+    settlements → sales_analytics_cube 전체 재집계 (호출자 트랜잭션 안에서 실행).
+
+    Returns:
+        기록된 큐브 셀 수
+    """
+    cursor.execute('SELECT settlement_year_month, company_name, status, total_amount FROM settlements')
+    rows = [_row_values(r) for r in cursor.fetchall()]
+    cells = aggregate_cube_rows(rows, use_numpy=use_numpy)
+    cursor.execute('DELETE FROM sales_analytics_cube')
+    if cells:
+        sym = '%s' if USE_POSTGRESQL else '?'
+        cursor.executemany(
+            f'''INSERT INTO sales_analytics_cube
+                    (year_month, company_key, status, company_name, total_amount, row_count)
+                VALUES ({sym}, {sym}, {sym}, {sym}, {sym}, {sym})''',
+            [(k[0], k[1], k[2], v[2], v[0], v[1]) for k, v in cells.items()],
+        )
+    return len(cells)
+
+
+def settlement_cube_rows(cursor, settlement_ids: Sequence[int], lock: bool = False) -> List[SettlementCubeRow]:
+    """
+    큐브 반영용 정산 행 조회 (변경 전후 비교에 사용)
+
+    lock=True 는 변경 전 조회용: 커밋까지 행을 잠가 동시 수정이 같은 '변경 전' 값을 두 번 빼지 않게 한다.
+    PostgreSQL 은 SELECT ... FOR UPDATE, SQLite 는 먼저 빈 UPDATE 로 쓰기 잠금을 잡는다.
+    """
+    ids = [i for i in settlement_ids if i is not None]
+    if not ids:
+        return []
+    if USE_POSTGRESQL:
+        cursor.execute(
+            'SELECT settlement_year_month, company_name, status, total_amount FROM settlements WHERE id = ANY(%s)'
+            + (' FOR UPDATE' if lock else ''),
+            (list(ids),),
+        )
+    else:
+        marks = ', '.join(['?'] * len(ids))
+        if lock:
+            cursor.execute(f'UPDATE settlements SET id = id WHERE id IN ({marks})', list(ids))
+        cursor.execute(
+            f"SELECT settlement_year_month, company_name, status, total_amount FROM settlements "
+            f"WHERE id IN ({marks})",
+            list(ids),
+        )
+    return [_row_values(r) for r in cursor.fetchall()]
+
+
+def apply_settlement_cube_diff(cursor, before: Sequence[SettlementCubeRow], after: Sequence[SettlementCubeRow]):
+    """
+    변경 전후 정산 행의 차이를 큐브에 반영 (호출자 트랜잭션 안에서 실행, 커밋은 호출자).
+
+    Raises:
+        RuntimeError: 큐브 테이블이 준비되지 않았을 때. 차이를 버리면 비어 있지 않은 큐브는
+            다시 집계되지 않아 계속 틀리므로, 호출자 트랜잭션을 되돌리게 한다.
+    """
+    if not _SALES_ANALYTICS_CUBE_ENSURED:
+        raise RuntimeError('매출 통계 큐브를 준비하지 못해 정산 변경을 반영할 수 없습니다. 잠시 후 다시 시도해 주세요.')
+    deltas: Dict[CubeCell, list] = defaultdict(lambda: [0, 0, None])
+    for sign, rows in ((-1, before), (1, after)):
+        for ym, company_name, status, amount in rows:
+            key, name = cube_key(ym, company_name, status)
+            delta = deltas[key]
+            delta[0] += sign * int(amount or 0)
+            delta[1] += sign
+            if sign > 0 or delta[2] is None:
+                delta[2] = name
+    changed = [(k, v) for k, v in deltas.items() if v[0] or v[1]]
+    if not changed:
+        return
+
+    sym = '%s' if USE_POSTGRESQL else '?'
+    cursor.executemany(
+        f'''INSERT INTO sales_analytics_cube
+                (year_month, company_key, status, company_name, total_amount, row_count)
+            VALUES ({sym}, {sym}, {sym}, {sym}, {sym}, {sym})
+            ON CONFLICT (year_month, company_key, status) DO UPDATE SET
+                total_amount = sales_analytics_cube.total_amount + excluded.total_amount,
+                row_count = sales_analytics_cube.row_count + excluded.row_count,
+                company_name = excluded.company_name,
+                updated_at = CURRENT_TIMESTAMP''',
+        [(k[0], k[1], k[2], v[2], v[0], v[1]) for k, v in changed],
+    )
+    cursor.executemany(
+        f'''DELETE FROM sales_analytics_cube
+            WHERE year_month = {sym} AND company_key = {sym} AND status = {sym} AND row_count <= 0''',
+        [k for k, _ in changed],
+    )
+
+
+def load_sales_analytics_cube(year_from: Optional[str] = None,
+                              year_to: Optional[str] = None) -> List[Dict[str, Any]]:
+    """
+    큐브 셀 조회 (build_settlement_analytics 입력 형식)
+
+    Returns:
+        [{settlement_year_month, company_key, company_name, status, total_amount, row_count}, ...]
+    """
+    sym = '%s' if USE_POSTGRESQL else '?'
+    where = ["year_month <> ''"]
+    params: List[Any] = []
+    if year_from and str(year_from).isdigit():
+        where.append(f'year_month >= {sym}')
+        params.append(f'{int(year_from):04d}')
+    if year_to and str(year_to).isdigit():
+        where.append(f'year_month < {sym}')
+        params.append(f'{int(year_to) + 1:04d}')
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''SELECT year_month, company_key, company_name, status, total_amount, row_count
+                FROM sales_analytics_cube WHERE {' AND '.join(where)}''',
+            params,
+        )
+        return [
+            {
+                'settlement_year_month': r[0],
+                'company_key': r[1],
+                'company_name': r[2],
+                'status': r[3],
+                'total_amount': int(r[4] or 0),
+                'row_count': int(r[5] or 0),
+            }
+            for r in cursor.fetchall()
+        ]
+    finally:
+        cursor.close()
+        conn.close()
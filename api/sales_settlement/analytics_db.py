@@ -47,14 +47,16 @@ def build_settlement_analytics(
     year_to: Optional[str] = None,
 ) -> Dict[str, Any]:
     """
-    settlements 행 목록으로 월별·연별·화주사 순위·KPI 산출.
+    settlements 행 목록 또는 통계 큐브 셀로 월별·연별·화주사 순위·KPI 산출.
 
     rows: dict with keys settlement_year_month, company_name, total_amount, status
+          (큐브 셀이면 row_count(건수), company_key(화주사 키) 포함)
     """
     monthly: Dict[str, int] = defaultdict(int)
     month_rows: Dict[str, int] = defaultdict(int)
     yearly: Dict[str, int] = defaultdict(int)
     company_totals: Dict[str, int] = defaultdict(int)
+    company_names: Dict[str, str] = {}
     status_counts: Dict[str, int] = defaultdict(int)
     total_amount = 0
     row_count = 0
@@ -64,18 +66,21 @@ def build_settlement_analytics(
         if not _in_year_range(ym, year_from, year_to):
             continue
         amt = int(r.get('total_amount') or 0)
+        cnt = int(r.get('row_count', 1) or 0)
         cn = (r.get('company_name') or '').strip() or '(미지정)'
+        ck = r.get('company_key') or cn
         st = (r.get('status') or '대기') or '대기'
 
         total_amount += amt
-        row_count += 1
+        row_count += cnt
         monthly[ym] += amt
-        month_rows[ym] += 1
+        month_rows[ym] += cnt
         ykey = ym[:4] if len(ym) >= 4 else ''
         if ykey:
             yearly[ykey] += amt
-        company_totals[cn] += amt
-        status_counts[st] += 1
+        company_totals[ck] += amt
+        company_names.setdefault(ck, cn)
+        status_counts[st] += cnt
 
     # 월별 시계열 (오름차순), 최근 months_back개만
     months_sorted = sorted(monthly.keys())
@@ -96,11 +101,11 @@ def build_settlement_analytics(
     grand = total_amount if total_amount > 0 else 1
     company_ranking = [
         {
-            'company_name': name,
+            'company_name': company_names[key],
             'total_amount': amt,
             'share_pct': round(amt / grand * 100, 2),
         }
-        for name, amt in top_n
+        for key, amt in top_n
     ]
 
     # KPI
@@ -4,8 +4,18 @@
 - 기존 settlements API 재사용 (목록, 상세, 상태변경)
 """
 from flask import Blueprint, request, jsonify
-from api.database.models import get_db_connection, USE_POSTGRESQL, ensure_settlement_return_fee_column
+from api.database.models import (
+    get_db_connection,
+    USE_POSTGRESQL,
+    ensure_settlement_return_fee_column,
+    ensure_settlement_file_count_column,
+)
 from api.sales_settlement.analytics_db import build_settlement_analytics
+from api.sales_settlement.analytics_cube import (
+    ensure_sales_analytics_cube_table,
+    load_sales_analytics_cube,
+    rebuild_sales_analytics_cube,
+)
 from datetime import datetime, date
 from urllib.parse import unquote
 
@@ -18,38 +28,25 @@ sales_settlement_bp = Blueprint('sales_settlement', __name__, url_prefix='/api/s
 JJAY_USERNAME = 'jjay'
 
 
-def _settlement_statement_ready(item: dict) -> bool:
-    """정산 명세서(엑셀) 생성에 쓸 금액·첨부가 갖춰졌는지 여부 (전달 건 표시·정렬용)."""
-    for key in (
-        'work_fee_file_url',
-        'inout_fee_file_url',
-        'shipping_fee_file_url',
-        'tax_invoice_file_url',
-    ):
-        v = item.get(key)
-        if v and str(v).strip():
-            return True
-    try:
-        fc = int(item.get('settlement_file_count') or 0)
-    except (TypeError, ValueError):
-        fc = 0
-    if fc > 0:
-        return True
-    line = (
-        int(item.get('work_fee') or 0)
-        + int(item.get('inout_fee') or 0)
-        + int(item.get('shipping_fee') or 0)
-        + int(item.get('collect_on_delivery_fee') or 0)
-        + int(item.get('return_fee') or 0)
-        + int(item.get('storage_fee') or 0)
-        + int(item.get('special_work_fee') or 0)
-        - int(item.get('error_deduction') or 0)
-    )
-    if line != 0:
-        return True
-    if int(item.get('total_amount') or 0) != 0:
-        return True
-    return False
+def _nonblank_sql(col: str) -> str:
+    return f"({col} IS NOT NULL AND TRIM({col}) <> '')"
+
+
+# 정산 명세서(엑셀) 생성에 쓸 금액·첨부가 갖춰졌는지 여부 (전달 건 표시·정렬용)
+# 첨부 URL 또는 첨부 파일(file_count)이 있거나, 항목 합계 또는 총액이 0이 아니면 준비된 것으로 본다.
+STATEMENT_READY_SQL = f'''
+    CASE WHEN {_nonblank_sql('s.work_fee_file_url')}
+           OR {_nonblank_sql('s.inout_fee_file_url')}
+           OR {_nonblank_sql('s.shipping_fee_file_url')}
+           OR {_nonblank_sql('s.tax_invoice_file_url')}
+           OR COALESCE(s.file_count, 0) > 0
+           OR (COALESCE(s.work_fee, 0) + COALESCE(s.inout_fee, 0) + COALESCE(s.shipping_fee, 0)
+               + COALESCE(s.collect_on_delivery_fee, 0) + COALESCE(s.return_fee, 0)
+               + COALESCE(s.storage_fee, 0) + COALESCE(s.special_work_fee, 0)
+               - COALESCE(s.error_deduction, 0)) <> 0
+           OR COALESCE(s.total_amount, 0) <> 0
+         THEN 1 ELSE 0 END
+'''
 
 
 def get_user_context():
@@ -107,6 +104,7 @@ def get_summary():
 
         conn = get_db_connection()
         ensure_settlement_return_fee_column(conn)
+        ensure_settlement_file_count_column(conn)
         if USE_POSTGRESQL:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
         else:
@@ -116,15 +114,18 @@ def get_summary():
             where_clauses = []
             params = []
 
+            sym = '%s' if USE_POSTGRESQL else '?'
             if year_month:
-                where_clauses.append('settlement_year_month = %s' if USE_POSTGRESQL else 'settlement_year_month = ?')
+                where_clauses.append(f's.settlement_year_month = {sym}')
                 params.append(year_month)
             if year:
-                where_clauses.append('settlement_year_month LIKE %s' if USE_POSTGRESQL else 'settlement_year_month LIKE ?')
-                params.append(f'{year}-%')
+                # LIKE 대신 범위 조건 (idx_settlements_year_month 인덱스 사용)
+                where_clauses.append(f's.settlement_year_month BETWEEN {sym} AND {sym}')
+                params.extend([f'{year}-01', f'{year}-12'])
 
             where_sql = ' AND '.join(where_clauses) if where_clauses else '1=1'
 
+            # 첨부 수는 settlements.file_count(업로드/삭제 시 갱신)를 쓰고, 준비 여부도 SQL 에서 계산
             query = f'''
                 SELECT 
                     s.id,
@@ -134,29 +135,16 @@ def get_summary():
                     s.status,
                     s.work_fee, s.inout_fee, s.shipping_fee, s.storage_fee,
                     s.special_work_fee, s.error_deduction, s.collect_on_delivery_fee, s.return_fee,
-                    s.work_fee_file_url,
-                    s.inout_fee_file_url,
-                    s.shipping_fee_file_url,
-                    s.tax_invoice_file_url,
-                    (SELECT COUNT(*) FROM settlement_files f WHERE f.settlement_id = s.id) AS settlement_file_count
+                    {STATEMENT_READY_SQL} AS statement_ready
                 FROM settlements s
-                WHERE {where_sql.replace("settlement_year_month", "s.settlement_year_month")}
+                WHERE {where_sql}
                 ORDER BY s.settlement_year_month DESC, s.company_name
             '''
             cursor.execute(query, params)
             rows = cursor.fetchall()
             result = [dict(row) for row in rows]
-
             for item in result:
-                item['statement_ready'] = _settlement_statement_ready(item)
-                for k in (
-                    'work_fee_file_url',
-                    'inout_fee_file_url',
-                    'shipping_fee_file_url',
-                    'tax_invoice_file_url',
-                    'settlement_file_count',
-                ):
-                    item.pop(k, None)
+                item['statement_ready'] = bool(item.get('statement_ready'))
 
             def _ss_sort_key(row):
                 st = (row.get('status') or '대기').strip()
@@ -226,6 +214,24 @@ def get_summary():
         }), 500
 
 
+def _load_settlement_rows_for_analytics():
+    """큐브를 쓸 수 없을 때 settlements 원본 행 조회 (기존 방식)"""
+    conn = get_db_connection()
+    ensure_settlement_return_fee_column(conn)
+    cursor = conn.cursor()
+    try:
+        cursor.execute('''
+            SELECT settlement_year_month, company_name, total_amount, status
+            FROM settlements
+            WHERE settlement_year_month IS NOT NULL AND TRIM(settlement_year_month) <> ''
+        ''')
+        cols = [d[0] for d in cursor.description]
+        return [dict(zip(cols, tuple(r))) for r in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+
 @sales_settlement_bp.route('/analytics', methods=['GET'])
 def get_analytics():
     """
@@ -244,35 +250,11 @@ def get_analytics():
         year_from = request.args.get('year_from', '').strip() or None
         year_to = request.args.get('year_to', '').strip() or None
 
-        conn = get_db_connection()
-        ensure_settlement_return_fee_column(conn)
-        if USE_POSTGRESQL:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
+        if ensure_sales_analytics_cube_table():
+            # 큐브 셀(정산년월·화주사·상태별 합계)만 읽어 순위·KPI 계산
+            list_rows = load_sales_analytics_cube(year_from, year_to)
         else:
-            cursor = conn.cursor()
-
-        try:
-            if USE_POSTGRESQL:
-                cursor.execute('''
-                    SELECT settlement_year_month, company_name, total_amount, status
-                    FROM settlements
-                    WHERE settlement_year_month IS NOT NULL AND TRIM(settlement_year_month) <> ''
-                ''')
-            else:
-                cursor.execute('''
-                    SELECT settlement_year_month, company_name, total_amount, status
-                    FROM settlements
-                    WHERE settlement_year_month IS NOT NULL AND settlement_year_month != ''
-                ''')
-            rows = cursor.fetchall()
-            if USE_POSTGRESQL:
-                list_rows = [dict(r) for r in rows]
-            else:
-                cols = [d[0] for d in cursor.description]
-                list_rows = [dict(zip(cols, r)) for r in rows]
-        finally:
-            cursor.close()
-            conn.close()
+            list_rows = _load_settlement_rows_for_analytics()
 
         payload = build_settlement_analytics(
             list_rows,
@@ -288,6 +270,34 @@ def get_analytics():
         return jsonify({'success': False, 'message': str(e)}), 500
 
 
+@sales_settlement_bp.route('/analytics/rebuild', methods=['POST'])
+def rebuild_analytics_cube():
+    """통계 큐브 전체 재집계 (settlements 를 직접 수정한 뒤 등)"""
+    ctx, err = _check_jjay()
+    if err:
+        return err[0], err[1]
+    try:
+        if not ensure_sales_analytics_cube_table():
+            return jsonify({'success': False, 'message': '통계 큐브 테이블을 준비하지 못했습니다.'}), 500
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cells = rebuild_sales_analytics_cube(cursor)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            cursor.close()
+            conn.close()
+        return jsonify({'success': True, 'message': f'통계 큐브 {cells}개 셀을 재집계했습니다.', 'cells': cells})
+    except Exception as e:
+        print(f'[매출정산] 큐브 재집계 오류: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'message': str(e)}), 500
+
+
 @sales_settlement_bp.route('/available-months', methods=['GET'])
 def get_available_months():
     """정산 데이터가 있는 년월 목록"""
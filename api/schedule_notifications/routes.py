@@ -63,11 +63,12 @@ def check_notifications():
         
         # 스케줄러 함수 직접 호출
         from api.schedule_notifications.scheduler import send_schedule_notifications
-        send_schedule_notifications()
+        result = send_schedule_notifications()
         
         return jsonify({
             'success': True,
-            'message': '스케쥴 알림 체크 완료'
+            'message': '스케쥴 알림 체크 완료',
+            'result': result
         })
         
     except Exception as e:
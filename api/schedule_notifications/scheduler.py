@@ -4,12 +4,18 @@
 - 시작일 전 알림: 시작일 - 1일, 오전 9시 (KST)
 - 시작일 알림: 시작일, 오전 9시 (KST)
 - 종료일 알림: 종료일, 오전 9시 (KST) - 단, 시작일 != 종료일인 경우만
+
+매일 09:00 KST 정각에 깨어나 세 종류 대상을 UNION 쿼리 한 번으로 가져오고, 보낸 건의 플래그를
+UPDATE 한 번으로 표시한다. 마지막으로 처리한 날짜(워터마크)를 DB 에 남겨, 재시작 등으로 9시를
+놓쳤으면 그날 안에 바로 보충 전송한다.
 """
 import threading
 import time
-from datetime import datetime, timezone, timedelta
+from datetime import date, datetime, timezone, timedelta
+from typing import Any, Dict, List, Optional
 from api.database.models import get_db_connection, USE_POSTGRESQL
 from api.schedule_notifications.telegram import send_schedule_notification
+from api.database.leader import get_leader_election
 
 
 def convert_to_kst(value) -> str:
@@ -60,136 +66,150 @@ def convert_to_kst(value) -> str:
         return value_str.split('.')[0] if '.' in value_str else value_str
 
 
-# 마지막 알림 시간 추적 (중복 알림 방지)
-last_notification_times = {}
+KST = timezone(timedelta(hours=9))
+SCHEDULE_DISPATCH_HOUR = 9
+# 일부 전송 실패 시 같은 날 다시 시도하는 간격 (초)
+SCHEDULE_RETRY_SECONDS = 600
+SCHEDULE_WATERMARK_NAME = 'daily_0900'
+NOTIFICATION_KINDS = ('before_start', 'start', 'end')
+KIND_LABELS = {'before_start': '시작일 전', 'start': '시작일', 'end': '종료일'}
+
+SCHEDULE_RUNS_TABLE_READY = False
+
+
+def _ensure_runs_table(cursor) -> None:
+    """알림 실행 워터마크 테이블 (name → 마지막으로 처리 완료한 KST 날짜)"""
+    global SCHEDULE_RUNS_TABLE_READY
+    if SCHEDULE_RUNS_TABLE_READY:
+        return
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schedule_notification_runs (
+            name TEXT PRIMARY KEY,
+            last_run_date TEXT NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    SCHEDULE_RUNS_TABLE_READY = True
+
+
+def get_dispatch_watermark(cursor) -> Optional[str]:
+    """마지막으로 9시 알림을 끝낸 날짜 (YYYY-MM-DD, 없으면 None)"""
+    sym = '%s' if USE_POSTGRESQL else '?'
+    _ensure_runs_table(cursor)
+    cursor.execute(f'SELECT last_run_date FROM schedule_notification_runs WHERE name = {sym}',
+                   (SCHEDULE_WATERMARK_NAME,))
+    row = cursor.fetchone()
+    return row[0] if row else None
+
 
+def set_dispatch_watermark(cursor, run_date: date) -> None:
+    sym = '%s' if USE_POSTGRESQL else '?'
+    _ensure_runs_table(cursor)
+    cursor.execute(f'''
+        INSERT INTO schedule_notification_runs (name, last_run_date, updated_at)
+        VALUES ({sym}, {sym}, CURRENT_TIMESTAMP)
+        ON CONFLICT (name) DO UPDATE SET last_run_date = excluded.last_run_date, updated_at = CURRENT_TIMESTAMP
+    ''', (SCHEDULE_WATERMARK_NAME, run_date.strftime('%Y-%m-%d')))
 
-def get_schedules_for_notification(notification_type: str) -> list:
+
+def next_dispatch_at(now: Optional[datetime] = None) -> datetime:
+    """다음 09:00 KST (지금이 9시 전이면 오늘, 아니면 내일)"""
+    now = (now or datetime.now(KST)).astimezone(KST)
+    target = now.replace(hour=SCHEDULE_DISPATCH_HOUR, minute=0, second=0, microsecond=0)
+    if now >= target:
+        target += timedelta(days=1)
+    return target
+
+
+def due_run_date(now: datetime, watermark: Optional[str]) -> Optional[date]:
     """
-    알림 대상 스케쥴 조회
-    
+    지금 처리해야 할 날짜 (없으면 None)
+
+    오늘 9시가 지났고 워터마크가 오늘보다 이전이면 오늘. 며칠을 놓쳤어도 지난 날짜의 '내일 시작'·'오늘 시작'
+    알림은 의미가 없으므로 가장 최근(오늘) 회차만 보충한다.
+    """
+    now = now.astimezone(KST)
+    if now.hour < SCHEDULE_DISPATCH_HOUR:
+        return None
+    today = now.date()
+    if watermark and watermark >= today.strftime('%Y-%m-%d'):
+        return None
+    return today
+
+
+def get_schedule_notification_candidates(cursor, run_date: date) -> List[Dict[str, Any]]:
+    """
+    run_date 기준 알림 대상 (시작일 전/시작일/종료일)을 UNION 쿼리 한 번으로 조회
+
+    Returns:
+        [{kind, id, company_name, title, start_date, end_date, event_description, request_note, schedule_type}]
+    """
+    sym = '%s' if USE_POSTGRESQL else '?'
+    false_value = 'FALSE' if USE_POSTGRESQL else '0'
+    columns = ('id', 'company_name', 'title', 'start_date', 'end_date',
+               'event_description', 'request_note', 'schedule_type')
+    select_columns = ', '.join(columns)
+
+    def _not_sent(kind):
+        col = f'notification_sent_{kind}'
+        return f'({col} IS NULL OR {col} = {false_value})'
+
+    today = run_date.strftime('%Y-%m-%d')
+    tomorrow = (run_date + timedelta(days=1)).strftime('%Y-%m-%d')
+    cursor.execute(f'''
+        SELECT 'before_start' AS kind, 0 AS kind_order, {select_columns} FROM schedules
+        WHERE start_date = {sym} AND {_not_sent('before_start')}
+        UNION ALL
+        SELECT 'start', 1, {select_columns} FROM schedules
+        WHERE start_date = {sym} AND {_not_sent('start')}
+        UNION ALL
+        SELECT 'end', 2, {select_columns} FROM schedules
+        WHERE end_date = {sym} AND start_date != end_date AND {_not_sent('end')}
+        ORDER BY kind_order, id
+    ''', (tomorrow, today, today))
+    keys = ('kind', 'kind_order') + columns
+    rows = []
+    for row in cursor.fetchall():
+        item = dict(zip(keys, tuple(row)))
+        item.pop('kind_order')
+        rows.append(item)
+    return rows
+
+
+def mark_notifications_sent(cursor, sent: Dict[str, List[int]]) -> int:
+    """
+    보낸 알림 플래그를 UPDATE 한 번으로 표시
+
     Args:
-        notification_type: 'before_start', 'start', 'end'
-    
+        sent: {'before_start': [id...], 'start': [...], 'end': [...]}
     Returns:
-        List[Dict]: 알림 대상 스케쥴 리스트
+        갱신된 행 수
     """
-    kst = timezone(timedelta(hours=9))
-    current_time = datetime.now(kst)
-    today = current_time.date()
-    tomorrow = today + timedelta(days=1)
-    
-    conn = get_db_connection()
-    schedules = []
-    
-    try:
-        if USE_POSTGRESQL:
-            from psycopg2.extras import RealDictCursor
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-        else:
-            import sqlite3
-            conn.row_factory = sqlite3.Row
-            cursor = conn.cursor()
-        
-        if notification_type == 'before_start':
-            # 시작일 전 알림: 내일이 시작일인 스케쥴
-            query = '''
-                SELECT id, company_name, title, start_date, end_date, 
-                       event_description, request_note, schedule_type,
-                       notification_sent_before_start
-                FROM schedules 
-                WHERE start_date = %s
-                  AND (notification_sent_before_start IS NULL OR notification_sent_before_start = FALSE)
-            ''' if USE_POSTGRESQL else '''
-                SELECT id, company_name, title, start_date, end_date, 
-                       event_description, request_note, schedule_type,
-                       notification_sent_before_start
-                FROM schedules 
-                WHERE start_date = ?
-                  AND (notification_sent_before_start IS NULL OR notification_sent_before_start = 0)
-            '''
-            target_date = tomorrow
-        elif notification_type == 'start':
-            # 시작일 알림: 오늘이 시작일인 스케쥴
-            query = '''
-                SELECT id, company_name, title, start_date, end_date, 
-                       event_description, request_note, schedule_type,
-                       notification_sent_start
-                FROM schedules 
-                WHERE start_date = %s
-                  AND (notification_sent_start IS NULL OR notification_sent_start = FALSE)
-            ''' if USE_POSTGRESQL else '''
-                SELECT id, company_name, title, start_date, end_date, 
-                       event_description, request_note, schedule_type,
-                       notification_sent_start
-                FROM schedules 
-                WHERE start_date = ?
-                  AND (notification_sent_start IS NULL OR notification_sent_start = 0)
-            '''
-            target_date = today
-        elif notification_type == 'end':
-            # 종료일 알림: 오늘이 종료일이고, 시작일 != 종료일인 스케쥴
-            query = '''
-                SELECT id, company_name, title, start_date, end_date, 
-                       event_description, request_note, schedule_type,
-                       notification_sent_end
-                FROM schedules 
-                WHERE end_date = %s
-                  AND start_date != end_date
-                  AND (notification_sent_end IS NULL OR notification_sent_end = FALSE)
-            ''' if USE_POSTGRESQL else '''
-                SELECT id, company_name, title, start_date, end_date, 
-                       event_description, request_note, schedule_type,
-                       notification_sent_end
-                FROM schedules 
-                WHERE end_date = ?
-                  AND start_date != end_date
-                  AND (notification_sent_end IS NULL OR notification_sent_end = 0)
-            '''
-            target_date = today
-        else:
-            return []
-        
-        date_str = target_date.strftime('%Y-%m-%d')
-        cursor.execute(query, (date_str,))
-        
-        if USE_POSTGRESQL:
-            rows = cursor.fetchall()
-            schedules = [dict(row) for row in rows]
-        else:
-            rows = cursor.fetchall()
-            schedules = []
-            for row in rows:
-                if hasattr(row, 'keys'):
-                    schedules.append(dict(row))
-                else:
-                    schedules.append({
-                        'id': row[0],
-                        'company_name': row[1],
-                        'title': row[2],
-                        'start_date': row[3],
-                        'end_date': row[4],
-                        'event_description': row[5],
-                        'request_note': row[6],
-                        'schedule_type': row[7],
-                        f'notification_sent_{notification_type}': row[8] if len(row) > 8 else None
-                    })
-        
-        cursor.close()
-        return schedules
-        
-    except Exception as e:
-        print(f"[오류] 스케쥴 조회 오류: {e}")
-        import traceback
-        traceback.print_exc()
-        return []
-    finally:
-        conn.close()
+    sym = '%s' if USE_POSTGRESQL else '?'
+    true_value = 'TRUE' if USE_POSTGRESQL else '1'
+    assignments, params, all_ids = [], [], set()
+    for kind in NOTIFICATION_KINDS:
+        ids = sorted(set(sent.get(kind) or []))
+        if not ids:
+            continue
+        col = f'notification_sent_{kind}'
+        assignments.append(f"{col} = CASE WHEN id IN ({', '.join([sym] * len(ids))}) THEN {true_value} ELSE {col} END")
+        params.extend(ids)
+        all_ids.update(ids)
+    if not all_ids:
+        return 0
+    ids = sorted(all_ids)
+    params.extend(ids)
+    cursor.execute(
+        f"UPDATE schedules SET {', '.join(assignments)} WHERE id IN ({', '.join([sym] * len(ids))})",
+        params,
+    )
+    return cursor.rowcount
 
 
 def mark_notification_sent(schedule_id: int, notification_type: str) -> bool:
     """
-    알림 전송 플래그 업데이트
+    알림 전송 플래그 업데이트 (한 건)
     
     Args:
         schedule_id: 스케쥴 ID
@@ -199,24 +219,12 @@ def mark_notification_sent(schedule_id: int, notification_type: str) -> bool:
         bool: 업데이트 성공 여부
     """
     conn = get_db_connection()
-    
     try:
         cursor = conn.cursor()
-        
-        column_name = f'notification_sent_{notification_type}'
-        
-        if USE_POSTGRESQL:
-            query = f'UPDATE schedules SET {column_name} = TRUE WHERE id = %s'
-        else:
-            query = f'UPDATE schedules SET {column_name} = 1 WHERE id = ?'
-        
-        cursor.execute(query, (schedule_id,))
+        success = mark_notifications_sent(cursor, {notification_type: [schedule_id]}) > 0
         conn.commit()
-        
-        success = cursor.rowcount > 0
         cursor.close()
         return success
-        
     except Exception as e:
         print(f"[오류] 알림 플래그 업데이트 오류: {e}")
         import traceback
@@ -228,129 +236,92 @@ def mark_notification_sent(schedule_id: int, notification_type: str) -> bool:
         conn.close()
 
 
-def send_schedule_notifications():
-    """스케쥴 알림 전송 (스케줄러에서 호출)"""
+def build_schedule_message(schedule: Dict[str, Any]) -> str:
+    """알림 종류별 텔레그램 메시지"""
+    kind = schedule.get('kind')
+    company_name = schedule.get('company_name') or '알 수 없음'
+    schedule_type = schedule.get('schedule_type') or ''
+    title = schedule.get('title') or ''
+    start_date = convert_to_kst(schedule.get('start_date', ''))
+    end_date = convert_to_kst(schedule.get('end_date', ''))
+    event_description = schedule.get('event_description') or ''
+    request_note = schedule.get('request_note') or ''
+    
+    if kind == 'before_start':
+        message = f"⏰ <b>스케쥴 시작일 하루 전 알림</b>\n\n"
+        start_label, end_label = ' (내일)', ''
+    elif kind == 'start':
+        message = f"🚀 <b>스케쥴 시작일 알림</b>\n\n"
+        start_label, end_label = ' (오늘)', ''
+    else:
+        message = f"🏁 <b>스케쥴 종료일 알림</b>\n\n"
+        start_label, end_label = '', ' (오늘)'
+    message += f"🏢 화주사: {company_name}\n"
+    if schedule_type:
+        message += f"📋 타입: {schedule_type}\n"
+    message += f"📝 제목: {title}\n"
+    message += f"📅 시작일: {start_date}{start_label}\n"
+    message += f"📅 종료일: {end_date}{end_label}\n"
+    if event_description:
+        message += f"📄 내용: {event_description[:200]}{'...' if len(event_description) > 200 else ''}\n"
+    if request_note:
+        message += f"💬 요청사항: {request_note[:100]}{'...' if len(request_note) > 100 else ''}\n"
+    return message
+
+
+def send_schedule_notifications(now: Optional[datetime] = None) -> Dict[str, Any]:
+    """
+    스케쥴 알림 전송 (스케줄러/cron 에서 호출)
+
+    오늘 09:00 KST 가 지났고 오늘 회차를 아직 끝내지 않았으면(워터마크) 대상을 전송하고 플래그·워터마크를 남긴다.
+    일부 전송이 실패하면 워터마크를 올리지 않아 다음 실행에서 실패 건만 다시 보낸다(보낸 건은 플래그로 제외).
+
+    Returns:
+        dict: {run_date, before_start, start, end, sent, failed, skipped}
+    """
+    now = (now or datetime.now(KST)).astimezone(KST)
+    result = {'run_date': None, 'before_start': 0, 'start': 0, 'end': 0, 'sent': 0, 'failed': 0, 'skipped': None}
+    conn = get_db_connection()
     try:
-        kst = timezone(timedelta(hours=9))
-        current_time = datetime.now(kst)
-        current_hour = current_time.hour
-        current_minute = current_time.minute
-        
-        # 오전 9시에만 알림 전송 (9:00 ~ 9:59 사이)
-        if current_hour != 9:
-            return
-        
-        print(f"[정보] [스케쥴 스케줄러] 실행 시작: {current_time.strftime('%Y-%m-%d %H:%M:%S')}")
-        
-        # 1. 시작일 전 알림 (내일이 시작일)
-        before_start_schedules = get_schedules_for_notification('before_start')
-        print(f"[정보] [스케쥴 스케줄러] 시작일 전 알림 대상: {len(before_start_schedules)}건")
-        
-        for schedule in before_start_schedules:
-            schedule_id = schedule.get('id')
-            if not schedule_id:
-                continue
-            
-            company_name = schedule.get('company_name', '알 수 없음')
-            schedule_type = schedule.get('schedule_type', '')
-            title = schedule.get('title', '')
-            start_date = convert_to_kst(schedule.get('start_date', ''))
-            end_date = convert_to_kst(schedule.get('end_date', ''))
-            event_description = schedule.get('event_description', '')
-            request_note = schedule.get('request_note', '')
-            
-            message = f"⏰ <b>스케쥴 시작일 하루 전 알림</b>\n\n"
-            message += f"🏢 화주사: {company_name}\n"
-            if schedule_type:
-                message += f"📋 타입: {schedule_type}\n"
-            message += f"📝 제목: {title}\n"
-            message += f"📅 시작일: {start_date} (내일)\n"
-            message += f"📅 종료일: {end_date}\n"
-            if event_description:
-                message += f"📄 내용: {event_description[:200]}{'...' if len(event_description) > 200 else ''}\n"
-            if request_note:
-                message += f"💬 요청사항: {request_note[:100]}{'...' if len(request_note) > 100 else ''}\n"
-            
-            print(f"[정보] [스케쥴 스케줄러] 시작일 전 알림 전송: 스케쥴 #{schedule_id}")
-            success = send_schedule_notification(message)
-            
-            if success:
-                mark_notification_sent(schedule_id, 'before_start')
-        
-        # 2. 시작일 알림 (오늘이 시작일)
-        start_schedules = get_schedules_for_notification('start')
-        print(f"[정보] [스케쥴 스케줄러] 시작일 알림 대상: {len(start_schedules)}건")
-        
-        for schedule in start_schedules:
-            schedule_id = schedule.get('id')
-            if not schedule_id:
-                continue
-            
-            company_name = schedule.get('company_name', '알 수 없음')
-            schedule_type = schedule.get('schedule_type', '')
-            title = schedule.get('title', '')
-            start_date = convert_to_kst(schedule.get('start_date', ''))
-            end_date = convert_to_kst(schedule.get('end_date', ''))
-            event_description = schedule.get('event_description', '')
-            request_note = schedule.get('request_note', '')
-            
-            message = f"🚀 <b>스케쥴 시작일 알림</b>\n\n"
-            message += f"🏢 화주사: {company_name}\n"
-            if schedule_type:
-                message += f"📋 타입: {schedule_type}\n"
-            message += f"📝 제목: {title}\n"
-            message += f"📅 시작일: {start_date} (오늘)\n"
-            message += f"📅 종료일: {end_date}\n"
-            if event_description:
-                message += f"📄 내용: {event_description[:200]}{'...' if len(event_description) > 200 else ''}\n"
-            if request_note:
-                message += f"💬 요청사항: {request_note[:100]}{'...' if len(request_note) > 100 else ''}\n"
-            
-            print(f"[정보] [스케쥴 스케줄러] 시작일 알림 전송: 스케쥴 #{schedule_id}")
-            success = send_schedule_notification(message)
-            
-            if success:
-                mark_notification_sent(schedule_id, 'start')
+        cursor = conn.cursor()
+        watermark = get_dispatch_watermark(cursor)
+        run_date = due_run_date(now, watermark)
+        if run_date is None:
+            conn.commit()
+            result['skipped'] = 'not_due' if now.hour < SCHEDULE_DISPATCH_HOUR else 'already_done'
+            return result
+        result['run_date'] = run_date.strftime('%Y-%m-%d')
+        print(f"[정보] [스케쥴 스케줄러] 실행 시작: {now.strftime('%Y-%m-%d %H:%M:%S')} "
+              f"(회차 {result['run_date']}, 이전 워터마크 {watermark or '없음'})")
         
-        # 3. 종료일 알림 (오늘이 종료일이고, 시작일 != 종료일)
-        end_schedules = get_schedules_for_notification('end')
-        print(f"[정보] [스케쥴 스케줄러] 종료일 알림 대상: {len(end_schedules)}건")
+        candidates = get_schedule_notification_candidates(cursor, run_date)
+        sent: Dict[str, List[int]] = {kind: [] for kind in NOTIFICATION_KINDS}
+        for schedule in candidates:
+            kind = schedule['kind']
+            result[kind] += 1
+            print(f"[정보] [스케쥴 스케줄러] {KIND_LABELS[kind]} 알림 전송: 스케쥴 #{schedule['id']}")
+            if send_schedule_notification(build_schedule_message(schedule)):
+                sent[kind].append(schedule['id'])
+                result['sent'] += 1
+            else:
+                result['failed'] += 1
         
-        for schedule in end_schedules:
-            schedule_id = schedule.get('id')
-            if not schedule_id:
-                continue
-            
-            company_name = schedule.get('company_name', '알 수 없음')
-            schedule_type = schedule.get('schedule_type', '')
-            title = schedule.get('title', '')
-            start_date = convert_to_kst(schedule.get('start_date', ''))
-            end_date = convert_to_kst(schedule.get('end_date', ''))
-            event_description = schedule.get('event_description', '')
-            request_note = schedule.get('request_note', '')
-            
-            message = f"🏁 <b>스케쥴 종료일 알림</b>\n\n"
-            message += f"🏢 화주사: {company_name}\n"
-            if schedule_type:
-                message += f"📋 타입: {schedule_type}\n"
-            message += f"📝 제목: {title}\n"
-            message += f"📅 시작일: {start_date}\n"
-            message += f"📅 종료일: {end_date} (오늘)\n"
-            if event_description:
-                message += f"📄 내용: {event_description[:200]}{'...' if len(event_description) > 200 else ''}\n"
-            if request_note:
-                message += f"💬 요청사항: {request_note[:100]}{'...' if len(request_note) > 100 else ''}\n"
-            
-            print(f"[정보] [스케쥴 스케줄러] 종료일 알림 전송: 스케쥴 #{schedule_id}")
-            success = send_schedule_notification(message)
-            
-            if success:
-                mark_notification_sent(schedule_id, 'end')
-                
+        mark_notifications_sent(cursor, sent)
+        if result['failed'] == 0:
+            set_dispatch_watermark(cursor, run_date)
+        conn.commit()
+        print(f"[정보] [스케쥴 스케줄러] 완료: 대상 {len(candidates)}건, 전송 {result['sent']}건, 실패 {result['failed']}건")
+        return result
     except Exception as e:
         print(f"[오류] 스케쥴 알림 전송 오류: {e}")
         import traceback
         traceback.print_exc()
+        if USE_POSTGRESQL:
+            conn.rollback()
+        result['skipped'] = 'error'
+        return result
+    finally:
+        conn.close()
 
 
 def start_schedule_notification_scheduler():
@@ -362,22 +333,35 @@ def start_schedule_notification_scheduler():
         print("[경고] [스케쥴 스케줄러] Vercel 환경 감지 - 백그라운드 스레드는 제한적일 수 있습니다.")
         print("   Vercel Cron Jobs를 사용하는 것을 권장합니다.")
     
+    election = get_leader_election('schedule_notifications')
+    
     def scheduler_loop():
         print("[정보] [스케쥴 스케줄러] 루프 시작 (백그라운드 스레드)")
-        loop_count = 0
         while True:
+            # 워커가 여러 개여도 리더 프로세스 하나만 실행 (리더가 바뀌면 새 리더가 바로 실행 → 놓친 회차 보충)
+            if not election.is_leader:
+                election.wait_until_leader()
+                continue
+            result = {}
             try:
-                loop_count += 1
-                if loop_count % 60 == 0:  # 1시간마다 한 번씩 로그 출력
-                    print(f"[정보] [스케쥴 스케줄러] 루프 실행 중... (실행 횟수: {loop_count})")
-                send_schedule_notifications()
+                result = send_schedule_notifications()
             except Exception as e:
                 print(f"[오류] [스케쥴 스케줄러] 루프 오류: {e}")
                 import traceback
                 traceback.print_exc()
             
-            # 1시간마다 실행
-            time.sleep(3600)
+            # 다음 09:00 KST 까지 대기 (실패 건이 있으면 잠시 후 재시도)
+            now = datetime.now(KST)
+            wake_at = next_dispatch_at(now)
+            if result.get('failed') or result.get('skipped') == 'error':
+                wake_at = min(wake_at, now + timedelta(seconds=SCHEDULE_RETRY_SECONDS))
+            print(f"[정보] [스케쥴 스케줄러] 다음 실행: {wake_at.strftime('%Y-%m-%d %H:%M:%S')} KST")
+            # 시계 보정에 대비해 최대 1시간씩 나눠 자고 남은 시간을 다시 계산
+            while True:
+                remaining = (wake_at - datetime.now(KST)).total_seconds()
+                if remaining <= 0:
+                    break
+                time.sleep(min(remaining, 3600))
     
     try:
         scheduler_thread = threading.Thread(target=scheduler_loop, daemon=True)
@@ -397,5 +381,3 @@ def start_schedule_notification_scheduler():
         print(f"[오류] [스케쥴 스케줄러] 스레드 시작 오류: {e}")
         import traceback
         traceback.print_exc()
-
-
@@ -0,0 +1,141 @@
+"""
+스케쥴 달력 엔진
+
+- 범위 조회: get_schedules_by_date_range (GiST daterange / (range_end, start_date) 인덱스)
+- 반복 스케쥴: 규칙을 가진 행 하나만 저장하고, 요청한 달의 회차만 펼친다 (recurrence.py)
+- 월별 응답 캐시: 달마다 펼친 결과를 프로세스에 두고, 스케쥴 생성/수정/삭제 시
+  invalidate_schedule_calendar_cache 로 올라가는 cache_versions 버전이 바뀌면 모두 버린다.
+  같은 프로세스의 변경은 즉시, 다른 프로세스의 변경은 CALENDAR_CACHE_CHECK_SECONDS 안에 반영된다.
+
+여러 달 보기는 달별 캐시를 이어 붙이므로, 긴 구간도 DB 에는 달마다 한 번씩만 묻는다.
+"""
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+from typing import Any, Dict, List, Tuple
+
+from api.database.models import (
+    SCHEDULE_CALENDAR_CACHE,
+    get_cache_version,
+    get_schedules_by_date_range,
+    local_cache_generation,
+)
+from api.schedules.recurrence import expand_occurrences, parse_recurrence_rule, to_date
+
+CALENDAR_CACHE_CHECK_SECONDS = 30
+# 프로세스에 보관하는 달 수 (오래 안 본 달부터 버림)
+CALENDAR_CACHE_MAX_MONTHS = 36
+# 한 번에 조회할 수 있는 최대 달 수
+CALENDAR_MAX_MONTHS = 12
+
+_MONTHS: 'OrderedDict[Tuple[int, int], List[Dict[str, Any]]]' = OrderedDict()
+_STATE: Dict[str, Any] = {'version': None, 'generation': None, 'checked_at': 0.0}
+_LOCK = threading.Lock()
+
+
+def month_bounds(year: int, month: int) -> Tuple[date, date]:
+    """(해당 월 1일, 다음 달 1일)"""
+    first = date(year, month, 1)
+    nxt = date(year + 1, 1, 1) if month == 12 else date(year, month + 1, 1)
+    return first, nxt
+
+
+def _fmt(value) -> Any:
+    if isinstance(value, date):
+        return value.strftime('%Y-%m-%d') if type(value) is date else value.strftime('%Y-%m-%d %H:%M:%S')
+    return value
+
+
+def _expand_rows(rows: List[Dict[str, Any]], window_start: date, window_end: date) -> List[Dict[str, Any]]:
+    """원본 행 → [window_start, window_end) 와 겹치는 회차 목록 (반복이 아니면 행 그대로)"""
+    items = []
+    for row in rows:
+        rule = row.get('recurrence_rule')
+        base = {k: _fmt(v) for k, v in row.items() if k != 'range_end'}
+        base['start_date'] = str(base['start_date'])[:10]
+        base['end_date'] = str(base['end_date'])[:10]
+        try:
+            parsed = parse_recurrence_rule(rule)
+        except ValueError as e:
+            print(f"[경고] 스케쥴 {row.get('id')} 반복 규칙 오류 (단일 일정으로 표시): {e}")
+            parsed = None
+        if not parsed:
+            base['is_recurring'] = False
+            items.append(base)
+            continue
+        for occ_start, occ_end in expand_occurrences(row['start_date'], row['end_date'], parsed,
+                                                     window_start, window_end):
+            item = dict(base)
+            item['is_recurring'] = True
+            item['series_start_date'] = base['start_date']
+            item['series_end_date'] = base['end_date']
+            item['start_date'] = occ_start.strftime('%Y-%m-%d')
+            item['end_date'] = occ_end.strftime('%Y-%m-%d')
+            items.append(item)
+    items.sort(key=lambda x: (x['start_date'], x.get('company_name') or ''))
+    return items
+
+
+def _check_version() -> None:
+    """버전이 바뀌었으면 월별 캐시 전체 폐기 (_LOCK 안에서 호출)"""
+    generation = local_cache_generation(SCHEDULE_CALENDAR_CACHE)
+    now = time.monotonic()
+    if _STATE['generation'] == generation and now - _STATE['checked_at'] < CALENDAR_CACHE_CHECK_SECONDS:
+        return
+    version = get_cache_version(SCHEDULE_CALENDAR_CACHE)
+    if _STATE['version'] != version or _STATE['generation'] != generation:
+        _MONTHS.clear()
+    _STATE.update(version=version, generation=generation, checked_at=now)
+
+
+def get_calendar_month(year: int, month: int) -> List[Dict[str, Any]]:
+    """한 달(1일~말일)과 겹치는 스케쥴 회차 목록 (캐시)"""
+    key = (year, month)
+    with _LOCK:
+        _check_version()
+        items = _MONTHS.get(key)
+        if items is not None:
+            _MONTHS.move_to_end(key)
+            return items
+        first, nxt = month_bounds(year, month)
+        rows = get_schedules_by_date_range(first.strftime('%Y-%m-%d'),
+                                           (nxt - timedelta(days=1)).strftime('%Y-%m-%d'))
+        items = _expand_rows(rows, first, nxt)
+        _MONTHS[key] = items
+        while len(_MONTHS) > CALENDAR_CACHE_MAX_MONTHS:
+            _MONTHS.popitem(last=False)
+        return items
+
+
+def get_calendar_range(start_date, end_date) -> List[Dict[str, Any]]:
+    """
+    구간 [start_date, end_date) 와 겹치는 스케쥴 회차 목록
+
+    구간이 걸친 달들의 캐시를 이어 붙이고, 여러 달에 걸친 일정은 한 번만 넣는다.
+    구간이 CALENDAR_MAX_MONTHS 달을 넘으면 ValueError.
+    """
+    start, end = to_date(start_date), to_date(end_date)
+    if end <= start:
+        raise ValueError('종료일은 시작일보다 늦어야 합니다.')
+    last = end - timedelta(days=1)
+    months = (last.year - start.year) * 12 + last.month - start.month + 1
+    if months > CALENDAR_MAX_MONTHS:
+        raise ValueError(f'달력은 한 번에 최대 {CALENDAR_MAX_MONTHS}개월까지 조회할 수 있습니다.')
+
+    start_text, end_text = start.strftime('%Y-%m-%d'), end.strftime('%Y-%m-%d')
+    seen = set()
+    result = []
+    year, month = start.year, start.month
+    for _ in range(months):
+        for item in get_calendar_month(year, month):
+            if item['start_date'] >= end_text or item['end_date'] < start_text:
+                continue
+            key = (item['id'], item['start_date'])
+            if key in seen:
+                continue
+            seen.add(key)
+            result.append(dict(item))
+        year, month = (year + 1, 1) if month == 12 else (year, month + 1)
+    result.sort(key=lambda x: (x['start_date'], x.get('company_name') or ''))
+    return result
@@ -0,0 +1,105 @@
+"""
+스케줄 메모 변경 기록 (압축 diff + keyset 커서)
+
+메모 수정 기록(schedule_memo_logs.changes)에는 바뀐 필드만, 그것도 바뀐 구간만 저장한다.
+    {"content": [[위치, "지운 글자", "넣은 글자"], ...], "title": [...]}
+위치는 이전 값 기준 글자 위치이고, 같은 구간은 저장하지 않는다.
+지운 글자와 넣은 글자를 모두 가지고 있어 이전 값 → 새 값, 새 값 → 이전 값 양쪽으로 되돌릴 수 있고,
+기록 한 행의 크기는 메모 전체 길이가 아니라 고친 분량에 비례한다.
+"""
+import base64
+import difflib
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from api.database.models import USE_POSTGRESQL
+
+# diff 를 남기는 메모 필드
+MEMO_DIFF_FIELDS = ('title', 'company_name', 'content')
+MEMO_LOG_PAGE_DEFAULT_LIMIT = 50
+MEMO_LOG_PAGE_MAX_LIMIT = 200
+
+
+def diff_text(old: Optional[str], new: Optional[str]) -> List[list]:
+    """이전 값 → 새 값 변경 구간 목록 [[위치, 지운 글자, 넣은 글자], ...] (같으면 빈 목록)"""
+    old, new = old or '', new or ''
+    if old == new:
+        return []
+    matcher = difflib.SequenceMatcher(None, old, new, autojunk=False)
+    return [[i1, old[i1:i2], new[j1:j2]]
+            for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != 'equal']
+
+
+def apply_text_diff(old: Optional[str], hunks: List[list]) -> str:
+    """이전 값에 변경 구간 적용 → 새 값 (구간이 이전 값과 맞지 않으면 ValueError)"""
+    old = old or ''
+    parts, pos = [], 0
+    for at, removed, added in hunks:
+        if at < pos or old[at:at + len(removed)] != removed:
+            raise ValueError('메모 변경 기록이 이전 내용과 맞지 않습니다.')
+        parts.append(old[pos:at])
+        parts.append(added)
+        pos = at + len(removed)
+    parts.append(old[pos:])
+    return ''.join(parts)
+
+
+def revert_text_diff(new: Optional[str], hunks: List[list]) -> str:
+    """새 값에서 변경 구간을 되돌림 → 이전 값"""
+    reverse, shift = [], 0
+    for at, removed, added in hunks:
+        reverse.append([at + shift, added, removed])
+        shift += len(added) - len(removed)
+    return apply_text_diff(new, reverse)
+
+
+def memo_changes(before: Dict, after: Dict) -> Optional[str]:
+    """메모 수정 전/후 → changes 컬럼에 저장할 JSON (바뀐 필드가 없으면 None)"""
+    changes = {}
+    for field in MEMO_DIFF_FIELDS:
+        hunks = diff_text(before.get(field), after.get(field))
+        if hunks:
+            changes[field] = hunks
+    if not changes:
+        return None
+    return json.dumps(changes, ensure_ascii=False, separators=(',', ':'))
+
+
+def parse_memo_changes(raw: Optional[str]) -> Dict[str, List[list]]:
+    """changes 컬럼 값 → {필드: 변경 구간 목록} (없거나 깨졌으면 빈 dict)"""
+    if not raw:
+        return {}
+    try:
+        data = json.loads(raw)
+    except (TypeError, ValueError):
+        return {}
+    return data if isinstance(data, dict) else {}
+
+
+def encode_memo_log_cursor(created_at, row_id: int) -> str:
+    """keyset 커서 (시각, id) → URL-safe 문자열"""
+    raw = json.dumps([str(created_at), int(row_id)], ensure_ascii=False).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_memo_log_cursor(token: str) -> Tuple[object, int]:
+    """encode_memo_log_cursor 역변환. 형식이 잘못되면 ValueError."""
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')).decode('utf-8'))
+        # PostgreSQL 은 timestamp 로 비교, SQLite 는 저장된 문자열 그대로 비교
+        if USE_POSTGRESQL:
+            created_at = datetime.fromisoformat(created_at)
+        return created_at, int(row_id)
+    except Exception:
+        raise ValueError('잘못된 커서입니다.')
+
+
+def page_limit(value, default: int = MEMO_LOG_PAGE_DEFAULT_LIMIT) -> int:
+    """요청 limit → 1 ~ MEMO_LOG_PAGE_MAX_LIMIT"""
+    try:
+        limit = int(value or default)
+    except (TypeError, ValueError):
+        limit = default
+    return max(1, min(limit, MEMO_LOG_PAGE_MAX_LIMIT))
@@ -0,0 +1,256 @@
+"""
+반복 스케쥴 규칙 (RRULE 부분 집합)
+
+규칙은 스케쥴 행에 한 번만 저장하고(recurrence_rule), 달력 조회 시 요청 구간의 회차만 펼친다.
+첫 회차는 스케쥴의 start_date ~ end_date 이고, 이후 회차도 같은 기간(일수)을 가진다.
+
+지원 형식 (세미콜론 구분, 'RRULE:' 접두어 허용):
+    FREQ=DAILY|WEEKLY|MONTHLY|YEARLY   (필수)
+    INTERVAL=n                          (기본 1)
+    BYDAY=MO,TH                         (WEEKLY 전용, 기본 시작일 요일)
+    BYMONTHDAY=n                        (MONTHLY 전용, 음수는 말일 기준 -1=말일, 기본 시작일의 일)
+    UNTIL=YYYY-MM-DD                    (마지막 회차 시작일 상한, 포함)
+    COUNT=n                             (회차 수, 최대 MAX_RECURRENCE_COUNT)
+
+예: 매주 월·목 출고 'FREQ=WEEKLY;BYDAY=MO,TH', 매월 말일 재고조사 'FREQ=MONTHLY;BYMONTHDAY=-1'
+"""
+import calendar
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+FREQUENCIES = ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY')
+WEEKDAYS = ('MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU')
+MAX_RECURRENCE_COUNT = 1000
+MAX_RECURRENCE_INTERVAL = 366
+# 종료 없는 반복 스케쥴의 range_end
+OPEN_RANGE_END = date(9999, 12, 31)
+# 회차 없는 주기가 이만큼 이어지면 중단 (예: 윤일 매년 반복의 긴 공백 대비 안전장치)
+_MAX_EMPTY_PERIODS = 5000
+
+
+def to_date(value) -> date:
+    """date/datetime/'YYYY-MM-DD...' 문자열 → date"""
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return datetime.strptime(str(value)[:10], '%Y-%m-%d').date()
+
+
+def _parse_until(value: str) -> date:
+    for fmt in ('%Y-%m-%d', '%Y%m%d'):
+        try:
+            return datetime.strptime(value[:10] if '-' in value else value[:8], fmt).date()
+        except ValueError:
+            continue
+    raise ValueError(f'반복 종료일(UNTIL) 형식이 올바르지 않습니다: {value}')
+
+
+def parse_recurrence_rule(rule: Optional[str]) -> Optional[Dict]:
+    """
+    반복 규칙 문자열 → dict (빈 값이면 None, 형식이 잘못되면 ValueError)
+
+    Returns:
+        {'freq', 'interval', 'byday': [0-6] | None, 'bymonthday': int | None,
+         'until': date | None, 'count': int | None}
+    """
+    if rule is None:
+        return None
+    text = str(rule).strip()
+    if text.upper().startswith('RRULE:'):
+        text = text[6:]
+    if not text:
+        return None
+
+    parts = {}
+    for item in text.split(';'):
+        if not item.strip():
+            continue
+        if '=' not in item:
+            raise ValueError(f'반복 규칙 형식이 올바르지 않습니다: {item}')
+        key, value = item.split('=', 1)
+        parts[key.strip().upper()] = value.strip()
+
+    freq = parts.pop('FREQ', '').upper()
+    if freq not in FREQUENCIES:
+        raise ValueError(f"반복 주기(FREQ)는 {', '.join(FREQUENCIES)} 중 하나여야 합니다.")
+    parsed = {'freq': freq, 'interval': 1, 'byday': None, 'bymonthday': None, 'until': None, 'count': None}
+
+    try:
+        if 'INTERVAL' in parts:
+            parsed['interval'] = int(parts.pop('INTERVAL'))
+        if 'COUNT' in parts:
+            parsed['count'] = int(parts.pop('COUNT'))
+        if 'BYMONTHDAY' in parts:
+            parsed['bymonthday'] = int(parts.pop('BYMONTHDAY'))
+    except ValueError:
+        raise ValueError('INTERVAL/COUNT/BYMONTHDAY 는 숫자여야 합니다.')
+    if 'BYDAY' in parts:
+        days = [d.strip().upper() for d in parts.pop('BYDAY').split(',') if d.strip()]
+        if not days or any(d not in WEEKDAYS for d in days):
+            raise ValueError(f"BYDAY 는 {','.join(WEEKDAYS)} 중에서 지정해야 합니다.")
+        parsed['byday'] = sorted({WEEKDAYS.index(d) for d in days})
+    if 'UNTIL' in parts:
+        parsed['until'] = _parse_until(parts.pop('UNTIL'))
+    if parts:
+        raise ValueError(f"지원하지 않는 반복 규칙 항목: {', '.join(sorted(parts))}")
+
+    if not 1 <= parsed['interval'] <= MAX_RECURRENCE_INTERVAL:
+        raise ValueError(f'INTERVAL 은 1~{MAX_RECURRENCE_INTERVAL} 사이여야 합니다.')
+    if parsed['count'] is not None and not 1 <= parsed['count'] <= MAX_RECURRENCE_COUNT:
+        raise ValueError(f'COUNT 는 1~{MAX_RECURRENCE_COUNT} 사이여야 합니다.')
+    if parsed['byday'] is not None and freq != 'WEEKLY':
+        raise ValueError('BYDAY 는 FREQ=WEEKLY 에서만 사용할 수 있습니다.')
+    if parsed['bymonthday'] is not None:
+        if freq != 'MONTHLY':
+            raise ValueError('BYMONTHDAY 는 FREQ=MONTHLY 에서만 사용할 수 있습니다.')
+        if parsed['bymonthday'] == 0 or not -31 <= parsed['bymonthday'] <= 31:
+            raise ValueError('BYMONTHDAY 는 1~31 또는 -31~-1 이어야 합니다.')
+    if parsed['until'] is not None and parsed['count'] is not None:
+        raise ValueError('UNTIL 과 COUNT 는 함께 쓸 수 없습니다.')
+    return parsed
+
+
+def format_recurrence_rule(parsed: Optional[Dict]) -> Optional[str]:
+    """parse_recurrence_rule 결과 → 저장용 정규화 문자열"""
+    if not parsed:
+        return None
+    items = [f"FREQ={parsed['freq']}"]
+    if parsed['interval'] != 1:
+        items.append(f"INTERVAL={parsed['interval']}")
+    if parsed['byday']:
+        items.append('BYDAY=' + ','.join(WEEKDAYS[d] for d in parsed['byday']))
+    if parsed['bymonthday'] is not None:
+        items.append(f"BYMONTHDAY={parsed['bymonthday']}")
+    if parsed['until'] is not None:
+        items.append(f"UNTIL={parsed['until'].strftime('%Y-%m-%d')}")
+    if parsed['count'] is not None:
+        items.append(f"COUNT={parsed['count']}")
+    return ';'.join(items)
+
+
+def normalize_recurrence_rule(rule: Optional[str], start_date=None) -> Optional[str]:
+    """요청의 반복 규칙 검증·정규화 (빈 값이면 None). start_date 가 있으면 UNTIL >= 시작일 확인."""
+    parsed = parse_recurrence_rule(rule)
+    if parsed and start_date and parsed['until'] is not None and parsed['until'] < to_date(start_date):
+        raise ValueError('반복 종료일(UNTIL)은 시작일 이후여야 합니다.')
+    return format_recurrence_rule(parsed)
+
+
+def _add_months(year: int, month: int, months: int) -> Tuple[int, int]:
+    index = year * 12 + (month - 1) + months
+    return index // 12, index % 12 + 1
+
+
+def _first_period(parsed: Dict, start: date, threshold: date) -> int:
+    """threshold 이후 회차가 처음 나올 수 있는 주기 번호 (그 앞 주기는 건너뜀)"""
+    if threshold <= start:
+        return 0
+    interval = parsed['interval']
+    freq = parsed['freq']
+    if freq == 'DAILY':
+        return (threshold - start).days // interval
+    if freq == 'WEEKLY':
+        week0 = start - timedelta(days=start.weekday())
+        return (threshold - week0).days // 7 // interval
+    if freq == 'MONTHLY':
+        return ((threshold.year - start.year) * 12 + threshold.month - start.month) // interval
+    return (threshold.year - start.year) // interval
+
+
+def _period(parsed: Dict, start: date, k: int) -> Tuple[date, List[date]]:
+    """k 번째 주기의 (주기 시작일, 회차 시작일 목록)"""
+    interval = parsed['interval']
+    freq = parsed['freq']
+    if freq == 'DAILY':
+        day = start + timedelta(days=k * interval)
+        return day, [day]
+    if freq == 'WEEKLY':
+        week = start - timedelta(days=start.weekday()) + timedelta(weeks=k * interval)
+        days = parsed['byday'] or [start.weekday()]
+        return week, [week + timedelta(days=d) for d in days]
+    if freq == 'MONTHLY':
+        year, month = _add_months(start.year, start.month, k * interval)
+        last = calendar.monthrange(year, month)[1]
+        day = parsed['bymonthday'] if parsed['bymonthday'] is not None else start.day
+        if day < 0:
+            day = last + day + 1
+        period_start = date(year, month, 1)
+        return period_start, [date(year, month, day)] if 1 <= day <= last else []
+    year = start.year + k * interval
+    period_start = date(year, 1, 1)
+    if start.month == 2 and start.day == 29 and not calendar.isleap(year):
+        return period_start, []
+    return period_start, [date(year, start.month, start.day)]
+
+
+def iter_occurrences(start_date, end_date, rule, window_start=None,
+                     window_end=None) -> Iterator[Tuple[date, date]]:
+    """
+    회차 (시작일, 종료일) 를 시작일 순으로 생성
+
+    window_start 가 있으면 그 전에 끝나는 주기는 계산하지 않고 건너뛰며(COUNT 규칙 제외),
+    window_end 가 있으면 그 이후 주기에서 멈춘다.
+    """
+    parsed = rule if isinstance(rule, dict) else parse_recurrence_rule(rule)
+    start, end = to_date(start_date), to_date(end_date)
+    duration = max(end - start, timedelta(0))
+    if not parsed:
+        yield start, start + duration
+        return
+    k = 0
+    if window_start is not None and parsed['count'] is None:
+        k = _first_period(parsed, start, to_date(window_start) - duration)
+    stop = to_date(window_end) if window_end is not None else None
+    emitted, empty = 0, 0
+    while True:
+        period_start, days = _period(parsed, start, k)
+        if stop is not None and period_start >= stop:
+            return
+        if parsed['until'] is not None and period_start > parsed['until']:
+            return
+        empty = 0 if days else empty + 1
+        if empty > _MAX_EMPTY_PERIODS:
+            return
+        for day in days:
+            if day < start:
+                continue
+            if parsed['until'] is not None and day > parsed['until']:
+                return
+            if parsed['count'] is not None and emitted >= parsed['count']:
+                return
+            emitted += 1
+            yield day, day + duration
+        k += 1
+
+
+def expand_occurrences(start_date, end_date, rule, window_start, window_end) -> List[Tuple[date, date]]:
+    """구간 [window_start, window_end) 와 겹치는 회차 목록"""
+    window_start, window_end = to_date(window_start), to_date(window_end)
+    result = []
+    for occ_start, occ_end in iter_occurrences(start_date, end_date, rule, window_start, window_end):
+        if occ_start >= window_end:
+            break
+        if occ_end >= window_start:
+            result.append((occ_start, occ_end))
+    return result
+
+
+def schedule_range_end(start_date, end_date, rule=None) -> date:
+    """
+    스케쥴(반복이면 전체 회차)이 차지하는 마지막 날 - 범위 인덱스용 range_end 값
+    종료 없는 반복은 OPEN_RANGE_END.
+    """
+    parsed = rule if isinstance(rule, dict) else parse_recurrence_rule(rule)
+    start, end = to_date(start_date), to_date(end_date)
+    end = max(end, start)
+    if not parsed:
+        return end
+    if parsed['until'] is not None:
+        return max(end, parsed['until'] + (end - start))
+    if parsed['count'] is not None:
+        last = end
+        for _, occ_end in iter_occurrences(start, end, parsed):
+            last = occ_end
+        return last
+    return OPEN_RANGE_END
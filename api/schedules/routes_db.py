@@ -7,16 +7,22 @@ from api.database.models import (
     create_schedule,
     get_schedules_by_company,
     get_all_schedules,
-    get_schedules_by_date_range,
     get_schedule_by_id,
     update_schedule,
     delete_schedule,
     get_all_companies,
     create_schedule_type,
     get_all_schedule_types,
-    delete_schedule_type
+    delete_schedule_type,
+    SCHEDULE_TYPES_LOOKUP,
+    lookup_json_response
 )
 from api.schedule_notifications.telegram import send_schedule_notification
+from api.schedules.calendar_engine import get_calendar_range, month_bounds
+from api.schedules.memo_log import (
+    decode_memo_log_cursor, encode_memo_log_cursor, memo_changes, page_limit, parse_memo_changes,
+)
+from api.schedules.recurrence import normalize_recurrence_rule
 from api.database.models import get_db_connection, USE_POSTGRESQL
 from urllib.parse import unquote
 
@@ -87,8 +93,11 @@ def get_calendar_schedules():
     
     Query Parameters:
         - startDate: 시작 날짜 (YYYY-MM-DD)
-        - endDate: 종료 날짜 (YYYY-MM-DD)
+        - endDate: 종료 날짜 (YYYY-MM-DD, 포함)
         - month: 월 (예: "2025-11") - 선택사항, 없으면 현재 월
+        - months: month 부터 몇 개월을 볼지 (기본 1, 최대 12)
+    
+    반복 스케쥴은 구간 안의 회차마다 한 건씩 반환한다 (id 는 원본 스케쥴, is_recurring/series_* 포함).
     
     Returns:
         {
@@ -101,38 +110,36 @@ def get_calendar_schedules():
         start_date = request.args.get('startDate', '').strip()
         end_date = request.args.get('endDate', '').strip()
         month = request.args.get('month', '').strip()
+        months = request.args.get('months', 1, type=int) or 1
         
-        # 월이 제공된 경우 해당 월의 시작일과 종료일 계산
-        if month and not start_date and not end_date:
+        if start_date and end_date:
             try:
-                year, month_num = month.split('-')
-                year = int(year)
-                month_num = int(month_num)
-                # 해당 월의 첫날과 마지막날
-                start_date = f"{year}-{month_num:02d}-01"
-                if month_num == 12:
-                    end_date = f"{year + 1}-01-01"
-                else:
-                    end_date = f"{year}-{month_num + 1:02d}-01"
-            except:
-                # 파싱 실패 시 현재 월 사용
-                today = datetime.now()
-                start_date = today.replace(day=1).strftime('%Y-%m-%d')
-                if today.month == 12:
-                    end_date = today.replace(year=today.year + 1, month=1, day=1).strftime('%Y-%m-%d')
-                else:
-                    end_date = today.replace(month=today.month + 1, day=1).strftime('%Y-%m-%d')
-        
-        # 날짜가 없으면 현재 월 사용
-        if not start_date or not end_date:
+                window_start = datetime.strptime(start_date, '%Y-%m-%d').date()
+                window_end = datetime.strptime(end_date, '%Y-%m-%d').date() + timedelta(days=1)
+            except ValueError:
+                return jsonify({
+                    'success': False,
+                    'data': [],
+                    'count': 0,
+                    'message': '날짜 형식이 올바르지 않습니다. (YYYY-MM-DD 형식)'
+                }), 400
+        else:
+            # 월이 제공된 경우 해당 월부터, 없거나 파싱 실패 시 현재 월부터
             today = datetime.now()
-            start_date = today.replace(day=1).strftime('%Y-%m-%d')
-            if today.month == 12:
-                end_date = today.replace(year=today.year + 1, month=1, day=1).strftime('%Y-%m-%d')
-            else:
-                end_date = today.replace(month=today.month + 1, day=1).strftime('%Y-%m-%d')
+            year, month_num = today.year, today.month
+            if month:
+                try:
+                    year, month_num = map(int, month.split('-'))
+                    month_bounds(year, month_num)
+                except ValueError:
+                    year, month_num = today.year, today.month
+            window_start = month_bounds(year, month_num)[0]
+            end_year, end_month = divmod(year * 12 + month_num - 1 + max(months, 1), 12)
+            window_end = month_bounds(end_year, end_month + 1)[0]
         
-        schedules = get_schedules_by_date_range(start_date, end_date)
+        schedules = get_calendar_range(window_start, window_end)
+        start_date = window_start.strftime('%Y-%m-%d')
+        end_date = (window_end - timedelta(days=1)).strftime('%Y-%m-%d')
         
         return jsonify({
             'success': True,
@@ -142,6 +149,13 @@ def get_calendar_schedules():
             'endDate': end_date,
             'message': f'{len(schedules)}개의 스케쥴을 찾았습니다.'
         })
+    except ValueError as e:
+        return jsonify({
+            'success': False,
+            'data': [],
+            'count': 0,
+            'message': str(e)
+        }), 400
     except Exception as e:
         print(f'❌ 달력 스케쥴 조회 오류: {e}')
         import traceback
@@ -195,6 +209,15 @@ def create_schedule_route():
                 'message': '날짜 형식이 올바르지 않습니다. (YYYY-MM-DD 형식)'
             }), 400
         
+        # 반복 규칙 검증 (예: FREQ=WEEKLY;BYDAY=MO,TH)
+        try:
+            data['recurrence_rule'] = normalize_recurrence_rule(data.get('recurrence_rule'), data.get('start_date'))
+        except ValueError as e:
+            return jsonify({
+                'success': False,
+                'message': f'반복 규칙 오류: {e}'
+            }), 400
+        
         # "모든 화주사" 선택 시 모든 화주사에게 스케줄 생성 (company_name은 "제이제이"로 저장)
         if company_name == '모든 화주사' or company_name == 'ALL':
             companies = get_all_companies(include_inactive=False)
@@ -370,6 +393,16 @@ def update_schedule_route(schedule_id):
                     'message': '날짜 형식이 올바르지 않습니다. (YYYY-MM-DD 형식)'
                 }), 400
         
+        # 반복 규칙은 보낸 경우에만 변경 (키가 없으면 기존 규칙 유지, null/빈 값이면 해제)
+        if 'recurrence_rule' in data:
+            try:
+                data['recurrence_rule'] = normalize_recurrence_rule(data.get('recurrence_rule'), data.get('start_date'))
+            except ValueError as e:
+                return jsonify({
+                    'success': False,
+                    'message': f'반복 규칙 오류: {e}'
+                }), 400
+        
         success = update_schedule(schedule_id, data)
         if success:
             return jsonify({
@@ -472,24 +505,18 @@ def get_schedule_detail(schedule_id):
 
 @schedules_bp.route('/types', methods=['GET'])
 def get_schedule_types():
-    """스케줄 타입 목록 조회"""
+    """스케줄 타입 목록 조회 (ETag - 변경이 없으면 304)"""
     try:
+        return lookup_json_response(SCHEDULE_TYPES_LOOKUP)
+    except Exception as e:
+        print(f'[경고] 스케줄 타입 조회 오류 (기본 타입 반환): {e}')
+        # 테이블이 없거나 조회 오류 - get_all_schedule_types 의 기본 타입
         types = get_all_schedule_types()
         return jsonify({
             'success': True,
             'data': types,
             'count': len(types)
         })
-    except Exception as e:
-        print(f'❌ 스케줄 타입 조회 오류: {e}')
-        import traceback
-        traceback.print_exc()
-        return jsonify({
-            'success': False,
-            'data': [],
-            'count': 0,
-            'message': f'스케줄 타입 조회 중 오류: {str(e)}'
-        }), 500
 
 
 @schedules_bp.route('/types', methods=['POST'])
@@ -917,37 +944,37 @@ def update_schedule_memo(memo_id):
         
         conn = get_db_connection()
         cursor = conn.cursor()
+        sym = '%s' if USE_POSTGRESQL else '?'
         
         try:
-            if USE_POSTGRESQL:
-                cursor.execute('''
-                    UPDATE schedule_memos
-                    SET title = %s, company_name = %s, content = %s, updated_by = %s, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = %s
-                ''', (title, company_name if company_name else None, content, username, memo_id))
-            else:
-                cursor.execute('''
-                    UPDATE schedule_memos
-                    SET title = ?, company_name = ?, content = ?, updated_by = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE id = ?
-                ''', (title, company_name if company_name else None, content, username, memo_id))
-            
-            if cursor.rowcount == 0:
+            # 변경 전 값을 읽는 동안 동시 수정이 끼어들지 않도록 행 잠금 (PostgreSQL)
+            cursor.execute(
+                f'SELECT title, company_name, content FROM schedule_memos WHERE id = {sym}'
+                + (' FOR UPDATE' if USE_POSTGRESQL else ''),
+                (memo_id,)
+            )
+            row = cursor.fetchone()
+            if not row:
                 return jsonify({
                     'success': False,
                     'message': '메모를 찾을 수 없습니다.'
                 }), 404
+            before = dict(zip(('title', 'company_name', 'content'), tuple(row)))
+            after = {'title': title, 'company_name': company_name if company_name else None, 'content': content}
             
-            if USE_POSTGRESQL:
-                cursor.execute('''
-                    INSERT INTO schedule_memo_logs (memo_id, action, created_by)
-                    VALUES (%s, 'updated', %s)
-                ''', (memo_id, username))
-            else:
-                cursor.execute('''
-                    INSERT INTO schedule_memo_logs (memo_id, action, created_by)
-                    VALUES (?, 'updated', ?)
-                ''', (memo_id, username))
+            cursor.execute(f'''
+                UPDATE schedule_memos
+                SET title = {sym}, company_name = {sym}, content = {sym}, updated_by = {sym}, updated_at = CURRENT_TIMESTAMP
+                WHERE id = {sym}
+            ''', (title, after['company_name'], content, username, memo_id))
+            
+            # 바뀐 구간만 기록 (내용이 그대로면 기록하지 않음)
+            changes = memo_changes(before, after)
+            if changes:
+                cursor.execute(f'''
+                    INSERT INTO schedule_memo_logs (memo_id, action, changes, created_by)
+                    VALUES ({sym}, 'updated', {sym}, {sym})
+                ''', (memo_id, changes, username))
             
             conn.commit()
             
@@ -1037,50 +1064,62 @@ def update_schedule_memo_status(memo_id):
 
 @schedules_bp.route('/admin-memo-logs', methods=['GET'])
 def get_schedule_memo_logs():
-    """스케줄 메모 기록장 조회 API (관리자 전용). 메모당 1행, 현재 진행상황만 반환."""
+    """
+    스케줄 메모 기록장 조회 API (관리자 전용). 메모당 1행, 현재 진행상황만 반환.
+    최근 변경순 keyset 페이지: 응답의 next_cursor 를 ?cursor= 로 넘기면 다음 페이지.
+    """
     try:
         user_context = get_user_context()
         if user_context['role'] != '관리자':
             return jsonify({'success': False, 'data': [], 'message': '관리자만 접근할 수 있습니다.'}), 403
         
-        limit = max(1, min(100, request.args.get('limit', type=int) or 50))
+        limit = page_limit(request.args.get('limit'))
+        sym = '%s' if USE_POSTGRESQL else '?'
+        where_sql, params = '', []
+        cursor_token = (request.args.get('cursor') or '').strip()
+        if cursor_token:
+            try:
+                after_at, after_id = decode_memo_log_cursor(cursor_token)
+            except ValueError as e:
+                return jsonify({'success': False, 'data': [], 'message': str(e)}), 400
+            where_sql = (f' WHERE (COALESCE(updated_at, created_at) < {sym}'
+                         f' OR (COALESCE(updated_at, created_at) = {sym} AND id < {sym}))')
+            params = [after_at, after_at, after_id]
+        params.append(limit + 1)
         
         conn = get_db_connection()
         try:
-            if USE_POSTGRESQL:
-                cur = conn.cursor(cursor_factory=RealDictCursor)
-                cur.execute('''
-                    SELECT id, title, company_name, content, status, updated_at, updated_by, created_at
-                    FROM schedule_memos
-                    ORDER BY COALESCE(updated_at, created_at) DESC
-                    LIMIT %s
-                ''', (limit,))
-                rows = cur.fetchall()
-                items = [dict(r) for r in rows]
-            else:
-                cur = conn.cursor()
-                cur.execute('''
-                    SELECT id, title, company_name, content, status, updated_at, updated_by, created_at
-                    FROM schedule_memos
-                    ORDER BY COALESCE(updated_at, created_at) DESC
-                    LIMIT ?
-                ''', (limit,))
-                rows = cur.fetchall()
-                desc = [c[0] for c in cur.description] if cur.description else []
-                items = [dict(zip(desc, r)) for r in rows]
-            
-            for it in items:
-                ts = it.get('updated_at') or it.get('created_at')
-                if isinstance(ts, datetime):
-                    it['display_at'] = ts.strftime('%Y-%m-%d %H:%M')
-                elif ts:
-                    it['display_at'] = str(ts).replace('T', ' ')[:16]
-                else:
-                    it['display_at'] = '-'
-            
-            return jsonify({'success': True, 'data': items, 'count': len(items)})
+            cur = conn.cursor()
+            cur.execute(f'''
+                SELECT id, title, company_name, content, status, updated_at, updated_by, created_at,
+                       COALESCE(updated_at, created_at) AS activity_at
+                FROM schedule_memos{where_sql}
+                ORDER BY COALESCE(updated_at, created_at) DESC, id DESC
+                LIMIT {sym}
+            ''', params)
+            rows = cur.fetchall()
+            desc = [c[0] for c in cur.description] if cur.description else []
+            items = [dict(zip(desc, tuple(r))) for r in rows]
         finally:
             conn.close()
+        
+        has_more = len(items) > limit
+        items = items[:limit]
+        next_cursor = encode_memo_log_cursor(items[-1]['activity_at'], items[-1]['id']) if has_more else None
+        for it in items:
+            ts = it.pop('activity_at')
+            if isinstance(ts, datetime):
+                it['display_at'] = ts.strftime('%Y-%m-%d %H:%M')
+            elif ts:
+                it['display_at'] = str(ts).replace('T', ' ')[:16]
+            else:
+                it['display_at'] = '-'
+            for key in ('updated_at', 'created_at'):
+                if isinstance(it.get(key), datetime):
+                    it[key] = it[key].strftime('%Y-%m-%d %H:%M:%S')
+        
+        return jsonify({'success': True, 'data': items, 'count': len(items),
+                        'next_cursor': next_cursor, 'has_more': has_more})
     except Exception as e:
         print(f'❌ 스케줄 메모 기록장 조회 오류: {e}')
         import traceback
@@ -1088,12 +1127,71 @@ def get_schedule_memo_logs():
         return jsonify({'success': False, 'data': [], 'message': str(e)}), 500
 
 
+@schedules_bp.route('/admin-memo/<int:memo_id>/logs', methods=['GET'])
+def get_schedule_memo_history(memo_id):
+    """
+    스케줄 메모 한 건의 변경 이력 API (관리자 전용)
+    (created_at DESC, id DESC) keyset 페이지, 수정 기록은 바뀐 구간(changes)만 반환.
+    """
+    try:
+        user_context = get_user_context()
+        if user_context['role'] != '관리자':
+            return jsonify({'success': False, 'data': [], 'message': '관리자만 접근할 수 있습니다.'}), 403
+        
+        limit = page_limit(request.args.get('limit'))
+        sym = '%s' if USE_POSTGRESQL else '?'
+        where = [f'memo_id = {sym}']
+        params = [memo_id]
+        cursor_token = (request.args.get('cursor') or '').strip()
+        if cursor_token:
+            try:
+                after_at, after_id = decode_memo_log_cursor(cursor_token)
+            except ValueError as e:
+                return jsonify({'success': False, 'data': [], 'message': str(e)}), 400
+            where.append(f'(created_at < {sym} OR (created_at = {sym} AND id < {sym}))')
+            params.extend([after_at, after_at, after_id])
+        params.append(limit + 1)
+        
+        conn = get_db_connection()
+        try:
+            cur = conn.cursor()
+            cur.execute(f'''
+                SELECT id, memo_id, action, from_status, to_status, changes, created_by, created_at
+                FROM schedule_memo_logs
+                WHERE {' AND '.join(where)}
+                ORDER BY created_at DESC, id DESC
+                LIMIT {sym}
+            ''', params)
+            rows = cur.fetchall()
+            desc = [c[0] for c in cur.description] if cur.description else []
+            items = [dict(zip(desc, tuple(r))) for r in rows]
+        finally:
+            conn.close()
+        
+        has_more = len(items) > limit
+        items = items[:limit]
+        next_cursor = encode_memo_log_cursor(items[-1]['created_at'], items[-1]['id']) if has_more else None
+        for it in items:
+            it['changes'] = parse_memo_changes(it.get('changes'))
+            if isinstance(it.get('created_at'), datetime):
+                it['created_at'] = it['created_at'].strftime('%Y-%m-%d %H:%M:%S')
+        
+        return jsonify({'success': True, 'data': items, 'count': len(items),
+                        'next_cursor': next_cursor, 'has_more': has_more})
+    except Exception as e:
+        print(f'❌ 스케줄 메모 변경 이력 조회 오류: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({'success': False, 'data': [], 'message': str(e)}), 500
+
+
 @schedules_bp.route('/admin-memo/<int:memo_id>', methods=['DELETE'])
 def delete_schedule_memo(memo_id):
     """스케줄 메모 삭제 API (관리자 전용)"""
     try:
         user_context = get_user_context()
         role = user_context['role']
+        username = user_context['username']
         
         # 관리자만 접근 가능
         if role != '관리자':
@@ -1104,19 +1202,37 @@ def delete_schedule_memo(memo_id):
         
         conn = get_db_connection()
         cursor = conn.cursor()
+        sym = '%s' if USE_POSTGRESQL else '?'
         
         try:
-            if USE_POSTGRESQL:
-                cursor.execute('DELETE FROM schedule_memos WHERE id = %s', (memo_id,))
-            else:
-                cursor.execute('DELETE FROM schedule_memos WHERE id = ?', (memo_id,))
+            # 삭제 기록에 남길 값을 읽는 동안 동시 수정이 끼어들지 않도록 행 잠금 (PostgreSQL)
+            cursor.execute(
+                f'SELECT title, company_name, content, status FROM schedule_memos WHERE id = {sym}'
+                + (' FOR UPDATE' if USE_POSTGRESQL else ''),
+                (memo_id,)
+            )
+            row = cursor.fetchone()
+            if not row:
+                return jsonify({
+                    'success': False,
+                    'message': '메모를 찾을 수 없습니다.'
+                }), 404
+            before = dict(zip(('title', 'company_name', 'content', 'status'), tuple(row)))
             
+            cursor.execute(f'DELETE FROM schedule_memos WHERE id = {sym}', (memo_id,))
             if cursor.rowcount == 0:
+                conn.rollback()
                 return jsonify({
                     'success': False,
                     'message': '메모를 찾을 수 없습니다.'
                 }), 404
             
+            # 변경 이력은 남기고 삭제 기록을 추가 (changes 를 되돌리면 삭제 직전 내용)
+            cursor.execute(f'''
+                INSERT INTO schedule_memo_logs (memo_id, action, from_status, changes, created_by)
+                VALUES ({sym}, 'deleted', {sym}, {sym}, {sym})
+            ''', (memo_id, before['status'], memo_changes(before, {}), username))
+            
             conn.commit()
             
             return jsonify({
@@ -0,0 +1,468 @@
+"""
+정산 데이터 소스 집계 (GET /api/settlements/data-sources)
+
+화주사 별칭 목록을 한 번만 조회한 뒤, 서로 독립적인 소스 쿼리
+(파레트 보관료, 특수작업, 오배송/누락, 착불 택배비, 반품 건수)를
+각자의 연결에서 동시에 실행하고 소스별 소요 시간을 함께 반환한다.
+"""
+import re
+import time
+import calendar
+import concurrent.futures
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from api.database.models import (
+    get_db_connection,
+    USE_POSTGRESQL,
+    normalize_company_name,
+    get_company_search_keywords,
+    _sql_company_normalized_equals_keywords_pg,
+    _sql_company_normalized_equals_keywords_sqlite,
+)
+
+# 정산에 반영하는 반품 처리 비용 (건당 원)
+RETURN_SETTLEMENT_FEE_PER_CASE = 500
+
+_COD_AMOUNT_RE = re.compile(r'착불\s*([\d,]+)')
+
+
+def empty_data_sources_result() -> Dict[str, Any]:
+    """data-sources 응답 기본값."""
+    return {
+        'storage_fee': 0,  # 파레트 보관료
+        'storage_fee_matched': False,  # 파레트 정산에서 화주사 매칭 여부
+        'special_work_fee': 0,  # 특수작업 비용
+        'special_works_count': 0,  # 특수작업 건수(해당월·화주 집계)
+        'special_work_match_mode': 'none',  # exact | keyword | none
+        'error_wrong_delivery_count': 0,  # 오배송 건수
+        'error_missing_count': 0,  # 누락 건수
+        'error_details': [],  # 오배송/누락 상세
+        'collect_on_delivery_fee': 0,  # 착불 택배비
+        'collect_cod_line_count': 0,  # 착불로 집계된 반품 행 수
+        'return_count': 0,  # 해당 월 반품 건수 (화주사 매칭)
+        'return_fee': 0  # 반품비 (건당 RETURN_SETTLEMENT_FEE_PER_CASE)
+    }
+
+
+def month_bounds(settlement_year_month: str) -> Tuple[str, str, List[str]]:
+    """
+    정산년월(YYYY-MM) → (시작일, 말일, C/S·반품 월 표기 목록)
+
+    반품/C/S DB는 "2025년1월" 또는 "2025년01월" 둘 다 있을 수 있다.
+
+    Raises:
+        ValueError: 형식이 올바르지 않을 때
+    """
+    year, month = map(int, settlement_year_month.split('-'))
+    last_day = calendar.monthrange(year, month)[1]
+    month_variants = list(dict.fromkeys([f'{year}년{month}월', f'{year}년{month:02d}월']))
+    return f'{year}-{month:02d}-01', f'{year}-{month:02d}-{last_day:02d}', month_variants
+
+
+def company_norm_sql() -> str:
+    """company_name 컬럼을 normalize_company_name 과 같은 규칙으로 정규화하는 SQL 식."""
+    if USE_POSTGRESQL:
+        return _sql_company_normalized_equals_keywords_pg()
+    return _sql_company_normalized_equals_keywords_sqlite()
+
+
+def parse_cod_amount(shipping_fee) -> Optional[int]:
+    """'착불 5,000' 형식이면 금액, 아니면 None."""
+    text = str(shipping_fee or '').strip()
+    if not text.startswith('착불'):
+        return None
+    match = _COD_AMOUNT_RE.match(text)
+    if not match:
+        return None
+    try:
+        return int(match.group(1).replace(',', ''))
+    except ValueError:
+        return None
+
+
+def _placeholders(n: int) -> str:
+    return ', '.join(['%s' if USE_POSTGRESQL else '?'] * n)
+
+
+# ========== 소스별 쿼리 (각자 연결 사용) ==========
+
+def _storage_fee_source(ctx: Dict) -> Dict:
+    """파레트 보관료: 해당 월 정산 중 정규화 이름이 정확히 같은 화주사."""
+    sym = '%s' if USE_POSTGRESQL else '?'
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''SELECT total_fee FROM pallet_monthly_settlements
+                WHERE settlement_month = {sym} AND {company_norm_sql()} = {sym}
+                ORDER BY company_name
+                LIMIT 1''',
+            (ctx['settlement_year_month'], ctx['company_normalized']),
+        )
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    if not row:
+        return {}
+    return {'storage_fee': row[0] or 0, 'storage_fee_matched': True}
+
+
+def _special_work_source(ctx: Dict) -> Dict:
+    """특수작업: 화주사명 정확 일치 우선, 없으면 별칭·정규화 일치 (한 번의 조회로 둘 다 집계)."""
+    sym = '%s' if USE_POSTGRESQL else '?'
+    keywords = ctx['keywords']
+    norm_in = f"{company_norm_sql()} IN ({_placeholders(len(keywords))})"
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''SELECT
+                    COALESCE(SUM(CASE WHEN company_name = {sym} THEN total_price ELSE 0 END), 0),
+                    COALESCE(SUM(CASE WHEN company_name = {sym} THEN 1 ELSE 0 END), 0),
+                    COALESCE(SUM(CASE WHEN {norm_in} THEN total_price ELSE 0 END), 0),
+                    COALESCE(SUM(CASE WHEN {norm_in} THEN 1 ELSE 0 END), 0)
+                FROM special_works
+                WHERE work_date >= {sym} AND work_date <= {sym}''',
+            [ctx['company_name'], ctx['company_name']] + keywords + keywords
+            + [ctx['start_date'], ctx['end_date']],
+        )
+        exact_total, exact_count, kw_total, kw_count = cursor.fetchone()
+    finally:
+        cursor.close()
+        conn.close()
+    if int(exact_count or 0) > 0:
+        return {
+            'special_work_fee': int(exact_total or 0),
+            'special_works_count': int(exact_count),
+            'special_work_match_mode': 'exact',
+        }
+    if int(kw_count or 0) > 0:
+        return {
+            'special_work_fee': int(kw_total or 0),
+            'special_works_count': int(kw_count),
+            'special_work_match_mode': 'keyword',
+        }
+    return {'special_work_match_mode': 'none'}
+
+
+def _error_deduction_source(ctx: Dict) -> Dict:
+    """오배송/누락 차감 (C/S 메뉴 customer_service, 별칭 매칭)."""
+    months = ctx['month_variants']
+    keywords = ctx['keywords']
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''SELECT management_number, customer_name, issue_type
+                FROM customer_service
+                WHERE month IN ({_placeholders(len(months))})
+                  AND (issue_type = '오배송' OR issue_type = '누락')
+                  AND {company_norm_sql()} IN ({_placeholders(len(keywords))})
+                ORDER BY id''',
+            months + keywords,
+        )
+        rows = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+    details = [
+        {
+            'tracking_number': r[0] or '',
+            'customer_name': r[1] or '',
+            'return_type': r[2],
+        }
+        for r in rows
+    ]
+    return {
+        'error_wrong_delivery_count': sum(1 for d in details if d['return_type'] == '오배송'),
+        'error_missing_count': sum(1 for d in details if d['return_type'] == '누락'),
+        'error_details': details,
+    }
+
+
+def _collect_on_delivery_source(ctx: Dict) -> Dict:
+    """착불 택배비 (반품관리, 화주사명 정확 일치)."""
+    sym = '%s' if USE_POSTGRESQL else '?'
+    months = ctx['month_variants']
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''SELECT shipping_fee FROM returns
+                WHERE company_name = {sym}
+                  AND month IN ({_placeholders(len(months))})
+                  AND LTRIM(shipping_fee) LIKE {sym}''',
+            [ctx['company_name']] + months + ['착불%'],
+        )
+        amounts = [parse_cod_amount(r[0]) for r in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+    amounts = [a for a in amounts if a is not None]
+    return {'collect_on_delivery_fee': sum(amounts), 'collect_cod_line_count': len(amounts)}
+
+
+def _return_count_source(ctx: Dict) -> Dict:
+    """반품 비용: 해당 정산월 반품 건수(별칭 매칭) × 건당 단가."""
+    months = ctx['month_variants']
+    keywords = ctx['keywords']
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''SELECT COUNT(*) FROM returns
+                WHERE month IN ({_placeholders(len(months))})
+                  AND {company_norm_sql()} IN ({_placeholders(len(keywords))})''',
+            months + keywords,
+        )
+        return_count = int(cursor.fetchone()[0] or 0)
+    finally:
+        cursor.close()
+        conn.close()
+    return {'return_count': return_count, 'return_fee': return_count * RETURN_SETTLEMENT_FEE_PER_CASE}
+
+
+_SOURCES: Tuple[Tuple[str, Callable[[Dict], Dict]], ...] = (
+    ('storage_fee', _storage_fee_source),
+    ('special_work', _special_work_source),
+    ('error_deduction', _error_deduction_source),
+    ('collect_on_delivery', _collect_on_delivery_source),
+    ('return_count', _return_count_source),
+)
+
+
+def collect_settlement_data_sources(company_name: str, settlement_year_month: str) -> Dict[str, Any]:
+    """
+    화주사 1곳의 정산 데이터 소스 집계
+
+    별칭 목록은 1회만 조회하고, 소스 쿼리는 스레드별 연결로 동시에 실행한다.
+    소스 하나가 실패해도 해당 항목만 기본값으로 두고 나머지는 반환한다.
+
+    Returns:
+        empty_data_sources_result() 형태 + 'timings_ms': {소스명: ms, 'total': ms}
+
+    Raises:
+        ValueError: 정산년월 형식이 올바르지 않을 때
+    """
+    started = time.perf_counter()
+    start_date, end_date, month_variants = month_bounds(settlement_year_month)
+
+    company_normalized = normalize_company_name(company_name)
+    try:
+        keywords = get_company_search_keywords(company_name) or [company_normalized]
+    except Exception:
+        keywords = [company_normalized]
+
+    ctx = {
+        'company_name': company_name,
+        'company_normalized': company_normalized,
+        'keywords': list(keywords),
+        'settlement_year_month': settlement_year_month,
+        'start_date': start_date,
+        'end_date': end_date,
+        'month_variants': month_variants,
+    }
+    timings = {'keywords': round((time.perf_counter() - started) * 1000, 1)}
+
+    def run(name: str, fn: Callable[[Dict], Dict]):
+        t0 = time.perf_counter()
+        try:
+            return name, fn(ctx), None, time.perf_counter() - t0
+        except Exception as e:
+            return name, {}, e, time.perf_counter() - t0
+
+    result = empty_data_sources_result()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=len(_SOURCES)) as executor:
+        futures = [executor.submit(run, name, fn) for name, fn in _SOURCES]
+        for future in concurrent.futures.as_completed(futures):
+            name, values, error, elapsed = future.result()
+            timings[name] = round(elapsed * 1000, 1)
+            if error is not None:
+                print(f'[경고] 정산 데이터 소스({name}) 조회 오류: {error}')
+                continue
+            result.update(values)
+
+    timings['total'] = round((time.perf_counter() - started) * 1000, 1)
+    result['timings_ms'] = timings
+    print(f"[정보] 정산 데이터 소스 집계: {company_name}, {settlement_year_month}, {timings['total']}ms")
+    return result
+
+
+# ========== 전체 화주사 일괄 집계 (월 단위, 소스별 1회 조회) ==========
+
+def build_company_keyword_map(company_names: List[str], cursor) -> Dict[str, List[str]]:
+    """
+    get_company_search_keywords 와 같은 규칙으로 여러 화주사의 별칭 목록을 한 번에 구성.
+
+    companies 를 한 번만 읽고, 정규화 키(회사명·아이디·별칭) → 처음 일치하는 행 인덱스를 만든다.
+    cursor 는 일반(튜플) 커서여야 한다.
+    """
+    cursor.execute('SELECT company_name, search_keywords, username FROM companies')
+    rows = cursor.fetchall()
+
+    def split_aliases(raw) -> List[str]:
+        if not raw or str(raw).lower() == 'none':
+            return []
+        return [a.strip() for a in str(raw).replace('\n', ',').split(',') if a.strip()]
+
+    first_row_by_key: Dict[str, int] = {}
+    for idx, (cn, sk, un) in enumerate(rows):
+        keys = [normalize_company_name(cn or '')]
+        if un:
+            keys.append(normalize_company_name(un))
+        keys.extend(normalize_company_name(a) for a in split_aliases(sk))
+        for key in keys:
+            first_row_by_key.setdefault(key, idx)
+
+    result = {}
+    for name in company_names:
+        norm = normalize_company_name(name)
+        idx = first_row_by_key.get(norm)
+        if idx is None:
+            result[name] = [norm]
+            continue
+        cn, sk, _ = rows[idx]
+        keywords = [normalize_company_name(cn or '')]
+        keywords.extend(normalize_company_name(a) for a in split_aliases(sk))
+        result[name] = list(set(keywords))
+    return result
+
+
+def collect_settlement_data_sources_batch(company_names: List[str],
+                                          settlement_year_month: str) -> Dict[str, Dict[str, Any]]:
+    """
+    여러 화주사의 정산 데이터 소스를 한 번에 집계 (collect_settlement_data_sources 와 같은 값).
+
+    소스마다 해당 월 전체를 화주사명(원문) 단위로 GROUP BY 한 번 조회한 뒤,
+    정규화 키 → 화주사 매핑으로 나눠 담는다. 화주사 수와 무관하게 쿼리 수가 일정하다.
+
+    Returns:
+        {화주사명: empty_data_sources_result() 형태}
+
+    Raises:
+        ValueError: 정산년월 형식이 올바르지 않을 때
+    """
+    start_date, end_date, month_variants = month_bounds(settlement_year_month)
+    results = {name: empty_data_sources_result() for name in company_names}
+    if not company_names:
+        return results
+
+    sym = '%s' if USE_POSTGRESQL else '?'
+    months_ph = _placeholders(len(month_variants))
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        keyword_map = build_company_keyword_map(company_names, cursor)
+
+        # 1. 파레트 보관료: 정규화 이름이 같은 첫 정산 행 (company_name 순)
+        cursor.execute(
+            f'''SELECT company_name, total_fee FROM pallet_monthly_settlements
+                WHERE settlement_month = {sym}
+                ORDER BY company_name''',
+            (settlement_year_month,),
+        )
+        storage_by_key: Dict[str, Any] = {}
+        for cn, fee in cursor.fetchall():
+            storage_by_key.setdefault(normalize_company_name(cn or ''), fee)
+
+        # 2. 특수작업: 화주사명(원문)별 합계
+        cursor.execute(
+            f'''SELECT company_name, COALESCE(SUM(total_price), 0), COUNT(*)
+                FROM special_works
+                WHERE work_date >= {sym} AND work_date <= {sym}
+                GROUP BY company_name''',
+            (start_date, end_date),
+        )
+        special_rows = [(cn or '', int(total or 0), int(cnt or 0)) for cn, total, cnt in cursor.fetchall()]
+
+        # 3. 오배송/누락
+        cursor.execute(
+            f'''SELECT company_name, management_number, customer_name, issue_type
+                FROM customer_service
+                WHERE month IN ({months_ph})
+                  AND (issue_type = '오배송' OR issue_type = '누락')
+                ORDER BY id''',
+            month_variants,
+        )
+        error_rows = cursor.fetchall()
+
+        # 4. 착불 택배비 (화주사명 정확 일치)
+        cursor.execute(
+            f'''SELECT company_name, shipping_fee FROM returns
+                WHERE month IN ({months_ph})
+                  AND LTRIM(shipping_fee) LIKE {sym}''',
+            month_variants + ['착불%'],
+        )
+        cod_rows = cursor.fetchall()
+
+        # 5. 반품 건수: 화주사명(원문)별 건수
+        cursor.execute(
+            f'''SELECT company_name, COUNT(*) FROM returns
+                WHERE month IN ({months_ph})
+                GROUP BY company_name''',
+            month_variants,
+        )
+        return_rows = [(cn or '', int(cnt or 0)) for cn, cnt in cursor.fetchall()]
+    finally:
+        cursor.close()
+        conn.close()
+
+    # 정규화 키 → 그 키를 별칭으로 가진 화주사들
+    companies_by_keyword: Dict[str, List[str]] = {}
+    for name, keywords in keyword_map.items():
+        for kw in keywords:
+            companies_by_keyword.setdefault(kw, []).append(name)
+
+    for name in company_names:
+        norm = normalize_company_name(name)
+        if norm in storage_by_key:
+            results[name]['storage_fee'] = storage_by_key[norm] or 0
+            results[name]['storage_fee_matched'] = True
+
+    special_exact = {cn: (total, cnt) for cn, total, cnt in special_rows}
+    special_keyword: Dict[str, List[int]] = {}
+    for cn, total, cnt in special_rows:
+        for name in companies_by_keyword.get(normalize_company_name(cn), []):
+            acc = special_keyword.setdefault(name, [0, 0])
+            acc[0] += total
+            acc[1] += cnt
+    for name in company_names:
+        exact_total, exact_count = special_exact.get(name, (0, 0))
+        kw_total, kw_count = special_keyword.get(name, [0, 0])
+        if exact_count > 0:
+            results[name].update(special_work_fee=exact_total, special_works_count=exact_count,
+                                 special_work_match_mode='exact')
+        elif kw_count > 0:
+            results[name].update(special_work_fee=kw_total, special_works_count=kw_count,
+                                 special_work_match_mode='keyword')
+
+    for cn, management_number, customer_name, issue_type in error_rows:
+        for name in companies_by_keyword.get(normalize_company_name(cn or ''), []):
+            r = results[name]
+            if issue_type == '오배송':
+                r['error_wrong_delivery_count'] += 1
+            elif issue_type == '누락':
+                r['error_missing_count'] += 1
+            r['error_details'].append({
+                'tracking_number': management_number or '',
+                'customer_name': customer_name or '',
+                'return_type': issue_type,
+            })
+
+    for cn, shipping_fee in cod_rows:
+        if cn not in results:
+            continue
+        amount = parse_cod_amount(shipping_fee)
+        if amount is None:
+            continue
+        results[cn]['collect_on_delivery_fee'] += amount
+        results[cn]['collect_cod_line_count'] += 1
+
+    for cn, cnt in return_rows:
+        for name in companies_by_keyword.get(normalize_company_name(cn), []):
+            results[name]['return_count'] += cnt
+    for r in results.values():
+        r['return_fee'] = r['return_count'] * RETURN_SETTLEMENT_FEE_PER_CASE
+
+    return results
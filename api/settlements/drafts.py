@@ -0,0 +1,211 @@
+"""
+월별 임시(대기) 정산 일괄 생성
+
+정산년월 하나에 대해 활성 화주사 전체의 데이터 소스를 일괄 집계하고,
+settlements 의 '대기' 행을 한 트랜잭션으로 생성/갱신한 뒤 기존 값과의 차이를 돌려준다.
+"""
+from typing import Any, Dict, List, Optional
+
+from api.database.models import (
+    get_db_connection,
+    USE_POSTGRESQL,
+    ensure_settlement_return_fee_column,
+    get_all_companies,
+    get_companies_deactivated_map,
+)
+from api.settlements.data_sources import collect_settlement_data_sources_batch
+from api.sales_settlement.analytics_cube import (
+    ensure_sales_analytics_cube_table,
+    settlement_cube_rows,
+    apply_settlement_cube_diff,
+)
+
+# 데이터 소스에서 채우는 금액 (나머지 금액·차감은 수기 입력값 유지)
+DRAFT_SOURCE_FIELDS = ('storage_fee', 'special_work_fee', 'collect_on_delivery_fee', 'return_fee')
+# 총액 계산에 쓰는 금액 (settlements.html stCalculateTotal 과 동일)
+_AMOUNT_FIELDS = ('work_fee', 'inout_fee', 'shipping_fee', 'collect_on_delivery_fee',
+                  'return_fee', 'storage_fee', 'special_work_fee')
+# 이 상태의 정산만 자동 갱신 (전달 이후는 확정된 것으로 보고 건드리지 않음)
+DRAFT_STATUS = '대기'
+
+
+def list_active_shipper_names() -> List[str]:
+    """정산 대상 화주사명 (화주사 계정 중 비활성·이전 화주사 제외)."""
+    names = []
+    for comp in get_all_companies(include_inactive=False):
+        name = (comp.get('company_name') or '').strip()
+        if name and comp.get('role', '화주사') == '화주사':
+            names.append(name)
+    names = list(dict.fromkeys(names))
+    deactivated = get_companies_deactivated_map(names)
+    return sorted(n for n in names if not deactivated.get(n))
+
+
+def _total_amount(values: Dict[str, Any]) -> int:
+    return sum(int(values.get(f) or 0) for f in _AMOUNT_FIELDS) - int(values.get('error_deduction') or 0)
+
+
+def generate_draft_settlements(settlement_year_month: str,
+                               company_names: Optional[List[str]] = None,
+                               dry_run: bool = False) -> Dict[str, Any]:
+    """
+    정산년월의 임시 정산 일괄 생성/갱신
+
+    Args:
+        settlement_year_month: YYYY-MM
+        company_names: 대상 화주사 (없으면 활성 화주사 전체)
+        dry_run: True 면 저장하지 않고 차이만 계산
+
+    Returns:
+        {
+            'settlement_year_month', 'dry_run',
+            'created': int, 'updated': int, 'unchanged': int, 'skipped': int,
+            'diff': [{company_name, action, settlement_id, status, changes: {필드: {before, after}}}, ...]
+        }
+        action: created | updated | unchanged | skipped(대기가 아닌 정산)
+
+    Raises:
+        ValueError: 정산년월 형식이 올바르지 않을 때
+    """
+    names = ([n.strip() for n in company_names if isinstance(n, str) and n.strip()]
+             if company_names else list_active_shipper_names())
+    names = list(dict.fromkeys(names))
+    sources = collect_settlement_data_sources_batch(names, settlement_year_month)
+
+    sym = '%s' if USE_POSTGRESQL else '?'
+    if not dry_run:
+        ensure_sales_analytics_cube_table()
+    conn = get_db_connection()
+    ensure_settlement_return_fee_column(conn)
+    cursor = conn.cursor()
+    try:
+        existing = {}
+        if names:
+            cursor.execute(
+                f'''SELECT id, company_name, status, work_fee, inout_fee, shipping_fee,
+                           storage_fee, special_work_fee, error_deduction,
+                           collect_on_delivery_fee, return_fee, total_amount
+                    FROM settlements
+                    WHERE settlement_year_month = {sym}
+                      AND company_name IN ({', '.join([sym] * len(names))})''',
+                [settlement_year_month] + names,
+            )
+            cols = ('id', 'company_name', 'status', 'work_fee', 'inout_fee', 'shipping_fee',
+                    'storage_fee', 'special_work_fee', 'error_deduction',
+                    'collect_on_delivery_fee', 'return_fee', 'total_amount')
+            for row in cursor.fetchall():
+                item = dict(zip(cols, tuple(row)))
+                existing[item['company_name']] = item
+
+        diff = []
+        inserts = []
+        updates = []
+        for name in names:
+            src = sources[name]
+            new_values = {f: int(src.get(f) or 0) for f in DRAFT_SOURCE_FIELDS}
+            current = existing.get(name)
+            if current is None:
+                after = dict(new_values)
+                after['total_amount'] = _total_amount(after)
+                diff.append({
+                    'company_name': name,
+                    'action': 'created',
+                    'settlement_id': None,
+                    'status': DRAFT_STATUS,
+                    'changes': {f: {'before': None, 'after': after[f]} for f in after},
+                })
+                inserts.append((name, after))
+                continue
+
+            before = {f: int(current.get(f) or 0) for f in _AMOUNT_FIELDS + ('error_deduction', 'total_amount')}
+            entry = {
+                'company_name': name,
+                'settlement_id': current['id'],
+                'status': current['status'],
+            }
+            if (current['status'] or DRAFT_STATUS) != DRAFT_STATUS:
+                entry.update(action='skipped', changes={})
+                diff.append(entry)
+                continue
+
+            after = dict(before)
+            after.update(new_values)
+            after['total_amount'] = _total_amount(after)
+            changes = {
+                f: {'before': before[f], 'after': after[f]}
+                for f in DRAFT_SOURCE_FIELDS + ('total_amount',)
+                if before[f] != after[f]
+            }
+            entry.update(action='updated' if changes else 'unchanged', changes=changes)
+            diff.append(entry)
+            if changes:
+                updates.append((current['id'], after))
+
+        if not dry_run and (inserts or updates):
+            cube_before = settlement_cube_rows(cursor, [sid for sid, _ in updates], lock=True)
+            if inserts:
+                cursor.executemany(
+                    f'''INSERT INTO settlements (
+                            company_name, settlement_year_month, storage_fee, special_work_fee,
+                            collect_on_delivery_fee, return_fee, total_amount, status, memo,
+                            created_at, updated_at)
+                        VALUES ({sym}, {sym}, {sym}, {sym}, {sym}, {sym}, {sym}, {sym}, '',
+                                CURRENT_TIMESTAMP, CURRENT_TIMESTAMP)
+                        ON CONFLICT (company_name, settlement_year_month) DO NOTHING''',
+                    [
+                        (name, settlement_year_month, v['storage_fee'], v['special_work_fee'],
+                         v['collect_on_delivery_fee'], v['return_fee'], v['total_amount'], DRAFT_STATUS)
+                        for name, v in inserts
+                    ],
+                )
+            if updates:
+                # 조회 이후 상태가 바뀐 행은 건드리지 않도록 status 조건 포함
+                cursor.executemany(
+                    f'''UPDATE settlements SET
+                            storage_fee = {sym}, special_work_fee = {sym},
+                            collect_on_delivery_fee = {sym}, return_fee = {sym},
+                            total_amount = {sym}, updated_at = CURRENT_TIMESTAMP
+                        WHERE id = {sym} AND COALESCE(status, {sym}) = {sym}''',
+                    [
+                        (v['storage_fee'], v['special_work_fee'], v['collect_on_delivery_fee'],
+                         v['return_fee'], v['total_amount'], sid, DRAFT_STATUS, DRAFT_STATUS)
+                        for sid, v in updates
+                    ],
+                )
+
+            new_ids = {}
+            if inserts:
+                cursor.execute(
+                    f'''SELECT id, company_name FROM settlements
+                        WHERE settlement_year_month = {sym}
+                          AND company_name IN ({', '.join([sym] * len(inserts))})''',
+                    [settlement_year_month] + [name for name, _ in inserts],
+                )
+                new_ids = {row[1]: row[0] for row in cursor.fetchall()}
+                for entry in diff:
+                    if entry['action'] == 'created':
+                        entry['settlement_id'] = new_ids.get(entry['company_name'])
+
+            apply_settlement_cube_diff(
+                cursor,
+                cube_before,
+                settlement_cube_rows(cursor, [sid for sid, _ in updates] + list(new_ids.values())),
+            )
+            conn.commit()
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    counts = {a: sum(1 for d in diff if d['action'] == a) for a in ('created', 'updated', 'unchanged', 'skipped')}
+    return {
+        'settlement_year_month': settlement_year_month,
+        'dry_run': bool(dry_run),
+        **counts,
+        'diff': diff,
+    }
@@ -5,15 +5,28 @@ from flask import Blueprint, request, jsonify, Response
 from api.database.models import (
     get_db_connection,
     USE_POSTGRESQL,
-    normalize_company_name,
-    get_company_search_keywords,
     ensure_settlement_return_fee_column,
+    ensure_settlement_file_count_column,
+    refresh_settlement_file_count,
+)
+from api.settlements.data_sources import collect_settlement_data_sources
+from api.sales_settlement.analytics_cube import (
+    ensure_sales_analytics_cube_table,
+    settlement_cube_rows,
+    apply_settlement_cube_diff,
+)
+from api.settlements.drafts import generate_draft_settlements
+from api.uploads.upload_sessions import (
+    create_upload_session,
+    get_upload_session,
+    store_upload_chunk,
+    assembled_upload_file,
+    delete_upload_session,
+    upload_session_progress,
 )
 from datetime import datetime, date
 from urllib.parse import unquote
 import os
-import uuid
-import base64 as base64_lib
 
 if USE_POSTGRESQL:
     from psycopg2.extras import RealDictCursor
@@ -21,8 +34,8 @@ if USE_POSTGRESQL:
 # Blueprint 생성
 settlements_bp = Blueprint('settlements', __name__, url_prefix='/api/settlements')
 
-# 정산에 반영하는 반품 처리 비용 (건당 원)
-RETURN_SETTLEMENT_FEE_PER_CASE = 500
+# 청크 업로드 세션 용도 (api.uploads.upload_sessions)
+SETTLEMENT_UPLOAD_PURPOSE = 'settlement_file'
 
 
 def _cursor_row_get(row, key, index=0):
@@ -288,6 +301,7 @@ def create_settlement():
                 'message': '화주사명과 정산년월은 필수입니다.'
             }), 400
         
+        ensure_sales_analytics_cube_table()
         conn = get_db_connection()
         ensure_settlement_return_fee_column(conn)
         cursor = conn.cursor()
@@ -302,6 +316,7 @@ def create_settlement():
                              (settlement_company_name, settlement_year_month))
             
             existing = cursor.fetchone()
+            cube_before = settlement_cube_rows(cursor, [existing[0]], lock=True) if existing else []
             
             if existing:
                 # 기존 정산이 있으면 UPDATE (임시 정산 업데이트)
@@ -382,6 +397,8 @@ def create_settlement():
                     ))
                     settlement_id = cursor.lastrowid
             
+            # 매출 통계 큐브 반영
+            apply_settlement_cube_diff(cursor, cube_before, settlement_cube_rows(cursor, [settlement_id]))
             conn.commit()
             return jsonify({
                 'success': True,
@@ -426,6 +443,7 @@ def update_settlement(settlement_id):
         
         data = request.get_json()
         
+        ensure_sales_analytics_cube_table()
         conn = get_db_connection()
         ensure_settlement_return_fee_column(conn)
         cursor = conn.cursor()
@@ -500,6 +518,7 @@ def update_settlement(settlement_id):
             updates.append('updated_at = CURRENT_TIMESTAMP')
             params.append(settlement_id)
             
+            cube_before = settlement_cube_rows(cursor, [settlement_id], lock=True)
             if USE_POSTGRESQL:
                 cursor.execute(f'''
                     UPDATE settlements 
@@ -512,10 +531,13 @@ def update_settlement(settlement_id):
                     SET {', '.join(updates)}
                     WHERE id = ?
                 ''', params)
+            updated_rows = cursor.rowcount
             
+            # 매출 통계 큐브 반영
+            apply_settlement_cube_diff(cursor, cube_before, settlement_cube_rows(cursor, [settlement_id]))
             conn.commit()
             
-            if cursor.rowcount > 0:
+            if updated_rows > 0:
                 return jsonify({
                     'success': True,
                     'message': '정산이 수정되었습니다.'
@@ -563,18 +585,23 @@ def delete_settlement(settlement_id):
                 'message': '관리자만 정산을 삭제할 수 있습니다.'
             }), 403
         
+        ensure_sales_analytics_cube_table()
         conn = get_db_connection()
         cursor = conn.cursor()
         
         try:
+            cube_before = settlement_cube_rows(cursor, [settlement_id], lock=True)
             if USE_POSTGRESQL:
                 cursor.execute('DELETE FROM settlements WHERE id = %s', (settlement_id,))
             else:
                 cursor.execute('DELETE FROM settlements WHERE id = ?', (settlement_id,))
+            deleted_rows = cursor.rowcount
             
+            # 매출 통계 큐브 반영
+            apply_settlement_cube_diff(cursor, cube_before, [])
             conn.commit()
             
-            if cursor.rowcount > 0:
+            if deleted_rows > 0:
                 return jsonify({
                     'success': True,
                     'message': '정산이 삭제되었습니다.'
@@ -610,7 +637,7 @@ def delete_settlement(settlement_id):
 
 @settlements_bp.route('/data-sources', methods=['GET'])
 def get_data_sources():
-    """정산에 필요한 데이터 소스 조회 (파레트 보관료, 특수작업, 오배송/누락 차감)"""
+    """정산에 필요한 데이터 소스 조회 (파레트 보관료, 특수작업, 오배송/누락 차감, 착불, 반품)"""
     try:
         user_context = get_user_context()
         role = user_context['role']
@@ -640,363 +667,93 @@ def get_data_sources():
                 'message': '화주사명이 필요합니다.'
             }), 400
         
-        result = {
-            'storage_fee': 0,  # 파레트 보관료
-            'storage_fee_matched': False,  # 파레트 정산에서 화주사 매칭 여부
-            'special_work_fee': 0,  # 특수작업 비용
-            'special_works_count': 0,  # 특수작업 건수(해당월·화주 집계)
-            'special_work_match_mode': 'none',  # exact | keyword | none
-            'error_wrong_delivery_count': 0,  # 오배송 건수
-            'error_missing_count': 0,  # 누락 건수
-            'error_details': [],  # 오배송/누락 상세
-            'collect_on_delivery_fee': 0,  # 착불 택배비
-            'collect_cod_line_count': 0,  # 착불로 집계된 반품 행 수
-            'return_count': 0,  # 해당 월 반품 건수 (화주사 매칭)
-            'return_fee': 0  # 반품비 (건당 RETURN_SETTLEMENT_FEE_PER_CASE)
-        }
-        
-        # 1. 파레트 보관료 조회
         try:
-            from api.pallets.models import get_settlements
-            pallet_settlements = get_settlements(
-                company_name=filter_company_name,
-                settlement_month=settlement_year_month,
-                role=role
-            )
-            if pallet_settlements:
-                filter_normalized = normalize_company_name(filter_company_name)
-                for settlement in pallet_settlements:
-                    if normalize_company_name(settlement.get('company_name', '') or '') == filter_normalized:
-                        result['storage_fee'] = settlement.get('total_fee', 0)
-                        result['storage_fee_matched'] = True
-                        break
-        except Exception as e:
-            print(f'[경고] 파레트 보관료 조회 오류: {e}')
+            result = collect_settlement_data_sources(filter_company_name, settlement_year_month)
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': '정산년월 형식이 올바르지 않습니다. (YYYY-MM)'
+            }), 400
         
-        # 2. 특수작업 비용 조회
-        try:
-            if not filter_company_name:
-                print('[경고] 특수작업 비용 조회: 화주사명이 없어서 조회하지 않음')
-            else:
-                conn = get_db_connection()
-                if USE_POSTGRESQL:
-                    cursor = conn.cursor(cursor_factory=RealDictCursor)
-                else:
-                    cursor = conn.cursor()
-                
-                try:
-                    try:
-                        year, month = map(int, settlement_year_month.split('-'))
-                        start_date = f'{year}-{month:02d}-01'
-                        if month == 12:
-                            last_day = date(year + 1, 1, 0).day
-                        else:
-                            last_day = date(year, month + 1, 0).day
-                        end_date = f'{year}-{month:02d}-{last_day:02d}'
-                    except (ValueError, AttributeError) as e:
-                        print(f'[경고] 정산년월 파싱 오류: {settlement_year_month}, {e}')
-                        start_date = None
-                        end_date = None
-                    
-                    if start_date and end_date:
-                        if USE_POSTGRESQL:
-                            cursor.execute('''
-                                SELECT COALESCE(SUM(total_price), 0) AS total,
-                                       COUNT(*)::bigint AS work_count
-                                FROM special_works
-                                WHERE company_name = %s
-                                  AND work_date >= %s
-                                  AND work_date <= %s
-                            ''', (filter_company_name, start_date, end_date))
-                        else:
-                            cursor.execute('''
-                                SELECT COALESCE(SUM(total_price), 0) AS total,
-                                       COUNT(*) AS work_count
-                                FROM special_works
-                                WHERE company_name = ?
-                                  AND work_date >= ?
-                                  AND work_date <= ?
-                            ''', (filter_company_name, start_date, end_date))
-                        
-                        row = cursor.fetchone()
-                        exact_total = int(_cursor_row_get(row, 'total', 0) or 0)
-                        exact_count = int(_cursor_row_get(row, 'work_count', 1) or 0)
-                        
-                        if exact_count > 0:
-                            result['special_work_fee'] = exact_total
-                            result['special_works_count'] = exact_count
-                            result['special_work_match_mode'] = 'exact'
-                            print(f'[정보] 특수작업 비용(정확매칭): {filter_company_name}, {settlement_year_month}, {exact_total}원, {exact_count}건')
-                        else:
-                            try:
-                                company_keywords = get_company_search_keywords(filter_company_name)
-                                if not company_keywords:
-                                    company_keywords = [normalize_company_name(filter_company_name)]
-                            except Exception:
-                                company_keywords = [normalize_company_name(filter_company_name)]
-                            
-                            if USE_POSTGRESQL:
-                                cursor.execute('''
-                                    SELECT company_name, COALESCE(total_price, 0) AS total_price
-                                    FROM special_works
-                                    WHERE work_date >= %s AND work_date <= %s
-                                ''', (start_date, end_date))
-                            else:
-                                cursor.execute('''
-                                    SELECT company_name, COALESCE(total_price, 0) AS total_price
-                                    FROM special_works
-                                    WHERE work_date >= ? AND work_date <= ?
-                                ''', (start_date, end_date))
-                            
-                            fb_rows = cursor.fetchall()
-                            fb_total = 0
-                            fb_count = 0
-                            for sw_row in fb_rows:
-                                cn = (_cursor_row_get(sw_row, 'company_name', 0) or '')
-                                if isinstance(cn, str):
-                                    cn = cn.strip()
-                                else:
-                                    cn = str(cn or '').strip()
-                                tp = _cursor_row_get(sw_row, 'total_price', 1)
-                                if normalize_company_name(cn) not in company_keywords:
-                                    continue
-                                try:
-                                    fb_total += int(float(tp or 0))
-                                except (TypeError, ValueError):
-                                    continue
-                                fb_count += 1
-                            
-                            if fb_count > 0:
-                                result['special_work_fee'] = fb_total
-                                result['special_works_count'] = fb_count
-                                result['special_work_match_mode'] = 'keyword'
-                                print(f'[정보] 특수작업 비용(별칭·정규화 매칭): {filter_company_name}, {settlement_year_month}, {fb_total}원, {fb_count}건')
-                            else:
-                                result['special_work_match_mode'] = 'none'
-                                print(f'[정보] 특수작업 비용 없음: {filter_company_name}, {settlement_year_month}')
-                finally:
-                    cursor.close()
-                    conn.close()
-        except Exception as e:
-            print(f'[경고] 특수작업 비용 조회 오류: {e}')
-            import traceback
-            traceback.print_exc()
-            result['special_work_fee'] = 0
-            result['special_works_count'] = 0
-            result['special_work_match_mode'] = 'none'
-        # 3. 오배송/누락 차감 조회 (C/S 메뉴 - customer_service 테이블)
-        # C/S 메뉴의 해당 월 데이터와 일치시켜 조회 (월 형식: 2025년01월, 2025년1월)
-        try:
-            conn = get_db_connection()
-            if USE_POSTGRESQL:
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-            else:
-                cursor = conn.cursor()
-            
-            try:
-                # 정산년월(2025-01) → C/S 월 형식 변환 ("2025년1월", "2025년01월")
-                year, month = map(int, settlement_year_month.split('-'))
-                month_variants = list(dict.fromkeys([f'{year}년{month}월', f'{year}년{month:02d}월']))
-                
-                # 화주사명 매칭용 키워드 (대소문자·띄어쓰기 무시)
-                try:
-                    company_keywords = get_company_search_keywords(filter_company_name)
-                    if not company_keywords:
-                        company_keywords = [normalize_company_name(filter_company_name)]
-                except Exception:
-                    company_keywords = [normalize_company_name(filter_company_name)]
-                
-                # C/S 테이블에서 해당 월의 오배송/누락 조회 (월만 필터, 화주사는 Python에서 매칭)
-                if USE_POSTGRESQL:
-                    placeholders = ','.join(['%s'] * len(month_variants))
-                    cursor.execute(f'''
-                        SELECT management_number, customer_name, issue_type, company_name
-                        FROM customer_service
-                        WHERE month IN ({placeholders})
-                        AND (issue_type = '오배송' OR issue_type = '누락')
-                    ''', tuple(month_variants))
-                else:
-                    placeholders = ','.join(['?'] * len(month_variants))
-                    cursor.execute(f'''
-                        SELECT management_number, customer_name, issue_type, company_name
-                        FROM customer_service
-                        WHERE month IN ({placeholders})
-                        AND (issue_type = '오배송' OR issue_type = '누락')
-                    ''', tuple(month_variants))
-                
-                rows = cursor.fetchall()
-                # SQLite는 tuple 반환 → dict 변환
-                if USE_POSTGRESQL:
-                    row_list = [dict(r) for r in rows]
-                else:
-                    col_names = [col[0] for col in cursor.description]
-                    row_list = [dict(zip(col_names, r)) for r in rows]
-                
-                wrong_delivery_count = 0
-                missing_count = 0
-                error_details = []
-                
-                for row in row_list:
-                    cs_company = (row.get('company_name') or '').strip()
-                    cs_company_norm = normalize_company_name(cs_company)
-                    # 화주사 매칭 (대소문자·띄어쓰기 무시)
-                    if cs_company_norm not in company_keywords:
-                        continue
-                    
-                    issue_type = row.get('issue_type', '')
-                    if issue_type == '오배송':
-                        wrong_delivery_count += 1
-                    elif issue_type == '누락':
-                        missing_count += 1
-                    
-                    error_details.append({
-                        'tracking_number': row.get('management_number', '') or '',
-                        'customer_name': row.get('customer_name', '') or '',
-                        'return_type': issue_type
-                    })
-                
-                result['error_wrong_delivery_count'] = wrong_delivery_count
-                result['error_missing_count'] = missing_count
-                result['error_details'] = error_details
-            finally:
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            print(f'[경고] 오배송/누락 차감 조회 오류: {e}')
-            import traceback
-            traceback.print_exc()
+        return jsonify({
+            'success': True,
+            'data': result
+        })
+    except Exception as e:
+        print(f'[오류] 데이터 소스 조회 오류: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'message': f'데이터 소스 조회 중 오류: {str(e)}'
+        }), 500
+
+
+@settlements_bp.route('/generate-drafts', methods=['POST'])
+def generate_draft_settlements_route():
+    """
+    정산년월의 임시(대기) 정산을 활성 화주사 전체에 대해 일괄 생성/갱신 (관리자 전용)
+    
+    요청: {"settlement_year_month": "YYYY-MM", "company_names": [...](선택), "dry_run": false}
+    응답 data: created/updated/unchanged/skipped 건수와 화주사별 diff
+    """
+    try:
+        user_context = get_user_context()
+        if user_context['role'] != '관리자':
+            return jsonify({
+                'success': False,
+                'message': '관리자만 정산을 생성할 수 있습니다.'
+            }), 403
         
-        # 4. 착불 택배비 집계 (반품관리)
-        try:
-            conn = get_db_connection()
-            if USE_POSTGRESQL:
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-            else:
-                cursor = conn.cursor()
-            
-            try:
-                # 정산년월 → 월 형식. 반품 DB는 "2025년1월" 또는 "2025년01월" 둘 다 있을 수 있음.
-                year, month = map(int, settlement_year_month.split('-'))
-                month_variants = list(dict.fromkeys([f'{year}년{month}월', f'{year}년{month:02d}월']))
-                
-                if USE_POSTGRESQL:
-                    placeholders = ','.join(['%s'] * len(month_variants))
-                    cursor.execute(f'''
-                        SELECT shipping_fee
-                        FROM returns
-                        WHERE company_name = %s 
-                        AND month IN ({placeholders})
-                        AND shipping_fee IS NOT NULL
-                        AND shipping_fee != ''
-                    ''', (filter_company_name, *month_variants))
-                else:
-                    placeholders = ','.join(['?'] * len(month_variants))
-                    cursor.execute(f'''
-                        SELECT shipping_fee
-                        FROM returns
-                        WHERE company_name = ? 
-                        AND month IN ({placeholders})
-                        AND shipping_fee IS NOT NULL
-                        AND shipping_fee != ''
-                    ''', (filter_company_name, *month_variants))
-                
-                rows = cursor.fetchall()
-                total_collect_fee = 0
-                cod_line_count = 0
-                
-                for row in rows:
-                    shipping_fee = row.get('shipping_fee', '') if isinstance(row, dict) else row[0]
-                    if not shipping_fee:
-                        continue
-                    shipping_fee_str = str(shipping_fee).strip()
-                    # "착불"로 시작하는 경우만 처리
-                    if shipping_fee_str.startswith('착불'):
-                        # "착불 5000" 형식에서 금액 추출
-                        import re
-                        match = re.match(r'착불\s*([\d,]+)', shipping_fee_str)
-                        if match:
-                            amount_str = match.group(1).replace(',', '')
-                            try:
-                                amount = int(amount_str)
-                                total_collect_fee += amount
-                                cod_line_count += 1
-                            except ValueError:
-                                pass
-                
-                result['collect_on_delivery_fee'] = total_collect_fee
-                result['collect_cod_line_count'] = cod_line_count
-                print(f'[정보] 착불 택배비 집계: {filter_company_name}, {settlement_year_month}, {total_collect_fee}원')
-            finally:
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            print(f'[경고] 착불 택배비 집계 오류: {e}')
-            import traceback
-            traceback.print_exc()
-            # 에러가 발생해도 기본값 0으로 계속 진행
-            result['collect_on_delivery_fee'] = 0
+        data = request.get_json() or {}
+        settlement_year_month = (data.get('settlement_year_month') or '').strip()
+        if not settlement_year_month:
+            return jsonify({
+                'success': False,
+                'message': '정산년월이 필요합니다.'
+            }), 400
+        company_names = data.get('company_names')
+        if company_names is not None and not isinstance(company_names, list):
+            return jsonify({
+                'success': False,
+                'message': 'company_names 는 배열이어야 합니다.'
+            }), 400
+        if company_names and any(n is not None and not isinstance(n, str) for n in company_names):
+            return jsonify({
+                'success': False,
+                'message': 'company_names 에는 화주사명(문자열)만 넣을 수 있습니다.'
+            }), 400
+        
+        # "false"/"0" 문자열도 들어오므로 bool() 대신 값으로 판별
+        dry_run = str(data.get('dry_run', '')).strip().lower() in ('1', 'true', 'yes')
         
-        # 5. 반품 비용 (반품관리 — 해당 정산월 반품 건수 × 건당 단가)
         try:
-            conn = get_db_connection()
-            if USE_POSTGRESQL:
-                cursor = conn.cursor(cursor_factory=RealDictCursor)
-            else:
-                cursor = conn.cursor()
-            try:
-                year, month = map(int, settlement_year_month.split('-'))
-                month_variants = list(dict.fromkeys([f'{year}년{month}월', f'{year}년{month:02d}월']))
-                try:
-                    company_keywords = get_company_search_keywords(filter_company_name)
-                    if not company_keywords:
-                        company_keywords = [normalize_company_name(filter_company_name)]
-                except Exception:
-                    company_keywords = [normalize_company_name(filter_company_name)]
-                if USE_POSTGRESQL:
-                    placeholders = ','.join(['%s'] * len(month_variants))
-                    cursor.execute(f'''
-                        SELECT company_name FROM returns
-                        WHERE month IN ({placeholders})
-                    ''', tuple(month_variants))
-                else:
-                    placeholders = ','.join(['?'] * len(month_variants))
-                    cursor.execute(f'''
-                        SELECT company_name FROM returns
-                        WHERE month IN ({placeholders})
-                    ''', tuple(month_variants))
-                rows = cursor.fetchall()
-                return_count = 0
-                for row in rows:
-                    if isinstance(row, dict):
-                        cn = (row.get('company_name') or '').strip()
-                    else:
-                        cn = (row[0] or '').strip() if row else ''
-                    if normalize_company_name(cn) in company_keywords:
-                        return_count += 1
-                result['return_count'] = return_count
-                result['return_fee'] = return_count * RETURN_SETTLEMENT_FEE_PER_CASE
-                print(f'[정보] 반품비 집계: {filter_company_name}, {settlement_year_month}, {return_count}건 → {result["return_fee"]}원')
-            finally:
-                cursor.close()
-                conn.close()
-        except Exception as e:
-            print(f'[경고] 반품비 집계 오류: {e}')
-            import traceback
-            traceback.print_exc()
-            result['return_count'] = 0
-            result['return_fee'] = 0
+            result = generate_draft_settlements(
+                settlement_year_month,
+                company_names=company_names,
+                dry_run=dry_run,
+            )
+        except ValueError:
+            return jsonify({
+                'success': False,
+                'message': '정산년월 형식이 올바르지 않습니다. (YYYY-MM)'
+            }), 400
         
+        verb = '미리보기' if result['dry_run'] else '완료'
         return jsonify({
             'success': True,
+            'message': (f"임시 정산 일괄 생성 {verb}: 생성 {result['created']}건, "
+                        f"갱신 {result['updated']}건, 변경없음 {result['unchanged']}건, "
+                        f"제외 {result['skipped']}건"),
             'data': result
         })
     except Exception as e:
-        print(f'[오류] 데이터 소스 조회 오류: {e}')
+        print(f'[오류] 임시 정산 일괄 생성 오류: {e}')
         import traceback
         traceback.print_exc()
         return jsonify({
             'success': False,
-            'message': f'데이터 소스 조회 중 오류: {str(e)}'
+            'message': f'임시 정산 일괄 생성 중 오류: {str(e)}'
         }), 500
 
 
@@ -1062,7 +819,6 @@ def upload_settlement_file():
             
             # Base64 디코딩
             try:
-                from api.uploads.oauth_drive import upload_settlement_excel_to_drive
                 import base64 as base64_lib
                 
                 # Base64 데이터에서 실제 데이터 추출
@@ -1137,6 +893,7 @@ def upload_settlement_file():
             
             # 파일 정보 DB 저장
             conn = get_db_connection()
+            ensure_settlement_file_count_column(conn)
             cursor = conn.cursor()
             
             try:
@@ -1160,6 +917,7 @@ def upload_settlement_file():
                         VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                     ''', (settlement_id, file_type, file_name, file_url, file_size))
                     file_id = cursor.lastrowid
+                refresh_settlement_file_count(cursor, settlement_id)
                 
                 # 정산 테이블에 파일 URL 업데이트 (file_type에 따라)
                 if file_type == 'work_fee':
@@ -1278,31 +1036,33 @@ def upload_settlement_file_start():
             cursor.close()
             conn.close()
         
-        # 업로드 세션 생성 (테스트 파일과 동일한 방식)
-        upload_id = str(uuid.uuid4())
-        
-        # 세션 저장 (임시로 전역 변수 사용, 실제로는 DB나 Redis 사용)
-        if not hasattr(upload_settlement_file_start, 'upload_sessions'):
-            upload_settlement_file_start.upload_sessions = {}
-        
-        upload_settlement_file_start.upload_sessions[upload_id] = {
-            'settlement_id': settlement_id,
-            'file_type': file_type,
-            'filename': filename,
-            'file_size': file_size,
-            'total_chunks': total_chunks,
-            'company_name': company_name,
-            'settlement_year_month': settlement_year_month,
-            'chunks': {},
-            'created_at': datetime.now()
-        }
+        # 업로드 세션 생성 (메타데이터·청크 모두 DB - 어느 인스턴스가 받아도 이어짐)
+        ok, message, session = create_upload_session(
+            SETTLEMENT_UPLOAD_PURPOSE,
+            filename,
+            total_chunks,
+            declared_size=file_size,
+            context={
+                'settlement_id': settlement_id,
+                'file_type': file_type,
+                'company_name': company_name,
+                'settlement_year_month': settlement_year_month,
+            },
+        )
+        if not ok:
+            return jsonify({
+                'success': False,
+                'message': message
+            }), 400
+        upload_id = session['upload_id']
         
         print(f"[정보] 정산 파일 업로드 세션 시작: {upload_id}, 파일: {filename}, 크기: {file_size} bytes, 청크: {total_chunks}")
         
         return jsonify({
             'success': True,
             'upload_id': upload_id,
-            'message': '업로드 세션이 생성되었습니다.'
+            'message': message,
+            **upload_session_progress(session)
         })
         
     except Exception as e:
@@ -1317,13 +1077,18 @@ def upload_settlement_file_start():
 
 @settlements_bp.route('/upload-file-chunk', methods=['POST'])
 def upload_settlement_file_chunk():
-    """정산 파일 청크 업로드 API (테스트 파일과 동일한 방식)"""
+    """
+    정산 파일 청크 업로드 API
+    
+    청크는 도착 즉시 디코딩해 DB(upload_session_chunks.data)에 저장하며, 같은 청크를 다시 보내면 덮어쓴다.
+    (여러 인스턴스가 같은 세션의 청크를 받아도 완료 요청에서 모두 조립할 수 있다)
+    응답의 received_chunks / missing_chunks 로 끊긴 업로드를 이어서 보낼 수 있다.
+    """
     try:
         data = request.get_json()
         upload_id = data.get('upload_id')
         chunk_index = data.get('chunk_index')
         chunk_data = data.get('chunk_data')
-        is_last_chunk = data.get('is_last_chunk', False)
         
         if not upload_id or chunk_index is None or not chunk_data:
             return jsonify({
@@ -1332,27 +1097,26 @@ def upload_settlement_file_chunk():
             }), 400
         
         # 세션 확인
-        if not hasattr(upload_settlement_file_start, 'upload_sessions'):
-            return jsonify({
-                'success': False,
-                'message': '업로드 세션을 찾을 수 없습니다.'
-            }), 404
-        
-        session = upload_settlement_file_start.upload_sessions.get(upload_id)
+        session = get_upload_session(upload_id, SETTLEMENT_UPLOAD_PURPOSE)
         if not session:
             return jsonify({
                 'success': False,
                 'message': '업로드 세션이 만료되었거나 존재하지 않습니다.'
             }), 404
         
-        # 청크 저장
-        session['chunks'][chunk_index] = chunk_data
+        ok, message, progress = store_upload_chunk(session, chunk_index, chunk_data)
+        if not ok:
+            return jsonify({
+                'success': False,
+                'message': message
+            }), 400
         
-        print(f"[정보] 정산 파일 청크 수신: {upload_id}, 청크 {chunk_index + 1}/{session['total_chunks']}")
+        print(f"[정보] 정산 파일 청크 수신: {upload_id}, 청크 {int(chunk_index) + 1}/{session['total_chunks']}")
         
         return jsonify({
             'success': True,
-            'message': f'청크 {chunk_index + 1} 수신 완료'
+            'message': message,
+            **progress
         })
         
     except Exception as e:
@@ -1365,6 +1129,22 @@ def upload_settlement_file_chunk():
         }), 500
 
 
+@settlements_bp.route('/upload-file-status', methods=['GET'])
+def upload_settlement_file_status():
+    """정산 파일 청크 업로드 진행 상황 (재개용: 받은 청크 / 빠진 청크)"""
+    upload_id = request.args.get('upload_id', '').strip()
+    session = get_upload_session(upload_id, SETTLEMENT_UPLOAD_PURPOSE)
+    if not session:
+        return jsonify({
+            'success': False,
+            'message': '업로드 세션이 만료되었거나 존재하지 않습니다.'
+        }), 404
+    return jsonify({
+        'success': True,
+        **upload_session_progress(session)
+    })
+
+
 @settlements_bp.route('/upload-file-complete', methods=['POST'])
 def upload_settlement_file_complete():
     """정산 파일 청크 업로드 완료 API (테스트 파일과 동일한 방식)"""
@@ -1389,13 +1169,7 @@ def upload_settlement_file_complete():
             }), 400
         
         # 세션 확인
-        if not hasattr(upload_settlement_file_start, 'upload_sessions'):
-            return jsonify({
-                'success': False,
-                'message': '업로드 세션을 찾을 수 없습니다.'
-            }), 404
-        
-        session = upload_settlement_file_start.upload_sessions.get(upload_id)
+        session = get_upload_session(upload_id, SETTLEMENT_UPLOAD_PURPOSE)
         if not session:
             return jsonify({
                 'success': False,
@@ -1403,51 +1177,44 @@ def upload_settlement_file_complete():
             }), 404
         
         # 모든 청크 확인
-        total_chunks = session['total_chunks']
-        chunks = session['chunks']
-        
-        if len(chunks) != total_chunks:
+        if session['missing_chunks']:
             return jsonify({
                 'success': False,
-                'message': f'모든 청크를 받지 못했습니다. ({len(chunks)}/{total_chunks})'
+                'message': f"모든 청크를 받지 못했습니다. ({len(session['received_chunks'])}/{session['total_chunks']})",
+                **upload_session_progress(session)
             }), 400
         
-        # 청크 조립
-        print(f"[정보] 정산 파일 청크 조립 시작: {upload_id}, 총 {total_chunks}개 청크")
-        chunks_list = [chunks[i] for i in range(total_chunks)]
-        base64_data = ''.join(chunks_list)
-        
-        # Base64 디코딩
-        file_data = base64_lib.b64decode(base64_data)
-        
-        print(f"[정보] 정산 파일 조립 완료: {len(file_data)} bytes")
-        
-        # Google Drive에 업로드
+        # Google Drive에 업로드 (DB 청크를 임시 파일로 조립해 스트리밍)
         try:
             from api.uploads.oauth_drive import upload_settlement_excel_to_drive
             
-            settlement_id = session['settlement_id']
-            file_type = session['file_type']
+            context = session['context']
+            settlement_id = context['settlement_id']
+            file_type = context['file_type']
             filename = session['filename']
-            company_name = session['company_name']
-            settlement_year_month = session['settlement_year_month']
-            
-            result = upload_settlement_excel_to_drive(
-                file_data=file_data,
-                filename=filename,
-                company_name=company_name,
-                settlement_year_month=settlement_year_month
-            )
-            
-            # 세션 삭제
-            del upload_settlement_file_start.upload_sessions[upload_id]
+            company_name = context['company_name']
+            settlement_year_month = context['settlement_year_month']
+            
+            print(f"[정보] 정산 파일 청크 조립 시작: {upload_id}, 총 {session['total_chunks']}개 청크")
+            with assembled_upload_file(session) as (file_obj, file_size):
+                print(f"[정보] 정산 파일 조립 완료: {file_size} bytes")
+                result = upload_settlement_excel_to_drive(
+                    file_data=file_obj,
+                    filename=filename,
+                    company_name=company_name,
+                    settlement_year_month=settlement_year_month
+                )
             
             if not result.get('success'):
+                # 세션은 남겨 두어 완료 요청만 다시 보낼 수 있게 함 (만료 시 자동 정리)
                 return jsonify({
                     'success': False,
                     'message': result.get('message', '파일 업로드 실패')
                 }), 500
             
+            # 세션 삭제
+            delete_upload_session(upload_id)
+            
             file_url = result.get('web_view_link', result.get('file_url', ''))
             
             if not file_url:
@@ -1458,11 +1225,10 @@ def upload_settlement_file_complete():
             
             # 파일 정보 DB 저장
             conn = get_db_connection()
+            ensure_settlement_file_count_column(conn)
             cursor = conn.cursor()
             
             try:
-                file_size = len(file_data)
-                
                 if USE_POSTGRESQL:
                     cursor.execute('''
                         INSERT INTO settlement_files (
@@ -1480,6 +1246,7 @@ def upload_settlement_file_complete():
                         VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
                     ''', (settlement_id, file_type, filename, file_url, file_size))
                     file_id = cursor.lastrowid
+                refresh_settlement_file_count(cursor, settlement_id)
                 
                 # 정산 테이블에 파일 URL 업데이트 (file_type에 따라)
                 if file_type == 'work_fee':
@@ -1570,6 +1337,7 @@ def delete_settlement_file(settlement_id):
             }), 400
         
         conn = get_db_connection()
+        ensure_settlement_file_count_column(conn)
         cursor = conn.cursor()
         
         try:
@@ -1595,6 +1363,7 @@ def delete_settlement_file(settlement_id):
                 cursor.execute('DELETE FROM settlement_files WHERE settlement_id = %s AND file_type = %s', (settlement_id, file_type))
             else:
                 cursor.execute('DELETE FROM settlement_files WHERE settlement_id = ? AND file_type = ?', (settlement_id, file_type))
+            refresh_settlement_file_count(cursor, settlement_id)
             
             conn.commit()
             
@@ -1688,7 +1457,15 @@ def delete_tax_invoice(settlement_id):
 
 @settlements_bp.route('/bulk-update-status', methods=['POST'])
 def bulk_update_settlement_status():
-    """정산년월별 일괄 상태 변경"""
+    """
+    정산 상태 일괄 변경 (대기 → 전달 → 정산확인 → 입금완료, 한 단계씩)
+    
+    대상 지정 (둘 중 하나):
+        - Query: ?settlement_year_month=YYYY-MM&status=전달 (해당 월 전체)
+        - Body: {"status": "입금완료", "settlement_ids": [1, 2, ...]}
+    
+    직전 단계가 아닌 정산은 변경하지 않고 rejected 로 돌려준다.
+    """
     try:
         user_context = get_user_context()
         role = user_context['role']
@@ -1700,57 +1477,50 @@ def bulk_update_settlement_status():
                 'message': '관리자만 일괄 상태 변경이 가능합니다.'
             }), 403
         
-        settlement_year_month = request.args.get('settlement_year_month', '').strip()
-        status = request.args.get('status', '').strip()
+        data = request.get_json(silent=True) or {}
+        settlement_year_month = (request.args.get('settlement_year_month') or data.get('settlement_year_month') or '').strip()
+        status = (request.args.get('status') or data.get('status') or '').strip()
+        settlement_ids = data.get('settlement_ids')
         
-        if not settlement_year_month or not status:
+        if not status or (not settlement_year_month and settlement_ids is None):
             return jsonify({
                 'success': False,
-                'message': '정산년월과 상태는 필수입니다.'
+                'message': '상태와 정산년월(또는 정산 ID 목록)은 필수입니다.'
+            }), 400
+        if settlement_ids is not None and not isinstance(settlement_ids, list):
+            return jsonify({
+                'success': False,
+                'message': 'settlement_ids는 배열이어야 합니다.'
             }), 400
         
-        conn = get_db_connection()
-        cursor = conn.cursor()
-        
+        from api.settlements.status_transitions import transition_settlement_statuses
         try:
-            # 해당 정산년월의 모든 정산 상태 변경
-            # 단, 이미 '정산확인' 이상 상태인 정산은 변경하지 않음 (화주사가 확인한 정산 보호)
-            if USE_POSTGRESQL:
-                cursor.execute('''
-                    UPDATE settlements 
-                    SET status = %s, updated_at = CURRENT_TIMESTAMP
-                    WHERE settlement_year_month = %s
-                    AND status NOT IN ('정산확인', '입금완료')
-                ''', (status, settlement_year_month))
-            else:
-                cursor.execute('''
-                    UPDATE settlements 
-                    SET status = ?, updated_at = CURRENT_TIMESTAMP
-                    WHERE settlement_year_month = ?
-                    AND status NOT IN ('정산확인', '입금완료')
-                ''', (status, settlement_year_month))
-            
-            updated_count = cursor.rowcount
-            conn.commit()
-            print(f'[일괄상태변경] 정산년월={settlement_year_month}, 상태={status}, 변경된개수={updated_count}')
-            
-            return jsonify({
-                'success': True,
-                'message': f'{updated_count}개의 정산이 {status} 상태로 변경되었습니다.',
-                'updated_count': updated_count
-            })
-        except Exception as e:
-            conn.rollback() if USE_POSTGRESQL else None
-            print(f'[오류] 일괄 상태 변경 오류: {e}')
-            import traceback
-            traceback.print_exc()
+            result = transition_settlement_statuses(
+                status,
+                settlement_ids=settlement_ids,
+                settlement_year_month=None if settlement_ids is not None else settlement_year_month,
+                changed_by=user_context['username'] or role
+            )
+        except ValueError as e:
             return jsonify({
                 'success': False,
-                'message': f'일괄 상태 변경 중 오류: {str(e)}'
-            }), 500
-        finally:
-            cursor.close()
-            conn.close()
+                'message': str(e)
+            }), 400
+        
+        updated_count = result['updated_count']
+        print(
+            f"[일괄상태변경] 정산년월={settlement_year_month or '-'}, 상태={status}, 변경된개수={updated_count}, "
+            f"유지={len(result['unchanged_ids'])}, 거부={len(result['rejected'])}"
+        )
+        
+        message = f'{updated_count}개의 정산이 {status} 상태로 변경되었습니다.'
+        if result['rejected']:
+            message += f" ({len(result['rejected'])}개는 현재 상태에서 변경할 수 없어 제외)"
+        return jsonify({
+            'success': True,
+            'message': message,
+            **result
+        })
     except Exception as e:
         print(f'[오류] 일괄 상태 변경 오류: {e}')
         import traceback
@@ -1921,6 +1691,7 @@ def update_settlement_status(settlement_id):
             }), 400
         
         # 정산 정보 조회
+        ensure_sales_analytics_cube_table()
         conn = get_db_connection()
         if USE_POSTGRESQL:
             cursor = conn.cursor(cursor_factory=RealDictCursor)
@@ -1983,12 +1754,15 @@ def update_settlement_status(settlement_id):
                     }), 403
             
             # 상태 업데이트
+            cube_before = settlement_cube_rows(cursor, [settlement_id], lock=True)
             if USE_POSTGRESQL:
                 cursor.execute('UPDATE settlements SET status = %s, updated_at = CURRENT_TIMESTAMP WHERE id = %s', (new_status, settlement_id))
             else:
                 cursor.execute('UPDATE settlements SET status = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ?', (new_status, settlement_id))
             
             updated_rows = cursor.rowcount
+            # 매출 통계 큐브 반영
+            apply_settlement_cube_diff(cursor, cube_before, settlement_cube_rows(cursor, [settlement_id]))
             print(f'[정산상태변경] UPDATE 실행, rowcount={updated_rows}, settlement_id={settlement_id}, new_status={new_status}')
             
             conn.commit()
@@ -2029,6 +1803,100 @@ def update_settlement_status(settlement_id):
 
 # ========== 명세서 생성 ==========
 
+@settlements_bp.route('/statements/zip', methods=['GET'])
+def download_settlement_statements_zip():
+    """
+    정산년월의 정산 명세서 일괄 다운로드 (ZIP, 관리자 전용)
+    
+    Query:
+        settlement_year_month: YYYY-MM (필수)
+        status: 정산 상태 필터 (선택)
+    
+    명세서는 워커 프로세스에서 병렬 생성하며, 생성 통계는 X-Statement-* 응답 헤더로 내려준다.
+    """
+    try:
+        user_context = get_user_context()
+        if user_context['role'] != '관리자':
+            return jsonify({
+                'success': False,
+                'message': '관리자만 명세서를 일괄 다운로드할 수 있습니다.'
+            }), 403
+        
+        settlement_year_month = request.args.get('settlement_year_month', '').strip()
+        status = request.args.get('status', '').strip()
+        if not settlement_year_month:
+            return jsonify({
+                'success': False,
+                'message': '정산년월이 필요합니다.'
+            }), 400
+        
+        sym = '%s' if USE_POSTGRESQL else '?'
+        where = [f'settlement_year_month = {sym}']
+        params = [settlement_year_month]
+        if status:
+            where.append(f'status = {sym}')
+            params.append(status)
+        
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            cursor.execute(
+                f"SELECT * FROM settlements WHERE {' AND '.join(where)} ORDER BY company_name",
+                params
+            )
+            columns = [desc[0] for desc in cursor.description]
+            settlements = [dict(zip(columns, tuple(row))) for row in cursor.fetchall()]
+        finally:
+            cursor.close()
+            conn.close()
+        
+        if not settlements:
+            return jsonify({
+                'success': False,
+                'message': '해당 정산년월의 정산이 없습니다.'
+            }), 404
+        
+        # 워커 프로세스로 넘길 수 있도록 날짜는 문자열로 변환
+        for settlement in settlements:
+            for key, value in settlement.items():
+                if isinstance(value, datetime):
+                    settlement[key] = value.strftime('%Y-%m-%d %H:%M:%S')
+                elif isinstance(value, date):
+                    settlement[key] = value.strftime('%Y-%m-%d')
+        
+        from api.settlements.statement_generator import render_statements_zip
+        zip_file, stats = render_statements_zip(settlements)
+        print(
+            f"[정보] 명세서 일괄 생성: {settlement_year_month} {stats['count']}건, "
+            f"{stats['mode']}({stats['workers']}), 전체 {stats['wall_ms']}ms, "
+            f"평균 {stats['avg_ms']}ms, 최대 {stats['max_ms']}ms, 최대 메모리 {stats['peak_rss_kb']}KB"
+        )
+        
+        from urllib.parse import quote
+        encoded_filename = quote(f"정산명세서_{settlement_year_month.replace('-', '')}.zip")
+        return Response(
+            zip_file.getvalue(),
+            mimetype='application/zip',
+            headers={
+                'Content-Disposition': f"attachment; filename*=UTF-8''{encoded_filename}",
+                'X-Statement-Count': str(stats['count']),
+                'X-Statement-Render-Mode': f"{stats['mode']}:{stats['workers']}",
+                'X-Statement-Wall-Ms': str(stats['wall_ms']),
+                'X-Statement-Avg-Ms': str(stats['avg_ms']),
+                'X-Statement-Max-Ms': str(stats['max_ms']),
+                'X-Statement-Peak-Rss-Kb': str(stats['peak_rss_kb'] or ''),
+            }
+        )
+    except Exception as e:
+        print(f'[오류] 명세서 일괄 생성 오류: {e}')
+        import traceback
+        traceback.print_exc()
+        return jsonify({
+            'success': False,
+            'message': f'명세서 일괄 생성 중 오류: {str(e)}'
+        }), 500
+
+
 @settlements_bp.route('/<int:settlement_id>/statement', methods=['GET'])
 def generate_settlement_statement(settlement_id):
     """정산 명세서 생성 (엑셀)"""
@@ -2075,13 +1943,9 @@ def generate_settlement_statement(settlement_id):
                     settlement[key] = value.strftime('%Y-%m-%d') if value else None
             
             # 명세서 생성
-            from api.settlements.statement_generator import create_settlement_statement
+            from api.settlements.statement_generator import create_settlement_statement, statement_filename
             excel_file = create_settlement_statement(settlement)
-            
-            # 파일명 생성
-            year_month = settlement.get('settlement_year_month', '').replace('-', '')
-            company = settlement.get('company_name', '정산')
-            filename = f'정산명세서_{company}_{year_month}.xlsx'
+            filename = statement_filename(settlement)
             
             return Response(
                 excel_file.read(),
@@ -0,0 +1,186 @@
+"""
+정산 상태 일괄 전이
+
+상태 흐름: 대기 → 전달 → 정산확인 → 입금완료 (한 단계씩만 진행)
+
+허용 여부는 SQL 조건(현재 상태 = 직전 단계)으로 판단하고, 대상 행 갱신과 이력(settlement_status_logs)
+기록을 한 번에 처리한다. PostgreSQL 은 CTE 한 문장(조회·UPDATE ... RETURNING·다중 행 INSERT)으로
+왕복 1회, SQLite 는 같은 트랜잭션 안의 세 문장으로 처리한다.
+"""
+from typing import Any, Dict, List, Optional
+
+from api.database.models import (
+    get_db_connection,
+    USE_POSTGRESQL,
+    ensure_settlement_status_logs_table,
+)
+from api.sales_settlement.analytics_cube import ensure_sales_analytics_cube_table, apply_settlement_cube_diff
+
+SETTLEMENT_STATUS_FLOW = ('대기', '전달', '정산확인', '입금완료')
+# 목표 상태 → 허용되는 현재 상태
+_PREVIOUS_STATUS = {
+    to_status: SETTLEMENT_STATUS_FLOW[i]
+    for i, to_status in enumerate(SETTLEMENT_STATUS_FLOW[1:])
+}
+# 빈 상태는 대기로 취급
+_CURRENT_STATUS_SQL = "COALESCE(NULLIF(TRIM({col}), ''), '대기')"
+
+
+def _classify(rows, target_status: str, updated_ids: set) -> Dict[str, Any]:
+    """(id, 현재 상태) 목록을 변경/유지/거부로 분류"""
+    previous = _PREVIOUS_STATUS[target_status]
+    result = {'updated_ids': [], 'unchanged_ids': [], 'rejected': []}
+    for settlement_id, current in rows:
+        if settlement_id in updated_ids:
+            result['updated_ids'].append(settlement_id)
+        elif current == target_status:
+            result['unchanged_ids'].append(settlement_id)
+        else:
+            result['rejected'].append({
+                'id': settlement_id,
+                'status': current,
+                'reason': f"'{previous}' 상태에서만 '{target_status}'(으)로 변경할 수 있습니다.",
+            })
+    return result
+
+
+def transition_settlement_statuses(target_status: str,
+                                   settlement_ids: Optional[List[int]] = None,
+                                   settlement_year_month: Optional[str] = None,
+                                   changed_by: str = '') -> Dict[str, Any]:
+    """
+    정산 상태 일괄 전이
+
+    Args:
+        target_status: 목표 상태 (전달 / 정산확인 / 입금완료)
+        settlement_ids: 대상 정산 ID 목록
+        settlement_year_month: 대상 정산년월 (ID 목록 대신 해당 월 전체)
+        changed_by: 변경자 (이력 기록용)
+
+    Returns:
+        {
+            'target_status', 'updated_count',
+            'updated_ids': [...], 'unchanged_ids': [...] (이미 목표 상태),
+            'rejected': [{'id', 'status', 'reason'}], 'not_found_ids': [...]
+        }
+
+    Raises:
+        ValueError: 목표 상태가 올바르지 않거나 대상이 지정되지 않았을 때
+    """
+    if target_status not in _PREVIOUS_STATUS:
+        raise ValueError(f"변경할 수 있는 상태: {', '.join(_PREVIOUS_STATUS)}")
+    if settlement_ids is None and not settlement_year_month:
+        raise ValueError('정산 ID 목록 또는 정산년월이 필요합니다.')
+
+    ids = []
+    if settlement_ids is not None:
+        try:
+            ids = list(dict.fromkeys(int(i) for i in settlement_ids))
+        except (TypeError, ValueError):
+            raise ValueError('정산 ID는 정수여야 합니다.')
+
+    empty = {
+        'target_status': target_status,
+        'updated_count': 0,
+        'updated_ids': [],
+        'unchanged_ids': [],
+        'rejected': [],
+        'not_found_ids': [],
+    }
+    if settlement_ids is not None and not ids:
+        return empty
+
+    previous = _PREVIOUS_STATUS[target_status]
+    ensure_sales_analytics_cube_table()
+    conn = get_db_connection()
+    ensure_settlement_status_logs_table(conn)
+    cursor = conn.cursor()
+    try:
+        if USE_POSTGRESQL:
+            if settlement_ids is not None:
+                scope_sql, scope_params = 'id = ANY(%s)', [ids]
+            else:
+                scope_sql, scope_params = 'settlement_year_month = %s', [settlement_year_month]
+            cursor.execute(
+                f'''
+                WITH req AS (
+                    SELECT id, {_CURRENT_STATUS_SQL.format(col='status')} AS current_status,
+                           settlement_year_month, company_name, total_amount
+                    FROM settlements
+                    WHERE {scope_sql}
+                    FOR UPDATE
+                ),
+                upd AS (
+                    UPDATE settlements s
+                    SET status = %s, updated_at = CURRENT_TIMESTAMP
+                    FROM req
+                    WHERE s.id = req.id
+                      AND {_CURRENT_STATUS_SQL.format(col='s.status')} = %s
+                    RETURNING s.id
+                ),
+                logged AS (
+                    INSERT INTO settlement_status_logs (settlement_id, from_status, to_status, changed_by)
+                    SELECT id, %s, %s, %s FROM upd
+                )
+                SELECT req.id, req.current_status, (upd.id IS NOT NULL) AS updated,
+                       req.settlement_year_month, req.company_name, req.total_amount
+                FROM req LEFT JOIN upd ON upd.id = req.id
+                ORDER BY req.id
+                ''',
+                scope_params + [target_status, previous, previous, target_status, changed_by or None],
+            )
+            fetched = cursor.fetchall()
+            rows = [(r[0], r[1]) for r in fetched]
+            updated_ids = {r[0] for r in fetched if r[2]}
+            moved = [(r[3], r[4], r[5]) for r in fetched if r[2]]
+        else:
+            if settlement_ids is not None:
+                scope_sql = f"id IN ({', '.join(['?'] * len(ids))})"
+                scope_params = ids
+            else:
+                scope_sql, scope_params = 'settlement_year_month = ?', [settlement_year_month]
+            eligible_sql = f"{scope_sql} AND {_CURRENT_STATUS_SQL.format(col='status')} = ?"
+            cursor.execute(
+                f"SELECT id, {_CURRENT_STATUS_SQL.format(col='status')}, "
+                f"settlement_year_month, company_name, total_amount FROM settlements "
+                f"WHERE {scope_sql} ORDER BY id",
+                scope_params,
+            )
+            fetched = cursor.fetchall()
+            rows = [(r[0], r[1]) for r in fetched]
+            moved = [(r[2], r[3], r[4]) for r in fetched if r[1] == previous]
+            cursor.execute(
+                f'''INSERT INTO settlement_status_logs (settlement_id, from_status, to_status, changed_by)
+                    SELECT id, ?, ?, ? FROM settlements WHERE {eligible_sql}''',
+                [previous, target_status, changed_by or None] + scope_params + [previous],
+            )
+            cursor.execute(
+                f'''UPDATE settlements SET status = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE {eligible_sql}''',
+                [target_status] + scope_params + [previous],
+            )
+            updated_ids = {sid for sid, current in rows if current == previous}
+        # 매출 통계 큐브 반영 (상태만 바뀌므로 직전 상태 → 목표 상태로 이동)
+        apply_settlement_cube_diff(
+            cursor,
+            [(ym, name, previous, amount) for ym, name, amount in moved],
+            [(ym, name, target_status, amount) for ym, name, amount in moved],
+        )
+        conn.commit()
+    except Exception:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+    result = dict(empty)
+    result.update(_classify(rows, target_status, updated_ids))
+    result['updated_count'] = len(result['updated_ids'])
+    if settlement_ids is not None:
+        found = {sid for sid, _ in rows}
+        result['not_found_ids'] = [i for i in ids if i not in found]
+    return result
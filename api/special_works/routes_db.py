@@ -4,7 +4,9 @@
 from flask import Blueprint, request, jsonify
 from api.database.models import (
     get_db_connection,
-    USE_POSTGRESQL
+    USE_POSTGRESQL,
+    LookupCache,
+    lookup_json_response
 )
 from datetime import datetime, date
 from urllib.parse import unquote
@@ -40,40 +42,48 @@ def get_user_context():
 
 # ========== 작업 종류 관련 API ==========
 
+def _load_special_work_types() -> list:
+    """작업 종류 목록 DB 조회 (SPECIAL_WORK_TYPES_LOOKUP 로더)"""
+    conn = get_db_connection()
+    if USE_POSTGRESQL:
+        cursor = conn.cursor(cursor_factory=RealDictCursor)
+    else:
+        cursor = conn.cursor()
+    
+    try:
+        cursor.execute('''
+            SELECT id, name, default_unit_price, display_order, created_at, updated_at
+            FROM special_work_types
+            ORDER BY display_order, name
+        ''')
+        rows = cursor.fetchall()
+        # SQLite Row 객체는 dict()로 변환 가능, PostgreSQL RealDictCursor는 이미 dict
+        result = [dict(row) for row in rows]
+        
+        # datetime 객체를 문자열로 변환
+        for item in result:
+            for key, value in item.items():
+                if isinstance(value, datetime):
+                    item[key] = value.strftime('%Y-%m-%d %H:%M:%S') if value else None
+        return result
+    finally:
+        cursor.close()
+        conn.close()
+
+
+SPECIAL_WORK_TYPES_LOOKUP = LookupCache('special_work_types', _load_special_work_types)
+
+
+def get_special_work_types() -> list:
+    """작업 종류 목록 조회 (프로세스 캐시, 생성/수정/삭제 시 무효화)"""
+    return SPECIAL_WORK_TYPES_LOOKUP.get()
+
+
 @special_works_bp.route('/types', methods=['GET'])
 def get_work_types():
-    """작업 종류 목록 조회"""
+    """작업 종류 목록 조회 (ETag - 변경이 없으면 304)"""
     try:
-        conn = get_db_connection()
-        if USE_POSTGRESQL:
-            cursor = conn.cursor(cursor_factory=RealDictCursor)
-        else:
-            cursor = conn.cursor()
-        
-        try:
-            cursor.execute('''
-                SELECT id, name, default_unit_price, display_order, created_at, updated_at
-                FROM special_work_types
-                ORDER BY display_order, name
-            ''')
-            rows = cursor.fetchall()
-            # SQLite Row 객체는 dict()로 변환 가능, PostgreSQL RealDictCursor는 이미 dict
-            result = [dict(row) for row in rows]
-            
-            # datetime 객체를 문자열로 변환
-            for item in result:
-                for key, value in item.items():
-                    if isinstance(value, datetime):
-                        item[key] = value.strftime('%Y-%m-%d %H:%M:%S') if value else None
-            
-            return jsonify({
-                'success': True,
-                'data': result,
-                'count': len(result)
-            })
-        finally:
-            cursor.close()
-            conn.close()
+        return lookup_json_response(SPECIAL_WORK_TYPES_LOOKUP)
     except Exception as e:
         print(f'[오류] 작업 종류 조회 오류: {e}')
         import traceback
@@ -126,6 +136,7 @@ def create_work_type():
                 ''', (name, default_unit_price, display_order))
                 work_type_id = cursor.lastrowid
             
+            SPECIAL_WORK_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
             return jsonify({
                 'success': True,
@@ -206,9 +217,12 @@ def update_work_type(type_id):
                     WHERE id = ?
                 ''', params)
             
+            changed = cursor.rowcount > 0
+            if changed:
+                SPECIAL_WORK_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
             
-            if cursor.rowcount > 0:
+            if changed:
                 return jsonify({
                     'success': True,
                     'message': '작업 종류가 수정되었습니다.'
@@ -274,9 +288,12 @@ def delete_work_type(type_id):
             else:
                 cursor.execute('DELETE FROM special_work_types WHERE id = ?', (type_id,))
             
+            changed = cursor.rowcount > 0
+            if changed:
+                SPECIAL_WORK_TYPES_LOOKUP.invalidate(cursor)
             conn.commit()
             
-            if cursor.rowcount > 0:
+            if changed:
                 return jsonify({
                     'success': True,
                     'message': '작업 종류가 삭제되었습니다.'
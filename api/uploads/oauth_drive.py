@@ -6,7 +6,7 @@ import os
 import json
 import base64
 from datetime import datetime
-from typing import List, Optional
+from typing import BinaryIO, List, Optional, Union
 from google.oauth2.credentials import Credentials
 from google.auth.transport.requests import Request
 from google.auth.exceptions import RefreshError
@@ -525,12 +525,19 @@ def find_folder_in_oauth(service, folder_name: str, parent_folder_id: Optional[s
         return None
 
 
-def upload_excel_to_drive(file_data: bytes, filename: str, folder_name: str = '정산파일') -> dict:
+def _as_upload_stream(file_data: Union[bytes, BinaryIO]):
+    """업로드용 스트림 (bytes 는 BytesIO 로 감싸고, 파일 객체는 그대로 사용)"""
+    if hasattr(file_data, 'read'):
+        return file_data
+    return io.BytesIO(file_data)
+
+
+def upload_excel_to_drive(file_data: Union[bytes, BinaryIO], filename: str, folder_name: str = '정산파일') -> dict:
     """
     OAuth 2.0을 사용하여 Google Drive에 엑셀 파일 업로드
     
     Args:
-        file_data: 파일 데이터 (bytes)
+        file_data: 파일 데이터 (bytes 또는 읽기 가능한 파일 객체 - 파일 객체는 메모리에 올리지 않고 그대로 전송)
         filename: 파일명
         folder_name: 대상 폴더명 (기본값: '정산파일')
     
@@ -612,7 +619,7 @@ def upload_excel_to_drive(file_data: bytes, filename: str, folder_name: str = '
             mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         
         media = MediaIoBaseUpload(
-            io.BytesIO(file_data),
+            _as_upload_stream(file_data),
             mimetype=mimetype,
             resumable=True
         )
@@ -794,7 +801,7 @@ def find_or_create_company_folder(service, parent_folder_id: str, company_name:
 
 
 def upload_settlement_excel_to_drive(
-    file_data: bytes, 
+    file_data: Union[bytes, BinaryIO], 
     filename: str, 
     company_name: str, 
     settlement_year_month: str
@@ -804,7 +811,7 @@ def upload_settlement_excel_to_drive(
     폴더 구조: 제이제이솔루션 > 정산파일 > 년도 > 월 > 화주사명
     
     Args:
-        file_data: 파일 데이터 (bytes)
+        file_data: 파일 데이터 (bytes 또는 읽기 가능한 파일 객체 - 파일 객체는 메모리에 올리지 않고 그대로 전송)
         filename: 파일명 (예: "작업비정산서.xlsx")
         company_name: 화주사명
         settlement_year_month: 정산년월 (예: "2025-01")
@@ -899,7 +906,7 @@ def upload_settlement_excel_to_drive(
             mimetype = 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'
         
         media = MediaIoBaseUpload(
-            io.BytesIO(file_data),
+            _as_upload_stream(file_data),
             mimetype=mimetype,
             resumable=True
         )
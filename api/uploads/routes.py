@@ -22,12 +22,22 @@ from api.database.models import (
     update_photo_links,
     get_available_months
 )
-from datetime import datetime
+from api.uploads.upload_sessions import (
+    create_upload_session,
+    get_upload_session,
+    store_upload_chunk,
+    assembled_upload_file,
+    delete_upload_session,
+    upload_session_progress,
+)
 import base64
 
 # Blueprint 생성
 uploads_bp = Blueprint('uploads', __name__, url_prefix='/api/uploads')
 
+# 청크 업로드 세션 용도 (api.uploads.upload_sessions)
+TEST_EXCEL_UPLOAD_PURPOSE = 'test_excel'
+
 
 @uploads_bp.route('/upload-images', methods=['POST'])
 def upload_images():
@@ -845,28 +855,24 @@ def test_upload_excel_start():
                 'message': f'Google Drive API 인증 확인 실패: {str(auth_error)}\n\n환경 변수 GOOGLE_SERVICE_ACCOUNT_JSON을 확인하거나 service_account.json 파일이 있는지 확인해주세요.'
             }), 500
         
-        # 업로드 세션 생성 (간단한 메모리 저장, 실제로는 DB나 Redis 사용 권장)
-        import uuid
-        upload_id = str(uuid.uuid4())
-        
-        # 세션 저장 (임시로 전역 변수 사용, 실제로는 DB나 Redis 사용)
-        if not hasattr(test_upload_excel_start, 'upload_sessions'):
-            test_upload_excel_start.upload_sessions = {}
-        
-        test_upload_excel_start.upload_sessions[upload_id] = {
-            'filename': filename,
-            'file_size': file_size,
-            'total_chunks': total_chunks,
-            'chunks': {},
-            'created_at': datetime.now()
-        }
+        # 업로드 세션 생성 (메타데이터·청크 모두 DB - 어느 인스턴스가 받아도 이어짐)
+        ok, message, session = create_upload_session(
+            TEST_EXCEL_UPLOAD_PURPOSE, filename, total_chunks, declared_size=file_size
+        )
+        if not ok:
+            return jsonify({
+                'success': False,
+                'message': message
+            }), 400
+        upload_id = session['upload_id']
         
         print(f"[정보] 업로드 세션 시작: {upload_id}, 파일: {filename}, 크기: {file_size} bytes, 청크: {total_chunks}")
         
         return jsonify({
             'success': True,
             'upload_id': upload_id,
-            'message': '업로드 세션이 생성되었습니다.'
+            'message': message,
+            **upload_session_progress(session)
         })
         
     except Exception as e:
@@ -884,6 +890,8 @@ def test_upload_excel_chunk():
     """
     엑셀 파일 청크 업로드 API
     
+    청크는 디코딩해 DB(upload_session_chunks.data)에 저장한다. 같은 청크를 다시 보내면 덮어쓴다.
+    
     Request Body:
         {
             "upload_id": str,
@@ -895,7 +903,9 @@ def test_upload_excel_chunk():
     Returns:
         {
             "success": bool,
-            "message": str
+            "message": str,
+            "received_chunks": [int],
+            "missing_chunks": [int]
         }
     """
     try:
@@ -903,7 +913,6 @@ def test_upload_excel_chunk():
         upload_id = data.get('upload_id')
         chunk_index = data.get('chunk_index')
         chunk_data = data.get('chunk_data')
-        is_last_chunk = data.get('is_last_chunk', False)
         
         if not upload_id or chunk_index is None or not chunk_data:
             return jsonify({
@@ -912,27 +921,27 @@ def test_upload_excel_chunk():
             }), 400
         
         # 세션 확인
-        if not hasattr(test_upload_excel_start, 'upload_sessions'):
-            return jsonify({
-                'success': False,
-                'message': '업로드 세션을 찾을 수 없습니다.'
-            }), 404
-        
-        session = test_upload_excel_start.upload_sessions.get(upload_id)
+        session = get_upload_session(upload_id, TEST_EXCEL_UPLOAD_PURPOSE)
         if not session:
             return jsonify({
                 'success': False,
                 'message': '업로드 세션이 만료되었거나 존재하지 않습니다.'
             }), 404
         
-        # 청크 저장
-        session['chunks'][chunk_index] = chunk_data
+        # 청크 저장 (디코딩 후 DB upload_session_chunks 에 기록)
+        ok, message, progress = store_upload_chunk(session, chunk_index, chunk_data)
+        if not ok:
+            return jsonify({
+                'success': False,
+                'message': message
+            }), 400
         
-        print(f"[정보] 청크 수신: {upload_id}, 청크 {chunk_index + 1}/{session['total_chunks']}")
+        print(f"[정보] 청크 수신: {upload_id}, 청크 {int(chunk_index) + 1}/{session['total_chunks']}")
         
         return jsonify({
             'success': True,
-            'message': f'청크 {chunk_index + 1} 수신 완료'
+            'message': message,
+            **progress
         })
         
     except Exception as e:
@@ -945,6 +954,22 @@ def test_upload_excel_chunk():
         }), 500
 
 
+@uploads_bp.route('/test/upload-excel-status', methods=['GET'])
+def test_upload_excel_status():
+    """엑셀 파일 청크 업로드 진행 상황 (재개용: 받은 청크 / 빠진 청크)"""
+    upload_id = request.args.get('upload_id', '').strip()
+    session = get_upload_session(upload_id, TEST_EXCEL_UPLOAD_PURPOSE)
+    if not session:
+        return jsonify({
+            'success': False,
+            'message': '업로드 세션이 만료되었거나 존재하지 않습니다.'
+        }), 404
+    return jsonify({
+        'success': True,
+        **upload_session_progress(session)
+    })
+
+
 @uploads_bp.route('/test/upload-excel-complete', methods=['POST'])
 def test_upload_excel_complete():
     """
@@ -975,13 +1000,7 @@ def test_upload_excel_complete():
             }), 400
         
         # 세션 확인
-        if not hasattr(test_upload_excel_start, 'upload_sessions'):
-            return jsonify({
-                'success': False,
-                'message': '업로드 세션을 찾을 수 없습니다.'
-            }), 404
-        
-        session = test_upload_excel_start.upload_sessions.get(upload_id)
+        session = get_upload_session(upload_id, TEST_EXCEL_UPLOAD_PURPOSE)
         if not session:
             return jsonify({
                 'success': False,
@@ -989,49 +1008,33 @@ def test_upload_excel_complete():
             }), 404
         
         # 모든 청크 확인
-        total_chunks = session['total_chunks']
-        chunks = session['chunks']
-        
-        if len(chunks) != total_chunks:
+        if session['missing_chunks']:
             return jsonify({
                 'success': False,
-                'message': f'모든 청크를 받지 못했습니다. ({len(chunks)}/{total_chunks})'
+                'message': f"모든 청크를 받지 못했습니다. ({len(session['received_chunks'])}/{session['total_chunks']})",
+                **upload_session_progress(session)
             }), 400
         
-        # 청크 조립
-        print(f"[정보] 청크 조립 시작: {upload_id}, 총 {total_chunks}개 청크")
-        chunks_list = [chunks[i] for i in range(total_chunks)]
-        base64_data = ''.join(chunks_list)
-        
-        # Base64 디코딩
-        import base64
-        file_data = base64.b64decode(base64_data)
-        
-        print(f"[정보] 파일 조립 완료: {len(file_data)} bytes")
-        
-        # 구글 드라이브에 업로드
+        # 구글 드라이브에 업로드 (DB 청크를 임시 파일로 조립해 스트리밍)
         try:
             print(f"[디버깅] 엑셀 파일 업로드 시작: {session['filename']}")
-            print(f"[디버깅] OAuth 2.0 모듈 import 시도...")
             
             # OAuth 2.0 사용 (서비스 계정 제한 우회)
             from api.uploads.oauth_drive import upload_excel_to_drive
             
-            print(f"[디버깅] OAuth 2.0 모듈 import 성공")
-            print(f"[디버깅] upload_excel_to_drive 함수 호출 시작...")
-            
-            result = upload_excel_to_drive(
-                file_data=file_data,
-                filename=session['filename'],
-                folder_name='정산파일'
-            )
+            with assembled_upload_file(session) as (file_obj, file_size):
+                print(f"[정보] 파일 조립 완료: {file_size} bytes")
+                result = upload_excel_to_drive(
+                    file_data=file_obj,
+                    filename=session['filename'],
+                    folder_name='정산파일'
+                )
             
             print(f"[디버깅] upload_excel_to_drive 함수 호출 완료: {result.get('success')}")
             
-            # 세션 삭제
-            del test_upload_excel_start.upload_sessions[upload_id]
-            
             if result.get('success'):
+                # 세션 삭제 (실패 시에는 완료 요청을 다시 보낼 수 있도록 남겨 둠)
+                delete_upload_session(upload_id)
                 return jsonify({
                     'success': True,
                     'file_id': result.get('file_id'),
@@ -0,0 +1,347 @@
+"""
+청크 업로드 세션 (정산 파일 / 테스트 엑셀 업로드 공용)
+
+- 세션 메타데이터와 청크 바이트는 모두 DB(upload_sessions, upload_session_chunks.data)에 저장해
+  어느 워커·인스턴스(서버리스 호출 포함)가 청크를 받아도 같은 세션을 이어서 처리할 수 있다.
+  (로컬 디스크는 인스턴스마다 달라 청크 보관에 쓰지 않는다)
+- 청크(base64)는 도착 즉시 디코딩해 바이너리로 저장한다. (메모리에는 청크 하나만 올라간다)
+- 완료 시 청크를 한 개씩 읽어 완료 요청을 받은 인스턴스의 임시 파일 하나로 이어 붙여
+  파일 객체 그대로 Drive 업로더에 넘기고, 세션은 삭제한다.
+- 만료(TTL)된 세션은 새 세션 생성 시 정리한다.
+
+클라이언트는 base64 문자열을 4의 배수 길이(2MB)로 잘라 보내므로 청크 단위 디코딩이 가능하다.
+"""
+import base64
+import binascii
+import json
+import os
+import re
+import tempfile
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Dict, Iterator, Optional, Tuple
+
+from api.database.models import get_db_connection, USE_POSTGRESQL
+
+# 세션 유효 시간 (마지막 청크 수신 기준으로 연장)
+UPLOAD_SESSION_TTL_SECONDS = int(os.environ.get('UPLOAD_SESSION_TTL_SECONDS', '3600'))
+# 세션당 최대 청크 수 (2MB 청크 기준 약 1GB)
+UPLOAD_SESSION_MAX_CHUNKS = 500
+# 완료 시 청크를 이어 붙일 임시 파일 위치 (Vercel 은 /tmp 만 쓰기 가능, 요청 하나 동안만 사용)
+UPLOAD_SPOOL_DIR = os.environ.get('UPLOAD_SPOOL_DIR') or tempfile.gettempdir()
+
+_UPLOAD_SESSION_TABLES_ENSURED = False
+_UPLOAD_ID_RE = re.compile(r'^[0-9a-f]{32}$')
+
+
+def ensure_upload_session_tables():
+    """upload_sessions / upload_session_chunks 테이블 생성 (최초 1회)"""
+    global _UPLOAD_SESSION_TABLES_ENSURED
+    if _UPLOAD_SESSION_TABLES_ENSURED:
+        return
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        if USE_POSTGRESQL:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS upload_sessions (
+                    upload_id TEXT PRIMARY KEY,
+                    purpose TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    declared_size BIGINT DEFAULT 0,
+                    total_chunks INTEGER NOT NULL,
+                    context TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at BIGINT NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS upload_session_chunks (
+                    upload_id TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    data BYTEA,
+                    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (upload_id, chunk_index)
+                )
+            ''')
+            cursor.execute('ALTER TABLE upload_session_chunks ADD COLUMN IF NOT EXISTS data BYTEA')
+        else:
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS upload_sessions (
+                    upload_id TEXT PRIMARY KEY,
+                    purpose TEXT NOT NULL,
+                    filename TEXT NOT NULL,
+                    declared_size INTEGER DEFAULT 0,
+                    total_chunks INTEGER NOT NULL,
+                    context TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    expires_at INTEGER NOT NULL
+                )
+            ''')
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS upload_session_chunks (
+                    upload_id TEXT NOT NULL,
+                    chunk_index INTEGER NOT NULL,
+                    size INTEGER NOT NULL,
+                    data BLOB,
+                    received_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (upload_id, chunk_index)
+                )
+            ''')
+            cursor.execute('PRAGMA table_info(upload_session_chunks)')
+            if 'data' not in [c[1] for c in cursor.fetchall()]:
+                cursor.execute('ALTER TABLE upload_session_chunks ADD COLUMN data BLOB')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_upload_sessions_expires_at ON upload_sessions(expires_at)')
+        conn.commit()
+        _UPLOAD_SESSION_TABLES_ENSURED = True
+    except Exception as e:
+        try:
+            conn.rollback()
+        except Exception:
+            pass
+        print(f'[오류] upload_sessions 테이블 생성 실패: {e}')
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def purge_expired_upload_sessions(now: Optional[float] = None) -> int:
+    """
+    만료된 업로드 세션 정리 (세션 행 + 청크 데이터)
+
+    Returns:
+        정리한 세션 수
+    """
+    ensure_upload_session_tables()
+    now = time.time() if now is None else now
+    sym = '%s' if USE_POSTGRESQL else '?'
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'SELECT upload_id FROM upload_sessions WHERE expires_at < {sym}', (int(now),))
+        expired = [row[0] for row in cursor.fetchall()]
+        if expired:
+            marks = ', '.join([sym] * len(expired))
+            cursor.execute(f'DELETE FROM upload_session_chunks WHERE upload_id IN ({marks})', expired)
+            cursor.execute(f'DELETE FROM upload_sessions WHERE upload_id IN ({marks})', expired)
+            conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return len(expired)
+
+
+def create_upload_session(purpose: str, filename: str, total_chunks: int,
+                          declared_size: int = 0,
+                          context: Optional[Dict[str, Any]] = None) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
+    """
+    업로드 세션 생성
+
+    Args:
+        purpose: 세션 용도 (예: 'settlement_file', 'test_excel') - 다른 용도의 API 로는 이어받을 수 없음
+        filename: 원본 파일명
+        total_chunks: 전체 청크 수
+        declared_size: 클라이언트가 알린 크기 (base64 길이, 참고용)
+        context: 완료 처리에 필요한 부가 정보 (정산 ID 등)
+
+    Returns:
+        (success, message, session)
+    """
+    try:
+        total_chunks = int(total_chunks)
+    except (TypeError, ValueError):
+        return False, '청크 수가 올바르지 않습니다.', None
+    if total_chunks < 1 or total_chunks > UPLOAD_SESSION_MAX_CHUNKS:
+        return False, f'청크 수는 1~{UPLOAD_SESSION_MAX_CHUNKS} 사이여야 합니다.', None
+
+    try:
+        purge_expired_upload_sessions()
+    except Exception as e:
+        print(f'[경고] 만료 업로드 세션 정리 실패 (무시): {e}')
+
+    upload_id = uuid.uuid4().hex
+    expires_at = int(time.time()) + UPLOAD_SESSION_TTL_SECONDS
+
+    sym = '%s' if USE_POSTGRESQL else '?'
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''INSERT INTO upload_sessions
+                    (upload_id, purpose, filename, declared_size, total_chunks, context, expires_at)
+                VALUES ({sym}, {sym}, {sym}, {sym}, {sym}, {sym}, {sym})''',
+            (upload_id, purpose, filename, int(declared_size or 0), total_chunks,
+             json.dumps(context or {}, ensure_ascii=False), expires_at),
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    return True, '업로드 세션이 생성되었습니다.', get_upload_session(upload_id, purpose)
+
+
+def get_upload_session(upload_id: str, purpose: str) -> Optional[Dict[str, Any]]:
+    """
+    업로드 세션 조회 (만료·다른 용도 세션은 None)
+
+    Returns:
+        {upload_id, purpose, filename, declared_size, total_chunks, context,
+         expires_at, received_chunks: [index...], missing_chunks: [index...], received_bytes}
+    """
+    if not upload_id or not _UPLOAD_ID_RE.match(str(upload_id)):
+        return None
+    ensure_upload_session_tables()
+    sym = '%s' if USE_POSTGRESQL else '?'
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''SELECT upload_id, purpose, filename, declared_size, total_chunks, context, expires_at
+                FROM upload_sessions WHERE upload_id = {sym}''',
+            (upload_id,),
+        )
+        row = cursor.fetchone()
+        if not row or row[1] != purpose or int(row[6]) < time.time():
+            return None
+        # 데이터가 없는 행(이전 스풀 방식 등)은 받지 않은 청크로 본다
+        cursor.execute(
+            f'''SELECT chunk_index, size FROM upload_session_chunks
+                WHERE upload_id = {sym} AND data IS NOT NULL ORDER BY chunk_index''',
+            (upload_id,),
+        )
+        chunks = cursor.fetchall()
+    finally:
+        cursor.close()
+        conn.close()
+
+    received = [int(c[0]) for c in chunks]
+    received_set = set(received)
+    total_chunks = int(row[4])
+    return {
+        'upload_id': row[0],
+        'purpose': row[1],
+        'filename': row[2],
+        'declared_size': int(row[3] or 0),
+        'total_chunks': total_chunks,
+        'context': json.loads(row[5] or '{}'),
+        'expires_at': int(row[6]),
+        'received_chunks': received,
+        'missing_chunks': [i for i in range(total_chunks) if i not in received_set],
+        'received_bytes': sum(int(c[1]) for c in chunks),
+    }
+
+
+def upload_session_progress(session: Dict[str, Any]) -> Dict[str, Any]:
+    """클라이언트 재개용 진행 상황 (응답 JSON 에 그대로 포함)"""
+    return {
+        'upload_id': session['upload_id'],
+        'total_chunks': session['total_chunks'],
+        'received_chunks': session['received_chunks'],
+        'missing_chunks': session['missing_chunks'],
+        'received_bytes': session['received_bytes'],
+        'expires_at': session['expires_at'],
+    }
+
+
+def store_upload_chunk(session: Dict[str, Any], chunk_index: Any,
+                       chunk_data: str) -> Tuple[bool, str, Optional[Dict[str, Any]]]:
+    """
+    청크 저장 (base64 디코딩 후 DB 에 바이너리로 저장, 같은 청크 재전송은 덮어씀)
+
+    Returns:
+        (success, message, progress)
+    """
+    try:
+        chunk_index = int(chunk_index)
+    except (TypeError, ValueError):
+        return False, '청크 번호가 올바르지 않습니다.', None
+    if chunk_index < 0 or chunk_index >= session['total_chunks']:
+        return False, f"청크 번호가 범위를 벗어났습니다. (0~{session['total_chunks'] - 1})", None
+
+    try:
+        data = base64.b64decode(chunk_data, validate=True)
+    except (binascii.Error, ValueError):
+        return False, f'청크 {chunk_index + 1} 데이터가 올바른 base64 형식이 아닙니다.', None
+
+    upload_id = session['upload_id']
+    sym = '%s' if USE_POSTGRESQL else '?'
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(
+            f'''INSERT INTO upload_session_chunks (upload_id, chunk_index, size, data)
+                VALUES ({sym}, {sym}, {sym}, {sym})
+                ON CONFLICT (upload_id, chunk_index)
+                DO UPDATE SET size = excluded.size, data = excluded.data, received_at = CURRENT_TIMESTAMP''',
+            (upload_id, chunk_index, len(data), data),
+        )
+        cursor.execute(
+            f'UPDATE upload_sessions SET expires_at = {sym} WHERE upload_id = {sym}',
+            (int(time.time()) + UPLOAD_SESSION_TTL_SECONDS, upload_id),
+        )
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+
+    refreshed = get_upload_session(upload_id, session['purpose']) or session
+    return True, f'청크 {chunk_index + 1} 수신 완료', upload_session_progress(refreshed)
+
+
+@contextmanager
+def assembled_upload_file(session: Dict[str, Any]) -> Iterator[Tuple[BinaryIO, int]]:
+    """
+    수신한 청크를 순서대로 이어 붙인 임시 파일 (디스크 기반, 컨텍스트 종료 시 삭제)
+    청크는 DB 에서 한 개씩 읽으므로 메모리에는 청크 하나만 올라간다.
+
+    Yields:
+        (파일 객체 - 처음 위치로 되감긴 상태, 전체 바이트 수)
+
+    Raises:
+        ValueError: 누락된 청크가 있을 때
+    """
+    if session['missing_chunks']:
+        raise ValueError(
+            f"모든 청크를 받지 못했습니다. ({len(session['received_chunks'])}/{session['total_chunks']})"
+        )
+    upload_id = session['upload_id']
+    sym = '%s' if USE_POSTGRESQL else '?'
+    os.makedirs(UPLOAD_SPOOL_DIR, exist_ok=True)
+    with tempfile.TemporaryFile(dir=UPLOAD_SPOOL_DIR) as out:
+        conn = get_db_connection()
+        cursor = conn.cursor()
+        try:
+            for i in range(session['total_chunks']):
+                cursor.execute(
+                    f'SELECT data FROM upload_session_chunks WHERE upload_id = {sym} AND chunk_index = {sym}',
+                    (upload_id, i),
+                )
+                row = cursor.fetchone()
+                if not row or row[0] is None:
+                    raise ValueError(f'청크 {i + 1} 데이터가 없습니다. 다시 업로드해주세요.')
+                out.write(bytes(row[0]))
+        finally:
+            cursor.close()
+            conn.close()
+        size = out.tell()
+        out.seek(0)
+        yield out, size
+
+
+def delete_upload_session(upload_id: str):
+    """업로드 세션 삭제 (세션 행 + 청크 데이터)"""
+    ensure_upload_session_tables()
+    sym = '%s' if USE_POSTGRESQL else '?'
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        cursor.execute(f'DELETE FROM upload_session_chunks WHERE upload_id = {sym}', (upload_id,))
+        cursor.execute(f'DELETE FROM upload_sessions WHERE upload_id = {sym}', (upload_id,))
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
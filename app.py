@@ -191,9 +191,22 @@ except Exception as e:
 def health():
     """헬스체크 (서버리스 부팅/DB 상태 확인용)"""
     ensure_db_ready()  # DB 초기화 확인
+    from api.notifications.dispatcher import telegram_delivery_metrics
+    from api.database.leader import leadership_state, PROCESS_ID
+    cs_queue = None
+    if DB_READY:
+        try:
+            from api.cs.routes_db import get_cs_queue_metrics
+            cs_queue = get_cs_queue_metrics()
+        except Exception as e:
+            print(f"[경고] 헬스체크 C/S 큐 지표 조회 실패: {e}")
     return jsonify({
         'success': True,
-        'db_ready': DB_READY
+        'db_ready': DB_READY,
+        'process': PROCESS_ID,
+        'schedulers': leadership_state(),
+        'telegram': telegram_delivery_metrics(),
+        'cs_queue': cs_queue
     })
 
 
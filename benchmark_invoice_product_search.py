@@ -0,0 +1,102 @@
+"""
+거래명세서 상품 검색 벤치마크 스크립트
+
+합성 상품 카탈로그(기본 5만 SKU)로 검색 경로별 응답 시간을 비교한다.
+- scan: 기존 방식과 같은 전체 부분 문자열 비교 (LIKE '%검색어%' 순차 스캔에 해당)
+- index: 프로세스 n-gram 인덱스 (ProductSearchIndex)
+- sqlite like / sqlite fts5: 임시 SQLite DB 에서 LIKE 와 FTS5 trigram 테이블 비교
+
+사용법:
+    python benchmark_invoice_product_search.py [상품 수]
+"""
+import sys
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.invoice.product_search import ProductSearchIndex, rank_product
+from api.invoice.models import ensure_product_fts_sqlite
+
+WORDS = ['유기농', '프리미엄', '국산', '무농약', '제주', '햇', '냉동', '건조', '선물세트', '대용량',
+         '사과', '배', '감귤', '한라봉', '고구마', '감자', '양파', '마늘', '당근', '토마토',
+         '딸기', '블루베리', '견과', '아몬드', '호두', '멸치', '김', '미역', '쌀', '현미']
+QUERIES = ['사', '한라', '제주 감', 'SKU-0123', 'sku-4', '선물세트', '블루베리 1kg', '없는상품']
+
+
+def make_products(count, seed=7):
+    rnd = random.Random(seed)
+    products = []
+    for i in range(count):
+        name = ' '.join(rnd.sample(WORDS, 3)) + f' {rnd.choice([500, 1, 2, 3, 5, 10])}{rnd.choice(["g", "kg", "개입"])}'
+        products.append({
+            'id': i + 1,
+            'product_code': f'SKU-{i:05d}',
+            'product_name': name,
+            'memo': rnd.choice(['', '', '냉장 보관', '산지 직송', '행사 상품']),
+            'is_active': 0 if i % 20 == 0 else 1,
+        })
+    return products
+
+
+def scan_search(products, query, limit):
+    q = query.lower()
+    hits = []
+    for p in products:
+        if p['is_active'] == 0:
+            continue
+        rank = rank_product(q, p['product_code'].lower(), p['product_name'].lower(), (p['memo'] or '').lower())
+        if rank is not None:
+            hits.append((rank, p['product_code'], p))
+    hits.sort(key=lambda h: (h[0], h[1]))
+    return [h[2] for h in hits[:limit]]
+
+
+def timed(fn, repeat=20):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = fn()
+    return (time.perf_counter() - started) * 1000 / repeat, result
+
+
+def run(count=50_000, limit=50):
+    products = make_products(count)
+    started = time.perf_counter()
+    index = ProductSearchIndex(products)
+    print(f'상품 {count:,}건, 인덱스 생성 {(time.perf_counter() - started) * 1000:.0f}ms')
+
+    db_path = os.path.join(tempfile.mkdtemp(), 'products.db')
+    conn = sqlite3.connect(db_path)
+    cur = conn.cursor()
+    cur.execute('''CREATE TABLE invoice_products (
+        id INTEGER PRIMARY KEY, product_code TEXT, product_name TEXT, memo TEXT, is_active INTEGER)''')
+    ensure_product_fts_sqlite(cur)
+    cur.executemany('INSERT INTO invoice_products VALUES (?, ?, ?, ?, ?)',
+                    [(p['id'], p['product_code'], p['product_name'], p['memo'], p['is_active']) for p in products])
+    conn.commit()
+
+    print(f"{'검색어':<14}{'scan ms':>10}{'index ms':>10}{'like ms':>10}{'fts5 ms':>10}  결과(일치)")
+    for query in QUERIES:
+        scan_ms, expected = timed(lambda: scan_search(products, query, limit), repeat=5)
+        index_ms, got = timed(lambda: index.search(query, limit=limit))
+        p = f'%{query}%'
+        like_ms, _ = timed(lambda: cur.execute(
+            'SELECT id FROM invoice_products WHERE (product_code LIKE ? OR product_name LIKE ? OR memo LIKE ?) '
+            'AND is_active = 1 LIMIT ?', (p, p, p, limit)).fetchall(), repeat=5)
+        fts = '-'
+        if len(query) >= 3:
+            fts_ms, _ = timed(lambda: cur.execute(
+                'SELECT rowid FROM invoice_products_fts WHERE invoice_products_fts MATCH ? LIMIT ?',
+                ('"' + query.replace('"', '""') + '"', limit)).fetchall(), repeat=5)
+            fts = f'{fts_ms:.2f}'
+        same = [x['id'] for x in got] == [x['id'] for x in expected]
+        print(f'{query:<14}{scan_ms:>10.2f}{index_ms:>10.2f}{like_ms:>10.2f}{fts:>10}  {len(got)}({same})')
+    conn.close()
+
+
+if __name__ == '__main__':
+    run(int(sys.argv[1]) if len(sys.argv) > 1 else 50_000)
@@ -0,0 +1,54 @@
+"""
+매출 통계 큐브 재집계 벤치마크 스크립트
+
+합성 정산 행(1만 / 10만 / 100만 건)으로 aggregate_cube_rows 의
+dict 루프 경로와 NumPy 경로(설치된 경우)의 소요 시간을 비교한다.
+
+사용법:
+    python benchmark_sales_analytics_cube.py [행 수 ...]
+"""
+import sys
+import os
+import random
+import time
+
+# 프로젝트 루트를 Python 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.sales_settlement.analytics_cube import aggregate_cube_rows, np
+
+STATUSES = ('대기', '전달', '정산확인', '입금완료', None)
+
+
+def make_rows(count, companies=300, seed=42):
+    """합성 정산 행 (정산년월, 화주사명, 상태, 총액)"""
+    rnd = random.Random(seed)
+    names = [f'화주사 {i:03d}' for i in range(companies)] + ['']
+    months = [f'{y}-{m:02d}' for y in range(2020, 2026) for m in range(1, 13)]
+    return [
+        (rnd.choice(months), rnd.choice(names), rnd.choice(STATUSES), rnd.randint(0, 5_000_000))
+        for _ in range(count)
+    ]
+
+
+def run(counts):
+    print(f"NumPy: {'사용 가능 ' + np.__version__ if np is not None else '미설치 (dict 루프만 측정)'}")
+    for count in counts:
+        rows = make_rows(count)
+        timings = {}
+        results = {}
+        for label, use_numpy in (('python', False), ('numpy', True)):
+            if use_numpy and np is None:
+                continue
+            started = time.perf_counter()
+            results[label] = aggregate_cube_rows(rows, use_numpy=use_numpy)
+            timings[label] = (time.perf_counter() - started) * 1000
+        line = f'{count:>9,}행  셀 {len(results["python"]):>6,}개  python {timings["python"]:>9.1f}ms'
+        if 'numpy' in timings:
+            same = {k: v[:2] for k, v in results['numpy'].items()} == {k: v[:2] for k, v in results['python'].items()}
+            line += f'  numpy {timings["numpy"]:>9.1f}ms  (결과 일치: {same})'
+        print(line)
+
+
+if __name__ == '__main__':
+    run([int(a) for a in sys.argv[1:]] or [10_000, 100_000, 1_000_000])
@@ -0,0 +1,120 @@
+"""
+거래명세서 번호 채번 동시성 테스트
+여러 스레드가 각자 연결로 명세서를 동시에 등록해도 번호가 중복·누락 없이 이어지는지 확인
+
+사용법:
+    python test_invoice_statement_numbering.py [작성자 수] [작성자당 건수]
+"""
+import sys
+import os
+import threading
+from datetime import datetime
+
+# 프로젝트 루트를 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.database.models import get_db_connection, USE_POSTGRESQL
+from api.invoice.models import init_invoice_tables, allocate_statement_numbers
+
+sym = '%s' if USE_POSTGRESQL else '?'
+TEST_CUSTOMER = '채번 동시성 테스트 거래처'
+TEST_YEAR = '2099'  # 실제 데이터와 겹치지 않는 연도
+
+
+def _setup():
+    init_invoice_tables()
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        _cleanup(cursor)
+        if USE_POSTGRESQL:
+            cursor.execute(f'INSERT INTO invoice_customers (customer_name) VALUES ({sym}) RETURNING id', (TEST_CUSTOMER,))
+            customer_id = cursor.fetchone()[0]
+        else:
+            cursor.execute(f'INSERT INTO invoice_customers (customer_name) VALUES ({sym})', (TEST_CUSTOMER,))
+            customer_id = cursor.lastrowid
+        conn.commit()
+        return customer_id
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def _cleanup(cursor):
+    cursor.execute(f"DELETE FROM invoice_statements WHERE statement_no LIKE {sym}", (f'INV-{TEST_YEAR}-%',))
+    cursor.execute(f'DELETE FROM invoice_statement_sequences WHERE year = {sym}', (TEST_YEAR,))
+    cursor.execute(f'DELETE FROM invoice_customers WHERE customer_name = {sym}', (TEST_CUSTOMER,))
+
+
+def _create(customer_id, batch_size, rollback=False):
+    """명세서 batch_size 건을 한 트랜잭션으로 등록 (rollback=True 면 커밋하지 않음)"""
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        numbers = allocate_statement_numbers(cursor, batch_size, year=TEST_YEAR)
+        for no in numbers:
+            cursor.execute(
+                f'''INSERT INTO invoice_statements (statement_no, statement_date, customer_id, total_amount, grand_total)
+                    VALUES ({sym}, {sym}, {sym}, 0, 0)''',
+                (no, datetime.now().strftime('%Y-%m-%d'), customer_id),
+            )
+        if rollback:
+            conn.rollback()
+            return []
+        conn.commit()
+        return numbers
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        cursor.close()
+        conn.close()
+
+
+def run(workers=8, per_worker=10):
+    customer_id = _setup()
+    results, errors = [], []
+    lock = threading.Lock()
+
+    def worker(index):
+        for i in range(per_worker):
+            # 일부는 일괄(3건) 예약, 일부는 롤백해 번호가 비지 않는지 확인
+            batch = 3 if i % 4 == 0 else 1
+            rollback = (index + i) % 7 == 0
+            try:
+                numbers = _create(customer_id, batch, rollback=rollback)
+                with lock:
+                    results.extend(numbers)
+            except Exception as e:
+                with lock:
+                    errors.append(str(e))
+
+    threads = [threading.Thread(target=worker, args=(n,)) for n in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    numbers = sorted(int(no.rsplit('-', 1)[1]) for no in results)
+    expected = list(range(1, len(numbers) + 1))
+    print(f'작성자 {workers}명 x {per_worker}회, 등록 {len(numbers)}건, 오류 {len(errors)}건')
+    print(f"중복 없음: {'✅' if len(set(numbers)) == len(numbers) else '❌'}")
+    print(f"누락 없음(1..{len(numbers)}): {'✅' if numbers == expected else '❌'}")
+    for e in errors[:5]:
+        print(f'   오류: {e}')
+
+    conn = get_db_connection()
+    cursor = conn.cursor()
+    try:
+        _cleanup(cursor)
+        conn.commit()
+    finally:
+        cursor.close()
+        conn.close()
+    return not errors and numbers == expected
+
+
+if __name__ == '__main__':
+    args = [int(a) for a in sys.argv[1:3]]
+    ok = run(*args)
+    sys.exit(0 if ok else 1)
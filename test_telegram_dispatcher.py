@@ -0,0 +1,106 @@
+"""
+텔레그램 디스패처 테스트 (로컬 스텁 HTTP 서버 사용, 실제 텔레그램으로 전송하지 않음)
+- 429(retry_after)/500 응답 후 재시도해 전송되는지
+- 큐에 넣은 같은 채팅방 메시지가 한 요청으로 합쳐지는지 (4096자 한도 유지)
+- 토큰 버킷 속도 제한과 전송 지표
+
+사용법:
+    python test_telegram_dispatcher.py
+"""
+import sys
+import os
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# 프로젝트 루트를 경로에 추가
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from api.notifications.dispatcher import TelegramDispatcher, TELEGRAM_MESSAGE_LIMIT
+
+
+class StubTelegram(BaseHTTPRequestHandler):
+    """sendMessage 스텁 - 미리 정한 상태코드를 차례로 응답하고 받은 본문을 기록"""
+    responses = []
+    received = []
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        status = StubTelegram.responses.pop(0) if StubTelegram.responses else 200
+        StubTelegram.received.append((status, body.get('text', '')))
+        if status == 200:
+            payload = {'ok': True, 'result': {'message_id': len(StubTelegram.received)}}
+        elif status == 429:
+            payload = {'ok': False, 'error_code': 429, 'parameters': {'retry_after': 1}}
+        else:
+            payload = {'ok': False, 'error_code': status, 'description': 'stub error'}
+        data = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, *args):
+        pass
+
+
+def _check(label, ok):
+    print(f"{'✅' if ok else '❌'} {label}")
+    return ok
+
+
+def run():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), StubTelegram)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    api_base = f'http://127.0.0.1:{server.server_address[1]}'
+    results = []
+
+    # 1. 429 → 500 → 200 재시도
+    d = TelegramDispatcher('TEST', name='test', api_base=api_base, rate=20, burst=5, coalesce_window=0.3)
+    StubTelegram.responses[:] = [429, 500]
+    started = time.perf_counter()
+    ok = d.send('100', '재시도 테스트')
+    elapsed = time.perf_counter() - started
+    results.append(_check(f'429/500 후 전송 성공 ({elapsed:.1f}초, retry_after 1초 준수)', ok and elapsed >= 1.0))
+    results.append(_check('요청 3회(재시도 2회)', len(StubTelegram.received) == 3 and d.metrics()['retries'] == 2))
+
+    # 2. 400 은 재시도하지 않음
+    StubTelegram.received.clear()
+    StubTelegram.responses[:] = [400]
+    results.append(_check('400 은 바로 실패', not d.send('100', '잘못된 요청') and len(StubTelegram.received) == 1))
+
+    # 3. 큐 병합: 같은 채팅방 20건 → 한 요청, 다른 채팅방은 따로
+    StubTelegram.received.clear()
+    for i in range(20):
+        d.enqueue('100', f'알림 #{i}')
+    d.enqueue('200', '다른 채팅방')
+    d.flush(10)
+    texts = [t for _, t in StubTelegram.received]
+    results.append(_check(f'21건 → 요청 {len(texts)}회', len(texts) == 2 and all(f'알림 #{i}' in texts[0] for i in range(20))))
+
+    # 4. 4096자 한도: 긴 메시지 여러 건은 한도 안에서 나눠 합침
+    StubTelegram.received.clear()
+    for i in range(5):
+        d.enqueue('100', f'{i}' * 1500)
+    d.enqueue('100', 'x' * 5000)
+    d.flush(10)
+    sizes = [len(t) for _, t in StubTelegram.received]
+    results.append(_check(f'한도 유지 (요청 크기 {sizes})', sizes and max(sizes) <= TELEGRAM_MESSAGE_LIMIT))
+
+    # 5. 속도 제한: 초당 5건, 연속 1건 → 6건에 약 1초
+    limited = TelegramDispatcher('TEST', name='limited', api_base=api_base, rate=5, burst=1)
+    started = time.perf_counter()
+    for i in range(6):
+        limited.send('100', f'속도 제한 #{i}')
+    elapsed = time.perf_counter() - started
+    results.append(_check(f'속도 제한 6건 {elapsed:.2f}초 (>= 0.95초)', elapsed >= 0.95))
+
+    print('지표:', json.dumps(d.metrics(), ensure_ascii=False))
+    server.shutdown()
+    return all(results)
+
+
+if __name__ == '__main__':
+    sys.exit(0 if run() else 1)